@@ -1,18 +1,15 @@
 import { auth } from '@/lib/auth'
-import { db } from '@/lib/db'
-import {
-  users,
-  submissions,
-  assignments,
-  feedbackDrafts,
-  masteryRecords,
-  lessonPlans,
-  rubrics,
-} from '@/lib/db/schema'
-import { eq, sql, desc } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
+import {
+  getRollupCounters,
+  getSubjectRollups,
+  getTopTeacherRollups,
+  countersWithPrefix,
+  rollupMetrics,
+} from '@/lib/analytics-rollups'
+import { withQueryStats } from '@/lib/db/query-stats'
 
-export async function GET() {
+export const GET = withQueryStats('GET /api/admin/analytics', async function GET() {
   try {
     const session = await auth()
     if (!session?.user) {
@@ -26,121 +23,50 @@ export async function GET() {
       return NextResponse.json({ error: 'Forbidden' }, { status: 403 })
     }
 
-    // Standards mastery distribution
-    const masteryDistribution = await db
-      .select({
-        level: masteryRecords.level,
-        count: sql<number>`count(*)`,
-      })
-      .from(masteryRecords)
-      .groupBy(masteryRecords.level)
+    // Everything below reads the incrementally maintained analytics rollups
+    const counters = await getRollupCounters()
+    const subjectRollups = await getSubjectRollups()
+    const topTeachers = await getTopTeacherRollups(10)
+    const count = (metric: string) => counters[metric] ?? 0
 
-    // Average scores by subject
-    const subjectScores = await db
-      .select({
-        subject: assignments.subject,
-        avgScore: sql<number>`avg(case when ${submissions.totalScore} is not null and ${submissions.maxScore} is not null and ${submissions.maxScore} > 0 then (${submissions.totalScore}::float / ${submissions.maxScore}::float) * 100 else null end)`,
-        submissionCount: sql<number>`count(${submissions.id})`,
-      })
-      .from(assignments)
-      .innerJoin(submissions, eq(submissions.assignmentId, assignments.id))
-      .groupBy(assignments.subject)
-
-    // Grading completion rates
-    const [totalSubmissions] = await db
-      .select({ count: sql<number>`count(*)` })
-      .from(submissions)
+    const masteryDistribution = Object.entries(
+      countersWithPrefix(counters, 'mastery:')
+    ).map(([level, levelCount]) => ({ level, count: levelCount }))
 
-    const [gradedSubmissions] = await db
-      .select({ count: sql<number>`count(*)` })
-      .from(submissions)
-      .where(
-        sql`${submissions.status} in ('graded', 'returned')`
-      )
+    const subjectScores = subjectRollups
+      .filter((s) => s.submissions > 0)
+      .map((s) => ({
+        subject: s.subject,
+        avgScore:
+          s.scoredSubmissions > 0
+            ? Math.round((s.scorePercentSum / s.scoredSubmissions) * 100) / 100
+            : null,
+        submissionCount: s.submissions,
+      }))
 
-    const total = Number(totalSubmissions.count)
-    const graded = Number(gradedSubmissions.count)
+    // Grading completion rates
+    const total = count(rollupMetrics.submissions)
+    const graded = count(rollupMetrics.gradedSubmissions)
     const gradingCompletionRate =
       total > 0 ? Math.round((graded / total) * 10000) / 100 : 0
 
-    // Teacher engagement: top teachers by activity
-    const teacherEngagement = await db
-      .select({
-        teacherId: assignments.teacherId,
-        teacherName: users.name,
-        teacherEmail: users.email,
-        assignmentCount: sql<number>`count(distinct ${assignments.id})`,
-        submissionCount: sql<number>`count(${submissions.id})`,
-        gradedCount: sql<number>`count(*) filter (where ${submissions.status} in ('graded', 'returned'))`,
-        feedbackCount: sql<number>`count(${feedbackDrafts.id})`,
-      })
-      .from(assignments)
-      .innerJoin(users, eq(assignments.teacherId, users.id))
-      .leftJoin(submissions, eq(submissions.assignmentId, assignments.id))
-      .leftJoin(
-        feedbackDrafts,
-        eq(feedbackDrafts.submissionId, submissions.id)
-      )
-      .groupBy(assignments.teacherId, users.name, users.email)
-      .orderBy(desc(sql`count(distinct ${assignments.id})`))
-      .limit(10)
-
-    // Aggregate teacher engagement counts
-    const [teachersWithAssignments] = await db
-      .select({
-        count: sql<number>`count(distinct ${assignments.teacherId})`,
-      })
-      .from(assignments)
-
-    const [teachersWithLessonPlans] = await db
-      .select({
-        count: sql<number>`count(distinct ${lessonPlans.teacherId})`,
-      })
-      .from(lessonPlans)
-
-    const [teachersWithRubrics] = await db
-      .select({
-        count: sql<number>`count(distinct ${rubrics.teacherId})`,
-      })
-      .from(rubrics)
-
-    const [teachersWithFeedback] = await db
-      .select({
-        count: sql<number>`count(distinct ${feedbackDrafts.teacherId})`,
-      })
-      .from(feedbackDrafts)
-
-    const [totalTeachers] = await db
-      .select({ count: sql<number>`count(*)` })
-      .from(users)
-      .where(
-        sql`${users.role} in ('teacher', 'sped_teacher')`
-      )
-
     return NextResponse.json({
-      masteryDistribution: masteryDistribution.map((m) => ({
-        level: m.level,
-        count: Number(m.count),
-      })),
-      subjectScores: subjectScores.map((s) => ({
-        subject: s.subject,
-        avgScore: s.avgScore
-          ? Math.round(Number(s.avgScore) * 100) / 100
-          : null,
-        submissionCount: Number(s.submissionCount),
-      })),
+      masteryDistribution,
+      subjectScores,
       gradingCompletion: {
         total,
         graded,
         completionRate: gradingCompletionRate,
       },
       teacherEngagement: {
-        totalTeachers: Number(totalTeachers.count),
-        withAssignments: Number(teachersWithAssignments.count),
-        withLessonPlans: Number(teachersWithLessonPlans.count),
-        withRubrics: Number(teachersWithRubrics.count),
-        withFeedbackDrafts: Number(teachersWithFeedback.count),
-        topTeachers: teacherEngagement.map((t) => ({
+        totalTeachers:
+          count(rollupMetrics.users('teacher')) +
+          count(rollupMetrics.users('sped_teacher')),
+        withAssignments: count(rollupMetrics.teachersWith('assignments')),
+        withLessonPlans: count(rollupMetrics.teachersWith('lessonPlans')),
+        withRubrics: count(rollupMetrics.teachersWith('rubrics')),
+        withFeedbackDrafts: count(rollupMetrics.teachersWith('feedbackDrafts')),
+        topTeachers: topTeachers.map((t) => ({
           teacherId: t.teacherId,
           teacherName: t.teacherName,
           teacherEmail: t.teacherEmail,
@@ -158,4 +84,4 @@ export async function GET() {
       { status: 500 }
     )
   }
-}
+})
@@ -1,16 +1,13 @@
 import { auth } from '@/lib/auth'
-import { db } from '@/lib/db'
-import {
-  users,
-  schools,
-  classes,
-  assignments,
-  submissions,
-} from '@/lib/db/schema'
-import { eq, sql, and, gte } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
+import {
+  getRollupCounters,
+  getRecentDailyTotals,
+  rollupMetrics,
+} from '@/lib/analytics-rollups'
+import { withQueryStats } from '@/lib/db/query-stats'
 
-export async function GET() {
+export const GET = withQueryStats('GET /api/admin/overview', async function GET() {
   try {
     const session = await auth()
     if (!session?.user) {
@@ -24,79 +21,28 @@ export async function GET() {
       return NextResponse.json({ error: 'Forbidden' }, { status: 403 })
     }
 
-    const [schoolCount] = await db
-      .select({ count: sql<number>`count(*)` })
-      .from(schools)
-
-    const [teacherCount] = await db
-      .select({ count: sql<number>`count(*)` })
-      .from(users)
-      .where(eq(users.role, 'teacher'))
-
-    const [spedTeacherCount] = await db
-      .select({ count: sql<number>`count(*)` })
-      .from(users)
-      .where(eq(users.role, 'sped_teacher'))
-
-    const [studentCount] = await db
-      .select({ count: sql<number>`count(*)` })
-      .from(users)
-      .where(eq(users.role, 'student'))
-
-    const [classCount] = await db
-      .select({ count: sql<number>`count(*)` })
-      .from(classes)
-
-    const [assignmentCount] = await db
-      .select({ count: sql<number>`count(*)` })
-      .from(assignments)
-
-    const [submissionCount] = await db
-      .select({ count: sql<number>`count(*)` })
-      .from(submissions)
-
-    // Recent activity: assignments created this week
-    const oneWeekAgo = new Date()
-    oneWeekAgo.setDate(oneWeekAgo.getDate() - 7)
-
-    const [recentAssignments] = await db
-      .select({ count: sql<number>`count(*)` })
-      .from(assignments)
-      .where(gte(assignments.createdAt, oneWeekAgo))
-
-    // Submissions graded this week
-    const [recentGraded] = await db
-      .select({ count: sql<number>`count(*)` })
-      .from(submissions)
-      .where(
-        and(
-          eq(submissions.status, 'graded'),
-          gte(submissions.gradedAt, oneWeekAgo)
-        )
-      )
-
-    // Grading pipeline: total ungraded submissions
-    const [ungradedCount] = await db
-      .select({ count: sql<number>`count(*)` })
-      .from(submissions)
-      .where(eq(submissions.status, 'submitted'))
+    // Totals come from the incrementally maintained analytics rollups
+    const counters = await getRollupCounters()
+    const thisWeek = await getRecentDailyTotals(7)
+    const count = (metric: string) => counters[metric] ?? 0
 
     return NextResponse.json({
       totals: {
-        schools: Number(schoolCount.count),
+        schools: count(rollupMetrics.schools),
         teachers:
-          Number(teacherCount.count) + Number(spedTeacherCount.count),
-        students: Number(studentCount.count),
-        classes: Number(classCount.count),
-        assignments: Number(assignmentCount.count),
-        submissions: Number(submissionCount.count),
+          count(rollupMetrics.users('teacher')) +
+          count(rollupMetrics.users('sped_teacher')),
+        students: count(rollupMetrics.users('student')),
+        classes: count(rollupMetrics.classes),
+        assignments: count(rollupMetrics.assignments),
+        submissions: count(rollupMetrics.submissions),
       },
       recentActivity: {
-        assignmentsCreatedThisWeek: Number(recentAssignments.count),
-        submissionsGradedThisWeek: Number(recentGraded.count),
+        assignmentsCreatedThisWeek: thisWeek.assignmentsCreated,
+        submissionsGradedThisWeek: thisWeek.submissionsGraded,
       },
       gradingPipeline: {
-        ungradedSubmissions: Number(ungradedCount.count),
+        ungradedSubmissions: count(rollupMetrics.ungradedSubmissions),
       },
     })
   } catch (error) {
@@ -106,4 +52,4 @@ export async function GET() {
       { status: 500 }
     )
   }
-}
+})
@@ -5,11 +5,10 @@ import {
   districts,
   classes,
   classMembers,
-  assignments,
-  submissions,
 } from '@/lib/db/schema'
 import { eq, sql, and, inArray } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
+import { getSchoolRollups } from '@/lib/analytics-rollups'
 
 export async function GET() {
   const session = await auth()
@@ -32,6 +31,11 @@ export async function GET() {
     .from(schools)
     .leftJoin(districts, eq(schools.districtId, districts.id))
 
+  // Assignment counts and average scores come from the analytics rollups
+  const rollupsBySchool = new Map(
+    (await getSchoolRollups()).map((r) => [r.schoolId, r])
+  )
+
   const schoolData = await Promise.all(
     allSchools.map(async (school) => {
       // Classes in this school
@@ -69,27 +73,12 @@ export async function GET() {
         studentCount = Number(students.count)
       }
 
-      // Assignment count
-      let assignmentCount = 0
-      let avgScore: number | null = null
-      if (classIds.length > 0) {
-        const [aCount] = await db
-          .select({ count: sql<number>`count(*)` })
-          .from(assignments)
-          .where(inArray(assignments.classId, classIds))
-        assignmentCount = Number(aCount.count)
-
-        const [scoreResult] = await db
-          .select({
-            avgScore: sql<number>`avg(case when ${submissions.totalScore} is not null and ${submissions.maxScore} is not null and ${submissions.maxScore} > 0 then (${submissions.totalScore}::float / ${submissions.maxScore}::float) * 100 else null end)`,
-          })
-          .from(submissions)
-          .innerJoin(assignments, eq(submissions.assignmentId, assignments.id))
-          .where(inArray(assignments.classId, classIds))
-        avgScore = scoreResult.avgScore
-          ? Math.round(Number(scoreResult.avgScore) * 100) / 100
+      const rollup = rollupsBySchool.get(school.id)
+      const assignmentCount = rollup?.assignments ?? 0
+      const avgScore =
+        rollup && rollup.scoredSubmissions > 0
+          ? Math.round((rollup.scorePercentSum / rollup.scoredSubmissions) * 100) / 100
           : null
-      }
 
       return {
         id: school.id,
@@ -0,0 +1,28 @@
+import { auth } from '@/lib/auth'
+import { NextResponse } from 'next/server'
+import { getCacheStats } from '@/lib/cache'
+import { getMemoizationStats } from '@/lib/ai/memoize'
+import { getQueryStats } from '@/lib/db/query-stats'
+
+// Operational statistics for this server process. Kept off the public health
+// check because they include recent SQL text and per-route traffic.
+export async function GET() {
+  const session = await auth()
+  if (!session?.user) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
+  }
+
+  if (
+    session.user.role !== 'admin' &&
+    session.user.role !== 'district_admin'
+  ) {
+    return NextResponse.json({ error: 'Forbidden' }, { status: 403 })
+  }
+
+  return NextResponse.json({
+    timestamp: new Date().toISOString(),
+    cache: getCacheStats(),
+    aiMemoization: getMemoizationStats(),
+    queries: getQueryStats(),
+  })
+}
@@ -9,6 +9,8 @@ import {
 } from '@/lib/db/schema'
 import { eq, and } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
+import { recordAssignmentChange } from '@/lib/analytics-rollups'
+import { markClassRiskScoresStale } from '@/lib/early-warning'
 
 export async function GET(
   _req: Request,
@@ -174,6 +176,8 @@ export async function DELETE(
     .where(eq(differentiatedVersions.assignmentId, id))
 
   await db.delete(assignments).where(eq(assignments.id, id))
+  await recordAssignmentChange(existing, -1)
+  await markClassRiskScoresStale(existing.classId)
 
   return NextResponse.json({ success: true })
 }
@@ -10,6 +10,8 @@ import {
 import { eq, and } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
 import { anthropic, AI_MODEL } from '@/lib/ai'
+import { RollupBatch, recordAssignmentChange } from '@/lib/analytics-rollups'
+import { markClassRiskScoresStale } from '@/lib/early-warning'
 
 export async function POST(req: Request) {
   const session = await auth()
@@ -274,6 +276,9 @@ Make the assignment engaging, age-appropriate, and pedagogically sound. Ensure a
       })
       .returning()
 
+    await recordAssignmentChange(createdAssignment, 1, new RollupBatch().rubric(session.user.id))
+    await markClassRiskScoresStale(createdAssignment.classId)
+
     // 4. Create differentiated versions (with null safety for truncated AI responses)
     const dv = generated.differentiatedVersions
     const versionEntries = [
@@ -3,8 +3,11 @@ import { db } from '@/lib/db'
 import { assignments, classes, classMembers, rubrics } from '@/lib/db/schema'
 import { eq, desc, and } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
+import { recordAssignmentChange } from '@/lib/analytics-rollups'
+import { markClassRiskScoresStale } from '@/lib/early-warning'
+import { withQueryStats } from '@/lib/db/query-stats'
 
-export async function GET() {
+export const GET = withQueryStats('GET /api/assignments', async function GET() {
   const session = await auth()
   if (!session?.user) {
     return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
@@ -23,7 +26,7 @@ export async function GET() {
     .orderBy(desc(assignments.createdAt))
 
   return NextResponse.json(results)
-}
+})
 
 export async function POST(req: Request) {
   const session = await auth()
@@ -93,6 +96,9 @@ export async function POST(req: Request) {
       })
       .returning()
 
+    await recordAssignmentChange(created, 1)
+    await markClassRiskScoresStale(created.classId)
+
     return NextResponse.json(created, { status: 201 })
   } catch (error) {
     console.error('Failed to create assignment:', error)
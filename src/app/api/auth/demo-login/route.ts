@@ -1,6 +1,6 @@
 import { NextRequest, NextResponse } from 'next/server'
 import { DEMO_ENTRY_EMAILS } from '@/lib/demo-constants'
-import { cloneDemoData, cleanupExpiredDemoSessions } from '@/lib/demo-clone'
+import { cloneDemoData, scheduleDemoMaintenance } from '@/lib/demo-clone'
 
 export async function POST(req: NextRequest) {
   try {
@@ -13,11 +13,11 @@ export async function POST(req: NextRequest) {
       )
     }
 
-    // Fire-and-forget cleanup of expired sessions
-    cleanupExpiredDemoSessions().catch(console.error)
-
     const result = await cloneDemoData(email)
 
+    // Refill the sandbox pool and remove expired sandboxes off the request path
+    scheduleDemoMaintenance()
+
     return NextResponse.json({ email: result.email })
   } catch (error) {
     console.error('Demo login failed:', error)
@@ -3,6 +3,7 @@ import { users } from '@/lib/db/schema'
 import { eq } from 'drizzle-orm'
 import bcrypt from 'bcryptjs'
 import { NextResponse } from 'next/server'
+import { RollupBatch, recordRollups } from '@/lib/analytics-rollups'
 
 export async function POST(req: Request) {
   try {
@@ -42,6 +43,8 @@ export async function POST(req: Request) {
       role: 'teacher',
     }).returning()
 
+    await recordRollups(new RollupBatch().user(user.role))
+
     return NextResponse.json({
       id: user.id,
       name: user.name,
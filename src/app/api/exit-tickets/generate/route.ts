@@ -17,7 +17,7 @@ export async function POST(req: Request) {
   }
 
   try {
-    const { topic, gradeLevel, subject, numberOfQuestions, lessonContext } =
+    const { topic, gradeLevel, subject, numberOfQuestions, lessonContext, regenerate } =
       await req.json()
 
     if (!topic || !gradeLevel || !subject) {
@@ -35,7 +35,7 @@ export async function POST(req: Request) {
       subject,
       numberOfQuestions: clampedCount,
       lessonContext,
-    })
+    }, { fresh: regenerate === true })
 
     return NextResponse.json(exitTicket)
   } catch (error) {
@@ -13,6 +13,8 @@ import { eq, and } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
 import { gradeSubmission } from '@/lib/ai/grade-submission'
 import { buildRubricInput } from '@/lib/grading-helpers'
+import { recordSubmissionChanges } from '@/lib/analytics-rollups'
+import { markRiskScoresStale } from '@/lib/early-warning'
 
 export async function GET(
   _req: Request,
@@ -170,7 +172,12 @@ export async function PUT(
       .select({
         id: submissions.id,
         assignmentId: submissions.assignmentId,
+        studentId: submissions.studentId,
         content: submissions.content,
+        status: submissions.status,
+        totalScore: submissions.totalScore,
+        maxScore: submissions.maxScore,
+        gradedAt: submissions.gradedAt,
         teacherId: assignments.teacherId,
         rubricId: assignments.rubricId,
         assignmentTitle: assignments.title,
@@ -229,6 +236,11 @@ export async function PUT(
         .set({ status: 'returned' })
         .where(eq(submissions.id, submissionId))
 
+      await recordSubmissionChanges([
+        { submissionId, before: submission, after: { ...submission, status: 'returned' } },
+      ])
+      await markRiskScoresStale([submission.studentId])
+
       return NextResponse.json({
         status: 'approved',
         finalFeedback: approved,
@@ -358,6 +370,20 @@ export async function PUT(
         })
         .where(eq(submissions.id, submissionId))
 
+      await recordSubmissionChanges([
+        {
+          submissionId,
+          before: submission,
+          after: {
+            ...submission,
+            status: 'graded',
+            totalScore: gradingResult.totalScore,
+            maxScore: gradingResult.maxScore,
+          },
+        },
+      ])
+      await markRiskScoresStale([submission.studentId])
+
       return NextResponse.json({
         status: 'regenerated',
         totalScore: gradingResult.totalScore,
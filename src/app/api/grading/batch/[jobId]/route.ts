@@ -0,0 +1,34 @@
+import { auth } from '@/lib/auth'
+import { NextResponse } from 'next/server'
+import { getGradingJobProgress } from '@/lib/grading-jobs'
+
+export async function GET(
+  _req: Request,
+  { params }: { params: Promise<{ jobId: string }> }
+) {
+  const session = await auth()
+  if (!session?.user) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
+  }
+
+  const { jobId } = await params
+
+  try {
+    const progress = await getGradingJobProgress(jobId, session.user.id)
+
+    if (!progress) {
+      return NextResponse.json(
+        { error: 'Grading job not found' },
+        { status: 404 }
+      )
+    }
+
+    return NextResponse.json(progress)
+  } catch (error) {
+    console.error('Failed to fetch grading job progress:', error)
+    return NextResponse.json(
+      { error: 'Failed to fetch grading job progress' },
+      { status: 500 }
+    )
+  }
+}
@@ -4,12 +4,10 @@ import {
   submissions,
   assignments,
   rubrics,
-  rubricCriteria,
 } from '@/lib/db/schema'
 import { eq, and } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
-import { batchGradeSubmissions } from '@/lib/ai/grade-submission'
-import { buildRubricInput, persistGradingResult } from '@/lib/grading-helpers'
+import { createGradingJob, startGradingJob } from '@/lib/grading-jobs'
 
 export async function POST(req: Request) {
   const session = await auth()
@@ -54,9 +52,8 @@ export async function POST(req: Request) {
       )
     }
 
-    // Fetch the rubric and criteria
     const [rubric] = await db
-      .select()
+      .select({ id: rubrics.id })
       .from(rubrics)
       .where(eq(rubrics.id, assignment.rubricId))
       .limit(1)
@@ -68,14 +65,9 @@ export async function POST(req: Request) {
       )
     }
 
-    const criteria = await db
-      .select()
-      .from(rubricCriteria)
-      .where(eq(rubricCriteria.rubricId, rubric.id))
-
     // Fetch all ungraded submissions for this assignment
     const ungradedSubmissions = await db
-      .select()
+      .select({ id: submissions.id })
       .from(submissions)
       .where(
         and(
@@ -84,7 +76,20 @@ export async function POST(req: Request) {
         )
       )
 
-    if (ungradedSubmissions.length === 0) {
+    // Create a resumable job and grade in the background; clients poll
+    // GET /api/grading/batch/[jobId] for progress. The job only claims
+    // submissions that are still ungraded, so a concurrent request that got
+    // there first leaves nothing for this one.
+    const job = ungradedSubmissions.length > 0
+      ? await createGradingJob({
+          assignmentId,
+          teacherId: session.user.id,
+          submissionIds: ungradedSubmissions.map((s) => s.id),
+          options: { feedbackTone },
+        })
+      : null
+
+    if (!job) {
       return NextResponse.json({
         total: 0,
         graded: 0,
@@ -93,65 +98,18 @@ export async function POST(req: Request) {
       })
     }
 
-    // Mark all submissions as grading
-    const submissionIds = ungradedSubmissions.map((s) => s.id)
-    for (const id of submissionIds) {
-      await db
-        .update(submissions)
-        .set({ status: 'grading' })
-        .where(eq(submissions.id, id))
-    }
-
-    // Build rubric and assignment data for the batch
-    const { rubric: rubricData, assignment: assignmentData } = buildRubricInput(rubric, criteria, assignment)
-
-    const batchInput = ungradedSubmissions.map((s) => ({
-      id: s.id,
-      studentWork: s.content,
-    }))
+    startGradingJob(job.id)
 
-    // Call batch grading with prompt caching
-    const batchResults = await batchGradeSubmissions(
-      batchInput,
-      rubricData,
-      assignmentData,
-      { feedbackTone }
+    return NextResponse.json(
+      {
+        jobId: job.id,
+        status: 'queued',
+        total: job.total,
+        graded: 0,
+        failed: 0,
+      },
+      { status: 202 }
     )
-
-    let graded = 0
-    let failed = 0
-
-    for (const result of batchResults) {
-      try {
-        await persistGradingResult(
-          result.submissionId,
-          session.user.id,
-          result.result,
-          { batchGraded: true }
-        )
-
-        graded++
-      } catch (err) {
-        console.error(
-          `Failed to store grading for submission ${result.submissionId}:`,
-          err
-        )
-
-        // Revert submission status to submitted
-        await db
-          .update(submissions)
-          .set({ status: 'submitted' })
-          .where(eq(submissions.id, result.submissionId))
-
-        failed++
-      }
-    }
-
-    return NextResponse.json({
-      total: ungradedSubmissions.length,
-      graded,
-      failed,
-    })
   } catch (error) {
     console.error('Failed to batch grade submissions:', error)
     return NextResponse.json(
@@ -11,8 +11,12 @@ import { eq, desc, and, inArray } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
 import { gradeSubmission } from '@/lib/ai/grade-submission'
 import { buildRubricInput, persistGradingResult } from '@/lib/grading-helpers'
+import { recordSubmissionChanges } from '@/lib/analytics-rollups'
+import { markRiskScoresStale } from '@/lib/early-warning'
+import { withQueryStats } from '@/lib/db/query-stats'
+import { ingestMasteryScores, criterionStandardMap } from '@/lib/mastery-ingest'
 
-export async function GET(req: Request) {
+export const GET = withQueryStats('GET /api/grading', async function GET(req: Request) {
   const session = await auth()
   if (!session?.user) {
     return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
@@ -67,7 +71,7 @@ export async function GET(req: Request) {
     .orderBy(desc(submissions.submittedAt))
 
   return NextResponse.json(results)
-}
+})
 
 export async function POST(req: Request) {
   const session = await auth()
@@ -109,6 +113,10 @@ export async function POST(req: Request) {
         })
         .returning()
 
+      await recordSubmissionChanges([
+        { submissionId: created.id, before: null, after: created },
+      ])
+
       targetSubmission = created
     } else {
       return NextResponse.json(
@@ -171,6 +179,16 @@ export async function POST(req: Request) {
       .set({ status: 'grading' })
       .where(eq(submissions.id, targetSubmission.id))
 
+    // Only a re-grade of a graded submission changes the rollups here
+    await recordSubmissionChanges([
+      {
+        submissionId: targetSubmission.id,
+        before: targetSubmission,
+        after: { ...targetSubmission, status: 'grading' },
+      },
+    ])
+    await markRiskScoresStale([targetSubmission.studentId])
+
     // Build AI grading input
     const { rubric: rubricData, assignment: assignmentData } = buildRubricInput(rubric, criteria, assignment)
 
@@ -182,6 +200,16 @@ export async function POST(req: Request) {
 
     await persistGradingResult(targetSubmission.id, session.user.id, gradingResult)
 
+    // Mastery is derived data; a failure here should not fail the grade
+    try {
+      await ingestMasteryScores(
+        [{ submissionId: targetSubmission.id, criterionScores: gradingResult.criterionScores }],
+        { criteria: criterionStandardMap(criteria) }
+      )
+    } catch (error) {
+      console.error('Failed to record mastery from grading result:', error)
+    }
+
     return NextResponse.json(
       {
         submissionId: targetSubmission.id,
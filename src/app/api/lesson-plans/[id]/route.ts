@@ -2,6 +2,7 @@ import { NextResponse } from 'next/server'
 import { auth } from '@/lib/auth'
 import { db } from '@/lib/db'
 import { lessonPlans } from '@/lib/db/schema'
+import { RollupBatch, recordRollups } from '@/lib/analytics-rollups'
 import { eq, and } from 'drizzle-orm'
 
 function parseLessonPlan(plan: typeof lessonPlans.$inferSelect) {
@@ -125,5 +126,7 @@ export async function DELETE(
     return NextResponse.json({ error: 'Lesson plan not found' }, { status: 404 })
   }
 
+  await recordRollups(new RollupBatch().lessonPlan(deleted.teacherId, deleted.createdAt, -1))
+
   return NextResponse.json({ success: true })
 }
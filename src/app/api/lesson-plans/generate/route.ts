@@ -2,6 +2,7 @@ import { NextResponse } from 'next/server'
 import { auth } from '@/lib/auth'
 import { db } from '@/lib/db'
 import { lessonPlans } from '@/lib/db/schema'
+import { RollupBatch, recordRollups } from '@/lib/analytics-rollups'
 import { generateLessonPlan, type LessonPlanInput } from '@/lib/ai/generate-lesson-plan'
 
 export async function POST(request: Request) {
@@ -12,7 +13,7 @@ export async function POST(request: Request) {
 
   const body = await request.json()
 
-  const { subject, gradeLevel, topic, duration, standards, instructionalModel } = body
+  const { subject, gradeLevel, topic, duration, standards, instructionalModel, regenerate } = body
 
   if (!subject || !gradeLevel || !topic) {
     return NextResponse.json(
@@ -38,7 +39,7 @@ export async function POST(request: Request) {
 
   let generated
   try {
-    generated = await generateLessonPlan(input)
+    generated = await generateLessonPlan(input, { fresh: regenerate === true })
   } catch (error) {
     console.error('AI generation failed:', error)
     return NextResponse.json(
@@ -75,6 +76,8 @@ export async function POST(request: Request) {
     })
     .returning()
 
+  await recordRollups(new RollupBatch().lessonPlan(created.teacherId, created.createdAt))
+
   return NextResponse.json(
     {
       ...created,
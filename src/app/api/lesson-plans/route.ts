@@ -2,6 +2,7 @@ import { NextResponse } from 'next/server'
 import { auth } from '@/lib/auth'
 import { db } from '@/lib/db'
 import { lessonPlans } from '@/lib/db/schema'
+import { RollupBatch, recordRollups } from '@/lib/analytics-rollups'
 import { eq, desc } from 'drizzle-orm'
 
 export async function GET() {
@@ -83,6 +84,8 @@ export async function POST(request: Request) {
     })
     .returning()
 
+  await recordRollups(new RollupBatch().lessonPlan(created.teacherId, created.createdAt))
+
   return NextResponse.json({
     ...created,
     standards: created.standards ? JSON.parse(created.standards) : [],
@@ -1,11 +1,16 @@
 import { auth } from '@/lib/auth'
 import { db } from '@/lib/db'
-import { masteryRecords, standards, classMembers, users } from '@/lib/db/schema'
-import { eq, and, inArray, desc } from 'drizzle-orm'
+import { masteryLatest, standards, classMembers, users } from '@/lib/db/schema'
+import { eq, and, inArray } from 'drizzle-orm'
 import { NextRequest, NextResponse } from 'next/server'
 import { generateReteachActivities } from '@/lib/ai/mastery-gaps'
+import { cached, cacheTags } from '@/lib/cache'
+import { createHash } from 'crypto'
+import { withQueryStats } from '@/lib/db/query-stats'
 
-export async function GET(req: NextRequest) {
+const RECOMMENDATIONS_TTL_MS = 30 * 60 * 1000
+
+export const GET = withQueryStats('GET /api/mastery/gaps', async function GET(req: NextRequest) {
   const session = await auth()
   if (!session?.user) {
     return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
@@ -63,25 +68,20 @@ export async function GET(req: NextRequest) {
 
   const studentMap = new Map(studentRows.map((s) => [s.id, s.name ?? 'Unknown']))
 
-  // Fetch all mastery records for these students
+  // Current level per (student, standard), maintained on write
   const records = await db
-    .select()
-    .from(masteryRecords)
-    .where(inArray(masteryRecords.studentId, studentIds))
-    .orderBy(desc(masteryRecords.assessedAt))
-
-  // Get most recent record per (student, standard)
-  const latestByStudentStandard = new Map<string, typeof records[number]>()
-  for (const record of records) {
-    const key = `${record.studentId}:${record.standardId}`
-    if (!latestByStudentStandard.has(key)) {
-      latestByStudentStandard.set(key, record)
-    }
-  }
+    .select({
+      studentId: masteryLatest.studentId,
+      standardId: masteryLatest.standardId,
+      level: masteryLatest.level,
+      score: masteryLatest.score,
+    })
+    .from(masteryLatest)
+    .where(inArray(masteryLatest.studentId, studentIds))
 
   // Group by standard
   const byStandard: Record<string, typeof records> = {}
-  for (const record of latestByStudentStandard.values()) {
+  for (const record of records) {
     if (!byStandard[record.standardId]) {
       byStandard[record.standardId] = []
     }
@@ -165,7 +165,15 @@ export async function GET(req: NextRequest) {
       }))
 
     try {
-      const result = await generateReteachActivities(gapInput)
+      const cacheKey = `mastery-gaps:${classId}:${createHash('sha256').update(JSON.stringify(gapInput)).digest('hex')}`
+      const result = await cached(
+        cacheKey,
+        () => generateReteachActivities(gapInput),
+        {
+          ttlMs: RECOMMENDATIONS_TTL_MS,
+          tags: studentIds.map((id) => cacheTags.student(id)),
+        }
+      )
       recommendations = result.recommendations
     } catch (error) {
       console.error('Failed to generate reteach recommendations:', error)
@@ -178,4 +186,4 @@ export async function GET(req: NextRequest) {
     gaps,
     recommendations,
   })
-}
+})
@@ -0,0 +1,61 @@
+import { auth } from '@/lib/auth'
+import { NextResponse } from 'next/server'
+import { ingestMasteryScores, type MasteryScoreInput } from '@/lib/mastery-ingest'
+
+const MAX_BATCH_SIZE = 500
+
+export async function POST(req: Request) {
+  const session = await auth()
+  if (!session?.user) {
+    return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
+  }
+
+  if (session.user.role !== 'teacher' && session.user.role !== 'sped_teacher') {
+    return NextResponse.json({ error: 'Forbidden: teacher role required' }, { status: 403 })
+  }
+
+  try {
+    const body = await req.json()
+    const { submissions: items } = body as { submissions: MasteryScoreInput[] }
+
+    if (
+      !Array.isArray(items) ||
+      items.length === 0 ||
+      items.some((i) => !i?.submissionId || !Array.isArray(i.criterionScores))
+    ) {
+      return NextResponse.json(
+        { error: 'submissions must be a non-empty array of { submissionId, criterionScores }' },
+        { status: 400 }
+      )
+    }
+
+    if (items.length > MAX_BATCH_SIZE) {
+      return NextResponse.json(
+        { error: `Batch size exceeds limit. Maximum ${MAX_BATCH_SIZE} submissions per batch.` },
+        { status: 400 }
+      )
+    }
+
+    // Only submissions to the caller's own assignments are ingested
+    const result = await ingestMasteryScores(items, { teacherId: session.user.id })
+
+    return NextResponse.json(
+      {
+        created: result.created,
+        submissions: [...result.bySubmission].map(([submissionId, records]) => ({
+          submissionId,
+          records,
+        })),
+        notFound: result.notFound,
+        forbidden: result.forbidden,
+      },
+      { status: 201 }
+    )
+  } catch (error) {
+    console.error('Failed to ingest mastery records:', error)
+    return NextResponse.json(
+      { error: 'Failed to ingest mastery records' },
+      { status: 500 }
+    )
+  }
+}
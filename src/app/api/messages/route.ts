@@ -3,8 +3,9 @@ import { db } from '@/lib/db'
 import { messages, users } from '@/lib/db/schema'
 import { eq, desc, or } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
+import { withQueryStats } from '@/lib/db/query-stats'
 
-export async function GET() {
+export const GET = withQueryStats('GET /api/messages', async function GET() {
   const session = await auth()
   if (!session?.user) {
     return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
@@ -69,7 +70,7 @@ export async function GET() {
       { status: 500 }
     )
   }
-}
+})
 
 export async function POST(req: Request) {
   const session = await auth()
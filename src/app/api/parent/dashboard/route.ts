@@ -12,8 +12,9 @@ import {
 } from '@/lib/db/schema'
 import { eq, desc, and, inArray, avg } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
+import { withQueryStats } from '@/lib/db/query-stats'
 
-export async function GET() {
+export const GET = withQueryStats('GET /api/parent/dashboard', async function GET() {
   const session = await auth()
   if (!session?.user) {
     return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
@@ -148,4 +149,4 @@ export async function GET() {
       { status: 500 }
     )
   }
-}
+})
@@ -27,6 +27,7 @@ export async function POST(req: Request) {
       questionTypes,
       standards,
       difficultyLevel,
+      regenerate,
     } = await req.json()
 
     if (!topic || !gradeLevel || !subject) {
@@ -50,7 +51,7 @@ export async function POST(req: Request) {
           : standards.split(',').map((s: string) => s.trim()).filter(Boolean)
         : undefined,
       difficultyLevel: difficultyLevel || undefined,
-    })
+    }, { fresh: regenerate === true })
 
     // Save the quiz to the database
     const [createdQuiz] = await db
@@ -1,19 +1,27 @@
 import { auth } from '@/lib/auth'
 import { db } from '@/lib/db'
-import {
-  reportCards,
-  submissions,
-  assignments,
-  masteryRecords,
-  feedbackDrafts,
-  standards,
-  classes,
-  classMembers,
-  users,
-} from '@/lib/db/schema'
-import { eq, and, inArray, desc } from 'drizzle-orm'
+import { reportCards, classes, classMembers, users } from '@/lib/db/schema'
+import { eq, and, inArray } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
-import { generateReportCardNarrative } from '@/lib/ai/report-card'
+import { batchGenerateReportCards, type GeneratedReportCard } from '@/lib/ai/report-card'
+import { loadReportCardInputs } from '@/lib/report-card-data'
+
+const MAX_BATCH_SIZE = 200
+const PER_STUDENT_TIMEOUT_MS = 60_000
+const INSERT_BATCH_SIZE = 10
+
+interface BatchResult {
+  studentId: string
+  studentName: string
+  status: 'generated' | 'skipped' | 'error'
+}
+
+// Streamed to the client as newline-delimited JSON: one `progress` event per
+// student as it finishes, then a final `done` (or `error`) event
+type BatchEvent =
+  | ({ type: 'progress'; completed: number; total: number } & BatchResult)
+  | { type: 'done'; generated: number; skipped: number; total: number; reportCards: BatchResult[] }
+  | { type: 'error'; error: string }
 
 export async function POST(req: Request) {
   const session = await auth()
@@ -68,11 +76,13 @@ export async function POST(req: Request) {
     }
 
     // Get all students in the class
-    const studentMembers = await db
+    const students = await db
       .select({
-        userId: classMembers.userId,
+        id: classMembers.userId,
+        name: users.name,
       })
       .from(classMembers)
+      .innerJoin(users, eq(classMembers.userId, users.id))
       .where(
         and(
           eq(classMembers.classId, classId),
@@ -80,24 +90,10 @@ export async function POST(req: Request) {
         )
       )
 
-    const MAX_BATCH_SIZE = 40
-    const PER_STUDENT_TIMEOUT_MS = 60_000
-
-    const studentIds = studentMembers.map((m) => m.userId)
-
-    if (studentIds.length === 0) {
-      return NextResponse.json({
-        generated: 0,
-        skipped: 0,
-        total: 0,
-        reportCards: [],
-      })
-    }
-
-    if (studentIds.length > MAX_BATCH_SIZE) {
+    if (students.length > MAX_BATCH_SIZE) {
       return NextResponse.json(
         {
-          error: `Batch size exceeds limit. Maximum ${MAX_BATCH_SIZE} students per batch, but this class has ${studentIds.length}.`,
+          error: `Batch size exceeds limit. Maximum ${MAX_BATCH_SIZE} students per batch, but this class has ${students.length}.`,
         },
         { status: 400 }
       )
@@ -117,184 +113,116 @@ export async function POST(req: Request) {
       )
 
     const existingStudentIds = new Set(existingCards.map((c) => c.studentId))
+    const named = students.map((s) => ({ id: s.id, name: s.name ?? 'Student' }))
+    const pending = named.filter((s) => !existingStudentIds.has(s.id))
 
-    // Get student names
-    const studentRecords = await db
-      .select({ id: users.id, name: users.name })
-      .from(users)
-      .where(inArray(users.id, studentIds))
-
-    const studentMap = new Map(studentRecords.map((s) => [s.id, s.name ?? 'Student']))
-
-    // Get all assignments for this class (shared across students)
-    const classAssignments = await db
-      .select({ id: assignments.id })
-      .from(assignments)
-      .where(eq(assignments.classId, classId))
-
-    const assignmentIds = classAssignments.map((a) => a.id)
-
-    // Process each student sequentially
-    const results: { studentId: string; studentName: string; status: 'generated' | 'skipped' | 'error' }[] = []
-    let generated = 0
-    let skipped = 0
+    // Everything the narratives need, fetched up front for the whole class
+    const inputs = await loadReportCardInputs(classInfo, pending, gradingPeriod)
 
-    for (const studentId of studentIds) {
-      const studentName = studentMap.get(studentId) ?? 'Student'
+    const encoder = new TextEncoder()
+    let disconnected = false
 
-      // Skip if report card already exists
-      if (existingStudentIds.has(studentId)) {
-        results.push({ studentId, studentName, status: 'skipped' })
-        skipped++
-        continue
-      }
+    const stream = new ReadableStream<Uint8Array>({
+      async start(controller) {
+        const results: BatchResult[] = []
+        let generated = 0
+        let skipped = 0
 
-      try {
-        // Get student submissions for this class
-        let studentSubmissions: {
-          assignmentTitle: string
-          score: number | null
-          maxScore: number | null
-          letterGrade: string | null
-          submittedAt: string
-        }[] = []
-
-        if (assignmentIds.length > 0) {
-          const subs = await db
-            .select({
-              assignmentTitle: assignments.title,
-              score: submissions.totalScore,
-              maxScore: submissions.maxScore,
-              letterGrade: submissions.letterGrade,
-              submittedAt: submissions.submittedAt,
-            })
-            .from(submissions)
-            .innerJoin(assignments, eq(submissions.assignmentId, assignments.id))
-            .where(
-              and(
-                eq(submissions.studentId, studentId),
-                inArray(submissions.assignmentId, assignmentIds)
-              )
-            )
-            .orderBy(desc(submissions.submittedAt))
-
-          studentSubmissions = subs.map((s) => ({
-            assignmentTitle: s.assignmentTitle,
-            score: s.score,
-            maxScore: s.maxScore,
-            letterGrade: s.letterGrade,
-            submittedAt: s.submittedAt.toISOString().split('T')[0],
-          }))
+        function send(event: BatchEvent) {
+          if (disconnected) return
+          controller.enqueue(encoder.encode(JSON.stringify(event) + '\n'))
         }
 
-        // Get mastery records
-        const masteryData = await db
-          .select({
-            standardCode: standards.code,
-            standardDescription: standards.description,
-            level: masteryRecords.level,
-            score: masteryRecords.score,
+        function record(student: { id: string; name: string }, status: BatchResult['status']) {
+          results.push({ studentId: student.id, studentName: student.name, status })
+          if (status === 'generated') generated++
+          if (status === 'skipped') skipped++
+          send({
+            type: 'progress',
+            completed: results.length,
+            total: students.length,
+            studentId: student.id,
+            studentName: student.name,
+            status,
           })
-          .from(masteryRecords)
-          .innerJoin(standards, eq(masteryRecords.standardId, standards.id))
-          .where(eq(masteryRecords.studentId, studentId))
-          .orderBy(desc(masteryRecords.assessedAt))
+        }
 
-        // Get feedback highlights
-        let feedbackHighlights: string[] = []
-        if (assignmentIds.length > 0) {
-          const submissionIds = await db
-            .select({ id: submissions.id })
-            .from(submissions)
-            .where(
-              and(
-                eq(submissions.studentId, studentId),
-                inArray(submissions.assignmentId, assignmentIds)
-              )
+        // Cards are written in multi-row inserts as narratives arrive, so a
+        // failure part-way through keeps everything generated so far
+        let unsaved: { student: { id: string; name: string }; card: GeneratedReportCard }[] = []
+
+        async function flush() {
+          const rows = unsaved
+          unsaved = []
+          if (rows.length === 0) return
+
+          try {
+            await db.insert(reportCards).values(
+              rows.map(({ student, card }) => ({
+                studentId: student.id,
+                classId,
+                gradingPeriod,
+                narrative: card.overallNarrative,
+                strengths: JSON.stringify(card.strengths),
+                areasForGrowth: JSON.stringify(card.areasForGrowth),
+                recommendations: JSON.stringify(card.recommendations),
+                gradeRecommendation: card.gradeRecommendation,
+                status: 'draft',
+              }))
             )
-
-          const subIds = submissionIds.map((s) => s.id)
-
-          if (subIds.length > 0) {
-            const feedbacks = await db
-              .select({
-                aiFeedback: feedbackDrafts.aiFeedback,
-                strengths: feedbackDrafts.strengths,
-              })
-              .from(feedbackDrafts)
-              .where(inArray(feedbackDrafts.submissionId, subIds))
-
-            feedbackHighlights = feedbacks
-              .flatMap((f) => {
-                const highlights: string[] = []
-                if (f.aiFeedback) {
-                  highlights.push(f.aiFeedback.slice(0, 200))
-                }
-                if (f.strengths) {
-                  try {
-                    const parsed = JSON.parse(f.strengths) as string[]
-                    highlights.push(...parsed.slice(0, 2))
-                  } catch {
-                    // skip malformed JSON
-                  }
-                }
-                return highlights
-              })
-              .slice(0, 8)
+            for (const { student } of rows) record(student, 'generated')
+          } catch (error) {
+            console.error('Failed to save batch report cards:', error)
+            for (const { student } of rows) record(student, 'error')
           }
         }
 
-        // Generate the report card narrative with AI (with per-student timeout)
-        const generatedCard = await Promise.race([
-          generateReportCardNarrative({
-            studentName,
-            className: classInfo.name,
-            subject: classInfo.subject,
-            gradeLevel: classInfo.gradeLevel,
-            gradingPeriod,
-            submissions: studentSubmissions,
-            masteryData: masteryData.map((m) => ({
-              standardCode: m.standardCode,
-              standardDescription: m.standardDescription,
-              level: m.level,
-              score: m.score,
-            })),
-            feedbackHighlights,
-          }),
-          new Promise<never>((_, reject) =>
-            setTimeout(
-              () => reject(new Error('Report card generation timed out')),
-              PER_STUDENT_TIMEOUT_MS
-            )
-          ),
-        ])
+        try {
+          for (const student of named) {
+            if (existingStudentIds.has(student.id)) record(student, 'skipped')
+          }
 
-        // Save to database
-        await db.insert(reportCards).values({
-          studentId,
-          classId,
-          gradingPeriod,
-          narrative: generatedCard.overallNarrative,
-          strengths: JSON.stringify(generatedCard.strengths),
-          areasForGrowth: JSON.stringify(generatedCard.areasForGrowth),
-          recommendations: JSON.stringify(generatedCard.recommendations),
-          gradeRecommendation: generatedCard.gradeRecommendation,
-          status: 'draft',
-        })
+          await batchGenerateReportCards(
+            pending.map((student) => ({ key: student, input: inputs.get(student.id)! })),
+            {
+              timeoutMs: PER_STUDENT_TIMEOUT_MS,
+              onResult: async (student, card) => {
+                unsaved.push({ student, card })
+                if (unsaved.length >= INSERT_BATCH_SIZE) await flush()
+              },
+              onError: (student, error) => {
+                console.error(`Failed to generate report card for student ${student.id}:`, error)
+                record(student, 'error')
+              },
+            }
+          )
+          await flush()
+
+          send({
+            type: 'done',
+            generated,
+            skipped,
+            total: students.length,
+            reportCards: results,
+          })
+        } catch (error) {
+          console.error('Failed to batch generate report cards:', error)
+          send({ type: 'error', error: 'Failed to batch generate report cards' })
+        }
 
-        results.push({ studentId, studentName, status: 'generated' })
-        generated++
-      } catch (error) {
-        console.error(`Failed to generate report card for student ${studentId}:`, error)
-        results.push({ studentId, studentName, status: 'error' })
-      }
-    }
+        if (!disconnected) controller.close()
+      },
+      cancel() {
+        // Generation carries on without the client; cards are still saved
+        disconnected = true
+      },
+    })
 
-    return NextResponse.json({
-      generated,
-      skipped,
-      total: studentIds.length,
-      reportCards: results,
+    return new Response(stream, {
+      headers: {
+        'Content-Type': 'application/x-ndjson; charset=utf-8',
+        'Cache-Control': 'no-cache',
+      },
     })
   } catch (error) {
     console.error('Failed to batch generate report cards:', error)
@@ -14,8 +14,9 @@ import {
 import { eq, and, inArray, desc } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
 import { generateReportCardNarrative } from '@/lib/ai/report-card'
+import { withQueryStats } from '@/lib/db/query-stats'
 
-export async function GET(req: Request) {
+export const GET = withQueryStats('GET /api/report-cards', async function GET(req: Request) {
   const session = await auth()
   if (!session?.user) {
     return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
@@ -100,7 +101,7 @@ export async function GET(req: Request) {
       }
     })
   )
-}
+})
 
 export async function POST(req: Request) {
   const session = await auth()
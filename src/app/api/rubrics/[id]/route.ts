@@ -3,6 +3,7 @@ import { db } from '@/lib/db'
 import { rubrics, rubricCriteria } from '@/lib/db/schema'
 import { eq, and } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
+import { RollupBatch, recordRollups } from '@/lib/analytics-rollups'
 
 export async function GET(
   _req: Request,
@@ -140,6 +141,7 @@ export async function DELETE(
   }
 
   await db.delete(rubrics).where(eq(rubrics.id, id))
+  await recordRollups(new RollupBatch().rubric(existing.teacherId, -1))
 
   return NextResponse.json({ success: true })
 }
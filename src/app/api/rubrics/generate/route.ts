@@ -3,6 +3,7 @@ import { db } from '@/lib/db'
 import { rubrics, rubricCriteria } from '@/lib/db/schema'
 import { eq } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
+import { RollupBatch, recordRollups } from '@/lib/analytics-rollups'
 import { generateRubric, type RubricInput } from '@/lib/ai/generate-rubric'
 
 export async function POST(req: Request) {
@@ -58,6 +59,8 @@ export async function POST(req: Request) {
       )
     }
 
+    await recordRollups(new RollupBatch().rubric(session.user.id))
+
     const savedCriteria = await db
       .select()
       .from(rubricCriteria)
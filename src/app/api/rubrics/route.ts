@@ -3,6 +3,7 @@ import { db } from '@/lib/db'
 import { rubrics, rubricCriteria } from '@/lib/db/schema'
 import { eq, desc } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
+import { RollupBatch, recordRollups } from '@/lib/analytics-rollups'
 
 export async function GET() {
   const session = await auth()
@@ -82,6 +83,8 @@ export async function POST(req: Request) {
       )
     }
 
+    await recordRollups(new RollupBatch().rubric(session.user.id))
+
     const savedCriteria = await db
       .select()
       .from(rubricCriteria)
@@ -3,8 +3,9 @@ import { db } from '@/lib/db'
 import { masteryRecords, standards, submissions, assignments } from '@/lib/db/schema'
 import { eq, and, desc, avg, count } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
+import { withQueryStats } from '@/lib/db/query-stats'
 
-export async function GET() {
+export const GET = withQueryStats('GET /api/student/progress', async function GET() {
   const session = await auth()
   if (!session?.user) {
     return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
@@ -184,4 +185,4 @@ export async function GET() {
     strengths: strengths.slice(0, 5),
     areasForGrowth: areasForGrowth.slice(0, 5),
   })
-}
+})
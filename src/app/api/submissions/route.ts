@@ -3,6 +3,8 @@ import { db } from '@/lib/db'
 import { submissions, assignments, classMembers } from '@/lib/db/schema'
 import { eq, and } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
+import { recordSubmissionChanges } from '@/lib/analytics-rollups'
+import { markRiskScoresStale } from '@/lib/early-warning'
 
 export async function POST(req: Request) {
   const session = await auth()
@@ -90,6 +92,11 @@ export async function POST(req: Request) {
         .where(eq(submissions.id, existing.id))
         .returning()
 
+      await recordSubmissionChanges([
+        { submissionId: existing.id, before: existing, after: updated },
+      ])
+      await markRiskScoresStale([session.user.id])
+
       return NextResponse.json(updated)
     }
 
@@ -105,6 +112,11 @@ export async function POST(req: Request) {
       })
       .returning()
 
+    await recordSubmissionChanges([
+      { submissionId: created.id, before: null, after: created },
+    ])
+    await markRiskScoresStale([session.user.id])
+
     return NextResponse.json(created)
   } catch (error) {
     console.error('Failed to submit work:', error)
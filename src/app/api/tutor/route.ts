@@ -3,13 +3,8 @@ import { db } from '@/lib/db'
 import { tutorSessions, classMembers, classes } from '@/lib/db/schema'
 import { eq, and } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
-import { streamTutorResponse } from '@/lib/ai/tutor'
-
-interface TutorMessage {
-  role: 'user' | 'assistant'
-  content: string
-  timestamp: string
-}
+import { streamTutorResponse, type TutorTurn } from '@/lib/ai/tutor'
+import { appendTutorMessage, loadTutorContext, scheduleTutorSummary } from '@/lib/tutor-sessions'
 
 export async function POST(request: Request) {
   const session = await auth()
@@ -52,7 +47,8 @@ export async function POST(request: Request) {
     }
 
     let currentSessionId = sessionId
-    let conversationHistory: TutorMessage[] = []
+    let summary: string | null = null
+    let conversationHistory: TutorTurn[] = []
 
     if (currentSessionId) {
       // Load existing session
@@ -75,7 +71,11 @@ export async function POST(request: Request) {
         return NextResponse.json({ error: 'Session has ended' }, { status: 400 })
       }
 
-      conversationHistory = JSON.parse(existingSession.messages) as TutorMessage[]
+      // Only the rolling summary and recent messages are loaded, never the
+      // full transcript
+      const context = await loadTutorContext(existingSession)
+      summary = context.summary
+      conversationHistory = context.turns
     } else {
       // Create new session
       const [newSession] = await db
@@ -84,34 +84,23 @@ export async function POST(request: Request) {
           studentId: session.user.id,
           subject,
           topic: topic ?? null,
-          messages: '[]',
         })
         .returning()
 
       currentSessionId = newSession.id
     }
 
-    // Build the new user message
-    const userMessage: TutorMessage = {
-      role: 'user',
-      content: message.trim(),
-      timestamp: new Date().toISOString(),
-    }
+    const userContent = message.trim()
+    const capturedSessionId: string = currentSessionId
 
-    // Append user message to session
-    const updatedMessages = [...conversationHistory, userMessage]
-    await db
-      .update(tutorSessions)
-      .set({ messages: JSON.stringify(updatedMessages) })
-      .where(eq(tutorSessions.id, currentSessionId))
+    // Append the user message; earlier messages are never rewritten
+    await appendTutorMessage(capturedSessionId, 'user', userContent)
 
     // Stream the AI response
     const aiStream = streamTutorResponse({
-      message: message.trim(),
-      conversationHistory: conversationHistory.map((m) => ({
-        role: m.role,
-        content: m.content,
-      })),
+      message: userContent,
+      conversationHistory,
+      summary,
       subject,
       gradeLevel,
       assignmentContext,
@@ -119,12 +108,21 @@ export async function POST(request: Request) {
 
     // Wrap the stream to capture the full response and save it
     let fullResponse = ''
+    let saved = false
     const decoder = new TextDecoder()
-    const capturedSessionId = currentSessionId
 
+    // Append the reply once. A reply cut short by an error or a disconnected
+    // client is still saved, so the transcript matches what the student saw.
+    async function saveResponse() {
+      if (saved || fullResponse.length === 0) return
+      saved = true
+      await appendTutorMessage(capturedSessionId, 'assistant', fullResponse)
+      scheduleTutorSummary(capturedSessionId)
+    }
+
+    const reader = aiStream.getReader()
     const transformedStream = new ReadableStream<Uint8Array>({
       async start(controller) {
-        const reader = aiStream.getReader()
         try {
           while (true) {
             const { done, value } = await reader.read()
@@ -134,24 +132,22 @@ export async function POST(request: Request) {
             controller.enqueue(value)
           }
 
-          // Save the assistant response to the session
-          const assistantMessage: TutorMessage = {
-            role: 'assistant',
-            content: fullResponse,
-            timestamp: new Date().toISOString(),
-          }
-          const finalMessages = [...updatedMessages, assistantMessage]
-          await db
-            .update(tutorSessions)
-            .set({ messages: JSON.stringify(finalMessages) })
-            .where(eq(tutorSessions.id, capturedSessionId))
-
+          await saveResponse()
           controller.close()
         } catch (error) {
           console.error('Tutor stream processing error:', error)
+          await saveResponse().catch((saveError) => {
+            console.error('Failed to save partial tutor response:', saveError)
+          })
           controller.error(error)
         }
       },
+      async cancel() {
+        await reader.cancel().catch(() => undefined)
+        await saveResponse().catch((error) => {
+          console.error('Failed to save partial tutor response:', error)
+        })
+      },
     })
 
     return new Response(transformedStream, {
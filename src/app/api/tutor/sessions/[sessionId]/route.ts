@@ -1,15 +1,9 @@
 import { auth } from '@/lib/auth'
 import { db } from '@/lib/db'
-import { tutorSessions } from '@/lib/db/schema'
-import { eq, and } from 'drizzle-orm'
+import { tutorSessions, tutorMessages } from '@/lib/db/schema'
+import { eq, and, asc } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
 
-interface TutorMessage {
-  role: 'user' | 'assistant'
-  content: string
-  timestamp: string
-}
-
 export async function GET(
   _request: Request,
   { params }: { params: Promise<{ sessionId: string }> }
@@ -40,7 +34,15 @@ export async function GET(
     return NextResponse.json({ error: 'Session not found' }, { status: 404 })
   }
 
-  const messages = JSON.parse(tutorSession.messages) as TutorMessage[]
+  const messages = await db
+    .select({
+      role: tutorMessages.role,
+      content: tutorMessages.content,
+      createdAt: tutorMessages.createdAt,
+    })
+    .from(tutorMessages)
+    .where(eq(tutorMessages.sessionId, sessionId))
+    .orderBy(asc(tutorMessages.seq))
 
   return NextResponse.json({
     id: tutorSession.id,
@@ -48,7 +50,11 @@ export async function GET(
     topic: tutorSession.topic,
     startedAt: tutorSession.startedAt.toISOString(),
     endedAt: tutorSession.endedAt?.toISOString() ?? null,
-    messages,
+    messages: messages.map((m) => ({
+      role: m.role,
+      content: m.content,
+      timestamp: m.createdAt.toISOString(),
+    })),
   })
 }
 
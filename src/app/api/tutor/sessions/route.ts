@@ -1,15 +1,9 @@
 import { auth } from '@/lib/auth'
 import { db } from '@/lib/db'
-import { tutorSessions } from '@/lib/db/schema'
-import { eq, desc } from 'drizzle-orm'
+import { tutorSessions, tutorMessages } from '@/lib/db/schema'
+import { eq, and, desc, sql } from 'drizzle-orm'
 import { NextResponse } from 'next/server'
 
-interface TutorMessage {
-  role: 'user' | 'assistant'
-  content: string
-  timestamp: string
-}
-
 export async function GET() {
   const session = await auth()
   if (!session?.user) {
@@ -20,24 +14,37 @@ export async function GET() {
     return NextResponse.json({ error: 'Forbidden: only students can access tutor sessions' }, { status: 403 })
   }
 
+  // Join only each session's last message rather than loading transcripts
   const sessions = await db
-    .select()
+    .select({
+      id: tutorSessions.id,
+      subject: tutorSessions.subject,
+      topic: tutorSessions.topic,
+      startedAt: tutorSessions.startedAt,
+      endedAt: tutorSessions.endedAt,
+      messageCount: tutorSessions.messageCount,
+      lastMessage: tutorMessages.content,
+    })
     .from(tutorSessions)
+    .leftJoin(
+      tutorMessages,
+      and(
+        eq(tutorMessages.sessionId, tutorSessions.id),
+        eq(tutorMessages.seq, sql`${tutorSessions.messageCount} - 1`)
+      )
+    )
     .where(eq(tutorSessions.studentId, session.user.id))
     .orderBy(desc(tutorSessions.startedAt))
 
-  const result = sessions.map((s) => {
-    const messages = JSON.parse(s.messages) as TutorMessage[]
-    return {
-      id: s.id,
-      subject: s.subject,
-      topic: s.topic,
-      startedAt: s.startedAt.toISOString(),
-      endedAt: s.endedAt?.toISOString() ?? null,
-      messageCount: messages.length,
-      lastMessage: messages.length > 0 ? messages[messages.length - 1].content.slice(0, 120) : null,
-    }
-  })
+  const result = sessions.map((s) => ({
+    id: s.id,
+    subject: s.subject,
+    topic: s.topic,
+    startedAt: s.startedAt.toISOString(),
+    endedAt: s.endedAt?.toISOString() ?? null,
+    messageCount: s.messageCount,
+    lastMessage: s.lastMessage?.slice(0, 120) ?? null,
+  }))
 
   return NextResponse.json(result)
 }
@@ -8,6 +8,7 @@ import {
   Minus,
   ChevronDown,
   ChevronRight,
+  ChevronLeft,
   Users,
   ShieldAlert,
   ShieldCheck,
@@ -15,6 +16,7 @@ import {
 } from 'lucide-react'
 import { Card, CardContent } from '@/components/ui/card'
 import { Badge } from '@/components/ui/badge'
+import { Button } from '@/components/ui/button'
 import {
   Table,
   TableBody,
@@ -35,6 +37,15 @@ interface StudentRisk {
   recommendations?: string[]
 }
 
+interface RiskSummary {
+  total: number
+  high_risk: number
+  moderate_risk: number
+  on_track: number
+}
+
+const PAGE_SIZE = 50
+
 const riskConfig = {
   high_risk: {
     label: 'High Risk',
@@ -66,6 +77,14 @@ function TrendIcon({ direction }: { direction: string }) {
 
 export default function EarlyWarningPage() {
   const [students, setStudents] = useState<StudentRisk[]>([])
+  const [summary, setSummary] = useState<RiskSummary>({
+    total: 0,
+    high_risk: 0,
+    moderate_risk: 0,
+    on_track: 0,
+  })
+  const [page, setPage] = useState(1)
+  const [totalPages, setTotalPages] = useState(1)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [expandedIds, setExpandedIds] = useState<Set<string>>(new Set())
@@ -73,7 +92,7 @@ export default function EarlyWarningPage() {
   useEffect(() => {
     async function fetchData() {
       try {
-        const res = await fetch('/api/early-warning')
+        const res = await fetch(`/api/early-warning?page=${page}&pageSize=${PAGE_SIZE}`)
         if (!res.ok) {
           if (res.status === 403) {
             throw new Error('You do not have permission to view this page.')
@@ -83,6 +102,8 @@ export default function EarlyWarningPage() {
         }
         const data = await res.json()
         setStudents(data.students)
+        setSummary(data.summary)
+        setTotalPages(data.totalPages)
       } catch (err) {
         setError(err instanceof Error ? err.message : 'An error occurred')
       } finally {
@@ -90,7 +111,7 @@ export default function EarlyWarningPage() {
       }
     }
     fetchData()
-  }, [])
+  }, [page])
 
   const toggleExpand = (id: string) => {
     setExpandedIds((prev) => {
@@ -104,9 +125,11 @@ export default function EarlyWarningPage() {
     })
   }
 
-  const highRiskCount = students.filter((s) => s.riskLevel === 'high_risk').length
-  const moderateCount = students.filter((s) => s.riskLevel === 'moderate_risk').length
-  const onTrackCount = students.filter((s) => s.riskLevel === 'on_track').length
+  const goToPage = (next: number) => {
+    setLoading(true)
+    setExpandedIds(new Set())
+    setPage(next)
+  }
 
   if (loading) {
     return (
@@ -172,7 +195,7 @@ export default function EarlyWarningPage() {
                 <Users className="size-5 text-stone-600" />
               </div>
               <div>
-                <p className="text-2xl font-bold text-stone-900">{students.length}</p>
+                <p className="text-2xl font-bold text-stone-900">{summary.total}</p>
                 <p className="text-xs text-stone-500">Students Monitored</p>
               </div>
             </div>
@@ -186,7 +209,7 @@ export default function EarlyWarningPage() {
                 <ShieldAlert className="size-5 text-red-600" />
               </div>
               <div>
-                <p className="text-2xl font-bold text-red-700">{highRiskCount}</p>
+                <p className="text-2xl font-bold text-red-700">{summary.high_risk}</p>
                 <p className="text-xs text-red-600">High Risk</p>
               </div>
             </div>
@@ -200,7 +223,7 @@ export default function EarlyWarningPage() {
                 <AlertTriangle className="size-5 text-amber-600" />
               </div>
               <div>
-                <p className="text-2xl font-bold text-amber-700">{moderateCount}</p>
+                <p className="text-2xl font-bold text-amber-700">{summary.moderate_risk}</p>
                 <p className="text-xs text-amber-600">Moderate Risk</p>
               </div>
             </div>
@@ -214,7 +237,7 @@ export default function EarlyWarningPage() {
                 <ShieldCheck className="size-5 text-emerald-600" />
               </div>
               <div>
-                <p className="text-2xl font-bold text-emerald-700">{onTrackCount}</p>
+                <p className="text-2xl font-bold text-emerald-700">{summary.on_track}</p>
                 <p className="text-xs text-emerald-600">On Track</p>
               </div>
             </div>
@@ -372,6 +395,35 @@ export default function EarlyWarningPage() {
               })}
             </TableBody>
           </Table>
+          {totalPages > 1 && (
+            <div className="flex items-center justify-between border-t border-stone-200 px-4 py-3">
+              <p className="text-xs text-stone-500">
+                Page {page} of {totalPages}
+              </p>
+              <div className="flex gap-2">
+                <Button
+                  variant="outline"
+                  size="sm"
+                  disabled={page <= 1}
+                  onClick={() => goToPage(page - 1)}
+                  className="gap-1"
+                >
+                  <ChevronLeft className="size-4" />
+                  Previous
+                </Button>
+                <Button
+                  variant="outline"
+                  size="sm"
+                  disabled={page >= totalPages}
+                  onClick={() => goToPage(page + 1)}
+                  className="gap-1"
+                >
+                  Next
+                  <ChevronRight className="size-4" />
+                </Button>
+              </div>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -86,6 +86,8 @@ export default function ExitTicketsPage() {
   const [isGenerating, setIsGenerating] = useState(false)
   const [error, setError] = useState<string | null>(null)
   const [generated, setGenerated] = useState<GeneratedExitTicket | null>(null)
+  // After the first ticket, Generate asks for a new variant instead of the stored one
+  const [hasGenerated, setHasGenerated] = useState(false)
   const [copied, setCopied] = useState(false)
   const [revealedAnswers, setRevealedAnswers] = useState<Set<number>>(new Set())
 
@@ -121,6 +123,7 @@ export default function ExitTicketsPage() {
           subject,
           numberOfQuestions: parseInt(numberOfQuestions, 10),
           lessonContext: lessonContext || undefined,
+          regenerate: hasGenerated,
         }),
       })
 
@@ -131,6 +134,7 @@ export default function ExitTicketsPage() {
 
       const data: GeneratedExitTicket = await res.json()
       setGenerated(data)
+      setHasGenerated(true)
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Something went wrong')
     } finally {
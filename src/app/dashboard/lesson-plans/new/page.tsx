@@ -117,6 +117,8 @@ export default function NewLessonPlanPage() {
   const [isGenerating, setIsGenerating] = useState(false)
   const [isSaving, setIsSaving] = useState(false)
   const [generatedPlan, setGeneratedPlan] = useState<LessonPlanData | null>(null)
+  // After the first plan, Generate asks for a new variant instead of the stored one
+  const [hasGenerated, setHasGenerated] = useState(false)
 
   // Form state
   const [subject, setSubject] = useState('')
@@ -152,6 +154,7 @@ export default function NewLessonPlanPage() {
           topic,
           duration: duration || undefined,
           instructionalModel: instructionalModel || undefined,
+          regenerate: hasGenerated,
         }),
       })
 
@@ -162,6 +165,7 @@ export default function NewLessonPlanPage() {
 
       const plan = await res.json()
       setGeneratedPlan(plan)
+      setHasGenerated(true)
       toast.success('Lesson plan generated successfully!')
     } catch (error) {
       toast.error(
@@ -117,6 +117,8 @@ export default function NewQuizPage() {
   const [isGenerating, setIsGenerating] = useState(false)
   const [loadingMessageIndex, setLoadingMessageIndex] = useState(0)
   const [generated, setGenerated] = useState<GeneratedQuizData | null>(null)
+  // After the first quiz, Generate asks for a new variant instead of the stored one
+  const [hasGenerated, setHasGenerated] = useState(false)
   const [error, setError] = useState<string | null>(null)
 
   // Form state
@@ -163,6 +165,7 @@ export default function NewQuizPage() {
           questionTypes: selectedTypes,
           standards: standards || undefined,
           difficultyLevel,
+          regenerate: hasGenerated,
         }),
       })
 
@@ -173,6 +176,7 @@ export default function NewQuizPage() {
 
       const data = await res.json()
       setGenerated(data)
+      setHasGenerated(true)
       setStep(3)
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Something went wrong')
@@ -3,11 +3,11 @@ import { db } from '@/lib/db'
 import {
   classes,
   classMembers,
-  masteryRecords,
+  masteryLatest,
   standards,
   users,
 } from '@/lib/db/schema'
-import { eq, and, inArray, desc } from 'drizzle-orm'
+import { eq, and, inArray } from 'drizzle-orm'
 import { redirect, notFound } from 'next/navigation'
 import Link from 'next/link'
 import { ArrowLeft } from 'lucide-react'
@@ -77,52 +77,36 @@ export default async function ClassMasteryPage({
       .where(inArray(users.id, studentIds))
   }
 
-  // Get mastery records
+  // Get the current level per (student, standard), maintained on write
   let records: {
-    id: string
     studentId: string
     standardId: string
     level: string
     score: number
     assessedAt: Date
-    source: string
-    notes: string | null
   }[] = []
 
   if (studentIds.length > 0) {
     records = await db
       .select({
-        id: masteryRecords.id,
-        studentId: masteryRecords.studentId,
-        standardId: masteryRecords.standardId,
-        level: masteryRecords.level,
-        score: masteryRecords.score,
-        assessedAt: masteryRecords.assessedAt,
-        source: masteryRecords.source,
-        notes: masteryRecords.notes,
+        studentId: masteryLatest.studentId,
+        standardId: masteryLatest.standardId,
+        level: masteryLatest.level,
+        score: masteryLatest.score,
+        assessedAt: masteryLatest.assessedAt,
       })
-      .from(masteryRecords)
-      .innerJoin(standards, eq(masteryRecords.standardId, standards.id))
+      .from(masteryLatest)
+      .innerJoin(standards, eq(masteryLatest.standardId, standards.id))
       .where(
         and(
-          inArray(masteryRecords.studentId, studentIds),
+          inArray(masteryLatest.studentId, studentIds),
           eq(standards.subject, cls.subject)
         )
       )
-      .orderBy(desc(masteryRecords.assessedAt))
-  }
-
-  // Get latest per (student, standard)
-  const latestByKey = new Map<string, typeof records[number]>()
-  for (const record of records) {
-    const key = `${record.studentId}:${record.standardId}`
-    if (!latestByKey.has(key)) {
-      latestByKey.set(key, record)
-    }
   }
 
   // Get standards info
-  const standardIdSet = [...new Set([...latestByKey.values()].map((r) => r.standardId))]
+  const standardIdSet = [...new Set(records.map((r) => r.standardId))]
   let standardRows: {
     id: string
     code: string
@@ -164,7 +148,7 @@ export default async function ClassMasteryPage({
     assessedAt: string
   }
 
-  const heatmapCells: HeatmapCell[] = [...latestByKey.values()].map((r) => ({
+  const heatmapCells: HeatmapCell[] = records.map((r) => ({
     studentId: r.studentId,
     standardId: r.standardId,
     level: r.level,
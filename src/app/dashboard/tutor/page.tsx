@@ -1,19 +1,13 @@
 import { redirect } from 'next/navigation'
 import { auth } from '@/lib/auth'
 import { db } from '@/lib/db'
-import { tutorSessions, masteryRecords, standards } from '@/lib/db/schema'
-import { eq, desc, and, lt } from 'drizzle-orm'
+import { tutorSessions, tutorMessages, masteryRecords, standards } from '@/lib/db/schema'
+import { eq, desc, and, lt, sql } from 'drizzle-orm'
 import Link from 'next/link'
 import { Bot, Sparkles, BookOpen, FlaskConical, Calculator, Globe, Palette, Code, Target } from 'lucide-react'
 import { Card, CardContent } from '@/components/ui/card'
 import { SessionCard } from '@/components/tutor/session-card'
 
-interface TutorMessage {
-  role: 'user' | 'assistant'
-  content: string
-  timestamp: string
-}
-
 function stripMarkdown(text: string): string {
   return text
     .replace(/\[([^\]]+)\]\([^)]+\)/g, '$1')   // [text](url) → text
@@ -49,8 +43,23 @@ export default async function TutorHubPage() {
 
   // Fetch recent sessions
   const recentSessions = await db
-    .select()
+    .select({
+      id: tutorSessions.id,
+      subject: tutorSessions.subject,
+      topic: tutorSessions.topic,
+      startedAt: tutorSessions.startedAt,
+      endedAt: tutorSessions.endedAt,
+      messageCount: tutorSessions.messageCount,
+      lastMessage: tutorMessages.content,
+    })
     .from(tutorSessions)
+    .leftJoin(
+      tutorMessages,
+      and(
+        eq(tutorMessages.sessionId, tutorSessions.id),
+        eq(tutorMessages.seq, sql`${tutorSessions.messageCount} - 1`)
+      )
+    )
     .where(eq(tutorSessions.studentId, session.user.id))
     .orderBy(desc(tutorSessions.startedAt))
     .limit(6)
@@ -96,21 +105,15 @@ export default async function TutorHubPage() {
     .sort((a, b) => a.score - b.score)
     .slice(0, 4)
 
-  const formattedSessions = recentSessions.map((s) => {
-    const messages = JSON.parse(s.messages) as TutorMessage[]
-    return {
-      id: s.id,
-      subject: s.subject,
-      topic: s.topic,
-      startedAt: s.startedAt.toISOString(),
-      endedAt: s.endedAt?.toISOString() ?? null,
-      messageCount: messages.length,
-      lastMessage:
-        messages.length > 0
-          ? stripMarkdown(messages[messages.length - 1].content).slice(0, 120)
-          : null,
-    }
-  })
+  const formattedSessions = recentSessions.map((s) => ({
+    id: s.id,
+    subject: s.subject,
+    topic: s.topic,
+    startedAt: s.startedAt.toISOString(),
+    endedAt: s.endedAt?.toISOString() ?? null,
+    messageCount: s.messageCount,
+    lastMessage: s.lastMessage ? stripMarkdown(s.lastMessage).slice(0, 120) : null,
+  }))
 
   return (
     <div className="space-y-8 max-w-4xl mx-auto">
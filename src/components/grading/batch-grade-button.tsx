@@ -5,6 +5,8 @@ import { Loader2, Zap } from 'lucide-react'
 import { Button } from '@/components/ui/button'
 import { toast } from 'sonner'
 
+const POLL_INTERVAL_MS = 2000
+
 interface BatchGradeButtonProps {
   assignmentId: string
   ungradedCount: number
@@ -35,9 +37,34 @@ export function BatchGradeButton({
         throw new Error(error.message ?? 'Grading request failed')
       }
 
-      const result = await response.json()
-      setProgress({ graded: result.graded ?? ungradedCount, total: ungradedCount })
-      toast.success(`Graded ${result.graded ?? ungradedCount} submissions`)
+      const job = await response.json()
+      if (!job.jobId) {
+        toast.success(job.message ?? 'No ungraded submissions found')
+        onGradingComplete?.()
+        return
+      }
+
+      // Poll until the background job finishes
+      let progress = job
+      while (progress.status === 'queued' || progress.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS))
+        const progressResponse = await fetch(`/api/grading/batch/${job.jobId}`)
+        if (!progressResponse.ok) {
+          throw new Error('Failed to check grading progress')
+        }
+        progress = await progressResponse.json()
+        setProgress({ graded: progress.graded + progress.failed, total: progress.total })
+      }
+
+      if (progress.status === 'failed') {
+        throw new Error(progress.error ?? 'Batch grading failed')
+      }
+
+      if (progress.failed > 0) {
+        toast.warning(`Graded ${progress.graded} submissions, ${progress.failed} failed`)
+      } else {
+        toast.success(`Graded ${progress.graded} submissions`)
+      }
       onGradingComplete?.()
     } catch (error) {
       const message = error instanceof Error ? error.message : 'Failed to start batch grading'
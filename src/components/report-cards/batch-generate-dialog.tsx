@@ -29,6 +29,11 @@ interface BatchResponse {
   reportCards: BatchResult[]
 }
 
+type BatchEvent =
+  | ({ type: 'progress'; completed: number; total: number } & BatchResult)
+  | ({ type: 'done' } & BatchResponse)
+  | { type: 'error'; error: string }
+
 type DialogState =
   | { step: 'form' }
   | { step: 'generating'; completed: number; total: number }
@@ -61,15 +66,53 @@ export function BatchGenerateDialog({
         body: JSON.stringify({ classId, gradingPeriod: gradingPeriod.trim() }),
       })
 
-      if (!res.ok) {
-        const data = await res.json()
+      if (!res.ok || !res.body) {
+        const data: { error?: string } = await res.json().catch(() => ({}))
         setState({ step: 'error', message: data.error ?? 'Failed to generate report cards' })
         return
       }
 
-      const result: BatchResponse = await res.json()
-      setState({ step: 'done', result })
-      router.refresh()
+      // The response is newline-delimited JSON: a progress event per student,
+      // then a final done or error event
+      const reader = res.body.getReader()
+      const decoder = new TextDecoder()
+      let buffered = ''
+
+      while (true) {
+        const { done, value } = await reader.read()
+        if (value) buffered += decoder.decode(value, { stream: true })
+
+        const lines = buffered.split('\n')
+        buffered = done ? '' : lines.pop() ?? ''
+
+        for (const line of lines) {
+          if (!line.trim()) continue
+          const event: BatchEvent = JSON.parse(line)
+
+          if (event.type === 'progress') {
+            setState({ step: 'generating', completed: event.completed, total: event.total })
+          } else if (event.type === 'done') {
+            setState({
+              step: 'done',
+              result: {
+                generated: event.generated,
+                skipped: event.skipped,
+                total: event.total,
+                reportCards: event.reportCards,
+              },
+            })
+            router.refresh()
+            return
+          } else {
+            setState({ step: 'error', message: event.error })
+            return
+          }
+        }
+
+        if (done) break
+      }
+
+      setState({ step: 'error', message: 'Generation was interrupted. Please try again.' })
     } catch {
       setState({ step: 'error', message: 'Network error. Please try again.' })
     }
@@ -151,16 +194,18 @@ export function BatchGenerateDialog({
             <div className="flex flex-col items-center gap-4 py-6">
               <Loader2 className="size-10 text-amber-500 animate-spin" />
               <p className="text-sm text-stone-600">
-                Generating report cards...
+                Generating report cards... {state.completed} of {state.total}
               </p>
               <div className="w-full rounded-full bg-stone-100 h-2">
                 <div
                   className="rounded-full bg-amber-500 h-2 transition-all duration-500"
-                  style={{ width: '100%' }}
+                  style={{
+                    width: `${state.total > 0 ? Math.round((state.completed / state.total) * 100) : 0}%`,
+                  }}
                 />
               </div>
               <p className="text-xs text-stone-500">
-                Please do not close this dialog.
+                Cards keep generating if you close this dialog.
               </p>
             </div>
           </>
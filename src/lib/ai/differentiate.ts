@@ -1,4 +1,5 @@
 import { anthropic, AI_MODEL } from '@/lib/ai'
+import { createMemoizedMessage } from './memoize'
 
 export interface DifferentiateInput {
   content: string
@@ -14,7 +15,7 @@ export interface DifferentiatedContent {
 }
 
 export async function differentiateContent(input: DifferentiateInput): Promise<DifferentiatedContent> {
-  const response = await anthropic.messages.create({
+  const response = await createMemoizedMessage('differentiate', {
     model: AI_MODEL,
     max_tokens: 4096,
     system: `You are an expert K-12 differentiation specialist. You transform instructional content into three tiers that serve students at different performance levels while maintaining the same core learning objective. For the below-grade tier, you simplify vocabulary, shorten sentences, add scaffolds (graphic organizers, sentence starters, word banks), and note the approximate Lexile adjustment. For the on-grade tier, you provide the content as intended with optional scaffolds. For the above-grade tier, you extend the complexity, add depth, and include enrichment challenges. All three tiers preserve the essential concepts and learning goals.`,
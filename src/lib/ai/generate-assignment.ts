@@ -1,4 +1,5 @@
-import { anthropic, AI_MODEL } from '@/lib/ai'
+import { AI_MODEL } from '@/lib/ai'
+import { createMemoizedMessage, type MemoizeOptions } from './memoize'
 import type { GeneratedRubric } from './generate-rubric'
 
 export interface SmartAssignmentInput {
@@ -25,8 +26,11 @@ export interface GeneratedSmartAssignment {
   }
 }
 
-export async function generateSmartAssignment(input: SmartAssignmentInput): Promise<GeneratedSmartAssignment> {
-  const response = await anthropic.messages.create({
+export async function generateSmartAssignment(
+  input: SmartAssignmentInput,
+  options: MemoizeOptions = {}
+): Promise<GeneratedSmartAssignment> {
+  const response = await createMemoizedMessage('assignment', {
     model: AI_MODEL,
     max_tokens: 8192,
     system: `You are an expert K-12 curriculum designer specializing in standards-aligned assignment creation. You design assignments that are rigorous, engaging, and accessible to all learners. Your signature approach combines the assignment itself with a matching rubric, student-facing success criteria, and three differentiated versions (below grade, on grade, above grade) -- all in a single cohesive package. Every component aligns to the same learning objectives and standards. Differentiated versions maintain the same core learning goal while varying the complexity, scaffolding, and entry points. Rubric criteria are specific and observable, with descriptors that distinguish performance levels clearly.`,
@@ -184,7 +188,7 @@ Generate all four components in a single response:
 4. Three differentiated versions (below grade with heavy scaffolds, on grade with optional supports, above grade with extensions) that all target the same learning objective`,
       },
     ],
-  })
+  }, options)
 
   const toolUseBlock = response.content.find(
     (block): block is Extract<typeof block, { type: 'tool_use' }> => block.type === 'tool_use'
@@ -1,4 +1,5 @@
-import { anthropic, AI_MODEL } from '@/lib/ai'
+import { AI_MODEL } from '@/lib/ai'
+import { createMemoizedMessage, type MemoizeOptions } from './memoize'
 
 export interface ExitTicketInput {
   topic: string
@@ -20,10 +21,13 @@ export interface GeneratedExitTicket {
   }>
 }
 
-export async function generateExitTicket(input: ExitTicketInput): Promise<GeneratedExitTicket> {
+export async function generateExitTicket(
+  input: ExitTicketInput,
+  options: MemoizeOptions = {}
+): Promise<GeneratedExitTicket> {
   const numberOfQuestions = input.numberOfQuestions ?? 3
 
-  const response = await anthropic.messages.create({
+  const response = await createMemoizedMessage('exit-ticket', {
     model: AI_MODEL,
     max_tokens: 4096,
     system: `You are an expert K-12 teacher creating formative exit tickets to check student understanding at the end of a lesson. Generate quick, focused questions that assess the key concepts of the topic. Questions should take 2-5 minutes total for students to complete.`,
@@ -94,7 +98,7 @@ ${input.lessonContext ? `Lesson Context: ${input.lessonContext}` : ''}
 Generate ${numberOfQuestions} quick-check questions that assess the key concepts. Use a mix of question types (multiple choice, short answer, true/false) appropriate for the grade level. Each question should target a specific skill or concept from the lesson. Questions should be answerable in under a minute each.`,
       },
     ],
-  })
+  }, options)
 
   const toolUseBlock = response.content.find(
     (block): block is Extract<typeof block, { type: 'tool_use' }> => block.type === 'tool_use'
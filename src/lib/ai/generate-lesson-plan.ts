@@ -1,4 +1,5 @@
-import { anthropic, AI_MODEL } from '@/lib/ai'
+import { AI_MODEL } from '@/lib/ai'
+import { createMemoizedMessage, type MemoizeOptions } from './memoize'
 
 export interface LessonPlanInput {
   subject: string
@@ -29,8 +30,11 @@ export interface GeneratedLessonPlan {
   estimatedDuration: string
 }
 
-export async function generateLessonPlan(input: LessonPlanInput): Promise<GeneratedLessonPlan> {
-  const response = await anthropic.messages.create({
+export async function generateLessonPlan(
+  input: LessonPlanInput,
+  options: MemoizeOptions = {}
+): Promise<GeneratedLessonPlan> {
+  const response = await createMemoizedMessage('lesson-plan', {
     model: AI_MODEL,
     max_tokens: 4096,
     system: `You are an expert K-12 instructional designer with deep knowledge of evidence-based pedagogy, standards alignment, and differentiated instruction. You create lesson plans that follow a structured format with clear learning objectives, engaging activities, and embedded formative assessment. Every lesson includes differentiation strategies for students performing below, at, and above grade level. When an instructional model is specified, structure the lesson to reflect that pedagogy (e.g., inquiry-based lessons lead with a driving question, workshop model includes mini-lesson + work time + share).`,
@@ -133,7 +137,7 @@ ${input.existingMasteryContext ? `Class Context (areas students have been strugg
 Generate a complete lesson plan with clear objectives, engaging activities, embedded formative assessment, and differentiation for below-grade, on-grade, and above-grade learners.`,
       },
     ],
-  })
+  }, options)
 
   const toolUseBlock = response.content.find(
     (block): block is Extract<typeof block, { type: 'tool_use' }> => block.type === 'tool_use'
@@ -1,4 +1,5 @@
-import { anthropic, AI_MODEL } from '@/lib/ai'
+import { AI_MODEL } from '@/lib/ai'
+import { createMemoizedMessage, type MemoizeOptions } from './memoize'
 
 export interface QuizInput {
   subject: string
@@ -24,11 +25,14 @@ export interface GeneratedQuiz {
   }[]
 }
 
-export async function generateQuiz(input: QuizInput): Promise<GeneratedQuiz> {
+export async function generateQuiz(
+  input: QuizInput,
+  options: MemoizeOptions = {}
+): Promise<GeneratedQuiz> {
   const numQuestions = input.numQuestions ?? 10
   const questionTypes = input.questionTypes ?? ['multiple_choice', 'short_answer']
 
-  const response = await anthropic.messages.create({
+  const response = await createMemoizedMessage('quiz', {
     model: AI_MODEL,
     max_tokens: 4096,
     system: `You are an expert K-12 assessment designer. You create quiz questions that assess genuine understanding across all levels of Bloom's taxonomy -- from recall to creation. For multiple-choice questions, you write plausible distractors based on common student misconceptions, not obviously wrong answers. Every question includes a clear explanation of the correct answer. You distribute questions across Bloom's levels to provide a balanced assessment, with a mix of lower-order (remember, understand) and higher-order (apply, analyze, evaluate, create) items.`,
@@ -110,7 +114,7 @@ ${input.standards?.length ? `Standards: ${input.standards.join(', ')}` : ''}
 Generate ${numQuestions} questions that span Bloom's taxonomy levels.${input.difficultyLevel ? ` Target an overall difficulty of "${input.difficultyLevel}" -- adjust question complexity, vocabulary, and required reasoning depth accordingly.` : ''} For multiple-choice questions, include 4 options with plausible distractors based on common misconceptions. Include an answer key with explanations for every question.`,
       },
     ],
-  })
+  }, options)
 
   const toolUseBlock = response.content.find(
     (block): block is Extract<typeof block, { type: 'tool_use' }> => block.type === 'tool_use'
@@ -1,4 +1,5 @@
-import { anthropic, AI_MODEL } from '@/lib/ai'
+import { AI_MODEL } from '@/lib/ai'
+import { createMemoizedMessage } from './memoize'
 
 export interface RubricInput {
   title: string
@@ -29,7 +30,7 @@ const DEFAULT_LEVELS = ['Beginning', 'Developing', 'Proficient', 'Advanced']
 export async function generateRubric(input: RubricInput): Promise<GeneratedRubric> {
   const levels = input.levels ?? DEFAULT_LEVELS
 
-  const response = await anthropic.messages.create({
+  const response = await createMemoizedMessage('rubric', {
     model: AI_MODEL,
     max_tokens: 4096,
     system: `You are an expert K-12 curriculum designer and assessment specialist. You create standards-aligned rubrics that are clear, measurable, and pedagogically sound. Your rubrics follow best practices for formative and summative assessment, with descriptors that are specific, observable, and progression-based across proficiency levels. Always write student-facing success criteria as "I can" statements grounded in the learning objectives.`,
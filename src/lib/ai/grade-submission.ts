@@ -1,4 +1,11 @@
 import { anthropic, AI_MODEL } from '@/lib/ai'
+import {
+  aiRateLimiter,
+  countedInputTokens,
+  estimateTokens,
+  runWithConcurrency,
+  withRetry,
+} from './request-pool'
 
 export interface GradeSubmissionInput {
   studentWork: string
@@ -265,14 +272,35 @@ export interface BatchGradingResult {
   result: GradingResult
 }
 
+export interface BatchGradingOptions {
+  feedbackTone?: GradeSubmissionInput['feedbackTone']
+  teacherGuidance?: string
+  /** Maximum number of grading requests in flight at once. */
+  concurrency?: number
+  /** Called as each result arrives, before the remaining submissions finish. */
+  onResult?: (result: BatchGradingResult) => Promise<void> | void
+  /**
+   * Called when a submission fails after retries. When provided, the batch
+   * continues with the remaining submissions; otherwise the error is rethrown.
+   */
+  onError?: (submissionId: string, error: unknown) => Promise<void> | void
+}
+
+export const DEFAULT_GRADING_CONCURRENCY = 5
+
+/**
+ * Grade many submissions against one rubric. Requests share a cached system
+ * message (rubric + assignment), run under a bounded concurrency limit and the
+ * process-wide rate limiter, and are retried on transient API errors.
+ *
+ * The first submission is graded on its own so the prompt cache is written
+ * before the rest fan out and read from it.
+ */
 export async function batchGradeSubmissions(
   submissions: BatchSubmission[],
   rubric: GradeSubmissionInput['rubric'],
   assignment: GradeSubmissionInput['assignment'],
-  options?: {
-    feedbackTone?: GradeSubmissionInput['feedbackTone']
-    teacherGuidance?: string
-  }
+  options?: BatchGradingOptions
 ): Promise<BatchGradingResult[]> {
   const input: GradeSubmissionInput = {
     studentWork: '',
@@ -284,40 +312,77 @@ export async function batchGradeSubmissions(
 
   const systemMessage = buildCachedSystemMessage(input)
   const tool = buildGradingTool(input)
+  const systemTokens = estimateTokens(
+    ...systemMessage.map((block) => block.text),
+    JSON.stringify(tool)
+  )
 
-  const results: BatchGradingResult[] = []
-
-  for (const submission of submissions) {
-    const response = await anthropic.messages.create({
-      model: AI_MODEL,
-      max_tokens: 4096,
-      system: systemMessage,
-      tools: [tool],
-      tool_choice: { type: 'tool', name: 'grade_student_work' },
-      messages: [
-        {
-          role: 'user',
-          content: `Grade this student's work:\n\n${submission.studentWork}`,
-        },
-      ],
-    })
+  async function gradeOne(
+    submission: BatchSubmission
+  ): Promise<BatchGradingResult | null> {
+    try {
+      const estimated = systemTokens + estimateTokens(submission.studentWork)
 
-    const toolUseBlock = response.content.find(
-      (block): block is Extract<typeof block, { type: 'tool_use' }> =>
-        block.type === 'tool_use'
-    )
+      const response = await withRetry(
+        async () => {
+          await aiRateLimiter.acquire(estimated)
+          const res = await anthropic.messages.create(
+            {
+              model: AI_MODEL,
+              max_tokens: 4096,
+              system: systemMessage,
+              tools: [tool],
+              tool_choice: { type: 'tool', name: 'grade_student_work' },
+              messages: [
+                {
+                  role: 'user',
+                  content: `Grade this student's work:\n\n${submission.studentWork}`,
+                },
+              ],
+            },
+            { maxRetries: 0 }
+          )
+          aiRateLimiter.settle(estimated, countedInputTokens(res.usage))
+          return res
+        },
+        { limiter: aiRateLimiter }
+      )
 
-    if (!toolUseBlock) {
-      throw new Error(
-        `AI did not return structured grading data for submission ${submission.id}. Please try again.`
+      const toolUseBlock = response.content.find(
+        (block): block is Extract<typeof block, { type: 'tool_use' }> =>
+          block.type === 'tool_use'
       )
-    }
 
-    results.push({
-      submissionId: submission.id,
-      result: toolUseBlock.input as GradingResult,
-    })
+      if (!toolUseBlock) {
+        throw new Error(
+          `AI did not return structured grading data for submission ${submission.id}. Please try again.`
+        )
+      }
+
+      const graded: BatchGradingResult = {
+        submissionId: submission.id,
+        result: toolUseBlock.input as GradingResult,
+      }
+      await options?.onResult?.(graded)
+      return graded
+    } catch (error) {
+      if (!options?.onError) throw error
+      await options.onError(submission.id, error)
+      return null
+    }
   }
 
-  return results
+  if (submissions.length === 0) return []
+
+  const [first, ...rest] = submissions
+  const firstResult = await gradeOne(first)
+  const restResults = await runWithConcurrency(
+    rest,
+    options?.concurrency ?? DEFAULT_GRADING_CONCURRENCY,
+    gradeOne
+  )
+
+  return [firstResult, ...restResults].filter(
+    (r): r is BatchGradingResult => r !== null
+  )
 }
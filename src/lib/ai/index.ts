@@ -19,14 +19,34 @@ export type {
   AssessmentDifferentiationResult,
 } from './differentiate'
 
-export { gradeSubmission, batchGradeSubmissions } from './grade-submission'
+export {
+  gradeSubmission,
+  batchGradeSubmissions,
+  DEFAULT_GRADING_CONCURRENCY,
+} from './grade-submission'
 export type {
   GradeSubmissionInput,
   GradingResult,
   BatchSubmission,
   BatchGradingResult,
+  BatchGradingOptions,
 } from './grade-submission'
 
+export {
+  AIRateLimiter,
+  aiRateLimiter,
+  runWithConcurrency,
+  withRetry,
+} from './request-pool'
+export type { RateLimiterOptions, RetryOptions } from './request-pool'
+
+export {
+  createMemoizedMessage,
+  getMemoizationStats,
+  trimMemoizedGenerations,
+} from './memoize'
+export type { MemoizeOptions } from './memoize'
+
 export {
   generatePresentLevels,
   generateIEPGoals,
@@ -58,13 +78,18 @@ export type {
   TranslatedContent,
 } from './parent-communication'
 
-export { streamTutorResponse } from './tutor'
-export type { TutorInput } from './tutor'
+export { streamTutorResponse, summarizeTutorConversation } from './tutor'
+export type { TutorInput, TutorTurn } from './tutor'
 
-export { generateReportCardNarrative } from './report-card'
+export {
+  generateReportCardNarrative,
+  batchGenerateReportCards,
+  DEFAULT_REPORT_CARD_CONCURRENCY,
+} from './report-card'
 export type {
   ReportCardInput,
   GeneratedReportCard,
+  BatchReportCardOptions,
 } from './report-card'
 
 export { generateDistrictInsights } from './district-insights'
@@ -0,0 +1,156 @@
+import type Anthropic from '@anthropic-ai/sdk'
+import { createHash } from 'crypto'
+import { sql } from 'drizzle-orm'
+import { anthropic } from '@/lib/ai'
+import { db } from '@/lib/db'
+import { cached, setCache } from '@/lib/cache'
+
+/**
+ * Content-addressed memoization for deterministic generations. The cache key
+ * is a hash of the complete request (model, system prompt, tool schema and
+ * user input), so byte-identical requests -- the same digest translated for 30
+ * parents, the same rubric requested twice -- reach the API once.
+ *
+ * Modules opt in by calling `createMemoizedMessage` in place of
+ * `anthropic.messages.create`. Entries live in the shared two-tier cache,
+ * tagged `ai` and `ai:<module>`, and the total stored size is trimmed
+ * oldest-first to stay under `MAX_TOTAL_BYTES`. Set `AI_MEMOIZATION=off` to
+ * bypass it.
+ *
+ * Generators that sample at the default temperature (lesson plans, quizzes,
+ * assignments, exit tickets) pass `fresh: true` when the user asks for another
+ * version: the stored result is skipped, and the new one replaces it.
+ */
+
+const MEMO_TTL_MS = 30 * 24 * 60 * 60 * 1000
+const MAX_ENTRY_BYTES = 256 * 1024
+const MAX_TOTAL_BYTES = 64 * 1024 * 1024
+const TRIM_EVERY_WRITES = 50
+/** Carried by every memoized entry, so the trim is served by the tags index. */
+const MEMO_TAG = 'ai'
+
+const moduleStats = new Map<string, { hits: number; misses: number; bypassed: number }>()
+let writesSinceTrim = 0
+
+function statsFor(module: string) {
+  let entry = moduleStats.get(module)
+  if (!entry) {
+    entry = { hits: 0, misses: 0, bypassed: 0 }
+    moduleStats.set(module, entry)
+  }
+  return entry
+}
+
+function isReplayable(message: Anthropic.Message): boolean {
+  // Truncated output is not worth replaying, and oversized responses would
+  // crowd everything else out of the byte budget
+  return (
+    message.stop_reason !== 'max_tokens' &&
+    Buffer.byteLength(JSON.stringify(message)) <= MAX_ENTRY_BYTES
+  )
+}
+
+export function memoizationKey(
+  module: string,
+  params: Anthropic.MessageCreateParamsNonStreaming
+): string {
+  const digest = createHash('sha256').update(JSON.stringify(params)).digest('hex')
+  return `ai:${module}:${digest}`
+}
+
+/**
+ * Drop the oldest memoized generations until the total stored size is within
+ * `MAX_TOTAL_BYTES`.
+ */
+export async function trimMemoizedGenerations(): Promise<void> {
+  await db.execute(sql`
+    delete from cache_entries
+    where key in (
+      select key from (
+        select key, sum(octet_length(value)) over (order by created_at desc) as running_bytes
+        from cache_entries
+        where tags @> array[${MEMO_TAG}]::text[]
+      ) ranked
+      where running_bytes > ${MAX_TOTAL_BYTES}
+    )
+  `)
+}
+
+export interface MemoizeOptions {
+  /** Skip the stored result and call the API; the new result is stored in its place. */
+  fresh?: boolean
+}
+
+function countWrite() {
+  if (++writesSinceTrim >= TRIM_EVERY_WRITES) {
+    writesSinceTrim = 0
+    trimMemoizedGenerations().catch((error) => {
+      console.error('Failed to trim memoized AI generations:', error)
+    })
+  }
+}
+
+export async function createMemoizedMessage(
+  module: string,
+  params: Anthropic.MessageCreateParamsNonStreaming,
+  options: MemoizeOptions = {}
+): Promise<Anthropic.Message> {
+  if (process.env.AI_MEMOIZATION === 'off') {
+    return anthropic.messages.create(params)
+  }
+
+  const stats = statsFor(module)
+  const key = memoizationKey(module, params)
+  const cacheOptions = { tags: [MEMO_TAG, `ai:${module}`] }
+
+  if (options.fresh) {
+    stats.bypassed++
+    const message = await anthropic.messages.create(params)
+    if (isReplayable(message)) {
+      try {
+        await setCache(key, message, MEMO_TTL_MS, cacheOptions)
+        countWrite()
+      } catch (error) {
+        console.error(`Failed to store memoized ${module} generation:`, error)
+      }
+    }
+    return message
+  }
+
+  let calledApi = false
+
+  const message = await cached(
+    key,
+    async () => {
+      calledApi = true
+      return anthropic.messages.create(params)
+    },
+    {
+      ...cacheOptions,
+      ttlMs: MEMO_TTL_MS,
+      cacheable: (value) => isReplayable(value as Anthropic.Message),
+    }
+  )
+
+  if (calledApi) {
+    stats.misses++
+    countWrite()
+  } else {
+    stats.hits++
+  }
+
+  return message
+}
+
+/**
+ * Per-module hit rates since process start. `bypassed` counts `fresh`
+ * requests, which are not part of the hit rate.
+ */
+export function getMemoizationStats() {
+  return Object.fromEntries(
+    [...moduleStats].map(([module, { hits, misses, bypassed }]) => [
+      module,
+      { hits, misses, bypassed, hitRate: hits + misses > 0 ? hits / (hits + misses) : 0 },
+    ])
+  )
+}
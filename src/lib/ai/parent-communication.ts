@@ -1,4 +1,5 @@
 import { anthropic, AI_MODEL } from '@/lib/ai'
+import { createMemoizedMessage } from './memoize'
 
 // ---------------------------------------------------------------------------
 // Types
@@ -168,7 +169,7 @@ export async function generateWeeklyDigest(
     })
     .join('\n\n')
 
-  const response = await anthropic.messages.create({
+  const response = await createMemoizedMessage('weekly-digest', {
     model: AI_MODEL,
     max_tokens: 2048,
     system: `You are a warm, supportive K-12 educator writing a weekly digest for parents. Your tone is conversational and encouraging. Use plain language -- no educational jargon or standards codes. Focus on giving parents a quick, clear picture of what their child did this week, what went well, anything to watch, and what is coming up.`,
@@ -247,7 +248,7 @@ Summarize the week's activities in an approachable, parent-friendly way. Highlig
 export async function translateCommunication(
   input: TranslationInput
 ): Promise<TranslatedContent> {
-  const response = await anthropic.messages.create({
+  const response = await createMemoizedMessage('translate', {
     model: AI_MODEL,
     max_tokens: 4096,
     system: `You are an expert multilingual translator specializing in K-12 education communication. You translate school-related messages between languages while preserving the warm, supportive tone appropriate for parent communication. You understand education-specific vocabulary and translate it naturally -- for example, "rubric" might become a culturally appropriate equivalent, and grade levels should be expressed in the target language's educational system conventions when relevant. Maintain the original formatting, paragraph structure, and emphasis. Do not add or remove content.`,
@@ -1,4 +1,12 @@
+import type Anthropic from '@anthropic-ai/sdk'
 import { anthropic, AI_MODEL } from '@/lib/ai'
+import {
+  aiRateLimiter,
+  countedInputTokens,
+  estimateTokens,
+  runWithConcurrency,
+  withRetry,
+} from './request-pool'
 
 // ---------------------------------------------------------------------------
 // Types
@@ -35,12 +43,65 @@ export interface GeneratedReportCard {
 }
 
 // ---------------------------------------------------------------------------
-// generateReportCardNarrative
+// Prompt
 // ---------------------------------------------------------------------------
 
-export async function generateReportCardNarrative(
-  input: ReportCardInput
-): Promise<GeneratedReportCard> {
+const REPORT_CARD_SYSTEM = `You are an experienced K-12 educator writing report card narratives for parents. Your language is clear, specific, evidence-based, and parent-friendly. You avoid educational jargon and standards codes in the narrative -- use plain descriptions of skills and concepts instead. Write in a warm, professional tone that conveys genuine knowledge of the student. Every claim should be grounded in the data provided. Frame growth areas constructively as opportunities, not deficits. Recommendations should be specific and actionable for both home and school settings.`
+
+const reportCardTool: Anthropic.Tool = {
+  name: 'generate_report_card',
+  description:
+    'Generate a comprehensive report card narrative with structured sections for a student based on their longitudinal performance data.',
+  input_schema: {
+    type: 'object',
+    properties: {
+      overallNarrative: {
+        type: 'string',
+        description:
+          'A 2-3 paragraph narrative summarizing the student\'s performance this grading period. Use plain language appropriate for parents. Reference specific assignments, skills, and growth patterns from the data. Write as if addressing the parent directly.',
+      },
+      strengths: {
+        type: 'array',
+        items: { type: 'string' },
+        description:
+          'Specific strengths demonstrated this grading period (3-5 items). Each strength should cite concrete evidence from submissions, scores, or mastery data. Use plain language.',
+      },
+      areasForGrowth: {
+        type: 'array',
+        items: { type: 'string' },
+        description:
+          'Areas where the student can improve (2-3 items). Frame constructively as growth opportunities with specific skill descriptions. Avoid deficit language.',
+      },
+      recommendations: {
+        type: 'array',
+        items: { type: 'string' },
+        description:
+          'Actionable suggestions for supporting the student (2-3 items). Include a mix of home activities and school-based strategies. Each recommendation should be specific and practical.',
+      },
+      gradeRecommendation: {
+        type: 'string',
+        enum: [
+          'A+', 'A', 'A-',
+          'B+', 'B', 'B-',
+          'C+', 'C', 'C-',
+          'D+', 'D', 'D-',
+          'F',
+        ],
+        description:
+          'Letter grade recommendation based on the overall data. Use standard grading scale: A (90-100%), B (80-89%), C (70-79%), D (60-69%), F (below 60%).',
+      },
+    },
+    required: [
+      'overallNarrative',
+      'strengths',
+      'areasForGrowth',
+      'recommendations',
+      'gradeRecommendation',
+    ],
+  },
+}
+
+function buildReportCardPrompt(input: ReportCardInput): string {
   const submissionsSection = input.submissions.length
     ? input.submissions
         .map(
@@ -66,69 +127,7 @@ export async function generateReportCardNarrative(
   // Use only the student's first name to minimize PII sent to the AI
   const firstName = input.studentName.split(' ')[0] || 'Student'
 
-  const response = await anthropic.messages.create({
-    model: AI_MODEL,
-    max_tokens: 4096,
-    system: `You are an experienced K-12 educator writing report card narratives for parents. Your language is clear, specific, evidence-based, and parent-friendly. You avoid educational jargon and standards codes in the narrative -- use plain descriptions of skills and concepts instead. Write in a warm, professional tone that conveys genuine knowledge of the student. Every claim should be grounded in the data provided. Frame growth areas constructively as opportunities, not deficits. Recommendations should be specific and actionable for both home and school settings.`,
-    tools: [
-      {
-        name: 'generate_report_card',
-        description:
-          'Generate a comprehensive report card narrative with structured sections for a student based on their longitudinal performance data.',
-        input_schema: {
-          type: 'object' as const,
-          properties: {
-            overallNarrative: {
-              type: 'string',
-              description:
-                'A 2-3 paragraph narrative summarizing the student\'s performance this grading period. Use plain language appropriate for parents. Reference specific assignments, skills, and growth patterns from the data. Write as if addressing the parent directly.',
-            },
-            strengths: {
-              type: 'array',
-              items: { type: 'string' },
-              description:
-                'Specific strengths demonstrated this grading period (3-5 items). Each strength should cite concrete evidence from submissions, scores, or mastery data. Use plain language.',
-            },
-            areasForGrowth: {
-              type: 'array',
-              items: { type: 'string' },
-              description:
-                'Areas where the student can improve (2-3 items). Frame constructively as growth opportunities with specific skill descriptions. Avoid deficit language.',
-            },
-            recommendations: {
-              type: 'array',
-              items: { type: 'string' },
-              description:
-                'Actionable suggestions for supporting the student (2-3 items). Include a mix of home activities and school-based strategies. Each recommendation should be specific and practical.',
-            },
-            gradeRecommendation: {
-              type: 'string',
-              enum: [
-                'A+', 'A', 'A-',
-                'B+', 'B', 'B-',
-                'C+', 'C', 'C-',
-                'D+', 'D', 'D-',
-                'F',
-              ],
-              description:
-                'Letter grade recommendation based on the overall data. Use standard grading scale: A (90-100%), B (80-89%), C (70-79%), D (60-69%), F (below 60%).',
-            },
-          },
-          required: [
-            'overallNarrative',
-            'strengths',
-            'areasForGrowth',
-            'recommendations',
-            'gradeRecommendation',
-          ],
-        },
-      },
-    ],
-    tool_choice: { type: 'tool', name: 'generate_report_card' },
-    messages: [
-      {
-        role: 'user',
-        content: `Generate a report card narrative for this student:
+  return `Generate a report card narrative for this student:
 
 Student: ${firstName}
 Class: ${input.className}
@@ -145,11 +144,21 @@ ${masterySection}
 Prior Feedback Highlights:
 ${feedbackSection}
 
-Write a comprehensive, evidence-based report card narrative. Include specific strengths with concrete examples from the data, constructive growth areas, actionable recommendations for home and school, and a letter grade recommendation based on the scores and mastery data.`,
-      },
-    ],
-  })
+Write a comprehensive, evidence-based report card narrative. Include specific strengths with concrete examples from the data, constructive growth areas, actionable recommendations for home and school, and a letter grade recommendation based on the scores and mastery data.`
+}
 
+function buildReportCardRequest(prompt: string): Anthropic.MessageCreateParamsNonStreaming {
+  return {
+    model: AI_MODEL,
+    max_tokens: 4096,
+    system: REPORT_CARD_SYSTEM,
+    tools: [reportCardTool],
+    tool_choice: { type: 'tool', name: 'generate_report_card' },
+    messages: [{ role: 'user', content: prompt }],
+  }
+}
+
+function parseReportCard(response: Anthropic.Message): GeneratedReportCard {
   const toolUseBlock = response.content.find(
     (block): block is Extract<typeof block, { type: 'tool_use' }> =>
       block.type === 'tool_use'
@@ -163,3 +172,75 @@ Write a comprehensive, evidence-based report card narrative. Include specific st
 
   return toolUseBlock.input as GeneratedReportCard
 }
+
+// ---------------------------------------------------------------------------
+// generateReportCardNarrative
+// ---------------------------------------------------------------------------
+
+export async function generateReportCardNarrative(
+  input: ReportCardInput
+): Promise<GeneratedReportCard> {
+  const response = await anthropic.messages.create(
+    buildReportCardRequest(buildReportCardPrompt(input))
+  )
+  return parseReportCard(response)
+}
+
+// ---------------------------------------------------------------------------
+// batchGenerateReportCards
+// ---------------------------------------------------------------------------
+
+export interface BatchReportCardOptions<K> {
+  concurrency?: number
+  /** Per-attempt request timeout in milliseconds. */
+  timeoutMs?: number
+  /** Called as each narrative arrives, before the remaining ones finish. */
+  onResult?: (key: K, card: GeneratedReportCard) => Promise<void> | void
+  /** Called when a narrative fails after retries; the batch continues. */
+  onError?: (key: K, error: unknown) => Promise<void> | void
+}
+
+export const DEFAULT_REPORT_CARD_CONCURRENCY = 8
+
+/**
+ * Generate narratives for many students. Requests run under a bounded
+ * concurrency limit and the process-wide rate limiter, and are retried on
+ * transient API errors; a timed-out request is retried only once. A failure
+ * for one student is reported through `onError` and does not stop the others.
+ */
+export async function batchGenerateReportCards<K>(
+  items: { key: K; input: ReportCardInput }[],
+  options?: BatchReportCardOptions<K>
+): Promise<void> {
+  const fixedTokens = estimateTokens(REPORT_CARD_SYSTEM, JSON.stringify(reportCardTool))
+
+  await runWithConcurrency(
+    items,
+    options?.concurrency ?? DEFAULT_REPORT_CARD_CONCURRENCY,
+    async ({ key, input }) => {
+      try {
+        const prompt = buildReportCardPrompt(input)
+        const estimated = fixedTokens + estimateTokens(prompt)
+
+        const response = await withRetry(
+          async () => {
+            await aiRateLimiter.acquire(estimated)
+            const res = await anthropic.messages.create(buildReportCardRequest(prompt), {
+              maxRetries: 0,
+              timeout: options?.timeoutMs,
+            })
+            aiRateLimiter.settle(estimated, countedInputTokens(res.usage))
+            return res
+          },
+          // One slow student must not hold a worker for several full timeouts
+          { limiter: aiRateLimiter, maxTimeoutRetries: 1 }
+        )
+
+        await options?.onResult?.(key, parseReportCard(response))
+      } catch (error) {
+        if (!options?.onError) throw error
+        await options.onError(key, error)
+      }
+    }
+  )
+}
@@ -0,0 +1,216 @@
+import Anthropic from '@anthropic-ai/sdk'
+
+/**
+ * Shared primitives for fanning AI requests out in parallel without tripping
+ * the provider's rate limits: a process-wide request/token budget, a bounded
+ * worker pool, and retry with exponential backoff.
+ */
+
+const MINUTE_MS = 60_000
+
+export interface RateLimiterOptions {
+  requestsPerMinute: number
+  inputTokensPerMinute: number
+}
+
+/**
+ * Token-bucket limiter covering both requests per minute and input tokens per
+ * minute. Callers reserve an estimated token count before sending a request and
+ * settle it against the actual usage afterwards, so prompt-cache reads (which do
+ * not count against input-token limits) are refunded to the budget.
+ */
+export class AIRateLimiter {
+  private requestBudget: number
+  private tokenBudget: number
+  private lastRefill = Date.now()
+  private pausedUntil = 0
+  private queue: Promise<void> = Promise.resolve()
+
+  constructor(private readonly options: RateLimiterOptions) {
+    this.requestBudget = options.requestsPerMinute
+    this.tokenBudget = options.inputTokensPerMinute
+  }
+
+  /**
+   * Wait until one request and `estimatedTokens` input tokens are available,
+   * then reserve them. Acquirers are served in FIFO order.
+   */
+  acquire(estimatedTokens: number): Promise<void> {
+    const tokens = Math.min(estimatedTokens, this.options.inputTokensPerMinute)
+    const turn = this.queue.then(() => this.waitFor(tokens))
+    this.queue = turn.catch(() => undefined)
+    return turn
+  }
+
+  /**
+   * Reconcile a reservation with the tokens the request actually consumed.
+   */
+  settle(estimatedTokens: number, actualTokens: number): void {
+    this.refill()
+    const reserved = Math.min(estimatedTokens, this.options.inputTokensPerMinute)
+    this.tokenBudget = Math.min(
+      this.options.inputTokensPerMinute,
+      this.tokenBudget + reserved - actualTokens
+    )
+  }
+
+  /**
+   * Stop issuing new requests for `ms` milliseconds (e.g. after a 429).
+   */
+  pause(ms: number): void {
+    this.pausedUntil = Math.max(this.pausedUntil, Date.now() + ms)
+  }
+
+  private refill(): void {
+    const now = Date.now()
+    const elapsed = now - this.lastRefill
+    this.lastRefill = now
+    this.requestBudget = Math.min(
+      this.options.requestsPerMinute,
+      this.requestBudget + (elapsed * this.options.requestsPerMinute) / MINUTE_MS
+    )
+    this.tokenBudget = Math.min(
+      this.options.inputTokensPerMinute,
+      this.tokenBudget + (elapsed * this.options.inputTokensPerMinute) / MINUTE_MS
+    )
+  }
+
+  private async waitFor(tokens: number): Promise<void> {
+    for (;;) {
+      this.refill()
+      const pauseMs = this.pausedUntil - Date.now()
+      if (pauseMs > 0) {
+        await sleep(pauseMs)
+        continue
+      }
+      if (this.requestBudget >= 1 && this.tokenBudget >= tokens) {
+        this.requestBudget -= 1
+        this.tokenBudget -= tokens
+        return
+      }
+      const requestWait = ((1 - this.requestBudget) * MINUTE_MS) / this.options.requestsPerMinute
+      const tokenWait = ((tokens - this.tokenBudget) * MINUTE_MS) / this.options.inputTokensPerMinute
+      await sleep(Math.max(requestWait, tokenWait, 10))
+    }
+  }
+}
+
+export const aiRateLimiter = new AIRateLimiter({
+  requestsPerMinute: Number(process.env.ANTHROPIC_REQUESTS_PER_MINUTE ?? 50),
+  inputTokensPerMinute: Number(process.env.ANTHROPIC_INPUT_TOKENS_PER_MINUTE ?? 30_000),
+})
+
+/**
+ * Rough input-token estimate (~4 characters per token) used for budgeting
+ * before the real count is known.
+ */
+export function estimateTokens(...texts: string[]): number {
+  return Math.ceil(texts.reduce((sum, text) => sum + text.length, 0) / 4)
+}
+
+/**
+ * Input tokens that count against the provider's rate limit. Cache reads are
+ * excluded; cache writes are billed as input.
+ */
+export function countedInputTokens(usage: Anthropic.Usage): number {
+  return usage.input_tokens + (usage.cache_creation_input_tokens ?? 0)
+}
+
+export interface RetryOptions {
+  maxAttempts?: number
+  /** Retries allowed after a request timeout, within `maxAttempts`. */
+  maxTimeoutRetries?: number
+  baseDelayMs?: number
+  maxDelayMs?: number
+  limiter?: AIRateLimiter
+}
+
+function isRetryable(error: unknown): boolean {
+  if (!(error instanceof Anthropic.APIError)) return false
+  // Connection errors carry no status; 429 is rate limiting, 5xx/529 is overload
+  return error.status === undefined || error.status === 429 || error.status >= 500
+}
+
+function retryAfterMs(error: unknown): number | null {
+  if (!(error instanceof Anthropic.APIError)) return null
+  const header = error.headers?.get('retry-after')
+  if (!header) return null
+  const seconds = Number(header)
+  return Number.isFinite(seconds) ? seconds * 1000 : null
+}
+
+/**
+ * Run `fn`, retrying transient API failures with exponential backoff and
+ * jitter. A `retry-after` header from the API takes precedence over the
+ * computed delay, and rate-limit responses pause the shared limiter so other
+ * in-flight workers back off too.
+ */
+export async function withRetry<T>(
+  fn: () => Promise<T>,
+  options: RetryOptions = {}
+): Promise<T> {
+  const {
+    maxAttempts = 4,
+    maxTimeoutRetries = Infinity,
+    baseDelayMs = 1000,
+    maxDelayMs = 30_000,
+    limiter,
+  } = options
+  let timeouts = 0
+
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await fn()
+    } catch (error) {
+      if (attempt >= maxAttempts || !isRetryable(error)) throw error
+      // A timed-out request already used its full timeout
+      if (error instanceof Anthropic.APIConnectionTimeoutError && ++timeouts > maxTimeoutRetries) {
+        throw error
+      }
+
+      const backoff = Math.min(maxDelayMs, baseDelayMs * 2 ** (attempt - 1))
+      const delay = retryAfterMs(error) ?? backoff / 2 + Math.random() * (backoff / 2)
+
+      if (limiter && error instanceof Anthropic.APIError && error.status === 429) {
+        limiter.pause(delay)
+      }
+      await sleep(delay)
+    }
+  }
+}
+
+/**
+ * Process `items` with at most `concurrency` workers in flight. Results are
+ * returned in input order. If a worker throws, no new items are started and
+ * the first error is rethrown once in-flight work has drained.
+ */
+export async function runWithConcurrency<T, R>(
+  items: T[],
+  concurrency: number,
+  worker: (item: T, index: number) => Promise<R>
+): Promise<R[]> {
+  const results = new Array<R>(items.length)
+  let next = 0
+  let failure: { error: unknown } | null = null
+
+  async function drain() {
+    while (!failure && next < items.length) {
+      const index = next++
+      try {
+        results[index] = await worker(items[index], index)
+      } catch (error) {
+        failure ??= { error }
+      }
+    }
+  }
+
+  const workerCount = Math.max(1, Math.min(concurrency, items.length))
+  await Promise.all(Array.from({ length: workerCount }, drain))
+
+  if (failure) throw (failure as { error: unknown }).error
+  return results
+}
+
+function sleep(ms: number): Promise<void> {
+  return new Promise((resolve) => setTimeout(resolve, ms))
+}
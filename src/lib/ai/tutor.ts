@@ -1,8 +1,17 @@
+import type Anthropic from '@anthropic-ai/sdk'
 import { anthropic, AI_MODEL } from '@/lib/ai'
 
+export interface TutorTurn {
+  role: 'user' | 'assistant'
+  content: string
+}
+
 export interface TutorInput {
   message: string
-  conversationHistory: { role: 'user' | 'assistant'; content: string }[]
+  /** Recent turns only; anything older is carried by `summary`. */
+  conversationHistory: TutorTurn[]
+  /** Rolling summary of the turns before `conversationHistory`. */
+  summary?: string | null
   subject: string
   gradeLevel: string
   assignmentContext?: {
@@ -95,18 +104,69 @@ CONVERSATION STYLE:
 - Use encouraging transitions between topics${assignmentSection}`
 }
 
-export function streamTutorResponse(input: TutorInput): ReadableStream<Uint8Array> {
-  const { message, conversationHistory, subject, gradeLevel, assignmentContext } = input
+/**
+ * System blocks with cache breakpoints: the tutor instructions only change with
+ * subject, grade and assignment, and the summary only when it is rolled
+ * forward, so both are read from the prompt cache on most turns.
+ */
+function buildSystemBlocks(
+  subject: string,
+  gradeLevel: string,
+  assignmentContext: TutorInput['assignmentContext'],
+  summary: string | null | undefined
+): Anthropic.TextBlockParam[] {
+  const blocks: Anthropic.TextBlockParam[] = [
+    {
+      type: 'text',
+      text: buildTutorSystemPrompt(subject, gradeLevel, assignmentContext),
+      cache_control: { type: 'ephemeral' },
+    },
+  ]
+  if (summary) {
+    blocks.push({
+      type: 'text',
+      text: `EARLIER IN THIS SESSION (summary of messages no longer shown):\n${summary}`,
+      cache_control: { type: 'ephemeral' },
+    })
+  }
+  return blocks
+}
 
-  const systemPrompt = buildTutorSystemPrompt(subject, gradeLevel, assignmentContext)
+/**
+ * The API expects alternating turns starting with the student. A reply that
+ * failed to save can leave two student turns in a row, so adjacent turns from
+ * the same role are merged and a leading tutor turn is dropped.
+ */
+function toAlternatingTurns(turns: TutorTurn[]): TutorTurn[] {
+  const result: TutorTurn[] = []
+  for (const turn of turns) {
+    if (result.length === 0 && turn.role === 'assistant') continue
+    const last = result[result.length - 1]
+    if (last && last.role === turn.role) {
+      last.content = `${last.content}\n\n${turn.content}`
+    } else {
+      result.push({ ...turn })
+    }
+  }
+  return result
+}
 
-  const messages = [
-    ...conversationHistory.map((msg) => ({
-      role: msg.role as 'user' | 'assistant',
-      content: msg.content,
-    })),
-    { role: 'user' as const, content: message },
-  ]
+export function streamTutorResponse(input: TutorInput): ReadableStream<Uint8Array> {
+  const { message, conversationHistory, summary, subject, gradeLevel, assignmentContext } = input
+
+  const system = buildSystemBlocks(subject, gradeLevel, assignmentContext, summary)
+
+  const turns = toAlternatingTurns([...conversationHistory, { role: 'user', content: message }])
+  // Cache breakpoint on the last prior turn: the next request repeats this
+  // prefix exactly, so only the newest exchange is billed as fresh input
+  const messages: Anthropic.MessageParam[] = turns.map((turn, i) =>
+    i === turns.length - 2
+      ? {
+          role: turn.role,
+          content: [{ type: 'text', text: turn.content, cache_control: { type: 'ephemeral' } }],
+        }
+      : { role: turn.role, content: turn.content }
+  )
 
   const encoder = new TextEncoder()
 
@@ -117,7 +177,7 @@ export function streamTutorResponse(input: TutorInput): ReadableStream<Uint8Arra
           model: AI_MODEL,
           max_tokens: 1024,
           temperature: 0.7,
-          system: systemPrompt,
+          system,
           messages,
         })
 
@@ -139,3 +199,41 @@ export function streamTutorResponse(input: TutorInput): ReadableStream<Uint8Arra
     },
   })
 }
+
+/**
+ * Fold older turns into the session's rolling summary so later requests can
+ * send the summary in place of the full transcript.
+ */
+export async function summarizeTutorConversation(input: {
+  subject: string
+  previousSummary: string | null
+  turns: TutorTurn[]
+}): Promise<string> {
+  const transcript = input.turns
+    .map((t) => `${t.role === 'user' ? 'Student' : 'Tutor'}: ${t.content}`)
+    .join('\n\n')
+
+  const response = await anthropic.messages.create({
+    model: AI_MODEL,
+    max_tokens: 600,
+    temperature: 0,
+    system: `You maintain a running summary of a Socratic ${input.subject} tutoring session so the tutor can continue it without the full transcript. Record what the student is working on, what they have understood, their misconceptions and where they are stuck, the hints and questions already given, and any problem currently in progress (with its exact numbers or text). Write in the third person, in at most 250 words. Output only the summary.`,
+    messages: [
+      {
+        role: 'user',
+        content: `${input.previousSummary ? `SUMMARY SO FAR:\n${input.previousSummary}\n\n` : ''}NEW MESSAGES:\n${transcript}\n\nWrite the updated summary.`,
+      },
+    ],
+  })
+
+  const text = response.content
+    .filter((block): block is Extract<typeof block, { type: 'text' }> => block.type === 'text')
+    .map((block) => block.text)
+    .join('')
+    .trim()
+
+  if (!text) {
+    throw new Error('Tutor summary was empty')
+  }
+  return text
+}
@@ -0,0 +1,651 @@
+import { db } from '@/lib/db'
+import {
+  analyticsCounters,
+  analyticsDailyRollups,
+  analyticsTeacherRollups,
+  analyticsSchoolRollups,
+  analyticsSubjectRollups,
+  users,
+  schools,
+  classes,
+  classMembers,
+  assignments,
+  submissions,
+  feedbackDrafts,
+  masteryRecords,
+  lessonPlans,
+  rubrics,
+} from '@/lib/db/schema'
+import { eq, desc, gt, gte, inArray, sql, type SQL } from 'drizzle-orm'
+import type { AnyPgColumn } from 'drizzle-orm/pg-core'
+
+/**
+ * Materialized analytics for the admin dashboards. Instead of scanning the
+ * base tables on every request, writes that change submissions, grades,
+ * feedback, mastery, lesson plans, assignments or rubrics apply small deltas
+ * to per-teacher, per-school, per-subject and per-day rollup rows plus a set
+ * of district-wide counters. Readers then fetch a handful of rows.
+ *
+ * Deltas are collected in a `RollupBatch` and written with one multi-row
+ * upsert per table. The same batch is built from aggregate queries over the
+ * base tables by `collectRollups`, which backs the full rebuild and the
+ * sandbox clone/cleanup paths.
+ *
+ * Route hooks never fail the write they follow: errors are logged, and
+ * `npm run analytics:rebuild` restores exact values.
+ */
+
+type DbExecutor = Pick<typeof db, 'select' | 'insert' | 'delete'>
+
+const ROLLUP_ERROR = 'Failed to update analytics rollups (run `npm run analytics:rebuild` to repair):'
+
+type TeacherField = 'assignments' | 'submissions' | 'gradedSubmissions' | 'feedbackDrafts' | 'lessonPlans' | 'rubrics'
+type SchoolField = 'assignments' | 'submissions' | 'gradedSubmissions' | 'scoredSubmissions' | 'scorePercentSum'
+type SubjectField = 'submissions' | 'scoredSubmissions' | 'scorePercentSum'
+type DailyField = 'assignmentsCreated' | 'submissionsGraded' | 'lessonPlansCreated'
+
+/** Teacher columns whose "teachers with at least one" totals are kept as counters. */
+const ENGAGEMENT_FIELDS = ['assignments', 'lessonPlans', 'rubrics', 'feedbackDrafts'] as const
+
+export const rollupMetrics = {
+  schools: 'schools',
+  classes: 'classes',
+  assignments: 'assignments',
+  submissions: 'submissions',
+  gradedSubmissions: 'submissions_graded',
+  ungradedSubmissions: 'submissions_ungraded',
+  feedbackDrafts: 'feedback_drafts',
+  lessonPlans: 'lesson_plans',
+  rubrics: 'rubrics',
+  users: (role: string) => `users:${role}`,
+  mastery: (level: string) => `mastery:${level}`,
+  teachersWith: (field: (typeof ENGAGEMENT_FIELDS)[number]) => `teachers_with:${field}`,
+}
+
+/** The fields of a submission that affect the rollups. */
+export interface SubmissionSnapshot {
+  status: string
+  totalScore: number | null
+  maxScore: number | null
+  gradedAt: Date | null
+}
+
+/** Where a submission is attributed: its assignment's teacher, class school and subject. */
+export interface SubmissionDims {
+  teacherId: string
+  schoolId: string | null
+  subject: string
+}
+
+interface SubmissionAggregate {
+  status: string
+  gradedDay: string | null
+  count: number
+  scored: number
+  scorePercentSum: number
+}
+
+export function rollupDay(date: Date): string {
+  return date.toISOString().slice(0, 10)
+}
+
+function isGraded(status: string): boolean {
+  return status === 'graded' || status === 'returned'
+}
+
+function isAwaitingGrade(status: string): boolean {
+  return status === 'submitted' || status === 'grading'
+}
+
+function scorePercent(s: SubmissionSnapshot): number | null {
+  if (s.totalScore === null || s.maxScore === null || s.maxScore <= 0) return null
+  return (s.totalScore / s.maxScore) * 100
+}
+
+function aggregateOf(s: SubmissionSnapshot): SubmissionAggregate {
+  const pct = scorePercent(s)
+  return {
+    status: s.status,
+    gradedDay: s.gradedAt ? rollupDay(s.gradedAt) : null,
+    count: 1,
+    scored: pct === null ? 0 : 1,
+    scorePercentSum: pct ?? 0,
+  }
+}
+
+function bump<K extends string>(
+  map: Map<string, Partial<Record<K, number>>>,
+  key: string,
+  field: K,
+  n: number
+): void {
+  if (n === 0) return
+  const entry = map.get(key) ?? {}
+  entry[field] = (entry[field] ?? 0) + n
+  map.set(key, entry)
+}
+
+function nonZero<K extends string>(
+  map: Map<string, Partial<Record<K, number>>>
+): [string, Partial<Record<K, number>>][] {
+  return [...map].filter(([, fields]) =>
+    Object.values<number | undefined>(fields).some((v) => v !== undefined && v !== 0)
+  )
+}
+
+function plusExcluded(column: AnyPgColumn): SQL {
+  return sql`${column} + excluded.${sql.identifier(column.name)}`
+}
+
+export class RollupBatch {
+  readonly counters = new Map<string, number>()
+  readonly daily = new Map<string, Partial<Record<DailyField, number>>>()
+  readonly teachers = new Map<string, Partial<Record<TeacherField, number>>>()
+  readonly schools = new Map<string, Partial<Record<SchoolField, number>>>()
+  readonly subjects = new Map<string, Partial<Record<SubjectField, number>>>()
+
+  counter(metric: string, n: number): this {
+    if (n !== 0) this.counters.set(metric, (this.counters.get(metric) ?? 0) + n)
+    return this
+  }
+
+  user(role: string, n = 1): this {
+    return this.counter(rollupMetrics.users(role), n)
+  }
+
+  mastery(level: string, n = 1): this {
+    return this.counter(rollupMetrics.mastery(level), n)
+  }
+
+  rubric(teacherId: string, n = 1): this {
+    bump(this.teachers, teacherId, 'rubrics', n)
+    return this.counter(rollupMetrics.rubrics, n)
+  }
+
+  feedbackDrafts(teacherId: string, n: number): this {
+    bump(this.teachers, teacherId, 'feedbackDrafts', n)
+    return this.counter(rollupMetrics.feedbackDrafts, n)
+  }
+
+  lessonPlan(teacherId: string, createdAt: Date, n = 1): this {
+    bump(this.teachers, teacherId, 'lessonPlans', n)
+    bump(this.daily, rollupDay(createdAt), 'lessonPlansCreated', n)
+    return this.counter(rollupMetrics.lessonPlans, n)
+  }
+
+  assignment(dims: SubmissionDims, createdAt: Date, n = 1): this {
+    bump(this.teachers, dims.teacherId, 'assignments', n)
+    if (dims.schoolId) bump(this.schools, dims.schoolId, 'assignments', n)
+    bump(this.daily, rollupDay(createdAt), 'assignmentsCreated', n)
+    return this.counter(rollupMetrics.assignments, n)
+  }
+
+  /**
+   * Record a submission moving from `before` to `after`; pass null for a
+   * submission that did not exist before or no longer exists.
+   */
+  submission(dims: SubmissionDims, before: SubmissionSnapshot | null, after: SubmissionSnapshot | null): this {
+    if (before) this.addSubmissions(dims, aggregateOf(before), -1)
+    if (after) this.addSubmissions(dims, aggregateOf(after), 1)
+    return this
+  }
+
+  /** Add (or remove) a group of submissions sharing attribution, status and graded day. */
+  addSubmissions(dims: SubmissionDims, agg: SubmissionAggregate, sign: 1 | -1): this {
+    const count = agg.count * sign
+    const graded = isGraded(agg.status) ? count : 0
+    const scored = agg.scored * sign
+    const scoreSum = agg.scorePercentSum * sign
+
+    bump(this.teachers, dims.teacherId, 'submissions', count)
+    bump(this.teachers, dims.teacherId, 'gradedSubmissions', graded)
+    if (dims.schoolId) {
+      bump(this.schools, dims.schoolId, 'submissions', count)
+      bump(this.schools, dims.schoolId, 'gradedSubmissions', graded)
+      bump(this.schools, dims.schoolId, 'scoredSubmissions', scored)
+      bump(this.schools, dims.schoolId, 'scorePercentSum', scoreSum)
+    }
+    bump(this.subjects, dims.subject, 'submissions', count)
+    bump(this.subjects, dims.subject, 'scoredSubmissions', scored)
+    bump(this.subjects, dims.subject, 'scorePercentSum', scoreSum)
+    if (graded !== 0 && agg.gradedDay) {
+      bump(this.daily, agg.gradedDay, 'submissionsGraded', graded)
+    }
+
+    this.counter(rollupMetrics.submissions, count)
+    this.counter(rollupMetrics.gradedSubmissions, graded)
+    this.counter(rollupMetrics.ungradedSubmissions, isAwaitingGrade(agg.status) ? count : 0)
+    return this
+  }
+
+  /** The non-zero deltas, for logging a batch that could not be written. */
+  summary() {
+    return {
+      counters: Object.fromEntries([...this.counters].filter(([, value]) => value !== 0)),
+      teachers: Object.fromEntries(nonZero(this.teachers)),
+      schools: Object.fromEntries(nonZero(this.schools)),
+      subjects: Object.fromEntries(nonZero(this.subjects)),
+      daily: Object.fromEntries(nonZero(this.daily)),
+    }
+  }
+
+  get isEmpty(): boolean {
+    return (
+      [...this.counters.values()].every((v) => v === 0) &&
+      nonZero(this.daily).length === 0 &&
+      nonZero(this.teachers).length === 0 &&
+      nonZero(this.schools).length === 0 &&
+      nonZero(this.subjects).length === 0
+    )
+  }
+
+  /**
+   * Write the batch: one upsert per rollup table. Teachers whose counts cross
+   * zero move the "teachers with ..." counters, which are written last.
+   */
+  async apply(executor: DbExecutor = db): Promise<void> {
+    const now = new Date()
+
+    const teacherRows = nonZero(this.teachers)
+    if (teacherRows.length > 0) {
+      const t = analyticsTeacherRollups
+      const updated = await executor
+        .insert(t)
+        .values(teacherRows.map(([teacherId, fields]) => ({ teacherId, ...fields, updatedAt: now })))
+        .onConflictDoUpdate({
+          target: t.teacherId,
+          set: {
+            assignments: plusExcluded(t.assignments),
+            submissions: plusExcluded(t.submissions),
+            gradedSubmissions: plusExcluded(t.gradedSubmissions),
+            feedbackDrafts: plusExcluded(t.feedbackDrafts),
+            lessonPlans: plusExcluded(t.lessonPlans),
+            rubrics: plusExcluded(t.rubrics),
+            updatedAt: now,
+          },
+        })
+        .returning()
+
+      for (const row of updated) {
+        const delta = this.teachers.get(row.teacherId) ?? {}
+        for (const field of ENGAGEMENT_FIELDS) {
+          const d = delta[field] ?? 0
+          if (d > 0 && row[field] === d) {
+            this.counter(rollupMetrics.teachersWith(field), 1)
+          } else if (d < 0 && row[field] === 0) {
+            this.counter(rollupMetrics.teachersWith(field), -1)
+          }
+        }
+      }
+    }
+
+    const schoolRows = nonZero(this.schools)
+    if (schoolRows.length > 0) {
+      const s = analyticsSchoolRollups
+      await executor
+        .insert(s)
+        .values(schoolRows.map(([schoolId, fields]) => ({ schoolId, ...fields, updatedAt: now })))
+        .onConflictDoUpdate({
+          target: s.schoolId,
+          set: {
+            assignments: plusExcluded(s.assignments),
+            submissions: plusExcluded(s.submissions),
+            gradedSubmissions: plusExcluded(s.gradedSubmissions),
+            scoredSubmissions: plusExcluded(s.scoredSubmissions),
+            scorePercentSum: plusExcluded(s.scorePercentSum),
+            updatedAt: now,
+          },
+        })
+    }
+
+    const subjectRows = nonZero(this.subjects)
+    if (subjectRows.length > 0) {
+      const s = analyticsSubjectRollups
+      await executor
+        .insert(s)
+        .values(subjectRows.map(([subject, fields]) => ({ subject, ...fields, updatedAt: now })))
+        .onConflictDoUpdate({
+          target: s.subject,
+          set: {
+            submissions: plusExcluded(s.submissions),
+            scoredSubmissions: plusExcluded(s.scoredSubmissions),
+            scorePercentSum: plusExcluded(s.scorePercentSum),
+            updatedAt: now,
+          },
+        })
+    }
+
+    const dailyRows = nonZero(this.daily)
+    if (dailyRows.length > 0) {
+      const d = analyticsDailyRollups
+      await executor
+        .insert(d)
+        .values(dailyRows.map(([day, fields]) => ({ day, ...fields, updatedAt: now })))
+        .onConflictDoUpdate({
+          target: d.day,
+          set: {
+            assignmentsCreated: plusExcluded(d.assignmentsCreated),
+            submissionsGraded: plusExcluded(d.submissionsGraded),
+            lessonPlansCreated: plusExcluded(d.lessonPlansCreated),
+            updatedAt: now,
+          },
+        })
+    }
+
+    const counterRows = [...this.counters].filter(([, value]) => value !== 0)
+    if (counterRows.length > 0) {
+      const c = analyticsCounters
+      await executor
+        .insert(c)
+        .values(counterRows.map(([metric, value]) => ({ metric, value, updatedAt: now })))
+        .onConflictDoUpdate({
+          target: c.metric,
+          set: { value: plusExcluded(c.value), updatedAt: now },
+        })
+    }
+  }
+}
+
+/**
+ * Apply a batch outside a transaction. Failures are logged rather than thrown
+ * so a rollup problem never fails the write that triggered it; the log carries
+ * the deltas that were lost, so the drift can be judged before a rebuild.
+ */
+export async function recordRollups(batch: RollupBatch): Promise<void> {
+  if (batch.isEmpty) return
+  try {
+    await batch.apply()
+  } catch (error) {
+    console.error(ROLLUP_ERROR, error, { lostDeltas: batch.summary() })
+  }
+}
+
+/**
+ * Record submission inserts, status changes and re-grades, together with any
+ * other deltas already in `batch`. Attribution (teacher, school, subject) is
+ * looked up in one query for the whole set, and changes that leave every
+ * rollup untouched are skipped without a lookup.
+ */
+export async function recordSubmissionChanges(
+  changes: { submissionId: string; before: SubmissionSnapshot | null; after: SubmissionSnapshot | null }[],
+  batch = new RollupBatch()
+): Promise<void> {
+  const relevant = changes.filter((change) => {
+    const probe = new RollupBatch().submission(
+      { teacherId: '', schoolId: null, subject: '' },
+      change.before,
+      change.after
+    )
+    return !probe.isEmpty
+  })
+
+  try {
+    if (relevant.length > 0) {
+      const dimsRows = await db
+        .select({
+          id: submissions.id,
+          teacherId: assignments.teacherId,
+          subject: assignments.subject,
+          schoolId: classes.schoolId,
+        })
+        .from(submissions)
+        .innerJoin(assignments, eq(submissions.assignmentId, assignments.id))
+        .leftJoin(classes, eq(assignments.classId, classes.id))
+        .where(inArray(submissions.id, relevant.map((c) => c.submissionId)))
+
+      const dimsById = new Map(dimsRows.map((row) => [row.id, row]))
+      for (const change of relevant) {
+        const dims = dimsById.get(change.submissionId)
+        if (dims) {
+          batch.submission(dims, change.before, change.after)
+        } else {
+          console.error(ROLLUP_ERROR, `submission ${change.submissionId} was not found; its change was not recorded`)
+        }
+      }
+    }
+    await recordRollups(batch)
+  } catch (error) {
+    console.error(ROLLUP_ERROR, error)
+  }
+}
+
+/**
+ * Record an assignment being created (`n = 1`) or deleted (`n = -1`), together
+ * with any other deltas already in `batch`.
+ */
+export async function recordAssignmentChange(
+  assignment: { teacherId: string; classId: string; subject: string; createdAt: Date },
+  n: 1 | -1,
+  batch = new RollupBatch()
+): Promise<void> {
+  try {
+    const [cls] = await db
+      .select({ schoolId: classes.schoolId })
+      .from(classes)
+      .where(eq(classes.id, assignment.classId))
+      .limit(1)
+
+    await recordRollups(
+      batch.assignment(
+        { teacherId: assignment.teacherId, schoolId: cls?.schoolId ?? null, subject: assignment.subject },
+        assignment.createdAt,
+        n
+      )
+    )
+  } catch (error) {
+    console.error(ROLLUP_ERROR, error)
+  }
+}
+
+/**
+ * Build the batch that adds (or, with `sign: -1`, removes) the contribution of
+ * existing rows. Without `demoSessionIds` this covers the whole database; with
+ * them, only rows owned by those sandboxes' users.
+ */
+export async function collectRollups(
+  options: { demoSessionIds?: string[]; sign?: 1 | -1 } = {},
+  executor: DbExecutor = db
+): Promise<RollupBatch> {
+  const { demoSessionIds, sign = 1 } = options
+  const batch = new RollupBatch()
+
+  const scoped = demoSessionIds !== undefined
+  if (scoped && demoSessionIds.length === 0) return batch
+
+  const sandboxUsers = executor
+    .select({ id: users.id })
+    .from(users)
+    .where(inArray(users.demoSessionId, demoSessionIds ?? []))
+  const ownedBy = (column: AnyPgColumn) => (scoped ? inArray(column, sandboxUsers) : undefined)
+
+  const userCounts = await executor
+    .select({ role: users.role, count: sql<number>`count(*)::int` })
+    .from(users)
+    .where(scoped ? inArray(users.demoSessionId, demoSessionIds) : undefined)
+    .groupBy(users.role)
+  for (const row of userCounts) batch.user(row.role, row.count * sign)
+
+  if (!scoped) {
+    // Sandboxes reuse the district's schools
+    const [schoolCount] = await executor
+      .select({ count: sql<number>`count(*)::int` })
+      .from(schools)
+    batch.counter(rollupMetrics.schools, schoolCount.count * sign)
+  }
+
+  const [classCount] = await executor
+    .select({ count: sql<number>`count(*)::int` })
+    .from(classes)
+    .where(
+      scoped
+        ? inArray(
+            classes.id,
+            executor
+              .select({ classId: classMembers.classId })
+              .from(classMembers)
+              .where(inArray(classMembers.userId, sandboxUsers))
+          )
+        : undefined
+    )
+  batch.counter(rollupMetrics.classes, classCount.count * sign)
+
+  const assignmentDay = sql<string>`to_char(${assignments.createdAt}, 'YYYY-MM-DD')`
+  const assignmentGroups = await executor
+    .select({
+      teacherId: assignments.teacherId,
+      schoolId: classes.schoolId,
+      subject: assignments.subject,
+      day: assignmentDay,
+      count: sql<number>`count(*)::int`,
+    })
+    .from(assignments)
+    .leftJoin(classes, eq(assignments.classId, classes.id))
+    .where(ownedBy(assignments.teacherId))
+    .groupBy(assignments.teacherId, classes.schoolId, assignments.subject, assignmentDay)
+  for (const row of assignmentGroups) {
+    batch.assignment(row, new Date(`${row.day}T00:00:00Z`), row.count * sign)
+  }
+
+  const pct = sql`case when ${submissions.totalScore} is not null and ${submissions.maxScore} > 0 then ${submissions.totalScore}::float / ${submissions.maxScore}::float * 100 end`
+  const gradedDay = sql<string | null>`to_char(${submissions.gradedAt}, 'YYYY-MM-DD')`
+  const submissionGroups = await executor
+    .select({
+      teacherId: assignments.teacherId,
+      schoolId: classes.schoolId,
+      subject: assignments.subject,
+      status: submissions.status,
+      gradedDay,
+      count: sql<number>`count(*)::int`,
+      scored: sql<number>`count(${pct})::int`,
+      scorePercentSum: sql<number>`coalesce(sum(${pct}), 0)::float`,
+    })
+    .from(submissions)
+    .innerJoin(assignments, eq(submissions.assignmentId, assignments.id))
+    .leftJoin(classes, eq(assignments.classId, classes.id))
+    .where(ownedBy(submissions.studentId))
+    .groupBy(assignments.teacherId, classes.schoolId, assignments.subject, submissions.status, gradedDay)
+  for (const row of submissionGroups) {
+    batch.addSubmissions(row, row, sign)
+  }
+
+  const feedbackGroups = await executor
+    .select({ teacherId: feedbackDrafts.teacherId, count: sql<number>`count(*)::int` })
+    .from(feedbackDrafts)
+    .where(ownedBy(feedbackDrafts.teacherId))
+    .groupBy(feedbackDrafts.teacherId)
+  for (const row of feedbackGroups) batch.feedbackDrafts(row.teacherId, row.count * sign)
+
+  const masteryGroups = await executor
+    .select({ level: masteryRecords.level, count: sql<number>`count(*)::int` })
+    .from(masteryRecords)
+    .where(ownedBy(masteryRecords.studentId))
+    .groupBy(masteryRecords.level)
+  for (const row of masteryGroups) batch.mastery(row.level, row.count * sign)
+
+  const lessonPlanDay = sql<string>`to_char(${lessonPlans.createdAt}, 'YYYY-MM-DD')`
+  const lessonPlanGroups = await executor
+    .select({
+      teacherId: lessonPlans.teacherId,
+      day: lessonPlanDay,
+      count: sql<number>`count(*)::int`,
+    })
+    .from(lessonPlans)
+    .where(ownedBy(lessonPlans.teacherId))
+    .groupBy(lessonPlans.teacherId, lessonPlanDay)
+  for (const row of lessonPlanGroups) {
+    batch.lessonPlan(row.teacherId, new Date(`${row.day}T00:00:00Z`), row.count * sign)
+  }
+
+  const rubricGroups = await executor
+    .select({ teacherId: rubrics.teacherId, count: sql<number>`count(*)::int` })
+    .from(rubrics)
+    .where(ownedBy(rubrics.teacherId))
+    .groupBy(rubrics.teacherId)
+  for (const row of rubricGroups) batch.rubric(row.teacherId, row.count * sign)
+
+  return batch
+}
+
+/**
+ * Recompute every rollup from the base tables in one transaction.
+ */
+export async function rebuildAnalyticsRollups(): Promise<void> {
+  await db.transaction(async (tx) => {
+    await tx.delete(analyticsCounters)
+    await tx.delete(analyticsDailyRollups)
+    await tx.delete(analyticsTeacherRollups)
+    await tx.delete(analyticsSchoolRollups)
+    await tx.delete(analyticsSubjectRollups)
+
+    const batch = await collectRollups({}, tx)
+    await batch.apply(tx)
+  })
+}
+
+// ---------- readers ----------
+
+export async function getRollupCounters(): Promise<Record<string, number>> {
+  const rows = await db
+    .select({ metric: analyticsCounters.metric, value: analyticsCounters.value })
+    .from(analyticsCounters)
+  return Object.fromEntries(rows.map((r) => [r.metric, Number(r.value)]))
+}
+
+/** Prefix-filtered view of the counters, e.g. `countersWithPrefix(c, 'mastery:')`. */
+export function countersWithPrefix(counters: Record<string, number>, prefix: string): Record<string, number> {
+  return Object.fromEntries(
+    Object.entries(counters)
+      .filter(([metric, value]) => metric.startsWith(prefix) && value !== 0)
+      .map(([metric, value]) => [metric.slice(prefix.length), value])
+  )
+}
+
+/** Daily rollups summed over the last `days` days, including today. */
+export async function getRecentDailyTotals(days: number) {
+  const since = new Date()
+  since.setUTCDate(since.getUTCDate() - (days - 1))
+
+  const rows = await db
+    .select({
+      assignmentsCreated: analyticsDailyRollups.assignmentsCreated,
+      submissionsGraded: analyticsDailyRollups.submissionsGraded,
+      lessonPlansCreated: analyticsDailyRollups.lessonPlansCreated,
+    })
+    .from(analyticsDailyRollups)
+    .where(gte(analyticsDailyRollups.day, rollupDay(since)))
+
+  return rows.reduce(
+    (sum, row) => ({
+      assignmentsCreated: sum.assignmentsCreated + Number(row.assignmentsCreated),
+      submissionsGraded: sum.submissionsGraded + Number(row.submissionsGraded),
+      lessonPlansCreated: sum.lessonPlansCreated + Number(row.lessonPlansCreated),
+    }),
+    { assignmentsCreated: 0, submissionsGraded: 0, lessonPlansCreated: 0 }
+  )
+}
+
+export async function getTopTeacherRollups(limit: number) {
+  return db
+    .select({
+      teacherId: analyticsTeacherRollups.teacherId,
+      teacherName: users.name,
+      teacherEmail: users.email,
+      assignmentCount: analyticsTeacherRollups.assignments,
+      submissionCount: analyticsTeacherRollups.submissions,
+      gradedCount: analyticsTeacherRollups.gradedSubmissions,
+      feedbackCount: analyticsTeacherRollups.feedbackDrafts,
+    })
+    .from(analyticsTeacherRollups)
+    .innerJoin(users, eq(analyticsTeacherRollups.teacherId, users.id))
+    .where(gt(analyticsTeacherRollups.assignments, 0))
+    .orderBy(desc(analyticsTeacherRollups.assignments))
+    .limit(limit)
+}
+
+export async function getSubjectRollups() {
+  return db.select().from(analyticsSubjectRollups)
+}
+
+export async function getSchoolRollups() {
+  return db.select().from(analyticsSchoolRollups)
+}
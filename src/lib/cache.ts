@@ -1,33 +1,306 @@
 import { db } from '@/lib/db'
 import { cacheEntries } from '@/lib/db/schema'
-import { eq } from 'drizzle-orm'
+import { eq, lt, arrayOverlaps, inArray } from 'drizzle-orm'
 
-export async function getCached<T>(key: string): Promise<T | null> {
+/**
+ * Two-tier cache: a bounded in-process LRU in front of the `cache_entries`
+ * table. Concurrent misses for the same key share one loader call, entries
+ * past their TTL are served stale while a single background refresh runs, and
+ * entries carry tags so writes can evict everything derived from them.
+ *
+ * The in-process tier only holds an entry for up to `L1_MAX_AGE_MS`, which
+ * bounds how long another server process can serve a value after it was
+ * invalidated elsewhere.
+ */
+
+const L1_MAX_ENTRIES = 500
+const L1_MAX_AGE_MS = 30 * 1000
+const SWEEP_INTERVAL_MS = 5 * 60 * 1000
+
+export interface CacheOptions {
+  /** How long the value is fresh. */
+  ttlMs: number
+  /** Extra time after `ttlMs` during which the stale value is served while it refreshes. */
+  staleTtlMs?: number
+  /** Invalidation tags, see `cacheTags`. */
+  tags?: string[]
+  /** Return false to hand a loaded value back to callers without storing it. */
+  cacheable?: (value: unknown) => boolean
+}
+
+interface CacheEntry {
+  value: unknown
+  expiresAt: number
+  staleUntil: number
+  tags: string[]
+}
+
+interface LocalEntry extends CacheEntry {
+  evictAt: number
+}
+
+/** Tag builders shared by cache readers and the writes that invalidate them. */
+export const cacheTags = {
+  student: (studentId: string) => `student:${studentId}`,
+}
+
+const local = new Map<string, LocalEntry>()
+const inflight = new Map<string, Promise<unknown>>()
+// Invalidation generation per `key:<key>` and `tag:<tag>`, only tracked while
+// loads are in flight (nothing else reads it)
+const generations = new Map<string, number>()
+let sweeper: ReturnType<typeof setInterval> | null = null
+
+const stats = {
+  hits: 0,
+  staleHits: 0,
+  misses: 0,
+  coalesced: 0,
+  localReads: 0,
+  remoteReads: 0,
+  remoteReadMs: 0,
+  loads: 0,
+  loadErrors: 0,
+  loadMs: 0,
+}
+
+function setLocal(key: string, entry: CacheEntry): void {
+  local.delete(key)
+  local.set(key, {
+    ...entry,
+    evictAt: Math.min(entry.staleUntil, Date.now() + L1_MAX_AGE_MS),
+  })
+  while (local.size > L1_MAX_ENTRIES) {
+    const oldest = local.keys().next().value
+    if (oldest === undefined) break
+    local.delete(oldest)
+  }
+}
+
+function getLocal(key: string): CacheEntry | null {
+  const entry = local.get(key)
+  if (!entry) return null
+  if (entry.evictAt <= Date.now()) {
+    local.delete(key)
+    return null
+  }
+  // Re-insert to mark as most recently used
+  local.delete(key)
+  local.set(key, entry)
+  return entry
+}
+
+async function readEntry(key: string): Promise<CacheEntry | null> {
+  ensureSweeper()
+
+  const hit = getLocal(key)
+  if (hit) {
+    stats.localReads++
+    return hit
+  }
+
+  const start = performance.now()
   const [row] = await db
-    .select({ value: cacheEntries.value, expiresAt: cacheEntries.expiresAt })
+    .select({
+      value: cacheEntries.value,
+      expiresAt: cacheEntries.expiresAt,
+      staleUntil: cacheEntries.staleUntil,
+      tags: cacheEntries.tags,
+    })
     .from(cacheEntries)
     .where(eq(cacheEntries.key, key))
+  stats.remoteReads++
+  stats.remoteReadMs += performance.now() - start
 
-  if (!row) return null
+  // Expired rows are left for the sweeper rather than deleted on the read path
+  if (!row || row.staleUntil.getTime() <= Date.now()) return null
 
-  if (row.expiresAt <= new Date()) {
-    await db.delete(cacheEntries).where(eq(cacheEntries.key, key))
-    return null
+  const entry: CacheEntry = {
+    value: JSON.parse(row.value),
+    expiresAt: row.expiresAt.getTime(),
+    staleUntil: row.staleUntil.getTime(),
+    tags: row.tags,
   }
+  setLocal(key, entry)
+  return entry
+}
 
-  return JSON.parse(row.value) as T
+/**
+ * Read a fresh value. Returns null on a miss or once the TTL has passed.
+ */
+export async function getCached<T>(key: string): Promise<T | null> {
+  const entry = await readEntry(key)
+  if (!entry || entry.expiresAt <= Date.now()) {
+    stats.misses++
+    return null
+  }
+  stats.hits++
+  return entry.value as T
 }
 
-export async function setCache(key: string, value: unknown, ttlMs: number): Promise<void> {
-  const expiresAt = new Date(Date.now() + ttlMs)
+export async function setCache(
+  key: string,
+  value: unknown,
+  ttlMs: number,
+  options?: Omit<CacheOptions, 'ttlMs'>
+): Promise<void> {
+  const now = Date.now()
+  const entry: CacheEntry = {
+    value,
+    expiresAt: now + ttlMs,
+    staleUntil: now + ttlMs + (options?.staleTtlMs ?? 0),
+    tags: options?.tags ?? [],
+  }
+  setLocal(key, entry)
+
   const jsonValue = JSON.stringify(value)
+  const expiresAt = new Date(entry.expiresAt)
+  const staleUntil = new Date(entry.staleUntil)
 
   // Upsert: insert or update on conflict
   await db
     .insert(cacheEntries)
-    .values({ key, value: jsonValue, expiresAt })
+    .values({ key, value: jsonValue, expiresAt, staleUntil, tags: entry.tags })
     .onConflictDoUpdate({
       target: cacheEntries.key,
-      set: { value: jsonValue, expiresAt, createdAt: new Date() },
+      set: { value: jsonValue, expiresAt, staleUntil, tags: entry.tags, createdAt: new Date() },
     })
 }
+
+function generationNames(key: string, tags: string[] = []): string[] {
+  return [`key:${key}`, ...tags.map((tag) => `tag:${tag}`)]
+}
+
+function bumpGenerations(names: string[]): void {
+  if (inflight.size === 0) return
+  for (const name of names) generations.set(name, (generations.get(name) ?? 0) + 1)
+}
+
+function load<T>(key: string, loader: () => Promise<T>, options: CacheOptions): Promise<T> {
+  const pending = inflight.get(key)
+  if (pending) {
+    stats.coalesced++
+    return pending as Promise<T>
+  }
+
+  const names = generationNames(key, options.tags)
+  const started = names.map((name) => generations.get(name) ?? 0)
+  const start = performance.now()
+  const promise = (async () => {
+    try {
+      const value = await loader()
+      stats.loads++
+      stats.loadMs += performance.now() - start
+
+      // Skip the write if this key or one of its tags was invalidated while
+      // loading; the value may have been computed from data that has since
+      // changed. Invalidations of unrelated entries do not affect it.
+      const invalidated = names.some((name, i) => (generations.get(name) ?? 0) !== started[i])
+      if (!invalidated && options.cacheable?.(value) !== false) {
+        try {
+          await setCache(key, value, options.ttlMs, options)
+        } catch (error) {
+          console.error(`Failed to write cache entry ${key}:`, error)
+        }
+      }
+      return value
+    } catch (error) {
+      stats.loadErrors++
+      throw error
+    } finally {
+      inflight.delete(key)
+      if (inflight.size === 0) generations.clear()
+    }
+  })()
+
+  inflight.set(key, promise)
+  return promise
+}
+
+/**
+ * Return the cached value for `key`, calling `loader` on a miss. Concurrent
+ * callers for the same key share a single loader call. Within `staleTtlMs`
+ * after expiry, the stale value is returned immediately and refreshed in the
+ * background.
+ */
+export async function cached<T>(
+  key: string,
+  loader: () => Promise<T>,
+  options: CacheOptions
+): Promise<T> {
+  const entry = await readEntry(key)
+  const now = Date.now()
+
+  if (entry && entry.expiresAt > now) {
+    stats.hits++
+    return entry.value as T
+  }
+
+  if (entry && entry.staleUntil > now) {
+    stats.staleHits++
+    load(key, loader, options).catch((error) => {
+      console.error(`Background cache refresh failed for ${key}:`, error)
+    })
+    return entry.value as T
+  }
+
+  stats.misses++
+  return load(key, loader, options)
+}
+
+/**
+ * Evict every entry carrying any of `tags` from both tiers.
+ */
+export async function invalidateCacheTags(tags: string[]): Promise<void> {
+  if (tags.length === 0) return
+  bumpGenerations(tags.map((tag) => `tag:${tag}`))
+
+  const tagSet = new Set(tags)
+  for (const [key, entry] of local) {
+    if (entry.tags.some((t) => tagSet.has(t))) local.delete(key)
+  }
+
+  await db.delete(cacheEntries).where(arrayOverlaps(cacheEntries.tags, tags))
+}
+
+export async function invalidateCacheKeys(keys: string[]): Promise<void> {
+  if (keys.length === 0) return
+  bumpGenerations(keys.map((key) => `key:${key}`))
+  for (const key of keys) local.delete(key)
+  await db.delete(cacheEntries).where(inArray(cacheEntries.key, keys))
+}
+
+/**
+ * Delete rows whose stale window has passed. Returns the number removed.
+ */
+export async function sweepExpiredCache(): Promise<number> {
+  const removed = await db
+    .delete(cacheEntries)
+    .where(lt(cacheEntries.staleUntil, new Date()))
+    .returning({ key: cacheEntries.key })
+  return removed.length
+}
+
+function ensureSweeper(): void {
+  if (sweeper) return
+  sweeper = setInterval(() => {
+    sweepExpiredCache().catch((error) => {
+      console.error('Cache sweep failed:', error)
+    })
+  }, SWEEP_INTERVAL_MS)
+  // Never keep the process alive just to sweep
+  sweeper.unref?.()
+}
+
+export function getCacheStats() {
+  const hits = stats.hits + stats.staleHits
+  const lookups = hits + stats.misses
+  return {
+    ...stats,
+    hitRate: lookups > 0 ? hits / lookups : 0,
+    avgLoadMs: stats.loads > 0 ? stats.loadMs / stats.loads : 0,
+    avgRemoteReadMs: stats.remoteReads > 0 ? stats.remoteReadMs / stats.remoteReads : 0,
+    localEntries: local.size,
+    inflight: inflight.size,
+  }
+}
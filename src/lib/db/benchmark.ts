@@ -0,0 +1,509 @@
+import 'dotenv/config'
+import { drizzle } from 'drizzle-orm/postgres-js'
+import postgres from 'postgres'
+import { eq } from 'drizzle-orm'
+import type { PgInsertValue, PgTable } from 'drizzle-orm/pg-core'
+import { createId } from '@paralleldrive/cuid2'
+import bcrypt from 'bcryptjs'
+import { readFileSync, writeFileSync } from 'fs'
+import * as schema from './schema'
+import { DEMO_ENTRY_EMAILS } from '../demo-constants'
+
+// District-scale latency benchmark for the main API routes.
+//
+//   npm run db:benchmark -- --seed   add the benchmark district (once per database)
+//   npm run db:benchmark             measure against a running server (BENCH_URL)
+//   npm run db:benchmark -- --demo-logins
+//                                    demo logins per second: provision a sandbox
+//                                    and sign in to it, BENCH_DEMO_LOGINS times
+//
+// Set BENCH_OUT=before.json to save a run and BENCH_BASELINE=before.json on a
+// later run (e.g. after `drizzle-kit push` adds indexes) to print the change.
+// Per-route query counts come from the server's /api/admin/stats query stats.
+
+const SCALE = {
+  schools: Number(process.env.BENCH_SCHOOLS ?? 10),
+  teachersPerSchool: Number(process.env.BENCH_TEACHERS_PER_SCHOOL ?? 30),
+  studentsPerSchool: Number(process.env.BENCH_STUDENTS_PER_SCHOOL ?? 700),
+  classesPerTeacher: 5,
+  studentsPerClass: 28,
+  assignmentsPerClass: 12,
+  masteryPerStudent: 30,
+  standards: 40,
+}
+
+const BASE_URL = process.env.BENCH_URL ?? 'http://localhost:3000'
+const ITERATIONS = Number(process.env.BENCH_ITERATIONS ?? 50)
+const CONCURRENCY = Number(process.env.BENCH_CONCURRENCY ?? 4)
+const WARMUP = 3
+const INSERT_CHUNK = 2000
+const PASSWORD = 'benchmark123'
+const DEMO_LOGINS = Number(process.env.BENCH_DEMO_LOGINS ?? 50)
+const DEMO_PASSWORD = 'password123'
+
+const EMAIL = {
+  admin: 'bench-admin@bench.local',
+  teacher: 'bench-teacher-0-0@bench.local',
+  student: 'bench-student-0-0@bench.local',
+  parent: 'bench-parent-0-0@bench.local',
+}
+
+// ---------- helpers ----------
+function mulberry32(seed: number) {
+  return () => {
+    seed |= 0
+    seed = (seed + 0x6d2b79f5) | 0
+    let t = Math.imul(seed ^ (seed >>> 15), 1 | seed)
+    t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296
+  }
+}
+
+const random = mulberry32(42)
+
+function pick<T>(items: T[]): T {
+  return items[Math.floor(random() * items.length)]
+}
+
+function sample<T>(items: T[], count: number): T[] {
+  const copy = [...items]
+  for (let i = copy.length - 1; i > 0; i--) {
+    const j = Math.floor(random() * (i + 1))
+    ;[copy[i], copy[j]] = [copy[j], copy[i]]
+  }
+  return copy.slice(0, count)
+}
+
+function daysAgo(n: number) {
+  const d = new Date()
+  d.setDate(d.getDate() - n)
+  return d
+}
+
+function letterFor(percent: number) {
+  if (percent >= 90) return 'A'
+  if (percent >= 80) return 'B'
+  if (percent >= 70) return 'C'
+  if (percent >= 60) return 'D'
+  return 'F'
+}
+
+function levelFor(score: number) {
+  if (score >= 90) return 'advanced'
+  if (score >= 75) return 'proficient'
+  if (score >= 60) return 'developing'
+  return 'beginning'
+}
+
+function percentile(sorted: number[], p: number) {
+  if (sorted.length === 0) return 0
+  const index = Math.min(sorted.length - 1, Math.ceil((p / 100) * sorted.length) - 1)
+  return sorted[Math.max(0, index)]
+}
+
+// ---------- seeding ----------
+async function seedDistrict() {
+  const connectionString = process.env.DATABASE_URL
+  if (!connectionString) {
+    console.error('DATABASE_URL is not set in .env')
+    process.exit(1)
+  }
+
+  const client = postgres(connectionString, { prepare: false })
+  const db = drizzle(client, { schema })
+
+  async function insertAll<T extends PgTable>(table: T, rows: PgInsertValue<T>[]) {
+    for (let i = 0; i < rows.length; i += INSERT_CHUNK) {
+      await db.insert(table).values(rows.slice(i, i + INSERT_CHUNK))
+    }
+  }
+
+  const [existing] = await db
+    .select({ id: schema.users.id })
+    .from(schema.users)
+    .where(eq(schema.users.email, EMAIL.admin))
+    .limit(1)
+
+  if (existing) {
+    console.log('Benchmark district already seeded.')
+    await client.end()
+    return
+  }
+
+  console.log('Seeding benchmark district...')
+  const start = Date.now()
+  const passwordHash = await bcrypt.hash(PASSWORD, 10)
+
+  const districtId = createId()
+  await db.insert(schema.districts).values({ id: districtId, name: 'Benchmark Unified', state: 'CA' })
+
+  const standardIds = Array.from({ length: SCALE.standards }, () => createId())
+  await insertAll(
+    schema.standards,
+    standardIds.map((id, i) => ({
+      id,
+      code: `BENCH.MATH.${i + 1}`,
+      description: `Benchmark standard ${i + 1}`,
+      subject: 'Math',
+      gradeLevel: '8',
+      domain: 'Benchmark',
+    }))
+  )
+
+  const users: (typeof schema.users.$inferInsert)[] = [
+    { id: createId(), name: 'Bench Admin', email: EMAIL.admin, passwordHash, role: 'admin' },
+  ]
+  const schools: (typeof schema.schools.$inferInsert)[] = []
+  const classes: (typeof schema.classes.$inferInsert)[] = []
+  const members: (typeof schema.classMembers.$inferInsert)[] = []
+  const parentLinks: (typeof schema.parentChildren.$inferInsert)[] = []
+  const assignments: (typeof schema.assignments.$inferInsert)[] = []
+  const submissions: (typeof schema.submissions.$inferInsert)[] = []
+  const mastery: (typeof schema.masteryRecords.$inferInsert)[] = []
+
+  for (let s = 0; s < SCALE.schools; s++) {
+    const schoolId = createId()
+    schools.push({ id: schoolId, name: `Benchmark School ${s + 1}`, districtId })
+
+    const studentIds: string[] = []
+    for (let i = 0; i < SCALE.studentsPerSchool; i++) {
+      const id = createId()
+      studentIds.push(id)
+      users.push({ id, name: `Student ${s}-${i}`, email: `bench-student-${s}-${i}@bench.local`, passwordHash, role: 'student' })
+
+      if (i % 2 === 0) {
+        const parentId = createId()
+        users.push({ id: parentId, name: `Parent ${s}-${i / 2}`, email: `bench-parent-${s}-${i / 2}@bench.local`, passwordHash, role: 'parent' })
+        parentLinks.push({ parentId, childId: id })
+      }
+
+      for (let m = 0; m < SCALE.masteryPerStudent; m++) {
+        const score = Math.round(40 + random() * 60)
+        mastery.push({
+          studentId: id,
+          standardId: pick(standardIds),
+          level: levelFor(score),
+          score,
+          assessedAt: daysAgo(Math.floor(random() * 120)),
+          source: 'benchmark',
+        })
+      }
+    }
+
+    for (let t = 0; t < SCALE.teachersPerSchool; t++) {
+      const teacherId = createId()
+      users.push({ id: teacherId, name: `Teacher ${s}-${t}`, email: `bench-teacher-${s}-${t}@bench.local`, passwordHash, role: 'teacher' })
+
+      for (let c = 0; c < SCALE.classesPerTeacher; c++) {
+        const classId = createId()
+        classes.push({ id: classId, name: `Math ${s}-${t}-${c}`, subject: 'Math', gradeLevel: '8', period: `${c + 1}`, schoolId })
+        members.push({ classId, userId: teacherId, role: 'teacher' })
+
+        const roster = sample(studentIds, SCALE.studentsPerClass)
+        for (const studentId of roster) {
+          members.push({ classId, userId: studentId, role: 'student' })
+        }
+
+        for (let a = 0; a < SCALE.assignmentsPerClass; a++) {
+          const assignmentId = createId()
+          const createdAt = daysAgo(90 - a * 7)
+          assignments.push({
+            id: assignmentId,
+            title: `Assignment ${a + 1}`,
+            description: 'Benchmark assignment',
+            gradeLevel: '8',
+            subject: 'Math',
+            status: 'published',
+            classId,
+            teacherId,
+            createdAt,
+          })
+
+          for (const studentId of roster) {
+            if (random() < 0.1) continue
+            const graded = random() < 0.7
+            const totalScore = graded ? Math.round(50 + random() * 50) : null
+            submissions.push({
+              assignmentId,
+              studentId,
+              content: 'Benchmark submission',
+              status: graded ? 'graded' : 'submitted',
+              submittedAt: new Date(createdAt.getTime() + random() * 5 * 86_400_000),
+              gradedAt: graded ? new Date() : null,
+              totalScore,
+              maxScore: graded ? 100 : null,
+              letterGrade: totalScore !== null ? letterFor(totalScore) : null,
+            })
+          }
+        }
+      }
+    }
+  }
+
+  await insertAll(schema.schools, schools)
+  await insertAll(schema.users, users)
+  await insertAll(schema.classes, classes)
+  await insertAll(schema.classMembers, members)
+  await insertAll(schema.parentChildren, parentLinks)
+  await insertAll(schema.assignments, assignments)
+  await insertAll(schema.submissions, submissions)
+  await insertAll(schema.masteryRecords, mastery)
+
+  console.log(
+    `  ${users.length} users, ${classes.length} classes, ${assignments.length} assignments, ` +
+      `${submissions.length} submissions, ${mastery.length} mastery records in ${Math.round((Date.now() - start) / 1000)}s`
+  )
+  console.log('Run `npm run analytics:rebuild` before measuring.')
+  await client.end()
+}
+
+// ---------- measuring ----------
+function cookieHeader(setCookies: string[], previous = ''): string {
+  const jar = new Map(
+    previous
+      .split('; ')
+      .filter(Boolean)
+      .map((c) => [c.slice(0, c.indexOf('=')), c] as [string, string])
+  )
+  for (const setCookie of setCookies) {
+    const pair = setCookie.split(';')[0]
+    jar.set(pair.slice(0, pair.indexOf('=')), pair)
+  }
+  return [...jar.values()].join('; ')
+}
+
+async function login(email: string, password = PASSWORD): Promise<string> {
+  const csrfRes = await fetch(`${BASE_URL}/api/auth/csrf`)
+  const { csrfToken } = (await csrfRes.json()) as { csrfToken: string }
+  let cookies = cookieHeader(csrfRes.headers.getSetCookie())
+
+  const res = await fetch(`${BASE_URL}/api/auth/callback/credentials`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/x-www-form-urlencoded', Cookie: cookies },
+    body: new URLSearchParams({ csrfToken, email, password }),
+    redirect: 'manual',
+  })
+  cookies = cookieHeader(res.headers.getSetCookie(), cookies)
+
+  if (!cookies.includes('session-token')) {
+    throw new Error(`Login failed for ${email}; seed the database first`)
+  }
+  return cookies
+}
+
+async function fetchQueryStats(
+  adminCookies: string
+): Promise<Record<string, { requests: number; queries: number }>> {
+  try {
+    const res = await fetch(`${BASE_URL}/api/admin/stats`, { headers: { Cookie: adminCookies } })
+    const data = await res.json()
+    return data.queries?.routes ?? {}
+  } catch {
+    return {}
+  }
+}
+
+interface RouteResult {
+  route: string
+  p50: number
+  p95: number
+  max: number
+  errors: number
+  queriesPerRequest: number | null
+}
+
+async function measure(
+  route: string,
+  path: string,
+  cookies: string,
+  adminCookies: string
+): Promise<RouteResult> {
+  const timings: number[] = []
+  let errors = 0
+
+  async function hit(record: boolean) {
+    const start = performance.now()
+    const res = await fetch(`${BASE_URL}${path}`, { headers: { Cookie: cookies } })
+    await res.arrayBuffer()
+    if (!record) return
+    timings.push(performance.now() - start)
+    if (!res.ok) errors++
+  }
+
+  // Warm-up requests fill caches (including any AI recommendations) first
+  for (let i = 0; i < WARMUP; i++) await hit(false)
+
+  const before = (await fetchQueryStats(adminCookies))[route]
+  let remaining = ITERATIONS
+  await Promise.all(
+    Array.from({ length: CONCURRENCY }, async () => {
+      while (remaining > 0) {
+        remaining--
+        await hit(true)
+      }
+    })
+  )
+  const after = (await fetchQueryStats(adminCookies))[route]
+
+  const sorted = timings.sort((a, b) => a - b)
+  const requests = (after?.requests ?? 0) - (before?.requests ?? 0)
+  return {
+    route,
+    p50: Math.round(percentile(sorted, 50)),
+    p95: Math.round(percentile(sorted, 95)),
+    max: Math.round(sorted[sorted.length - 1] ?? 0),
+    errors,
+    queriesPerRequest:
+      after && requests > 0
+        ? Math.round((((after.queries ?? 0) - (before?.queries ?? 0)) / requests) * 10) / 10
+        : null,
+  }
+}
+
+async function run() {
+  console.log(`Benchmarking ${BASE_URL} (${ITERATIONS} requests per route, concurrency ${CONCURRENCY})\n`)
+
+  const sessions = {
+    admin: await login(EMAIL.admin),
+    teacher: await login(EMAIL.teacher),
+    student: await login(EMAIL.student),
+    parent: await login(EMAIL.parent),
+  }
+
+  const classRes = await fetch(`${BASE_URL}/api/assignments`, { headers: { Cookie: sessions.teacher } })
+  const [firstAssignment] = (await classRes.json()) as { assignment: { classId: string } }[]
+
+  const plan: [string, string, keyof typeof sessions][] = [
+    ['GET /api/assignments', '/api/assignments', 'teacher'],
+    ['GET /api/grading', '/api/grading', 'teacher'],
+    ['GET /api/report-cards', '/api/report-cards', 'teacher'],
+    ['GET /api/messages', '/api/messages', 'teacher'],
+    ['GET /api/early-warning', '/api/early-warning', 'teacher'],
+    ['GET /api/mastery/gaps', `/api/mastery/gaps?classId=${firstAssignment?.assignment.classId ?? ''}`, 'teacher'],
+    ['GET /api/admin/overview', '/api/admin/overview', 'admin'],
+    ['GET /api/admin/analytics', '/api/admin/analytics', 'admin'],
+    ['GET /api/student/progress', '/api/student/progress', 'student'],
+    ['GET /api/parent/dashboard', '/api/parent/dashboard', 'parent'],
+  ]
+
+  const results: RouteResult[] = []
+  for (const [route, path, role] of plan) {
+    results.push(await measure(route, path, sessions[role], sessions.admin))
+  }
+
+  const baseline: RouteResult[] | null = process.env.BENCH_BASELINE
+    ? JSON.parse(readFileSync(process.env.BENCH_BASELINE, 'utf8'))
+    : null
+
+  console.table(
+    results.map((r) => {
+      const prior = baseline?.find((b) => b.route === r.route)
+      return {
+        route: r.route,
+        'p50 ms': r.p50,
+        'p95 ms': r.p95,
+        'max ms': r.max,
+        queries: r.queriesPerRequest ?? '-',
+        errors: r.errors,
+        ...(prior ? { 'p50 before': prior.p50, 'p95 before': prior.p95 } : {}),
+      }
+    })
+  )
+
+  if (process.env.BENCH_OUT) {
+    writeFileSync(process.env.BENCH_OUT, JSON.stringify(results, null, 2))
+    console.log(`\nSaved to ${process.env.BENCH_OUT}`)
+  }
+}
+
+function summarize(timings: number[]) {
+  const sorted = [...timings].sort((a, b) => a - b)
+  return {
+    p50: Math.round(percentile(sorted, 50)),
+    p95: Math.round(percentile(sorted, 95)),
+    max: Math.round(sorted[sorted.length - 1] ?? 0),
+  }
+}
+
+// A demo login is POST /api/auth/demo-login (claim or clone a sandbox) followed
+// by a credentials sign-in as the sandbox user. Bursts larger than the warm
+// pool (DEMO_POOL_SIZE on the server) fall back to cloning inline.
+async function runDemoLogins() {
+  console.log(`Demo logins against ${BASE_URL} (${DEMO_LOGINS} logins, concurrency ${CONCURRENCY})\n`)
+
+  const emails = [...DEMO_ENTRY_EMAILS]
+  const provisionMs: number[] = []
+  const loginMs: number[] = []
+  let errors = 0
+  let remaining = DEMO_LOGINS
+
+  const start = performance.now()
+  await Promise.all(
+    Array.from({ length: CONCURRENCY }, async () => {
+      while (remaining > 0) {
+        const email = emails[--remaining % emails.length]
+        const begin = performance.now()
+        try {
+          const res = await fetch(`${BASE_URL}/api/auth/demo-login`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ email }),
+          })
+          if (!res.ok) throw new Error(`demo-login returned ${res.status} for ${email}`)
+          const { email: sandboxEmail } = (await res.json()) as { email: string }
+          provisionMs.push(performance.now() - begin)
+
+          await login(sandboxEmail, DEMO_PASSWORD)
+          loginMs.push(performance.now() - begin)
+        } catch (err) {
+          if (errors++ === 0) console.error(err)
+        }
+      }
+    })
+  )
+  const seconds = (performance.now() - start) / 1000
+
+  const result = {
+    logins: loginMs.length,
+    errors,
+    seconds: Math.round(seconds * 10) / 10,
+    loginsPerSecond: Math.round((loginMs.length / seconds) * 10) / 10,
+    provision: summarize(provisionMs),
+    login: summarize(loginMs),
+  }
+  const baseline: typeof result | null = process.env.BENCH_BASELINE
+    ? JSON.parse(readFileSync(process.env.BENCH_BASELINE, 'utf8'))
+    : null
+
+  console.table(
+    (['provision', 'login'] as const).map((step) => ({
+      step: step === 'provision' ? 'POST /api/auth/demo-login' : 'demo-login + sign-in',
+      'p50 ms': result[step].p50,
+      'p95 ms': result[step].p95,
+      'max ms': result[step].max,
+      ...(baseline ? { 'p50 before': baseline[step].p50, 'p95 before': baseline[step].p95 } : {}),
+    }))
+  )
+  console.log(
+    `\n${result.loginsPerSecond} logins/sec (${result.logins} succeeded, ${errors} failed in ${result.seconds}s)` +
+      (baseline ? `; before: ${baseline.loginsPerSecond} logins/sec` : '')
+  )
+
+  if (process.env.BENCH_OUT) {
+    writeFileSync(process.env.BENCH_OUT, JSON.stringify(result, null, 2))
+    console.log(`Saved to ${process.env.BENCH_OUT}`)
+  }
+}
+
+const task = process.argv.includes('--seed')
+  ? seedDistrict
+  : process.argv.includes('--demo-logins')
+    ? runDemoLogins
+    : run
+
+task()
+  .then(() => process.exit(0))
+  .catch((err) => {
+    console.error('Benchmark failed:', err)
+    process.exit(1)
+  })
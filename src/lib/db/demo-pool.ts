@@ -0,0 +1,25 @@
+import 'dotenv/config'
+import { cleanupExpiredDemoSessions, replenishDemoPool } from '@/lib/demo-clone'
+
+// Delete expired demo sandboxes and fill the warm pool (DEMO_POOL_SIZE). Run
+// after seeding or deploying so the first demo logins do not clone inline.
+
+async function main() {
+  if (!process.env.DATABASE_URL) {
+    console.error('DATABASE_URL is not set in .env')
+    process.exit(1)
+  }
+
+  const start = Date.now()
+  const deleted = await cleanupExpiredDemoSessions()
+  const provisioned = await replenishDemoPool()
+  console.log(
+    `Demo pool ready in ${Date.now() - start}ms (${provisioned} provisioned, ${deleted} expired removed)`
+  )
+  process.exit(0)
+}
+
+main().catch((err) => {
+  console.error('Demo pool warm-up failed:', err)
+  process.exit(1)
+})
@@ -1,9 +1,18 @@
 import { drizzle } from 'drizzle-orm/postgres-js'
 import postgres from 'postgres'
 import * as schema from './schema'
+import { instrumentClient } from './query-stats'
 
 const connectionString = process.env.DATABASE_URL!
 
-const client = postgres(connectionString, { prepare: false })
+const client = instrumentClient(
+  postgres(connectionString, {
+    prepare: false,
+    max: Number(process.env.DATABASE_POOL_MAX ?? 10),
+    idle_timeout: Number(process.env.DATABASE_IDLE_TIMEOUT ?? 20), // seconds
+    max_lifetime: 30 * 60, // seconds; recycle connections behind poolers and failovers
+    connect_timeout: 10, // seconds
+  })
+)
 
 export const db = drizzle(client, { schema })
@@ -0,0 +1,102 @@
+import 'dotenv/config'
+import { db } from '@/lib/db'
+import { sql } from 'drizzle-orm'
+
+// Move tutor transcripts from the old tutor_sessions.messages JSON column into
+// tutor_messages rows. Run once against a database created before messages
+// were stored per row, before pushing the current schema (which no longer has
+// the column). Creates the new table and columns, expands every session's
+// JSON array in order, sets message_count to match, and only then drops the
+// old column -- all in one transaction. A database without the column is left
+// untouched, so the script is safe to run again.
+
+async function main() {
+  if (!process.env.DATABASE_URL) {
+    console.error('DATABASE_URL is not set in .env')
+    process.exit(1)
+  }
+
+  const start = Date.now()
+  const migrated = await db.transaction(async (tx) => {
+    const [legacy] = await tx.execute<{ exists: boolean }>(sql`
+      select exists (
+        select 1 from information_schema.columns
+        where table_schema = current_schema()
+          and table_name = 'tutor_sessions'
+          and column_name = 'messages'
+      ) as exists
+    `)
+    if (!legacy?.exists) return null
+
+    await tx.execute(sql`
+      alter table tutor_sessions
+        add column if not exists message_count integer not null default 0,
+        add column if not exists summary text,
+        add column if not exists summarized_count integer not null default 0
+    `)
+    await tx.execute(sql`
+      create table if not exists tutor_messages (
+        id text primary key,
+        session_id text not null references tutor_sessions(id) on delete cascade,
+        seq integer not null,
+        role text not null,
+        content text not null,
+        created_at timestamp not null default now()
+      )
+    `)
+    await tx.execute(sql`
+      create unique index if not exists tutor_messages_session_seq_idx
+        on tutor_messages (session_id, seq)
+    `)
+
+    // Ids are derived from the session and position, so the rows are stable
+    // and a session that was already expanded is skipped by the conflict
+    const inserted = await tx.execute<{ session_id: string }>(sql`
+      insert into tutor_messages (id, session_id, seq, role, content, created_at)
+      select
+        'm' || substr(md5(s.id || ':' || m.ordinality), 1, 23),
+        s.id,
+        (m.ordinality - 1)::integer,
+        coalesce(m.value->>'role', 'user'),
+        coalesce(m.value->>'content', ''),
+        coalesce((m.value->>'timestamp')::timestamp, s.started_at)
+      from tutor_sessions s
+      cross join lateral json_array_elements(coalesce(nullif(s.messages, ''), '[]')::json)
+        with ordinality as m(value, ordinality)
+      on conflict (session_id, seq) do nothing
+      returning session_id
+    `)
+
+    await tx.execute(sql`
+      update tutor_sessions s
+      set message_count = counts.n
+      from (
+        select session_id, max(seq) + 1 as n
+        from tutor_messages
+        group by session_id
+      ) counts
+      where counts.session_id = s.id
+    `)
+
+    await tx.execute(sql`alter table tutor_sessions drop column messages`)
+
+    return {
+      messages: inserted.length,
+      sessions: new Set(inserted.map((r) => r.session_id)).size,
+    }
+  })
+
+  if (!migrated) {
+    console.log('tutor_sessions.messages not found; nothing to migrate')
+  } else {
+    console.log(
+      `Migrated ${migrated.messages} tutor messages from ${migrated.sessions} sessions in ${Date.now() - start}ms`
+    )
+  }
+  process.exit(0)
+}
+
+main().catch((err) => {
+  console.error('Tutor message migration failed:', err)
+  process.exit(1)
+})
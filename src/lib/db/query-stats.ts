@@ -0,0 +1,177 @@
+import { AsyncLocalStorage } from 'async_hooks'
+import type { Sql, TransactionSql } from 'postgres'
+
+/**
+ * Per-route database query accounting. The postgres client is wrapped so every
+ * statement is timed, and route handlers wrapped in `withQueryStats` attribute
+ * their statements to the route (including ones issued while a streamed
+ * response is still being written). Queries outside a wrapped handler are
+ * counted under `(background)`.
+ *
+ * Statements slower than `DB_SLOW_QUERY_MS` are logged and kept in a short
+ * recent list. With `DB_QUERY_LOG=on`, every wrapped request also logs its
+ * query count and time. Totals are reported by `GET /api/admin/stats` under
+ * `queries`.
+ */
+
+const SLOW_QUERY_MS = Number(process.env.DB_SLOW_QUERY_MS ?? 200)
+const LOG_REQUESTS = process.env.DB_QUERY_LOG === 'on'
+const MAX_RECENT_SLOW_QUERIES = 20
+const MAX_LOGGED_SQL_LENGTH = 300
+const BACKGROUND_ROUTE = '(background)'
+
+interface RequestContext {
+  route: string
+  queries: number
+  queryMs: number
+}
+
+interface RouteStats {
+  requests: number
+  requestMs: number
+  queries: number
+  queryMs: number
+  maxQueries: number
+  slowQueries: number
+  errors: number
+}
+
+const requestContext = new AsyncLocalStorage<RequestContext>()
+const routes = new Map<string, RouteStats>()
+const recentSlowQueries: { route: string; ms: number; sql: string; at: string }[] = []
+
+function statsFor(route: string): RouteStats {
+  let stats = routes.get(route)
+  if (!stats) {
+    stats = { requests: 0, requestMs: 0, queries: 0, queryMs: 0, maxQueries: 0, slowQueries: 0, errors: 0 }
+    routes.set(route, stats)
+  }
+  return stats
+}
+
+function truncate(sqlText: string): string {
+  const oneLine = sqlText.replace(/\s+/g, ' ').trim()
+  return oneLine.length > MAX_LOGGED_SQL_LENGTH
+    ? `${oneLine.slice(0, MAX_LOGGED_SQL_LENGTH)}...`
+    : oneLine
+}
+
+function recordQuery(sqlText: string, ms: number, failed: boolean): void {
+  const context = requestContext.getStore()
+  const route = context?.route ?? BACKGROUND_ROUTE
+  if (context) {
+    context.queries++
+    context.queryMs += ms
+  }
+
+  const stats = statsFor(route)
+  stats.queries++
+  stats.queryMs += ms
+  if (failed) stats.errors++
+
+  if (ms >= SLOW_QUERY_MS) {
+    stats.slowQueries++
+    const statement = truncate(sqlText)
+    console.warn(`[db] slow query in ${route} (${Math.round(ms)}ms): ${statement}`)
+    recentSlowQueries.unshift({ route, ms: Math.round(ms), sql: statement, at: new Date().toISOString() })
+    recentSlowQueries.length = Math.min(recentSlowQueries.length, MAX_RECENT_SLOW_QUERIES)
+  }
+}
+
+/**
+ * Time a postgres-js pending query. Queries run lazily when first awaited, so
+ * the clock starts in `then`.
+ */
+function timeQuery<Q extends PromiseLike<unknown>>(sqlText: string, query: Q): Q {
+  const run = query.then.bind(query)
+  Object.assign(query, {
+    then(onFulfilled?: (value: unknown) => unknown, onRejected?: (error: unknown) => unknown) {
+      const start = performance.now()
+      return run(
+        (value) => {
+          recordQuery(sqlText, performance.now() - start, false)
+          return onFulfilled ? onFulfilled(value) : value
+        },
+        (error) => {
+          recordQuery(sqlText, performance.now() - start, true)
+          if (onRejected) return onRejected(error)
+          throw error
+        }
+      )
+    },
+  })
+  return query
+}
+
+// Drizzle sends every statement through `unsafe`, on the pool and inside
+// transactions alike
+function instrumentUnsafe(sql: Sql): void {
+  const unsafe = sql.unsafe.bind(sql)
+  sql.unsafe = ((query: string, ...rest: unknown[]) =>
+    timeQuery(query, (unsafe as (...args: unknown[]) => PromiseLike<unknown>)(query, ...rest))) as typeof sql.unsafe
+}
+
+/**
+ * Wrap a postgres-js client so its statements are timed and attributed.
+ */
+export function instrumentClient<T extends Sql>(client: T): T {
+  instrumentUnsafe(client)
+
+  const begin = client.begin.bind(client) as (...args: unknown[]) => Promise<unknown>
+  client.begin = ((...args: unknown[]) => {
+    const callback = args.pop() as (tx: TransactionSql) => unknown
+    return begin(...args, (tx: TransactionSql) => {
+      instrumentUnsafe(tx)
+      return callback(tx)
+    })
+  }) as T['begin']
+
+  return client
+}
+
+/**
+ * Wrap a route handler so the queries it issues are counted against `route`.
+ */
+export function withQueryStats<A extends unknown[], R>(
+  route: string,
+  handler: (...args: A) => Promise<R>
+): (...args: A) => Promise<R> {
+  return (...args: A) => {
+    const context: RequestContext = { route, queries: 0, queryMs: 0 }
+    return requestContext.run(context, async () => {
+      const start = performance.now()
+      try {
+        return await handler(...args)
+      } finally {
+        const ms = performance.now() - start
+        const stats = statsFor(route)
+        stats.requests++
+        stats.requestMs += ms
+        stats.maxQueries = Math.max(stats.maxQueries, context.queries)
+        if (LOG_REQUESTS) {
+          console.info(
+            `[db] ${route}: ${context.queries} queries, ${Math.round(context.queryMs)}ms in db, ${Math.round(ms)}ms total`
+          )
+        }
+      }
+    })
+  }
+}
+
+export function getQueryStats() {
+  return {
+    slowQueryMs: SLOW_QUERY_MS,
+    routes: Object.fromEntries(
+      [...routes].map(([route, stats]) => [
+        route,
+        {
+          ...stats,
+          avgQueries: stats.requests > 0 ? stats.queries / stats.requests : 0,
+          avgQueryMs: stats.queries > 0 ? stats.queryMs / stats.queries : 0,
+          avgRequestMs: stats.requests > 0 ? stats.requestMs / stats.requests : 0,
+        },
+      ])
+    ),
+    recentSlowQueries: [...recentSlowQueries],
+  }
+}
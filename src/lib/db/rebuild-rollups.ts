@@ -0,0 +1,25 @@
+import 'dotenv/config'
+import { rebuildAnalyticsRollups } from '@/lib/analytics-rollups'
+import { rebuildMasteryLatest } from '@/lib/mastery-ingest'
+
+// Recompute the analytics rollup tables and the latest-mastery table from the
+// base tables. Run after seeding, bulk imports, or if the incremental updates
+// ever logged an error.
+
+async function main() {
+  if (!process.env.DATABASE_URL) {
+    console.error('DATABASE_URL is not set in .env')
+    process.exit(1)
+  }
+
+  const start = Date.now()
+  await rebuildAnalyticsRollups()
+  await rebuildMasteryLatest()
+  console.log(`Analytics rollups rebuilt in ${Date.now() - start}ms`)
+  process.exit(0)
+}
+
+main().catch((err) => {
+  console.error('Rollup rebuild failed:', err)
+  process.exit(1)
+})
@@ -0,0 +1,70 @@
+import { pgTable, text, timestamp, integer, doublePrecision, index } from 'drizzle-orm/pg-core'
+import { sql } from 'drizzle-orm'
+import { users } from './auth'
+import { schools } from './classes'
+
+// Incrementally maintained aggregates behind the admin dashboards. Writes that
+// change the underlying rows apply deltas via src/lib/analytics-rollups.ts, and
+// `npm run analytics:rebuild` recomputes everything from the base tables.
+
+export const analyticsCounters = pgTable('analytics_counters', {
+  metric: text('metric').primaryKey(), // e.g. submissions, users:student, mastery:proficient, teachers_with:lessonPlans
+  value: integer('value').notNull().default(0),
+  updatedAt: timestamp('updated_at', { mode: 'date' }).notNull().defaultNow(),
+})
+
+export const analyticsDailyRollups = pgTable('analytics_daily_rollups', {
+  day: text('day').primaryKey(), // YYYY-MM-DD (UTC)
+  assignmentsCreated: integer('assignments_created').notNull().default(0),
+  submissionsGraded: integer('submissions_graded').notNull().default(0),
+  lessonPlansCreated: integer('lesson_plans_created').notNull().default(0),
+  updatedAt: timestamp('updated_at', { mode: 'date' }).notNull().defaultNow(),
+})
+
+export const analyticsTeacherRollups = pgTable('analytics_teacher_rollups', {
+  teacherId: text('teacher_id').primaryKey().references(() => users.id, { onDelete: 'cascade' }),
+  assignments: integer('assignments').notNull().default(0),
+  submissions: integer('submissions').notNull().default(0),
+  gradedSubmissions: integer('graded_submissions').notNull().default(0),
+  feedbackDrafts: integer('feedback_drafts').notNull().default(0),
+  lessonPlans: integer('lesson_plans').notNull().default(0),
+  rubrics: integer('rubrics').notNull().default(0),
+  updatedAt: timestamp('updated_at', { mode: 'date' }).notNull().defaultNow(),
+}, (table) => [
+  index('analytics_teacher_assignments_idx').on(table.assignments),
+])
+
+export const analyticsSchoolRollups = pgTable('analytics_school_rollups', {
+  schoolId: text('school_id').primaryKey().references(() => schools.id, { onDelete: 'cascade' }),
+  assignments: integer('assignments').notNull().default(0),
+  submissions: integer('submissions').notNull().default(0),
+  gradedSubmissions: integer('graded_submissions').notNull().default(0),
+  scoredSubmissions: integer('scored_submissions').notNull().default(0),
+  scorePercentSum: doublePrecision('score_percent_sum').notNull().default(0), // sum of totalScore / maxScore * 100
+  updatedAt: timestamp('updated_at', { mode: 'date' }).notNull().defaultNow(),
+})
+
+export const analyticsSubjectRollups = pgTable('analytics_subject_rollups', {
+  subject: text('subject').primaryKey(),
+  submissions: integer('submissions').notNull().default(0),
+  scoredSubmissions: integer('scored_submissions').notNull().default(0),
+  scorePercentSum: doublePrecision('score_percent_sum').notNull().default(0),
+  updatedAt: timestamp('updated_at', { mode: 'date' }).notNull().defaultNow(),
+})
+
+// Per-student early-warning indicators, computed set-wise by
+// src/lib/early-warning.ts. Writes to a student's submissions or mastery set
+// invalidatedAt; stale rows (and rows older than the refresh interval, since the
+// indicators look back over a rolling 30-day window) are recomputed on read.
+export const studentRiskScores = pgTable('student_risk_scores', {
+  studentId: text('student_id').primaryKey().references(() => users.id, { onDelete: 'cascade' }),
+  riskLevel: text('risk_level').notNull(), // high_risk | moderate_risk | on_track
+  riskRank: integer('risk_rank').notNull(), // 0 = high_risk, 1 = moderate_risk, 2 = on_track (sort key)
+  indicators: text('indicators').array().notNull().default(sql`'{}'::text[]`),
+  recentScores: integer('recent_scores').array().notNull().default(sql`'{}'::integer[]`), // newest first, up to 10
+  trendDirection: text('trend_direction').notNull(), // declining | stable | improving
+  computedAt: timestamp('computed_at', { mode: 'date' }).notNull().defaultNow(),
+  invalidatedAt: timestamp('invalidated_at', { mode: 'date' }),
+}, (table) => [
+  index('student_risk_scores_rank_idx').on(table.riskRank, table.studentId),
+])
@@ -1,4 +1,4 @@
-import { pgTable, text, timestamp, real, integer, boolean } from 'drizzle-orm/pg-core'
+import { pgTable, text, timestamp, real, integer, boolean, index } from 'drizzle-orm/pg-core'
 import { createId } from '@paralleldrive/cuid2'
 import { users } from './auth'
 import { classes } from './classes'
@@ -43,7 +43,10 @@ export const assignments = pgTable('assignments', {
   aiMetadata: text('ai_metadata'), // JSON
   createdAt: timestamp('created_at', { mode: 'date' }).notNull().defaultNow(),
   updatedAt: timestamp('updated_at', { mode: 'date' }).notNull().defaultNow(),
-})
+}, (table) => [
+  index('assignments_class_idx').on(table.classId),
+  index('assignments_teacher_idx').on(table.teacherId),
+])
 
 export const differentiatedVersions = pgTable('differentiated_versions', {
   id: text('id').primaryKey().$defaultFn(() => createId()),
@@ -1,8 +1,14 @@
-import { pgTable, text, timestamp } from 'drizzle-orm/pg-core'
+import { pgTable, text, timestamp, index } from 'drizzle-orm/pg-core'
+import { sql } from 'drizzle-orm'
 
 export const cacheEntries = pgTable('cache_entries', {
   key: text('key').primaryKey(),
   value: text('value').notNull(),
   expiresAt: timestamp('expires_at', { mode: 'date' }).notNull(),
+  staleUntil: timestamp('stale_until', { mode: 'date' }).notNull().defaultNow(), // served stale while revalidating until this time
+  tags: text('tags').array().notNull().default(sql`'{}'::text[]`), // invalidation tags, e.g. student:<id>
   createdAt: timestamp('created_at', { mode: 'date' }).notNull().defaultNow(),
-})
+}, (table) => [
+  index('cache_entries_tags_idx').using('gin', table.tags),
+  index('cache_entries_stale_until_idx').on(table.staleUntil),
+])
@@ -1,4 +1,4 @@
-import { pgTable, text, timestamp, uniqueIndex } from 'drizzle-orm/pg-core'
+import { pgTable, text, timestamp, index, uniqueIndex } from 'drizzle-orm/pg-core'
 import { createId } from '@paralleldrive/cuid2'
 import { users } from './auth'
 
@@ -37,6 +37,7 @@ export const classMembers = pgTable('class_members', {
   joinedAt: timestamp('joined_at', { mode: 'date' }).notNull().defaultNow(),
 }, (table) => [
   uniqueIndex('class_member_idx').on(table.classId, table.userId),
+  index('class_members_user_role_idx').on(table.userId, table.role),
 ])
 
 export const parentChildren = pgTable('parent_children', {
@@ -1,8 +1,14 @@
-import { pgTable, text, timestamp } from 'drizzle-orm/pg-core'
+import { pgTable, text, timestamp, index } from 'drizzle-orm/pg-core'
 import { createId } from '@paralleldrive/cuid2'
 
+// A demo sandbox: a private copy of the seed dataset. Sandboxes are
+// pre-provisioned into a warm pool (`source_email` null) and handed out on
+// demo login, which sets `source_email` and `claimed_at`.
 export const demoSessions = pgTable('demo_sessions', {
   id: text('id').primaryKey().$defaultFn(() => createId()),
-  sourceEmail: text('source_email').notNull(),
+  sourceEmail: text('source_email'), // null while waiting in the pool
   createdAt: timestamp('created_at', { mode: 'date' }).notNull().defaultNow(),
-})
+  claimedAt: timestamp('claimed_at', { mode: 'date' }),
+}, (table) => [
+  index('demo_sessions_pool_idx').on(table.sourceEmail, table.createdAt),
+])
@@ -13,3 +13,4 @@ export * from './communication'
 export * from './tutor'
 export * from './audit'
 export * from './report-cards'
+export * from './analytics'
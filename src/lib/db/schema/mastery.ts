@@ -1,4 +1,4 @@
-import { pgTable, text, timestamp, real } from 'drizzle-orm/pg-core'
+import { pgTable, text, timestamp, real, index, primaryKey } from 'drizzle-orm/pg-core'
 import { createId } from '@paralleldrive/cuid2'
 import { users } from './auth'
 import { standards } from './standards'
@@ -12,4 +12,21 @@ export const masteryRecords = pgTable('mastery_records', {
   assessedAt: timestamp('assessed_at', { mode: 'date' }).notNull().defaultNow(),
   source: text('source').notNull(), // assignment_id reference
   notes: text('notes'),
-})
+}, (table) => [
+  index('mastery_records_student_assessed_idx').on(table.studentId, table.assessedAt),
+])
+
+// The most recent mastery record per student and standard, maintained by
+// src/lib/mastery-ingest.ts alongside the append-only history above so reads
+// that only need current levels (gap analysis, the class heatmap) do not scan
+// full history. `npm run analytics:rebuild` recomputes it from mastery_records.
+export const masteryLatest = pgTable('mastery_latest', {
+  studentId: text('student_id').notNull().references(() => users.id, { onDelete: 'cascade' }),
+  standardId: text('standard_id').notNull().references(() => standards.id, { onDelete: 'cascade' }),
+  level: text('level').notNull(), // beginning, developing, proficient, advanced
+  score: real('score').notNull(), // 0-100
+  assessedAt: timestamp('assessed_at', { mode: 'date' }).notNull(),
+  source: text('source').notNull(), // assignment_id reference
+}, (table) => [
+  primaryKey({ columns: [table.studentId, table.standardId] }),
+])
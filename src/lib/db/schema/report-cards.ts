@@ -1,4 +1,4 @@
-import { pgTable, text, timestamp } from 'drizzle-orm/pg-core'
+import { pgTable, text, timestamp, index } from 'drizzle-orm/pg-core'
 import { createId } from '@paralleldrive/cuid2'
 import { users } from './auth'
 import { classes } from './classes'
@@ -17,4 +17,6 @@ export const reportCards = pgTable('report_cards', {
   generatedAt: timestamp('generated_at', { mode: 'date' }).notNull().defaultNow(),
   approvedAt: timestamp('approved_at', { mode: 'date' }),
   approvedBy: text('approved_by').references(() => users.id),
-})
+}, (table) => [
+  index('report_cards_class_period_idx').on(table.classId, table.gradingPeriod),
+])
@@ -1,4 +1,4 @@
-import { pgTable, text, timestamp, real, boolean, uniqueIndex } from 'drizzle-orm/pg-core'
+import { pgTable, text, timestamp, real, integer, boolean, index, uniqueIndex } from 'drizzle-orm/pg-core'
 import { createId } from '@paralleldrive/cuid2'
 import { users } from './auth'
 import { assignments, rubricCriteria } from './assignments'
@@ -15,7 +15,10 @@ export const submissions = pgTable('submissions', {
   totalScore: real('total_score'),
   maxScore: real('max_score'),
   letterGrade: text('letter_grade'),
-})
+}, (table) => [
+  index('submissions_assignment_status_idx').on(table.assignmentId, table.status),
+  index('submissions_student_submitted_idx').on(table.studentId, table.submittedAt),
+])
 
 export const feedbackDrafts = pgTable('feedback_drafts', {
   id: text('id').primaryKey().$defaultFn(() => createId()),
@@ -44,3 +47,28 @@ export const criterionScores = pgTable('criterion_scores', {
 }, (table) => [
   uniqueIndex('criterion_score_idx').on(table.submissionId, table.criterionId),
 ])
+
+export const gradingJobs = pgTable('grading_jobs', {
+  id: text('id').primaryKey().$defaultFn(() => createId()),
+  assignmentId: text('assignment_id').notNull().references(() => assignments.id, { onDelete: 'cascade' }),
+  teacherId: text('teacher_id').notNull().references(() => users.id),
+  status: text('status').notNull().default('queued'), // queued, running, completed, failed
+  total: integer('total').notNull().default(0),
+  options: text('options'), // JSON: { feedbackTone }
+  error: text('error'),
+  createdAt: timestamp('created_at', { mode: 'date' }).notNull().defaultNow(),
+  heartbeatAt: timestamp('heartbeat_at', { mode: 'date' }),
+  completedAt: timestamp('completed_at', { mode: 'date' }),
+})
+
+export const gradingJobItems = pgTable('grading_job_items', {
+  id: text('id').primaryKey().$defaultFn(() => createId()),
+  jobId: text('job_id').notNull().references(() => gradingJobs.id, { onDelete: 'cascade' }),
+  submissionId: text('submission_id').notNull().references(() => submissions.id, { onDelete: 'cascade' }),
+  status: text('status').notNull().default('pending'), // pending, graded, failed
+  masteryIngested: boolean('mastery_ingested').notNull().default(false), // graded items only
+  error: text('error'),
+  updatedAt: timestamp('updated_at', { mode: 'date' }).notNull().defaultNow(),
+}, (table) => [
+  uniqueIndex('grading_job_item_idx').on(table.jobId, table.submissionId),
+])
@@ -1,4 +1,4 @@
-import { pgTable, text, timestamp } from 'drizzle-orm/pg-core'
+import { pgTable, text, timestamp, integer, uniqueIndex } from 'drizzle-orm/pg-core'
 import { createId } from '@paralleldrive/cuid2'
 import { users } from './auth'
 
@@ -7,8 +7,21 @@ export const tutorSessions = pgTable('tutor_sessions', {
   studentId: text('student_id').notNull().references(() => users.id),
   subject: text('subject').notNull(),
   topic: text('topic'),
-  messages: text('messages').notNull(), // JSON array
+  messageCount: integer('message_count').notNull().default(0), // next tutor_messages.seq
+  summary: text('summary'), // rolling summary of the first summarizedCount messages
+  summarizedCount: integer('summarized_count').notNull().default(0),
   startedAt: timestamp('started_at', { mode: 'date' }).notNull().defaultNow(),
   endedAt: timestamp('ended_at', { mode: 'date' }),
   metadata: text('metadata'), // JSON
 })
+
+export const tutorMessages = pgTable('tutor_messages', {
+  id: text('id').primaryKey().$defaultFn(() => createId()),
+  sessionId: text('session_id').notNull().references(() => tutorSessions.id, { onDelete: 'cascade' }),
+  seq: integer('seq').notNull(), // 0-based position within the session
+  role: text('role').notNull(), // user, assistant
+  content: text('content').notNull(),
+  createdAt: timestamp('created_at', { mode: 'date' }).notNull().defaultNow(),
+}, (table) => [
+  uniqueIndex('tutor_messages_session_seq_idx').on(table.sessionId, table.seq),
+])
@@ -44,11 +44,13 @@ async function seed() {
   await db.delete(schema.reportCards)
   await db.delete(schema.notifications)
   await db.delete(schema.messages)
+  await db.delete(schema.tutorMessages)
   await db.delete(schema.tutorSessions)
   await db.delete(schema.progressDataPoints)
   await db.delete(schema.iepGoals)
   await db.delete(schema.complianceDeadlines)
   await db.delete(schema.ieps)
+  await db.delete(schema.masteryLatest)
   await db.delete(schema.masteryRecords)
   await db.delete(schema.criterionScores)
   await db.delete(schema.feedbackDrafts)
@@ -72,6 +74,7 @@ async function seed() {
   await db.delete(schema.accounts)
   await db.delete(schema.verificationTokens)
   await db.delete(schema.users)
+  await db.delete(schema.demoSessions)
   console.log('Cleared.\n')
 
   // =========================================================
@@ -1646,20 +1649,20 @@ DeShawn's specific learning disability in reading significantly impacts his abil
   // =========================================================
   console.log('Creating tutor sessions...')
 
-  await db.insert(schema.tutorSessions).values([
+  const tutorSessionSeeds = [
     {
       id: createId(),
       studentId: userIds.aisha,
       subject: 'Math',
       topic: 'Linear Equations',
-      messages: JSON.stringify([
+      messages: [
         { role: 'user', content: 'I need help with linear equations. I don\'t understand how to solve 2x + 5 = 13.' },
         { role: 'assistant', content: 'I\'d be happy to help you think through this! Let\'s start with what you already know. In the equation 2x + 5 = 13, what do you think the goal is? What are we trying to find?' },
         { role: 'user', content: 'We\'re trying to find what x equals?' },
         { role: 'assistant', content: 'Exactly! We want to find the value of x that makes the equation true. Now, think about it like a balance scale. Both sides need to stay equal. Right now, x has two things happening to it: it\'s being multiplied by 2, and then 5 is being added. To get x by itself, which operation do you think we should undo first?' },
         { role: 'user', content: 'We should get rid of the 5 first? So subtract 5 from both sides?' },
         { role: 'assistant', content: 'Great reasoning! When you subtract 5 from both sides, what does the equation look like now? Go ahead and work it out.' },
-      ]),
+      ],
       startedAt: daysAgo(5),
       endedAt: daysAgo(5),
       metadata: JSON.stringify({ duration: 420, messagesCount: 6 }),
@@ -1669,7 +1672,7 @@ DeShawn's specific learning disability in reading significantly impacts his abil
       studentId: userIds.deshawn,
       subject: 'ELA',
       topic: 'Main Idea and Supporting Details',
-      messages: JSON.stringify([
+      messages: [
         { role: 'user', content: 'I have to find the main idea of a passage but I don\'t really get how to do that.' },
         { role: 'assistant', content: 'That\'s a great thing to work on! Let\'s build this skill step by step. When you read a paragraph, what do you think the "main idea" means? In your own words, what is it?' },
         { role: 'user', content: 'It\'s like what the paragraph is mostly about?' },
@@ -1680,7 +1683,7 @@ DeShawn's specific learning disability in reading significantly impacts his abil
         { role: 'assistant', content: 'You\'ve got it! The main idea is like an umbrella, and the supporting details are everything underneath it. Here\'s a question to test yourself: if someone removed one supporting detail, would the main idea still make sense? Why or why not?' },
         { role: 'user', content: 'Yeah it would still make sense because the main idea is bigger than one detail. You\'d still know dolphins communicate even without one example.' },
         { role: 'assistant', content: 'That is an excellent observation. You clearly understand the relationship between main ideas and supporting details. When you tackle your reading assignment, try this: read each paragraph, pause, and ask yourself "What is the one big thing this paragraph is saying?" Then look for 2-3 details that support it. Would you like to practice with another example?' },
-      ]),
+      ],
       startedAt: daysAgo(8),
       endedAt: daysAgo(8),
       metadata: JSON.stringify({ duration: 600, messagesCount: 8 }),
@@ -1690,7 +1693,7 @@ DeShawn's specific learning disability in reading significantly impacts his abil
       studentId: userIds.students[0],
       subject: 'Science',
       topic: 'Cell Structure',
-      messages: JSON.stringify([
+      messages: [
         { role: 'user', content: 'What\'s the difference between plant and animal cells? I keep mixing them up.' },
         { role: 'assistant', content: 'That\'s a really common confusion, so you\'re in good company! Before I help you sort it out, tell me what you already know. Can you name any parts that you think are different between the two?' },
         { role: 'user', content: 'Plant cells have a cell wall and animal cells don\'t? And something about chloroplasts?' },
@@ -1698,7 +1701,7 @@ DeShawn's specific learning disability in reading significantly impacts his abil
         { role: 'user', content: 'Plants don\'t move so they need something rigid to hold them up?' },
         { role: 'assistant', content: 'Excellent reasoning! The cell wall provides structural support since plants can\'t rely on a skeleton like animals do. Now, what about chloroplasts — why would plants need them but animals wouldn\'t? Think about how each type of organism gets its energy.' },
         { role: 'user', content: 'Because plants make their own food with photosynthesis and animals eat food instead.' },
-      ]),
+      ],
       startedAt: daysAgo(12),
       endedAt: daysAgo(12),
       metadata: JSON.stringify({ duration: 350, messagesCount: 5 }),
@@ -1708,7 +1711,7 @@ DeShawn's specific learning disability in reading significantly impacts his abil
       studentId: userIds.students[1],
       subject: 'ELA',
       topic: 'Thesis Statement Writing',
-      messages: JSON.stringify([
+      messages: [
         { role: 'user', content: 'I need to write a thesis statement for my essay about social media but I don\'t know how to make it good.' },
         { role: 'assistant', content: 'Writing a strong thesis statement is one of the most important skills in essay writing, so it\'s great that you want to get it right! First, what is your opinion about social media? Do you think it\'s mostly positive, mostly negative, or somewhere in between?' },
         { role: 'user', content: 'I think it\'s bad for teenagers because it makes them compare themselves to others.' },
@@ -1717,7 +1720,7 @@ DeShawn's specific learning disability in reading significantly impacts his abil
         { role: 'assistant', content: 'Good start! That covers the basics. Now let\'s strengthen it. The word "bad" is vague. Can you replace it with something more specific? What exactly does comparison do to teenagers? Think about the effect.' },
         { role: 'user', content: 'Social media damages teenagers\' self-esteem because constant exposure to idealized images leads them to compare themselves negatively to others?' },
         { role: 'assistant', content: 'That is a dramatically stronger thesis! Notice what you did: "damages self-esteem" is more specific than "bad," "constant exposure to idealized images" gives a concrete mechanism, and "compare themselves negatively" clarifies the direction of the comparison. This thesis gives your essay a clear, arguable claim and a roadmap for your body paragraphs. Your reader already knows what to expect. Well done!' },
-      ]),
+      ],
       startedAt: daysAgo(4),
       endedAt: daysAgo(4),
       metadata: JSON.stringify({ duration: 480, messagesCount: 6 }),
@@ -1727,19 +1730,34 @@ DeShawn's specific learning disability in reading significantly impacts his abil
       studentId: userIds.students[7],
       subject: 'Math',
       topic: 'Fractions',
-      messages: JSON.stringify([
+      messages: [
         { role: 'user', content: 'I don\'t understand how to add fractions with different denominators like 1/3 + 1/4.' },
         { role: 'assistant', content: 'Fractions with different denominators can be tricky! Let me ask you this: why do you think we can\'t just add 1/3 + 1/4 by adding the tops and bottoms separately? What would go wrong?' },
         { role: 'user', content: 'Because the pieces are different sizes? Like thirds and fourths are not the same.' },
         { role: 'assistant', content: 'Exactly! You can\'t add pieces of different sizes any more than you can add 1 apple + 1 orange and call it 2 apples. So what do we need to do to make the pieces the same size? Think about what number both 3 and 4 can divide into evenly.' },
         { role: 'user', content: '12? Because 3 times 4 is 12.' },
         { role: 'assistant', content: 'That works! 12 is a common denominator for 3 and 4. Now, if we change 1/3 into twelfths, how many twelfths equal 1/3? Think about it: if you cut each third into 4 equal pieces, how many pieces do you have?' },
-      ]),
+      ],
       startedAt: daysAgo(3),
       endedAt: daysAgo(3),
       metadata: JSON.stringify({ duration: 300, messagesCount: 4 }),
     },
-  ])
+  ]
+
+  await db.insert(schema.tutorSessions).values(
+    tutorSessionSeeds.map(({ messages, ...ts }) => ({ ...ts, messageCount: messages.length }))
+  )
+  await db.insert(schema.tutorMessages).values(
+    tutorSessionSeeds.flatMap((ts) =>
+      ts.messages.map((m, seq) => ({
+        sessionId: ts.id,
+        seq,
+        role: m.role,
+        content: m.content,
+        createdAt: ts.startedAt,
+      }))
+    )
+  )
   console.log('  5 tutor sessions created.')
 
   // =========================================================
@@ -1,50 +1,233 @@
 import { db } from '@/lib/db'
 import { createId } from '@paralleldrive/cuid2'
-import { isNull, lte, inArray, or } from 'drizzle-orm'
+import { and, gt, isNull, isNotNull, lte, inArray, or, sql, getTableColumns, type SQL } from 'drizzle-orm'
+import type { AnyPgColumn, PgTable } from 'drizzle-orm/pg-core'
 import * as schema from '@/lib/db/schema'
 import { DEMO_SEED_EMAILS } from './demo-constants'
-
-const DEMO_SESSION_TTL_MS = 60 * 60 * 1000 // 1 hour
+import { collectRollups } from './analytics-rollups'
 
 /**
- * Clone all seed data for a demo session. Returns the cloned entry user's email.
+ * Demo sandbox provisioning. Each sandbox is a private copy of the seed
+ * dataset, owned by a `demo_sessions` row.
+ *
+ * - The template (the ids of every seed row a sandbox copies) is read once per
+ *   process. Cloning never moves seed rows through the app: a per-transaction
+ *   id map is built server-side from the template, and each table is copied
+ *   with one `INSERT ... SELECT` that rewrites ids through the map.
+ * - A warm pool of `DEMO_POOL_SIZE` unclaimed sandboxes is kept ready. A demo
+ *   login claims one with a single `UPDATE ... SKIP LOCKED` and only clones
+ *   inline when the pool is empty. Refills from different server processes
+ *   are serialized by an advisory lock, so they cannot overfill the pool.
+ * - Expired sandboxes are deleted in batches with set-based deletes, and the
+ *   pool is refilled, in the background after logins.
  */
-export async function cloneDemoData(sourceEmail: string): Promise<{ email: string; sessionId: string }> {
-  const sessionId = createId()
 
-  // Read all seed users (those without a demo session)
-  const seedUsers = await db
-    .select()
-    .from(schema.users)
-    .where(isNull(schema.users.demoSessionId))
+const DEMO_SESSION_TTL_MS = 60 * 60 * 1000 // 1 hour after a sandbox is handed out
+// Unclaimed sandboxes are replaced after this long, so a reseed reaches the pool
+const POOL_SANDBOX_MAX_AGE_MS = 24 * 60 * 60 * 1000
+const DEMO_POOL_SIZE = Number(process.env.DEMO_POOL_SIZE ?? 3)
+const CLEANUP_INTERVAL_MS = 60 * 1000
+const CLEANUP_BATCH_SIZE = 20 // sandboxes deleted per transaction
+
+interface CloneStep {
+  table: PgTable
+  /** Rows whose value in this column is a template id are copied. */
+  key: AnyPgColumn
+  /** Columns holding ids of copied rows. Values outside the template (shared rows such as standards and schools) are kept. */
+  remap: AnyPgColumn[]
+}
 
-  // Filter to only seed emails
-  const usersToClone = seedUsers.filter((u) => DEMO_SEED_EMAILS.has(u.email))
-  if (usersToClone.length === 0) {
-    throw new Error('No seed users found to clone')
-  }
+const usersStep: CloneStep = {
+  table: schema.users,
+  key: schema.users.id,
+  remap: [schema.users.id],
+}
 
-  // Build user ID map
-  const userIdMap = new Map<string, string>()
-  for (const u of usersToClone) {
-    userIdMap.set(u.id, createId())
-  }
+// Insert order follows foreign keys
+const CLONE_STEPS: CloneStep[] = [
+  { table: schema.classes, key: schema.classes.id, remap: [schema.classes.id] },
+  {
+    table: schema.classMembers,
+    key: schema.classMembers.id,
+    remap: [schema.classMembers.id, schema.classMembers.classId, schema.classMembers.userId],
+  },
+  {
+    table: schema.parentChildren,
+    key: schema.parentChildren.id,
+    remap: [schema.parentChildren.id, schema.parentChildren.parentId, schema.parentChildren.childId],
+  },
+  {
+    table: schema.classStandards,
+    key: schema.classStandards.id,
+    remap: [schema.classStandards.id, schema.classStandards.classId],
+  },
+  { table: schema.rubrics, key: schema.rubrics.id, remap: [schema.rubrics.id, schema.rubrics.teacherId] },
+  {
+    table: schema.rubricCriteria,
+    key: schema.rubricCriteria.id,
+    remap: [schema.rubricCriteria.id, schema.rubricCriteria.rubricId],
+  },
+  {
+    table: schema.assignments,
+    key: schema.assignments.id,
+    remap: [
+      schema.assignments.id,
+      schema.assignments.classId,
+      schema.assignments.teacherId,
+      schema.assignments.rubricId,
+    ],
+  },
+  {
+    table: schema.differentiatedVersions,
+    key: schema.differentiatedVersions.id,
+    remap: [schema.differentiatedVersions.id, schema.differentiatedVersions.assignmentId],
+  },
+  {
+    table: schema.submissions,
+    key: schema.submissions.id,
+    remap: [schema.submissions.id, schema.submissions.assignmentId, schema.submissions.studentId],
+  },
+  {
+    table: schema.feedbackDrafts,
+    key: schema.feedbackDrafts.id,
+    remap: [schema.feedbackDrafts.id, schema.feedbackDrafts.submissionId, schema.feedbackDrafts.teacherId],
+  },
+  {
+    table: schema.criterionScores,
+    key: schema.criterionScores.id,
+    remap: [schema.criterionScores.id, schema.criterionScores.submissionId, schema.criterionScores.criterionId],
+  },
+  {
+    table: schema.masteryRecords,
+    key: schema.masteryRecords.id,
+    remap: [schema.masteryRecords.id, schema.masteryRecords.studentId, schema.masteryRecords.source],
+  },
+  {
+    table: schema.masteryLatest,
+    key: schema.masteryLatest.studentId,
+    remap: [schema.masteryLatest.studentId, schema.masteryLatest.source],
+  },
+  { table: schema.lessonPlans, key: schema.lessonPlans.id, remap: [schema.lessonPlans.id, schema.lessonPlans.teacherId] },
+  { table: schema.quizzes, key: schema.quizzes.id, remap: [schema.quizzes.id, schema.quizzes.createdBy] },
+  {
+    table: schema.quizQuestions,
+    key: schema.quizQuestions.id,
+    remap: [schema.quizQuestions.id, schema.quizQuestions.quizId],
+  },
+  {
+    table: schema.questionStandards,
+    key: schema.questionStandards.id,
+    remap: [schema.questionStandards.id, schema.questionStandards.questionId],
+  },
+  { table: schema.ieps, key: schema.ieps.id, remap: [schema.ieps.id, schema.ieps.studentId, schema.ieps.authorId] },
+  { table: schema.iepGoals, key: schema.iepGoals.id, remap: [schema.iepGoals.id, schema.iepGoals.iepId] },
+  {
+    table: schema.progressDataPoints,
+    key: schema.progressDataPoints.id,
+    remap: [
+      schema.progressDataPoints.id,
+      schema.progressDataPoints.goalId,
+      schema.progressDataPoints.studentId,
+      schema.progressDataPoints.recordedBy,
+    ],
+  },
+  {
+    table: schema.complianceDeadlines,
+    key: schema.complianceDeadlines.id,
+    remap: [schema.complianceDeadlines.id, schema.complianceDeadlines.studentId], // student_id is plain text, not FK
+  },
+  {
+    table: schema.messages,
+    key: schema.messages.id,
+    remap: [schema.messages.id, schema.messages.senderId, schema.messages.receiverId],
+  },
+  {
+    table: schema.notifications,
+    key: schema.notifications.id,
+    remap: [schema.notifications.id, schema.notifications.userId],
+  },
+  {
+    table: schema.tutorSessions,
+    key: schema.tutorSessions.id,
+    remap: [schema.tutorSessions.id, schema.tutorSessions.studentId],
+  },
+  {
+    table: schema.tutorMessages,
+    key: schema.tutorMessages.id,
+    remap: [schema.tutorMessages.id, schema.tutorMessages.sessionId],
+  },
+  {
+    table: schema.reportCards,
+    key: schema.reportCards.id,
+    remap: [
+      schema.reportCards.id,
+      schema.reportCards.studentId,
+      schema.reportCards.classId,
+      schema.reportCards.approvedBy,
+    ],
+  },
+]
+
+/** `INSERT ... SELECT` copying one table's template rows through `demo_id_map`. */
+function cloneStatement(step: CloneStep, overrides: Record<string, SQL> = {}): SQL {
+  const columns = Object.values(getTableColumns(step.table))
+  const remapped = new Set(step.remap.map((c) => c.name))
+  const values = columns.map((column) => {
+    const source = sql`t.${sql.identifier(column.name)}`
+    if (overrides[column.name]) return overrides[column.name]
+    if (remapped.has(column.name)) {
+      return sql`coalesce((select m.new_id from demo_id_map m where m.old_id = ${source}), ${source})`
+    }
+    return source
+  })
+  return sql`
+    insert into ${step.table} (${sql.join(columns.map((c) => sql.identifier(c.name)), sql`, `)})
+    select ${sql.join(values, sql`, `)}
+    from ${step.table} t
+    where t.${sql.identifier(step.key.name)} in (select old_id from demo_id_map)
+  `
+}
 
-  // Find the entry user and generate their cloned email
-  const entryUser = usersToClone.find((u) => u.email === sourceEmail)
-  if (!entryUser) {
-    throw new Error(`Source email ${sourceEmail} not found in seed users`)
-  }
-  const sessionPrefix = sessionId.slice(0, 8)
+interface DemoTemplate {
+  seedEmails: Set<string>
+  /** JSON array of every seed row id a sandbox copies. */
+  ids: string
+  userCount: number
+  statements: SQL[]
+}
+
+class StaleTemplateError extends Error {}
+
+/** A pooled sandbox was not provisioned because the pool is already full. */
+class PoolFullError extends Error {}
 
-  function cloneEmail(email: string): string {
-    const [local, domain] = email.split('@')
-    return `${local}.demo.${sessionPrefix}@${domain}`
+let templatePromise: Promise<DemoTemplate> | null = null
+
+function getTemplate(): Promise<DemoTemplate> {
+  templatePromise ??= loadTemplate().catch((error) => {
+    templatePromise = null
+    throw error
+  })
+  return templatePromise
+}
+
+/** Read the ids of the seed rows a sandbox copies. */
+async function loadTemplate(): Promise<DemoTemplate> {
+  // Seed users are those without a demo session, limited to the seed emails
+  const seedUsers = (
+    await db
+      .select({ id: schema.users.id, email: schema.users.email })
+      .from(schema.users)
+      .where(isNull(schema.users.demoSessionId))
+  ).filter((u) => DEMO_SEED_EMAILS.has(u.email))
+  if (seedUsers.length === 0) {
+    throw new Error('No seed users found to clone')
   }
 
-  const seedUserIds = usersToClone.map((u) => u.id)
+  const seedUserIds = seedUsers.map((u) => u.id)
+  const ids = (rows: { id: string }[]) => rows.map((r) => r.id)
 
-  // Phase 1: Read tables scoped by seed user IDs
+  // Phase 1: tables scoped by seed user IDs
   const [
     seedClassMembers,
     seedParentChildren,
@@ -60,31 +243,30 @@ export async function cloneDemoData(sourceEmail: string): Promise<{ email: strin
     seedTutorSessions,
     seedReportCards,
   ] = await Promise.all([
-    db.select().from(schema.classMembers).where(inArray(schema.classMembers.userId, seedUserIds)),
-    db.select().from(schema.parentChildren).where(inArray(schema.parentChildren.parentId, seedUserIds)),
-    db.select().from(schema.rubrics).where(inArray(schema.rubrics.teacherId, seedUserIds)),
-    db.select().from(schema.submissions).where(inArray(schema.submissions.studentId, seedUserIds)),
-    db.select().from(schema.masteryRecords).where(inArray(schema.masteryRecords.studentId, seedUserIds)),
-    db.select().from(schema.lessonPlans).where(inArray(schema.lessonPlans.teacherId, seedUserIds)),
-    db.select().from(schema.quizzes).where(inArray(schema.quizzes.createdBy, seedUserIds)),
-    db.select().from(schema.ieps).where(inArray(schema.ieps.studentId, seedUserIds)),
-    db.select().from(schema.complianceDeadlines).where(inArray(schema.complianceDeadlines.studentId, seedUserIds)),
-    db.select().from(schema.messages).where(inArray(schema.messages.senderId, seedUserIds)),
-    db.select().from(schema.notifications).where(inArray(schema.notifications.userId, seedUserIds)),
-    db.select().from(schema.tutorSessions).where(inArray(schema.tutorSessions.studentId, seedUserIds)),
-    db.select().from(schema.reportCards).where(inArray(schema.reportCards.studentId, seedUserIds)),
+    db.select({ id: schema.classMembers.id, classId: schema.classMembers.classId }).from(schema.classMembers).where(inArray(schema.classMembers.userId, seedUserIds)),
+    db.select({ id: schema.parentChildren.id }).from(schema.parentChildren).where(inArray(schema.parentChildren.parentId, seedUserIds)),
+    db.select({ id: schema.rubrics.id }).from(schema.rubrics).where(inArray(schema.rubrics.teacherId, seedUserIds)),
+    db.select({ id: schema.submissions.id }).from(schema.submissions).where(inArray(schema.submissions.studentId, seedUserIds)),
+    db.select({ id: schema.masteryRecords.id }).from(schema.masteryRecords).where(inArray(schema.masteryRecords.studentId, seedUserIds)),
+    db.select({ id: schema.lessonPlans.id }).from(schema.lessonPlans).where(inArray(schema.lessonPlans.teacherId, seedUserIds)),
+    db.select({ id: schema.quizzes.id }).from(schema.quizzes).where(inArray(schema.quizzes.createdBy, seedUserIds)),
+    db.select({ id: schema.ieps.id }).from(schema.ieps).where(inArray(schema.ieps.studentId, seedUserIds)),
+    db.select({ id: schema.complianceDeadlines.id }).from(schema.complianceDeadlines).where(inArray(schema.complianceDeadlines.studentId, seedUserIds)),
+    db.select({ id: schema.messages.id }).from(schema.messages).where(inArray(schema.messages.senderId, seedUserIds)),
+    db.select({ id: schema.notifications.id }).from(schema.notifications).where(inArray(schema.notifications.userId, seedUserIds)),
+    db.select({ id: schema.tutorSessions.id }).from(schema.tutorSessions).where(inArray(schema.tutorSessions.studentId, seedUserIds)),
+    db.select({ id: schema.reportCards.id }).from(schema.reportCards).where(inArray(schema.reportCards.studentId, seedUserIds)),
   ])
 
-  // Derive parent IDs for phase 2 child table reads
   const seedClassIds = [...new Set(seedClassMembers.map((cm) => cm.classId))]
-  const seedRubricIds = seedRubrics.map((r) => r.id)
-  const seedSubmissionIds = seedSubmissions.map((s) => s.id)
-  const seedQuizIds = seedQuizzes.map((q) => q.id)
-  const seedIepIds = seedIeps.map((i) => i.id)
+  const seedRubricIds = ids(seedRubrics)
+  const seedSubmissionIds = ids(seedSubmissions)
+  const seedQuizIds = ids(seedQuizzes)
+  const seedIepIds = ids(seedIeps)
+  const seedTutorSessionIds = ids(seedTutorSessions)
 
-  // Phase 2: Read child tables scoped by parent IDs
+  // Phase 2: child tables scoped by parent IDs
   const [
-    seedClasses,
     seedClassStandards,
     seedRubricCriteria,
     seedAssignments,
@@ -92,620 +274,281 @@ export async function cloneDemoData(sourceEmail: string): Promise<{ email: strin
     seedCriterionScores,
     seedQuizQuestions,
     seedIepGoals,
+    seedTutorMessages,
   ] = await Promise.all([
-    seedClassIds.length > 0 ? db.select().from(schema.classes).where(inArray(schema.classes.id, seedClassIds)) : Promise.resolve([]),
-    seedClassIds.length > 0 ? db.select().from(schema.classStandards).where(inArray(schema.classStandards.classId, seedClassIds)) : Promise.resolve([]),
-    seedRubricIds.length > 0 ? db.select().from(schema.rubricCriteria).where(inArray(schema.rubricCriteria.rubricId, seedRubricIds)) : Promise.resolve([]),
-    seedClassIds.length > 0 ? db.select().from(schema.assignments).where(inArray(schema.assignments.classId, seedClassIds)) : Promise.resolve([]),
-    seedSubmissionIds.length > 0 ? db.select().from(schema.feedbackDrafts).where(inArray(schema.feedbackDrafts.submissionId, seedSubmissionIds)) : Promise.resolve([]),
-    seedSubmissionIds.length > 0 ? db.select().from(schema.criterionScores).where(inArray(schema.criterionScores.submissionId, seedSubmissionIds)) : Promise.resolve([]),
-    seedQuizIds.length > 0 ? db.select().from(schema.quizQuestions).where(inArray(schema.quizQuestions.quizId, seedQuizIds)) : Promise.resolve([]),
-    seedIepIds.length > 0 ? db.select().from(schema.iepGoals).where(inArray(schema.iepGoals.iepId, seedIepIds)) : Promise.resolve([]),
+    seedClassIds.length > 0 ? db.select({ id: schema.classStandards.id }).from(schema.classStandards).where(inArray(schema.classStandards.classId, seedClassIds)) : Promise.resolve([]),
+    seedRubricIds.length > 0 ? db.select({ id: schema.rubricCriteria.id }).from(schema.rubricCriteria).where(inArray(schema.rubricCriteria.rubricId, seedRubricIds)) : Promise.resolve([]),
+    seedClassIds.length > 0 ? db.select({ id: schema.assignments.id }).from(schema.assignments).where(inArray(schema.assignments.classId, seedClassIds)) : Promise.resolve([]),
+    seedSubmissionIds.length > 0 ? db.select({ id: schema.feedbackDrafts.id }).from(schema.feedbackDrafts).where(inArray(schema.feedbackDrafts.submissionId, seedSubmissionIds)) : Promise.resolve([]),
+    seedSubmissionIds.length > 0 ? db.select({ id: schema.criterionScores.id }).from(schema.criterionScores).where(inArray(schema.criterionScores.submissionId, seedSubmissionIds)) : Promise.resolve([]),
+    seedQuizIds.length > 0 ? db.select({ id: schema.quizQuestions.id }).from(schema.quizQuestions).where(inArray(schema.quizQuestions.quizId, seedQuizIds)) : Promise.resolve([]),
+    seedIepIds.length > 0 ? db.select({ id: schema.iepGoals.id }).from(schema.iepGoals).where(inArray(schema.iepGoals.iepId, seedIepIds)) : Promise.resolve([]),
+    seedTutorSessionIds.length > 0 ? db.select({ id: schema.tutorMessages.id }).from(schema.tutorMessages).where(inArray(schema.tutorMessages.sessionId, seedTutorSessionIds)) : Promise.resolve([]),
   ])
 
-  // Phase 3: Read grandchild tables
-  const seedAssignmentIds = seedAssignments.map((a) => a.id)
-  const seedQuestionIds = seedQuizQuestions.map((q) => q.id)
-  const seedGoalIds = seedIepGoals.map((g) => g.id)
+  // Phase 3: grandchild tables
+  const seedAssignmentIds = ids(seedAssignments)
+  const seedQuestionIds = ids(seedQuizQuestions)
+  const seedGoalIds = ids(seedIepGoals)
 
-  const [
-    seedDiffVersions,
-    seedQuestionStandards,
-    seedProgressDataPoints,
-  ] = await Promise.all([
-    seedAssignmentIds.length > 0 ? db.select().from(schema.differentiatedVersions).where(inArray(schema.differentiatedVersions.assignmentId, seedAssignmentIds)) : Promise.resolve([]),
-    seedQuestionIds.length > 0 ? db.select().from(schema.questionStandards).where(inArray(schema.questionStandards.questionId, seedQuestionIds)) : Promise.resolve([]),
-    seedGoalIds.length > 0 ? db.select().from(schema.progressDataPoints).where(inArray(schema.progressDataPoints.goalId, seedGoalIds)) : Promise.resolve([]),
+  const [seedDiffVersions, seedQuestionStandards, seedProgressDataPoints] = await Promise.all([
+    seedAssignmentIds.length > 0 ? db.select({ id: schema.differentiatedVersions.id }).from(schema.differentiatedVersions).where(inArray(schema.differentiatedVersions.assignmentId, seedAssignmentIds)) : Promise.resolve([]),
+    seedQuestionIds.length > 0 ? db.select({ id: schema.questionStandards.id }).from(schema.questionStandards).where(inArray(schema.questionStandards.questionId, seedQuestionIds)) : Promise.resolve([]),
+    seedGoalIds.length > 0 ? db.select({ id: schema.progressDataPoints.id }).from(schema.progressDataPoints).where(inArray(schema.progressDataPoints.goalId, seedGoalIds)) : Promise.resolve([]),
   ])
 
-  // Build ID maps for all tables
-  const classIdMap = new Map<string, string>()
-  for (const c of seedClasses) classIdMap.set(c.id, createId())
-
-  const rubricIdMap = new Map<string, string>()
-  for (const r of seedRubrics) rubricIdMap.set(r.id, createId())
-
-  const criterionIdMap = new Map<string, string>()
-  for (const c of seedRubricCriteria) criterionIdMap.set(c.id, createId())
-
-  const assignmentIdMap = new Map<string, string>()
-  for (const a of seedAssignments) assignmentIdMap.set(a.id, createId())
-
-  const submissionIdMap = new Map<string, string>()
-  for (const s of seedSubmissions) submissionIdMap.set(s.id, createId())
-
-  const quizIdMap = new Map<string, string>()
-  for (const q of seedQuizzes) quizIdMap.set(q.id, createId())
-
-  const questionIdMap = new Map<string, string>()
-  for (const q of seedQuizQuestions) questionIdMap.set(q.id, createId())
-
-  const iepIdMap = new Map<string, string>()
-  for (const i of seedIeps) iepIdMap.set(i.id, createId())
+  const templateIds = [
+    ...seedUserIds,
+    ...seedClassIds,
+    ...[
+      seedClassMembers, seedParentChildren, seedRubrics, seedSubmissions, seedMasteryRecords,
+      seedLessonPlans, seedQuizzes, seedIeps, seedComplianceDeadlines, seedMessages,
+      seedNotifications, seedTutorSessions, seedReportCards, seedClassStandards, seedRubricCriteria,
+      seedAssignments, seedFeedbackDrafts, seedCriterionScores, seedQuizQuestions, seedIepGoals,
+      seedTutorMessages, seedDiffVersions, seedQuestionStandards, seedProgressDataPoints,
+    ].flatMap(ids),
+  ]
+
+  return {
+    seedEmails: new Set(seedUsers.map((u) => u.email)),
+    ids: JSON.stringify(templateIds),
+    userCount: seedUsers.length,
+    statements: CLONE_STEPS.map((step) => cloneStatement(step)),
+  }
+}
 
-  const goalIdMap = new Map<string, string>()
-  for (const g of seedIepGoals) goalIdMap.set(g.id, createId())
+function cloneEmail(email: string, sessionId: string): string {
+  const [local, domain] = email.split('@')
+  return `${local}.demo.${sessionId.slice(0, 8)}@${domain}`
+}
 
-  // Helper to remap or keep an ID
-  function remap(map: Map<string, string>, id: string): string {
-    return map.get(id) ?? id
-  }
-  function remapNullable(map: Map<string, string>, id: string | null): string | null {
-    if (!id) return null
-    return map.get(id) ?? id
-  }
+/**
+ * Copy the seed dataset into a new sandbox. With `claimFor`, the sandbox is
+ * handed out immediately; otherwise it joins the pool.
+ */
+async function provisionSandbox(template: DemoTemplate, claimFor: string | null): Promise<string> {
+  const sessionId = createId()
+  const emailSuffix = `.demo.${sessionId.slice(0, 8)}@`
 
-  // Insert everything in a transaction
   await db.transaction(async (tx) => {
-    // Demo session
+    if (!claimFor) {
+      // Refills in other processes wait here, then see this sandbox once it
+      // commits, so the pool size is rechecked under the lock
+      await tx.execute(sql`select pg_advisory_xact_lock(hashtext('demo_pool'))`)
+      const [{ count }] = await tx
+        .select({ count: sql<number>`count(*)::int` })
+        .from(schema.demoSessions)
+        .where(unclaimedPooledSandbox())
+      if (count >= DEMO_POOL_SIZE) throw new PoolFullError()
+    }
+
     await tx.insert(schema.demoSessions).values({
       id: sessionId,
-      sourceEmail,
+      sourceEmail: claimFor,
+      claimedAt: claimFor ? new Date() : null,
     })
 
-    // Users
-    await tx.insert(schema.users).values(
-      usersToClone.map((u) => ({
-        id: remap(userIdMap, u.id),
-        name: u.name,
-        email: cloneEmail(u.email),
-        emailVerified: u.emailVerified,
-        image: u.image,
-        passwordHash: u.passwordHash,
-        role: u.role,
-        demoSessionId: sessionId,
-        createdAt: u.createdAt,
-        updatedAt: u.updatedAt,
-      }))
-    )
-
-    // Classes
-    if (seedClasses.length > 0) {
-      await tx.insert(schema.classes).values(
-        seedClasses.map((c) => ({
-          id: remap(classIdMap, c.id),
-          name: c.name,
-          subject: c.subject,
-          gradeLevel: c.gradeLevel,
-          period: c.period,
-          schoolYear: c.schoolYear,
-          schoolId: c.schoolId, // keep — shared
-          createdAt: c.createdAt,
-          updatedAt: c.updatedAt,
-        }))
-      )
-    }
-
-    // Class Members
-    if (seedClassMembers.length > 0) {
-      await tx.insert(schema.classMembers).values(
-        seedClassMembers.map((cm) => ({
-          id: createId(),
-          classId: remap(classIdMap, cm.classId),
-          userId: remap(userIdMap, cm.userId),
-          role: cm.role,
-          joinedAt: cm.joinedAt,
-        }))
-      )
-    }
-
-    // Parent-Child Links
-    if (seedParentChildren.length > 0) {
-      await tx.insert(schema.parentChildren).values(
-        seedParentChildren.map((pc) => ({
-          id: createId(),
-          parentId: remap(userIdMap, pc.parentId),
-          childId: remap(userIdMap, pc.childId),
-        }))
-      )
-    }
-
-    // Class Standards
-    if (seedClassStandards.length > 0) {
-      await tx.insert(schema.classStandards).values(
-        seedClassStandards.map((cs) => ({
-          id: createId(),
-          classId: remap(classIdMap, cs.classId),
-          standardId: cs.standardId, // keep — shared
-        }))
-      )
-    }
-
-    // Rubrics
-    if (seedRubrics.length > 0) {
-      await tx.insert(schema.rubrics).values(
-        seedRubrics.map((r) => ({
-          id: remap(rubricIdMap, r.id),
-          title: r.title,
-          description: r.description,
-          type: r.type,
-          levels: r.levels,
-          teacherId: remap(userIdMap, r.teacherId),
-          isTemplate: r.isTemplate,
-          createdAt: r.createdAt,
-          updatedAt: r.updatedAt,
-        }))
-      )
-    }
-
-    // Rubric Criteria
-    if (seedRubricCriteria.length > 0) {
-      await tx.insert(schema.rubricCriteria).values(
-        seedRubricCriteria.map((rc) => ({
-          id: remap(criterionIdMap, rc.id),
-          rubricId: remap(rubricIdMap, rc.rubricId),
-          name: rc.name,
-          description: rc.description,
-          weight: rc.weight,
-          standardId: rc.standardId, // keep — shared
-          descriptors: rc.descriptors,
-        }))
-      )
-    }
-
-    // Assignments
-    if (seedAssignments.length > 0) {
-      await tx.insert(schema.assignments).values(
-        seedAssignments.map((a) => ({
-          id: remap(assignmentIdMap, a.id),
-          title: a.title,
-          description: a.description,
-          instructions: a.instructions,
-          type: a.type,
-          gradeLevel: a.gradeLevel,
-          subject: a.subject,
-          dueDate: a.dueDate,
-          status: a.status,
-          classId: remap(classIdMap, a.classId),
-          teacherId: remap(userIdMap, a.teacherId),
-          rubricId: remapNullable(rubricIdMap, a.rubricId),
-          successCriteria: a.successCriteria,
-          aiMetadata: a.aiMetadata,
-          createdAt: a.createdAt,
-          updatedAt: a.updatedAt,
-        }))
-      )
-    }
-
-    // Differentiated Versions
-    if (seedDiffVersions.length > 0) {
-      await tx.insert(schema.differentiatedVersions).values(
-        seedDiffVersions.map((dv) => ({
-          id: createId(),
-          assignmentId: remap(assignmentIdMap, dv.assignmentId),
-          tier: dv.tier,
-          title: dv.title,
-          content: dv.content,
-          scaffolds: dv.scaffolds,
-          createdAt: dv.createdAt,
-        }))
-      )
-    }
-
-    // Submissions
-    if (seedSubmissions.length > 0) {
-      await tx.insert(schema.submissions).values(
-        seedSubmissions.map((s) => ({
-          id: remap(submissionIdMap, s.id),
-          assignmentId: remap(assignmentIdMap, s.assignmentId),
-          studentId: remap(userIdMap, s.studentId),
-          content: s.content,
-          attachments: s.attachments,
-          status: s.status,
-          submittedAt: s.submittedAt,
-          gradedAt: s.gradedAt,
-          totalScore: s.totalScore,
-          maxScore: s.maxScore,
-          letterGrade: s.letterGrade,
-        }))
-      )
-    }
-
-    // Feedback Drafts — only for cloned submissions
-    const feedbackToClone = seedFeedbackDrafts.filter((fd) => submissionIdMap.has(fd.submissionId))
-    if (feedbackToClone.length > 0) {
-      await tx.insert(schema.feedbackDrafts).values(
-        feedbackToClone.map((fd) => ({
-          id: createId(),
-          submissionId: remap(submissionIdMap, fd.submissionId),
-          teacherId: remap(userIdMap, fd.teacherId),
-          aiFeedback: fd.aiFeedback,
-          teacherEdits: fd.teacherEdits,
-          finalFeedback: fd.finalFeedback,
-          status: fd.status,
-          strengths: fd.strengths,
-          improvements: fd.improvements,
-          nextSteps: fd.nextSteps,
-          aiMetadata: fd.aiMetadata,
-          createdAt: fd.createdAt,
-          updatedAt: fd.updatedAt,
-        }))
-      )
-    }
-
-    // Criterion Scores — only for cloned submissions
-    const scoresToClone = seedCriterionScores.filter((cs) => submissionIdMap.has(cs.submissionId))
-    if (scoresToClone.length > 0) {
-      await tx.insert(schema.criterionScores).values(
-        scoresToClone.map((cs) => ({
-          id: createId(),
-          submissionId: remap(submissionIdMap, cs.submissionId),
-          criterionId: remap(criterionIdMap, cs.criterionId),
-          level: cs.level,
-          score: cs.score,
-          maxScore: cs.maxScore,
-          justification: cs.justification,
-        }))
-      )
-    }
-
-    // Mastery Records
-    if (seedMasteryRecords.length > 0) {
-      await tx.insert(schema.masteryRecords).values(
-        seedMasteryRecords.map((mr) => ({
-          id: createId(),
-          studentId: remap(userIdMap, mr.studentId),
-          standardId: mr.standardId, // keep — shared
-          level: mr.level,
-          score: mr.score,
-          assessedAt: mr.assessedAt,
-          source: mr.source ? (assignmentIdMap.get(mr.source) ?? mr.source) : mr.source,
-          notes: mr.notes,
-        }))
-      )
-    }
-
-    // Lesson Plans
-    if (seedLessonPlans.length > 0) {
-      await tx.insert(schema.lessonPlans).values(
-        seedLessonPlans.map((lp) => ({
-          id: createId(),
-          title: lp.title,
-          subject: lp.subject,
-          gradeLevel: lp.gradeLevel,
-          duration: lp.duration,
-          standards: lp.standards,
-          objectives: lp.objectives,
-          warmUp: lp.warmUp,
-          directInstruction: lp.directInstruction,
-          guidedPractice: lp.guidedPractice,
-          independentPractice: lp.independentPractice,
-          closure: lp.closure,
-          materials: lp.materials,
-          differentiation: lp.differentiation,
-          assessmentPlan: lp.assessmentPlan,
-          teacherId: remap(userIdMap, lp.teacherId),
-          aiMetadata: lp.aiMetadata,
-          createdAt: lp.createdAt,
-          updatedAt: lp.updatedAt,
-        }))
-      )
-    }
-
-    // Quizzes
-    if (seedQuizzes.length > 0) {
-      await tx.insert(schema.quizzes).values(
-        seedQuizzes.map((q) => ({
-          id: remap(quizIdMap, q.id),
-          title: q.title,
-          subject: q.subject,
-          gradeLevel: q.gradeLevel,
-          standards: q.standards,
-          difficultyLevel: q.difficultyLevel,
-          timeLimit: q.timeLimit,
-          createdBy: remapNullable(userIdMap, q.createdBy),
-          createdAt: q.createdAt,
-        }))
-      )
-    }
-
-    // Quiz Questions
-    if (seedQuizQuestions.length > 0) {
-      await tx.insert(schema.quizQuestions).values(
-        seedQuizQuestions.map((qq) => ({
-          id: remap(questionIdMap, qq.id),
-          quizId: remap(quizIdMap, qq.quizId),
-          type: qq.type,
-          questionText: qq.questionText,
-          options: qq.options,
-          correctAnswer: qq.correctAnswer,
-          explanation: qq.explanation,
-          bloomsLevel: qq.bloomsLevel,
-          points: qq.points,
-          orderIndex: qq.orderIndex,
-        }))
-      )
-    }
-
-    // Question Standards
-    if (seedQuestionStandards.length > 0) {
-      await tx.insert(schema.questionStandards).values(
-        seedQuestionStandards.map((qs) => ({
-          id: createId(),
-          questionId: remap(questionIdMap, qs.questionId),
-          standardId: qs.standardId, // keep — shared
-        }))
-      )
-    }
-
-    // IEPs
-    if (seedIeps.length > 0) {
-      await tx.insert(schema.ieps).values(
-        seedIeps.map((iep) => ({
-          id: remap(iepIdMap, iep.id),
-          studentId: remap(userIdMap, iep.studentId),
-          authorId: remap(userIdMap, iep.authorId),
-          status: iep.status,
-          startDate: iep.startDate,
-          endDate: iep.endDate,
-          presentLevels: iep.presentLevels,
-          disabilityCategory: iep.disabilityCategory,
-          accommodations: iep.accommodations,
-          modifications: iep.modifications,
-          relatedServices: iep.relatedServices,
-          transitionPlan: iep.transitionPlan,
-          meetingDate: iep.meetingDate,
-          meetingNotes: iep.meetingNotes,
-          parentInput: iep.parentInput,
-          aiMetadata: iep.aiMetadata,
-          createdAt: iep.createdAt,
-          updatedAt: iep.updatedAt,
-        }))
-      )
-    }
-
-    // IEP Goals
-    if (seedIepGoals.length > 0) {
-      await tx.insert(schema.iepGoals).values(
-        seedIepGoals.map((g) => ({
-          id: remap(goalIdMap, g.id),
-          iepId: remap(iepIdMap, g.iepId),
-          area: g.area,
-          goalText: g.goalText,
-          baseline: g.baseline,
-          target: g.target,
-          measureMethod: g.measureMethod,
-          frequency: g.frequency,
-          timeline: g.timeline,
-          status: g.status,
-          similarityScore: g.similarityScore,
-          aiGenerated: g.aiGenerated,
-          createdAt: g.createdAt,
-        }))
-      )
-    }
-
-    // Progress Data Points
-    if (seedProgressDataPoints.length > 0) {
-      await tx.insert(schema.progressDataPoints).values(
-        seedProgressDataPoints.map((pdp) => ({
-          id: createId(),
-          goalId: remap(goalIdMap, pdp.goalId),
-          studentId: remap(userIdMap, pdp.studentId),
-          value: pdp.value,
-          unit: pdp.unit,
-          date: pdp.date,
-          notes: pdp.notes,
-          recordedBy: pdp.recordedBy ? (userIdMap.get(pdp.recordedBy) ?? pdp.recordedBy) : pdp.recordedBy,
-        }))
-      )
-    }
-
-    // Compliance Deadlines
-    if (seedComplianceDeadlines.length > 0) {
-      await tx.insert(schema.complianceDeadlines).values(
-        seedComplianceDeadlines.map((cd) => ({
-          id: createId(),
-          type: cd.type,
-          studentId: remap(userIdMap, cd.studentId), // plain text, not FK
-          dueDate: cd.dueDate,
-          status: cd.status,
-          completedAt: cd.completedAt,
-          notes: cd.notes,
-        }))
-      )
-    }
-
-    // Messages
-    if (seedMessages.length > 0) {
-      await tx.insert(schema.messages).values(
-        seedMessages.map((m) => ({
-          id: createId(),
-          senderId: remap(userIdMap, m.senderId),
-          receiverId: remap(userIdMap, m.receiverId),
-          subject: m.subject,
-          content: m.content,
-          type: m.type,
-          language: m.language,
-          isAIGenerated: m.isAIGenerated,
-          status: m.status,
-          metadata: m.metadata,
-          createdAt: m.createdAt,
-        }))
-      )
-    }
+    // Old id -> new id for every template row. New ids are derived from the
+    // session id and keep the CUID shape (24 lowercase alphanumerics).
+    await tx.execute(sql`
+      create temp table demo_id_map (old_id text primary key, new_id text not null) on commit drop
+    `)
+    await tx.execute(sql`
+      insert into demo_id_map (old_id, new_id)
+      select old_id, 'd' || substr(md5(${sessionId}::text || old_id), 1, 23)
+      from json_array_elements_text(${template.ids}::json) as ids(old_id)
+    `)
+
+    const clonedUsers = await tx.execute(sql`
+      ${cloneStatement(usersStep, {
+        email: sql`split_part(t.email, '@', 1) || ${emailSuffix}::text || split_part(t.email, '@', 2)`,
+        demo_session_id: sql`${sessionId}::text`,
+      })}
+      returning id
+    `)
+    if (clonedUsers.length !== template.userCount) {
+      throw new StaleTemplateError('Seed users changed since the demo template was loaded')
+    }
+
+    for (const statement of template.statements) {
+      await tx.execute(statement)
+    }
+
+    // Count the sandbox in the analytics rollups
+    const rollups = await collectRollups({ demoSessionIds: [sessionId] }, tx)
+    await rollups.apply(tx)
+  })
 
-    // Notifications
-    if (seedNotifications.length > 0) {
-      await tx.insert(schema.notifications).values(
-        seedNotifications.map((n) => ({
-          id: createId(),
-          userId: remap(userIdMap, n.userId),
-          type: n.type,
-          title: n.title,
-          body: n.body,
-          isRead: n.isRead,
-          link: n.link,
-          createdAt: n.createdAt,
-        }))
-      )
-    }
+  return sessionId
+}
 
-    // Tutor Sessions
-    if (seedTutorSessions.length > 0) {
-      await tx.insert(schema.tutorSessions).values(
-        seedTutorSessions.map((ts) => ({
-          id: createId(),
-          studentId: remap(userIdMap, ts.studentId),
-          subject: ts.subject,
-          topic: ts.topic,
-          messages: ts.messages,
-          startedAt: ts.startedAt,
-          endedAt: ts.endedAt,
-          metadata: ts.metadata,
-        }))
-      )
-    }
+/** Provision with the current template, reloading it once if the seed data changed (e.g. after a reseed). */
+async function provisionWithTemplate(claimFor: string | null): Promise<string> {
+  try {
+    return await provisionSandbox(await getTemplate(), claimFor)
+  } catch (error) {
+    if (!(error instanceof StaleTemplateError)) throw error
+    templatePromise = null
+    return provisionSandbox(await getTemplate(), claimFor)
+  }
+}
 
-    // Report Cards
-    if (seedReportCards.length > 0) {
-      await tx.insert(schema.reportCards).values(
-        seedReportCards.map((rc) => ({
-          id: createId(),
-          studentId: remap(userIdMap, rc.studentId),
-          classId: remap(classIdMap, rc.classId),
-          gradingPeriod: rc.gradingPeriod,
-          narrative: rc.narrative,
-          strengths: rc.strengths,
-          areasForGrowth: rc.areasForGrowth,
-          recommendations: rc.recommendations,
-          gradeRecommendation: rc.gradeRecommendation,
-          status: rc.status,
-          generatedAt: rc.generatedAt,
-          approvedAt: rc.approvedAt,
-          approvedBy: remapNullable(userIdMap, rc.approvedBy),
-        }))
-      )
-    }
-  })
+function poolCutoff(): Date {
+  return new Date(Date.now() - POOL_SANDBOX_MAX_AGE_MS)
+}
 
-  const clonedEmail = cloneEmail(sourceEmail)
-  return { email: clonedEmail, sessionId }
+function unclaimedPooledSandbox(): SQL | undefined {
+  return and(isNull(schema.demoSessions.sourceEmail), gt(schema.demoSessions.createdAt, poolCutoff()))
 }
 
-/**
- * Delete demo sessions older than 1 hour and all their associated data.
- */
-export async function cleanupExpiredDemoSessions(): Promise<void> {
-  const expiry = new Date(Date.now() - DEMO_SESSION_TTL_MS)
-  const expired = await db
+/** Claim the oldest pooled sandbox for `sourceEmail`. Returns its session id, or null if the pool is empty. */
+async function claimPooledSandbox(sourceEmail: string): Promise<string | null> {
+  const next = db
     .select({ id: schema.demoSessions.id })
     .from(schema.demoSessions)
-    .where(lte(schema.demoSessions.createdAt, expiry))
-
-  if (expired.length === 0) return
-
-  const sessionIds = expired.map((s) => s.id)
-
-  // Find all demo users for these sessions
-  const demoUsers = await db
-    .select({ id: schema.users.id })
-    .from(schema.users)
-    .where(inArray(schema.users.demoSessionId, sessionIds))
+    .where(unclaimedPooledSandbox())
+    .orderBy(schema.demoSessions.createdAt)
+    .limit(1)
+    .for('update', { skipLocked: true })
+
+  const [claimed] = await db
+    .update(schema.demoSessions)
+    .set({ sourceEmail, claimedAt: new Date() })
+    .where(inArray(schema.demoSessions.id, next))
+    .returning({ id: schema.demoSessions.id })
+
+  return claimed?.id ?? null
+}
 
-  if (demoUsers.length === 0) {
-    // Sessions exist but no users — clean up orphaned sessions
-    await db.delete(schema.demoSessions).where(inArray(schema.demoSessions.id, sessionIds))
-    return
+/**
+ * Hand out a demo sandbox for a seed user, from the pool when one is ready.
+ * Returns the cloned entry user's email.
+ */
+export async function cloneDemoData(sourceEmail: string): Promise<{ email: string; sessionId: string }> {
+  const template = await getTemplate()
+  if (!template.seedEmails.has(sourceEmail)) {
+    throw new Error(`Source email ${sourceEmail} not found in seed users`)
   }
 
-  const demoUserIds = demoUsers.map((u) => u.id)
+  const sessionId =
+    (await claimPooledSandbox(sourceEmail)) ?? (await provisionWithTemplate(sourceEmail))
 
-  // Gather child IDs needed for cascading deletes
-  const [demoIeps, demoQuizzes, demoSubmissions, demoAssignments, demoRubrics, demoClassRows] = await Promise.all([
-    db.select({ id: schema.ieps.id }).from(schema.ieps).where(inArray(schema.ieps.studentId, demoUserIds)),
-    db.select({ id: schema.quizzes.id }).from(schema.quizzes).where(inArray(schema.quizzes.createdBy, demoUserIds)),
-    db.select({ id: schema.submissions.id }).from(schema.submissions).where(inArray(schema.submissions.studentId, demoUserIds)),
-    db.select({ id: schema.assignments.id }).from(schema.assignments).where(inArray(schema.assignments.teacherId, demoUserIds)),
-    db.select({ id: schema.rubrics.id }).from(schema.rubrics).where(inArray(schema.rubrics.teacherId, demoUserIds)),
-    db.select({ classId: schema.classMembers.classId }).from(schema.classMembers).where(inArray(schema.classMembers.userId, demoUserIds)),
-  ])
+  return { email: cloneEmail(sourceEmail, sessionId), sessionId }
+}
 
-  const demoIepIds = demoIeps.map((i) => i.id)
-  const demoQuizIds = demoQuizzes.map((q) => q.id)
-  const demoSubmissionIds = demoSubmissions.map((s) => s.id)
-  const demoAssignmentIds = demoAssignments.map((a) => a.id)
-  const demoRubricIds = demoRubrics.map((r) => r.id)
-  const demoClassIds = [...new Set(demoClassRows.map((r) => r.classId))]
-
-  // Gather grandchild IDs
-  const [demoGoals, demoQuestions] = await Promise.all([
-    demoIepIds.length > 0 ? db.select({ id: schema.iepGoals.id }).from(schema.iepGoals).where(inArray(schema.iepGoals.iepId, demoIepIds)) : Promise.resolve([]),
-    demoQuizIds.length > 0 ? db.select({ id: schema.quizQuestions.id }).from(schema.quizQuestions).where(inArray(schema.quizQuestions.quizId, demoQuizIds)) : Promise.resolve([]),
-  ])
+let replenishing: Promise<number> | null = null
 
-  const demoGoalIds = demoGoals.map((g) => g.id)
-  const demoQuestionIds = demoQuestions.map((q) => q.id)
+/**
+ * Top the pool up to `DEMO_POOL_SIZE` unclaimed sandboxes. Concurrent calls
+ * in one process share a single refill; across processes, each sandbox is
+ * provisioned under an advisory lock that rechecks the pool size. Returns the
+ * number provisioned.
+ */
+export function replenishDemoPool(): Promise<number> {
+  replenishing ??= (async () => {
+    try {
+      // Unlocked read so a full pool costs one query
+      const [{ count }] = await db
+        .select({ count: sql<number>`count(*)::int` })
+        .from(schema.demoSessions)
+        .where(unclaimedPooledSandbox())
+
+      let provisioned = 0
+      for (let i = count; i < DEMO_POOL_SIZE; i++) {
+        try {
+          await provisionWithTemplate(null)
+        } catch (error) {
+          // Another process filled the pool first
+          if (error instanceof PoolFullError) break
+          throw error
+        }
+        provisioned++
+      }
+      return provisioned
+    } finally {
+      replenishing = null
+    }
+  })()
+  return replenishing
+}
 
-  // Delete everything in a transaction, reverse dependency order
+/** Delete sandboxes and everything they own, with set-based deletes in one transaction. */
+async function deleteSandboxes(sessionIds: string[]): Promise<void> {
   await db.transaction(async (tx) => {
-    await tx.delete(schema.reportCards).where(inArray(schema.reportCards.studentId, demoUserIds))
-    await tx.delete(schema.tutorSessions).where(inArray(schema.tutorSessions.studentId, demoUserIds))
-    await tx.delete(schema.notifications).where(inArray(schema.notifications.userId, demoUserIds))
-    await tx.delete(schema.messages).where(
-      or(inArray(schema.messages.senderId, demoUserIds), inArray(schema.messages.receiverId, demoUserIds))
-    )
-
-    if (demoGoalIds.length > 0) {
-      await tx.delete(schema.progressDataPoints).where(inArray(schema.progressDataPoints.goalId, demoGoalIds))
-    }
-    if (demoIepIds.length > 0) {
-      await tx.delete(schema.iepGoals).where(inArray(schema.iepGoals.iepId, demoIepIds))
-    }
-    await tx.delete(schema.complianceDeadlines).where(inArray(schema.complianceDeadlines.studentId, demoUserIds))
-    await tx.delete(schema.ieps).where(inArray(schema.ieps.studentId, demoUserIds))
-
-    if (demoQuestionIds.length > 0) {
-      await tx.delete(schema.questionStandards).where(inArray(schema.questionStandards.questionId, demoQuestionIds))
-      await tx.delete(schema.quizQuestions).where(inArray(schema.quizQuestions.quizId, demoQuizIds))
-    }
-    await tx.delete(schema.quizzes).where(inArray(schema.quizzes.createdBy, demoUserIds))
-
-    await tx.delete(schema.lessonPlans).where(inArray(schema.lessonPlans.teacherId, demoUserIds))
-    await tx.delete(schema.masteryRecords).where(inArray(schema.masteryRecords.studentId, demoUserIds))
-
-    if (demoSubmissionIds.length > 0) {
-      await tx.delete(schema.criterionScores).where(inArray(schema.criterionScores.submissionId, demoSubmissionIds))
-      await tx.delete(schema.feedbackDrafts).where(inArray(schema.feedbackDrafts.submissionId, demoSubmissionIds))
-    }
-    await tx.delete(schema.submissions).where(inArray(schema.submissions.studentId, demoUserIds))
-
-    if (demoAssignmentIds.length > 0) {
-      await tx.delete(schema.differentiatedVersions).where(inArray(schema.differentiatedVersions.assignmentId, demoAssignmentIds))
-    }
-    await tx.delete(schema.assignments).where(inArray(schema.assignments.teacherId, demoUserIds))
-
-    if (demoRubricIds.length > 0) {
-      await tx.delete(schema.rubricCriteria).where(inArray(schema.rubricCriteria.rubricId, demoRubricIds))
-    }
-    await tx.delete(schema.rubrics).where(inArray(schema.rubrics.teacherId, demoUserIds))
+    // Remove the sandboxes' contribution to the analytics rollups first
+    const rollups = await collectRollups({ demoSessionIds: sessionIds, sign: -1 }, tx)
+    await rollups.apply(tx)
+
+    const demoUsers = tx
+      .select({ id: schema.users.id })
+      .from(schema.users)
+      .where(inArray(schema.users.demoSessionId, sessionIds))
+    const ownedBy = (column: AnyPgColumn) => inArray(column, demoUsers)
+
+    // Classes are only reachable through memberships, which go before them
+    const demoClassIds = [
+      ...new Set(
+        (
+          await tx
+            .select({ classId: schema.classMembers.classId })
+            .from(schema.classMembers)
+            .where(ownedBy(schema.classMembers.userId))
+        ).map((r) => r.classId)
+      ),
+    ]
+
+    const demoIeps = tx.select({ id: schema.ieps.id }).from(schema.ieps).where(ownedBy(schema.ieps.studentId))
+    const demoGoals = tx.select({ id: schema.iepGoals.id }).from(schema.iepGoals).where(inArray(schema.iepGoals.iepId, demoIeps))
+    const demoQuizzes = tx.select({ id: schema.quizzes.id }).from(schema.quizzes).where(ownedBy(schema.quizzes.createdBy))
+    const demoQuestions = tx
+      .select({ id: schema.quizQuestions.id })
+      .from(schema.quizQuestions)
+      .where(inArray(schema.quizQuestions.quizId, demoQuizzes))
+    const demoSubmissions = tx
+      .select({ id: schema.submissions.id })
+      .from(schema.submissions)
+      .where(ownedBy(schema.submissions.studentId))
+    const demoAssignments = tx
+      .select({ id: schema.assignments.id })
+      .from(schema.assignments)
+      .where(ownedBy(schema.assignments.teacherId))
+    const demoRubrics = tx.select({ id: schema.rubrics.id }).from(schema.rubrics).where(ownedBy(schema.rubrics.teacherId))
+
+    // Reverse dependency order
+    await tx.delete(schema.reportCards).where(ownedBy(schema.reportCards.studentId))
+    await tx.delete(schema.tutorSessions).where(ownedBy(schema.tutorSessions.studentId))
+    await tx.delete(schema.notifications).where(ownedBy(schema.notifications.userId))
+    await tx.delete(schema.messages).where(or(ownedBy(schema.messages.senderId), ownedBy(schema.messages.receiverId)))
+
+    await tx.delete(schema.progressDataPoints).where(inArray(schema.progressDataPoints.goalId, demoGoals))
+    await tx.delete(schema.iepGoals).where(inArray(schema.iepGoals.iepId, demoIeps))
+    await tx.delete(schema.complianceDeadlines).where(ownedBy(schema.complianceDeadlines.studentId))
+    await tx.delete(schema.ieps).where(ownedBy(schema.ieps.studentId))
+
+    await tx.delete(schema.questionStandards).where(inArray(schema.questionStandards.questionId, demoQuestions))
+    await tx.delete(schema.quizQuestions).where(inArray(schema.quizQuestions.quizId, demoQuizzes))
+    await tx.delete(schema.quizzes).where(ownedBy(schema.quizzes.createdBy))
+
+    await tx.delete(schema.lessonPlans).where(ownedBy(schema.lessonPlans.teacherId))
+    await tx.delete(schema.masteryLatest).where(ownedBy(schema.masteryLatest.studentId))
+    await tx.delete(schema.masteryRecords).where(ownedBy(schema.masteryRecords.studentId))
+
+    await tx.delete(schema.criterionScores).where(inArray(schema.criterionScores.submissionId, demoSubmissions))
+    await tx.delete(schema.feedbackDrafts).where(inArray(schema.feedbackDrafts.submissionId, demoSubmissions))
+    await tx.delete(schema.submissions).where(ownedBy(schema.submissions.studentId))
+
+    await tx.delete(schema.differentiatedVersions).where(inArray(schema.differentiatedVersions.assignmentId, demoAssignments))
+    await tx.delete(schema.assignments).where(ownedBy(schema.assignments.teacherId))
+
+    await tx.delete(schema.rubricCriteria).where(inArray(schema.rubricCriteria.rubricId, demoRubrics))
+    await tx.delete(schema.rubrics).where(ownedBy(schema.rubrics.teacherId))
 
     if (demoClassIds.length > 0) {
       await tx.delete(schema.classStandards).where(inArray(schema.classStandards.classId, demoClassIds))
     }
-    await tx.delete(schema.classMembers).where(inArray(schema.classMembers.userId, demoUserIds))
+    await tx.delete(schema.classMembers).where(ownedBy(schema.classMembers.userId))
     await tx.delete(schema.parentChildren).where(
-      or(inArray(schema.parentChildren.parentId, demoUserIds), inArray(schema.parentChildren.childId, demoUserIds))
+      or(ownedBy(schema.parentChildren.parentId), ownedBy(schema.parentChildren.childId))
     )
     if (demoClassIds.length > 0) {
       await tx.delete(schema.classes).where(inArray(schema.classes.id, demoClassIds))
@@ -715,3 +558,51 @@ export async function cleanupExpiredDemoSessions(): Promise<void> {
     await tx.delete(schema.demoSessions).where(inArray(schema.demoSessions.id, sessionIds))
   })
 }
+
+/**
+ * Delete sandboxes handed out more than an hour ago, and pooled sandboxes
+ * that were never claimed, in batches. Returns the number deleted.
+ */
+export async function cleanupExpiredDemoSessions(): Promise<number> {
+  const claimedBefore = new Date(Date.now() - DEMO_SESSION_TTL_MS)
+  const pooledBefore = poolCutoff()
+  let deleted = 0
+
+  for (;;) {
+    const expired = await db
+      .select({ id: schema.demoSessions.id })
+      .from(schema.demoSessions)
+      .where(
+        or(
+          and(isNotNull(schema.demoSessions.sourceEmail), lte(schema.demoSessions.claimedAt, claimedBefore)),
+          // Sessions handed out before the pool existed have no claimed_at
+          and(
+            isNotNull(schema.demoSessions.sourceEmail),
+            isNull(schema.demoSessions.claimedAt),
+            lte(schema.demoSessions.createdAt, claimedBefore)
+          ),
+          and(isNull(schema.demoSessions.sourceEmail), lte(schema.demoSessions.createdAt, pooledBefore))
+        )
+      )
+      .limit(CLEANUP_BATCH_SIZE)
+
+    if (expired.length === 0) return deleted
+
+    await deleteSandboxes(expired.map((s) => s.id))
+    deleted += expired.length
+  }
+}
+
+let lastCleanupAt = 0
+
+/**
+ * Refill the pool and, at most once per `CLEANUP_INTERVAL_MS`, delete
+ * expired sandboxes. Runs in the background; failures are logged.
+ */
+export function scheduleDemoMaintenance(): void {
+  replenishDemoPool().catch((error) => console.error('Failed to replenish demo pool:', error))
+
+  if (Date.now() - lastCleanupAt < CLEANUP_INTERVAL_MS) return
+  lastCleanupAt = Date.now()
+  cleanupExpiredDemoSessions().catch((error) => console.error('Failed to clean up demo sandboxes:', error))
+}
@@ -0,0 +1,365 @@
+import { db } from '@/lib/db'
+import {
+  users,
+  classes,
+  classMembers,
+  masteryRecords,
+  submissions,
+  assignments,
+  studentRiskScores,
+} from '@/lib/db/schema'
+import { eq, and, or, asc, gte, lt, inArray, isNull, isNotNull, sql, type SQL, type SQLWrapper } from 'drizzle-orm'
+import type { AnyPgColumn } from 'drizzle-orm/pg-core'
+
+/**
+ * Set-based early-warning scoring. Indicators are computed for a batch of
+ * students with three grouped queries (recent scores, below-proficient
+ * standards, missing submissions) and a single pass over the results, then
+ * stored in `student_risk_scores`. Reads refresh only the rows that are
+ * missing, invalidated by a write, or older than `REFRESH_INTERVAL_MS`, and
+ * page through the stored rows in SQL.
+ */
+
+export type RiskLevel = 'high_risk' | 'moderate_risk' | 'on_track'
+export type TrendDirection = 'declining' | 'stable' | 'improving'
+
+export interface RiskAssessment {
+  riskLevel: RiskLevel
+  indicators: string[]
+  trendDirection: TrendDirection
+}
+
+/** A subquery selecting a single column of student user ids. */
+export type StudentScope = SQLWrapper
+
+const LOOKBACK_DAYS = 30
+const RECENT_SCORE_LIMIT = 10
+const COMPUTE_BATCH_SIZE = 1000
+// The 30-day window slides even when nothing is written, so rows are also
+// recomputed once they reach this age
+const REFRESH_INTERVAL_MS = 60 * 60 * 1000
+
+export const riskRank: Record<RiskLevel, number> = {
+  high_risk: 0,
+  moderate_risk: 1,
+  on_track: 2,
+}
+
+function studentScopeQuery(classIds: string[] | SQLWrapper) {
+  return db
+    .select({ id: classMembers.userId })
+    .from(classMembers)
+    .where(and(inArray(classMembers.classId, classIds), eq(classMembers.role, 'student')))
+}
+
+function classIdsQuery(teacherId: string) {
+  return db
+    .select({ id: classMembers.classId })
+    .from(classMembers)
+    .where(and(eq(classMembers.userId, teacherId), eq(classMembers.role, 'teacher')))
+}
+
+/**
+ * Students visible to a user: a teacher's enrolled students, or for admins
+ * every student (optionally only those in one school's classes).
+ */
+export function studentScopeFor(role: string, userId: string, schoolId?: string | null): StudentScope {
+  if (role === 'admin' || role === 'district_admin') {
+    if (schoolId) {
+      const schoolClassIds = db
+        .select({ id: classes.id })
+        .from(classes)
+        .where(eq(classes.schoolId, schoolId))
+      return studentScopeQuery(schoolClassIds)
+    }
+    return db.select({ id: users.id }).from(users).where(eq(users.role, 'student'))
+  }
+  return studentScopeQuery(classIdsQuery(userId))
+}
+
+function average(values: number[]): number {
+  return values.reduce((a, b) => a + b, 0) / values.length
+}
+
+/**
+ * Turn one student's aggregates into indicators and a risk level.
+ * `recentScores` are percentages, newest first.
+ */
+export function assessRisk(
+  recentScores: number[],
+  belowProficientCount: number,
+  missingCount: number
+): RiskAssessment {
+  const indicators: string[] = []
+
+  // Indicator 1: Declining score trend
+  let trendDirection: TrendDirection = 'stable'
+  if (recentScores.length >= 3) {
+    const halfIdx = Math.floor(recentScores.length / 2)
+    const recentAvg = average(recentScores.slice(0, halfIdx))
+    const olderAvg = average(recentScores.slice(halfIdx))
+
+    if (recentAvg < olderAvg - 5) {
+      trendDirection = 'declining'
+      indicators.push('Declining score trend')
+    } else if (recentAvg > olderAvg + 5) {
+      trendDirection = 'improving'
+    }
+  }
+
+  // Indicator 2: Standards below proficient
+  if (belowProficientCount > 0) {
+    indicators.push(`${belowProficientCount} standard${belowProficientCount !== 1 ? 's' : ''} below proficient`)
+  }
+
+  // Indicator 3: Missing submissions
+  if (missingCount > 0) {
+    indicators.push(`${missingCount} missing submission${missingCount !== 1 ? 's' : ''}`)
+  }
+
+  // Indicator 4: Low average score
+  if (recentScores.length > 0 && average(recentScores) < 70) {
+    indicators.push('Average score below 70%')
+  }
+
+  let riskLevel: RiskLevel = 'on_track'
+  if (indicators.length >= 3) {
+    riskLevel = 'high_risk'
+  } else if (indicators.length === 2) {
+    riskLevel = 'moderate_risk'
+  }
+
+  return { riskLevel, indicators, trendDirection }
+}
+
+function countsById(rows: { studentId: string; count: number }[]): Map<string, number> {
+  return new Map(rows.map((r) => [r.studentId, Number(r.count)]))
+}
+
+/**
+ * Compute risk for a batch of students in three grouped queries.
+ */
+export async function computeRiskScores(
+  studentIds: string[]
+): Promise<Map<string, RiskAssessment & { recentScores: number[] }>> {
+  const results = new Map<string, RiskAssessment & { recentScores: number[] }>()
+  if (studentIds.length === 0) return results
+
+  const since = new Date()
+  since.setDate(since.getDate() - LOOKBACK_DAYS)
+
+  // Latest graded scores per student as rounded percentages, newest first.
+  // floor(x + 0.5) matches Math.round for the non-negative percentages here.
+  const scoreRows = await db
+    .select({
+      studentId: submissions.studentId,
+      scores: sql<number[]>`(array_agg(
+        case when ${submissions.maxScore} > 0
+          then floor(${submissions.totalScore}::float / ${submissions.maxScore}::float * 100 + 0.5)::int
+          else 0 end
+        order by ${submissions.submittedAt} desc
+      ))[1:${sql.raw(String(RECENT_SCORE_LIMIT))}]`,
+    })
+    .from(submissions)
+    .where(
+      and(
+        inArray(submissions.studentId, studentIds),
+        eq(submissions.status, 'graded'),
+        isNotNull(submissions.totalScore),
+        isNotNull(submissions.maxScore)
+      )
+    )
+    .groupBy(submissions.studentId)
+
+  const belowProficientRows = await db
+    .select({ studentId: masteryRecords.studentId, count: sql<number>`count(*)` })
+    .from(masteryRecords)
+    .where(
+      and(
+        inArray(masteryRecords.studentId, studentIds),
+        gte(masteryRecords.assessedAt, since),
+        or(
+          lt(masteryRecords.score, 70),
+          inArray(masteryRecords.level, ['beginning', 'developing'])
+        )
+      )
+    )
+    .groupBy(masteryRecords.studentId)
+
+  // Recent assignments in the student's classes with no submission from them
+  const missingRows = await db
+    .select({ studentId: classMembers.userId, count: sql<number>`count(*)` })
+    .from(classMembers)
+    .innerJoin(assignments, eq(assignments.classId, classMembers.classId))
+    .leftJoin(
+      submissions,
+      and(
+        eq(submissions.assignmentId, assignments.id),
+        eq(submissions.studentId, classMembers.userId)
+      )
+    )
+    .where(
+      and(
+        inArray(classMembers.userId, studentIds),
+        eq(classMembers.role, 'student'),
+        gte(assignments.createdAt, since),
+        isNull(submissions.id)
+      )
+    )
+    .groupBy(classMembers.userId)
+
+  const scoresById = new Map(
+    scoreRows.map((r) => [r.studentId, (r.scores ?? []).map(Number)])
+  )
+  const belowProficient = countsById(belowProficientRows)
+  const missing = countsById(missingRows)
+
+  for (const studentId of studentIds) {
+    const recentScores = scoresById.get(studentId) ?? []
+    results.set(studentId, {
+      ...assessRisk(recentScores, belowProficient.get(studentId) ?? 0, missing.get(studentId) ?? 0),
+      recentScores,
+    })
+  }
+  return results
+}
+
+function excluded(column: AnyPgColumn): SQL {
+  return sql`excluded.${sql.identifier(column.name)}`
+}
+
+/**
+ * Recompute rows in `scope` that are missing, invalidated or past the refresh
+ * interval. Returns the number of students recomputed.
+ */
+export async function refreshRiskScores(scope: StudentScope): Promise<number> {
+  const cutoff = new Date(Date.now() - REFRESH_INTERVAL_MS)
+  const due = await db
+    .select({ id: users.id })
+    .from(users)
+    .leftJoin(studentRiskScores, eq(studentRiskScores.studentId, users.id))
+    .where(
+      and(
+        inArray(users.id, scope),
+        or(
+          isNull(studentRiskScores.studentId),
+          lt(studentRiskScores.computedAt, cutoff),
+          sql`${studentRiskScores.invalidatedAt} >= ${studentRiskScores.computedAt}`
+        )
+      )
+    )
+
+  for (let i = 0; i < due.length; i += COMPUTE_BATCH_SIZE) {
+    const ids = due.slice(i, i + COMPUTE_BATCH_SIZE).map((r) => r.id)
+    // Stamp rows with the time computation started, so a write that lands
+    // while this batch is being computed still leaves its row stale
+    const computedAt = new Date()
+    const scores = await computeRiskScores(ids)
+
+    await db
+      .insert(studentRiskScores)
+      .values(
+        [...scores].map(([studentId, s]) => ({
+          studentId,
+          riskLevel: s.riskLevel,
+          riskRank: riskRank[s.riskLevel],
+          indicators: s.indicators,
+          recentScores: s.recentScores,
+          trendDirection: s.trendDirection,
+          computedAt,
+        }))
+      )
+      .onConflictDoUpdate({
+        target: studentRiskScores.studentId,
+        set: {
+          riskLevel: excluded(studentRiskScores.riskLevel),
+          riskRank: excluded(studentRiskScores.riskRank),
+          indicators: excluded(studentRiskScores.indicators),
+          recentScores: excluded(studentRiskScores.recentScores),
+          trendDirection: excluded(studentRiskScores.trendDirection),
+          computedAt: excluded(studentRiskScores.computedAt),
+        },
+      })
+  }
+
+  return due.length
+}
+
+/**
+ * Flag students' stored risk as stale so the next read recomputes them.
+ * Failures are logged rather than thrown; the refresh interval bounds how
+ * long a missed invalidation can go unnoticed.
+ */
+export async function markRiskScoresStale(studentIds: string[]): Promise<void> {
+  if (studentIds.length === 0) return
+  try {
+    await db
+      .update(studentRiskScores)
+      .set({ invalidatedAt: new Date() })
+      .where(inArray(studentRiskScores.studentId, studentIds))
+  } catch (error) {
+    console.error('Failed to invalidate early-warning scores:', error)
+  }
+}
+
+/**
+ * Flag every student in a class, e.g. when an assignment is created or removed.
+ */
+export async function markClassRiskScoresStale(classId: string): Promise<void> {
+  try {
+    await db
+      .update(studentRiskScores)
+      .set({ invalidatedAt: new Date() })
+      .where(inArray(studentRiskScores.studentId, studentScopeQuery([classId])))
+  } catch (error) {
+    console.error('Failed to invalidate early-warning scores:', error)
+  }
+}
+
+/**
+ * Counts per risk level across the whole scope.
+ */
+export async function getRiskSummary(scope: StudentScope) {
+  const rows = await db
+    .select({ riskLevel: studentRiskScores.riskLevel, count: sql<number>`count(*)` })
+    .from(studentRiskScores)
+    .where(inArray(studentRiskScores.studentId, scope))
+    .groupBy(studentRiskScores.riskLevel)
+
+  const summary = { total: 0, high_risk: 0, moderate_risk: 0, on_track: 0 }
+  for (const row of rows) {
+    const count = Number(row.count)
+    summary.total += count
+    if (row.riskLevel in riskRank) summary[row.riskLevel as RiskLevel] += count
+  }
+  return summary
+}
+
+/**
+ * One page of students, highest risk first, then by name.
+ */
+export async function getRiskPage(scope: StudentScope, page: number, pageSize: number) {
+  const rows = await db
+    .select({
+      id: users.id,
+      name: users.name,
+      email: users.email,
+      riskLevel: studentRiskScores.riskLevel,
+      indicators: studentRiskScores.indicators,
+      recentScores: studentRiskScores.recentScores,
+      trendDirection: studentRiskScores.trendDirection,
+    })
+    .from(studentRiskScores)
+    .innerJoin(users, eq(users.id, studentRiskScores.studentId))
+    .where(inArray(studentRiskScores.studentId, scope))
+    .orderBy(asc(studentRiskScores.riskRank), asc(users.name), asc(users.id))
+    .limit(pageSize)
+    .offset((page - 1) * pageSize)
+
+  return rows.map((r) => ({
+    ...r,
+    name: r.name ?? 'Unknown',
+    riskLevel: r.riskLevel as RiskLevel,
+    trendDirection: r.trendDirection as TrendDirection,
+  }))
+}
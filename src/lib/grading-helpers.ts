@@ -5,6 +5,9 @@ import {
   criterionScores,
 } from '@/lib/db/schema'
 import { eq } from 'drizzle-orm'
+import { cacheTags, invalidateCacheTags } from '@/lib/cache'
+import { markRiskScoresStale } from '@/lib/early-warning'
+import { RollupBatch, recordSubmissionChanges } from '@/lib/analytics-rollups'
 import type { GradeSubmissionInput, GradingResult } from '@/lib/ai/grade-submission'
 
 /**
@@ -42,6 +45,8 @@ export function buildRubricInput(
  * then update the submission with score totals and graded status.
  *
  * When `extraMeta` is provided, its entries are merged into the aiMetadata JSON object.
+ * Cache entries tagged with the student are invalidated and the analytics
+ * rollups updated afterwards.
  */
 export async function persistGradingResult(
   submissionId: string,
@@ -49,8 +54,22 @@ export async function persistGradingResult(
   gradingResult: GradingResult,
   extraMeta?: Record<string, unknown>
 ): Promise<void> {
+  const [previous] = await db
+    .select({
+      status: submissions.status,
+      totalScore: submissions.totalScore,
+      maxScore: submissions.maxScore,
+      gradedAt: submissions.gradedAt,
+    })
+    .from(submissions)
+    .where(eq(submissions.id, submissionId))
+    .limit(1)
+
   // Delete existing feedback and scores if re-grading
-  await db.delete(feedbackDrafts).where(eq(feedbackDrafts.submissionId, submissionId))
+  const replacedDrafts = await db
+    .delete(feedbackDrafts)
+    .where(eq(feedbackDrafts.submissionId, submissionId))
+    .returning({ teacherId: feedbackDrafts.teacherId })
   await db.delete(criterionScores).where(eq(criterionScores.submissionId, submissionId))
 
   // Store feedback draft
@@ -84,14 +103,34 @@ export async function persistGradingResult(
   }
 
   // Update submission with scores and status
-  await db
+  const gradedAt = new Date()
+  const [graded] = await db
     .update(submissions)
     .set({
       status: 'graded',
       totalScore: gradingResult.totalScore,
       maxScore: gradingResult.maxScore,
       letterGrade: gradingResult.letterGrade,
-      gradedAt: new Date(),
+      gradedAt,
     })
     .where(eq(submissions.id, submissionId))
+    .returning({ studentId: submissions.studentId })
+
+  // Evict cached mastery/early-warning results derived from this student's work
+  if (graded) {
+    await invalidateCacheTags([cacheTags.student(graded.studentId)])
+    await markRiskScoresStale([graded.studentId])
+  }
+
+  // One feedback draft replaces any from a previous grading
+  const rollups = new RollupBatch().feedbackDrafts(teacherId, 1)
+  for (const draft of replacedDrafts) rollups.feedbackDrafts(draft.teacherId, -1)
+
+  const after = {
+    status: 'graded',
+    totalScore: gradingResult.totalScore,
+    maxScore: gradingResult.maxScore,
+    gradedAt,
+  }
+  await recordSubmissionChanges(previous ? [{ submissionId, before: previous, after }] : [], rollups)
 }
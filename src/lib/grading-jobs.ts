@@ -0,0 +1,405 @@
+import { db } from '@/lib/db'
+import {
+  submissions,
+  assignments,
+  rubrics,
+  rubricCriteria,
+  gradingJobs,
+  gradingJobItems,
+  criterionScores,
+} from '@/lib/db/schema'
+import { eq, and, inArray, isNull, sql } from 'drizzle-orm'
+import { batchGradeSubmissions } from '@/lib/ai/grade-submission'
+import type { GradeSubmissionInput } from '@/lib/ai/grade-submission'
+import { buildRubricInput, persistGradingResult } from '@/lib/grading-helpers'
+import { ingestMasteryScores, criterionStandardMap, type MasteryScoreInput } from '@/lib/mastery-ingest'
+
+/** A running job whose heartbeat is older than this is treated as abandoned and resumed. */
+const STALE_JOB_MS = 2 * 60 * 1000
+
+/**
+ * How often a running job writes its heartbeat. This is on a timer rather
+ * than per item, because rate-limit waits and retry backoff can keep a live
+ * job from finishing any item for longer than `STALE_JOB_MS`.
+ */
+const HEARTBEAT_INTERVAL_MS = 30 * 1000
+
+/** Graded results buffered before their mastery records are written in one batch. */
+const MASTERY_INGEST_BATCH_SIZE = 25
+
+interface GradingJobOptions {
+  feedbackTone?: GradeSubmissionInput['feedbackTone']
+}
+
+export interface GradingJobProgress {
+  jobId: string
+  assignmentId: string
+  status: string
+  total: number
+  graded: number
+  failed: number
+  pending: number
+  error: string | null
+  completedAt: Date | null
+}
+
+const runningJobs = new Map<string, Promise<void>>()
+
+/**
+ * Create a grading job for the given submissions. Only submissions still
+ * `submitted` are claimed (moved to `grading`), so overlapping requests for
+ * the same assignment never queue a submission twice; one checkpoint item is
+ * recorded per claimed submission. Returns null when none could be claimed.
+ */
+export async function createGradingJob(params: {
+  assignmentId: string
+  teacherId: string
+  submissionIds: string[]
+  options?: GradingJobOptions
+}): Promise<{ id: string; total: number } | null> {
+  const { assignmentId, teacherId, submissionIds, options } = params
+
+  return db.transaction(async (tx) => {
+    // `submitted` -> `grading` does not move any analytics rollup
+    const claimed = await tx
+      .update(submissions)
+      .set({ status: 'grading' })
+      .where(and(inArray(submissions.id, submissionIds), eq(submissions.status, 'submitted')))
+      .returning({ id: submissions.id })
+
+    if (claimed.length === 0) return null
+
+    const [job] = await tx
+      .insert(gradingJobs)
+      .values({
+        assignmentId,
+        teacherId,
+        total: claimed.length,
+        options: JSON.stringify(options ?? {}),
+      })
+      .returning({ id: gradingJobs.id, total: gradingJobs.total })
+
+    await tx.insert(gradingJobItems).values(
+      claimed.map(({ id }) => ({ jobId: job.id, submissionId: id }))
+    )
+
+    return job
+  })
+}
+
+/**
+ * Start (or resume) a job in the background of this process. No-op if the job
+ * is already running here.
+ */
+export function startGradingJob(jobId: string): void {
+  if (runningJobs.has(jobId)) return
+
+  const beat = setInterval(() => {
+    heartbeat(jobId).catch((err) => {
+      console.error(`Failed to write heartbeat for grading job ${jobId}:`, err)
+    })
+  }, HEARTBEAT_INTERVAL_MS)
+
+  const run = runGradingJob(jobId)
+    .catch(async (err) => {
+      console.error(`Grading job ${jobId} failed:`, err)
+      await failGradingJob(jobId, err instanceof Error ? err.message : String(err))
+    })
+    .finally(() => {
+      clearInterval(beat)
+      runningJobs.delete(jobId)
+    })
+
+  runningJobs.set(jobId, run)
+}
+
+/**
+ * Mark a job failed and release its unfinished submissions: they go back to
+ * `submitted` so a later batch can pick them up, and their items are failed.
+ */
+async function failGradingJob(jobId: string, error: string): Promise<void> {
+  await db.transaction(async (tx) => {
+    const pending = tx
+      .select({ submissionId: gradingJobItems.submissionId })
+      .from(gradingJobItems)
+      .where(and(eq(gradingJobItems.jobId, jobId), eq(gradingJobItems.status, 'pending')))
+
+    await tx
+      .update(submissions)
+      .set({ status: 'submitted' })
+      .where(and(inArray(submissions.id, pending), eq(submissions.status, 'grading')))
+
+    await tx
+      .update(gradingJobItems)
+      .set({ status: 'failed', error, updatedAt: new Date() })
+      .where(and(eq(gradingJobItems.jobId, jobId), eq(gradingJobItems.status, 'pending')))
+
+    await tx
+      .update(gradingJobs)
+      .set({ status: 'failed', error })
+      .where(eq(gradingJobs.id, jobId))
+  })
+}
+
+async function heartbeat(jobId: string): Promise<void> {
+  await db
+    .update(gradingJobs)
+    .set({ heartbeatAt: new Date() })
+    .where(eq(gradingJobs.id, jobId))
+}
+
+/**
+ * Take over a stale job. The update only succeeds while the heartbeat still
+ * holds the value this process read, so when several processes notice the
+ * same stale job, exactly one of them resumes it.
+ */
+async function claimStaleGradingJob(
+  job: Pick<typeof gradingJobs.$inferSelect, 'id' | 'heartbeatAt'>
+): Promise<boolean> {
+  const claimed = await db
+    .update(gradingJobs)
+    .set({ heartbeatAt: new Date() })
+    .where(
+      and(
+        eq(gradingJobs.id, job.id),
+        inArray(gradingJobs.status, ['queued', 'running']),
+        job.heartbeatAt
+          ? eq(gradingJobs.heartbeatAt, job.heartbeatAt)
+          : isNull(gradingJobs.heartbeatAt)
+      )
+    )
+    .returning({ id: gradingJobs.id })
+  return claimed.length > 0
+}
+
+/**
+ * Grade every pending item of a job. Each result is persisted as soon as it
+ * arrives and its item is checkpointed, so a restarted job only re-grades the
+ * submissions that had not finished.
+ */
+async function runGradingJob(jobId: string): Promise<void> {
+  const [job] = await db
+    .select()
+    .from(gradingJobs)
+    .where(eq(gradingJobs.id, jobId))
+    .limit(1)
+
+  if (!job || job.status === 'completed' || job.status === 'failed') return
+
+  await db
+    .update(gradingJobs)
+    .set({ status: 'running', heartbeatAt: new Date(), error: null })
+    .where(eq(gradingJobs.id, jobId))
+
+  const [assignment] = await db
+    .select()
+    .from(assignments)
+    .where(eq(assignments.id, job.assignmentId))
+    .limit(1)
+
+  if (!assignment?.rubricId) {
+    throw new Error(`Assignment ${job.assignmentId} has no rubric`)
+  }
+
+  const [rubric] = await db
+    .select()
+    .from(rubrics)
+    .where(eq(rubrics.id, assignment.rubricId))
+    .limit(1)
+
+  if (!rubric) {
+    throw new Error(`Rubric ${assignment.rubricId} not found`)
+  }
+
+  const criteria = await db
+    .select()
+    .from(rubricCriteria)
+    .where(eq(rubricCriteria.rubricId, rubric.id))
+
+  const pendingItems = await db
+    .select({
+      submissionId: gradingJobItems.submissionId,
+      content: submissions.content,
+    })
+    .from(gradingJobItems)
+    .innerJoin(submissions, eq(gradingJobItems.submissionId, submissions.id))
+    .where(
+      and(
+        eq(gradingJobItems.jobId, jobId),
+        eq(gradingJobItems.status, 'pending')
+      )
+    )
+
+  const { rubric: rubricData, assignment: assignmentData } = buildRubricInput(rubric, criteria, assignment)
+  const options = JSON.parse(job.options ?? '{}') as GradingJobOptions
+
+  async function markItem(submissionId: string, status: 'graded' | 'failed', error?: string) {
+    await db
+      .update(gradingJobItems)
+      .set({ status, error: error ?? null, updatedAt: new Date() })
+      .where(
+        and(
+          eq(gradingJobItems.jobId, jobId),
+          eq(gradingJobItems.submissionId, submissionId)
+        )
+      )
+  }
+
+  // Mastery records for graded submissions are buffered and written in
+  // batches. Each item records whether its mastery has been written, so
+  // items graded before a crash or takeover are ingested from their stored
+  // criterion scores when the job resumes. A failed write is logged and the
+  // job carries on; its items are retried once more before the job completes.
+  const criteriaMap = criterionStandardMap(criteria)
+  const pendingMastery: MasteryScoreInput[] = []
+
+  async function ingestMastery(items: MasteryScoreInput[]) {
+    if (items.length === 0) return
+    try {
+      await ingestMasteryScores(items, { criteria: criteriaMap })
+      await db
+        .update(gradingJobItems)
+        .set({ masteryIngested: true })
+        .where(
+          and(
+            eq(gradingJobItems.jobId, jobId),
+            inArray(gradingJobItems.submissionId, items.map((i) => i.submissionId))
+          )
+        )
+    } catch (err) {
+      console.error(`Failed to record mastery for grading job ${jobId}:`, err)
+    }
+  }
+
+  async function flushMastery() {
+    await ingestMastery(pendingMastery.splice(0))
+  }
+
+  async function ingestOutstandingMastery() {
+    const outstanding = await db
+      .select({ submissionId: gradingJobItems.submissionId })
+      .from(gradingJobItems)
+      .where(
+        and(
+          eq(gradingJobItems.jobId, jobId),
+          eq(gradingJobItems.status, 'graded'),
+          eq(gradingJobItems.masteryIngested, false)
+        )
+      )
+    if (outstanding.length === 0) return
+
+    const submissionIds = outstanding.map((o) => o.submissionId)
+    const scores = await db
+      .select({
+        submissionId: criterionScores.submissionId,
+        criterionId: criterionScores.criterionId,
+        score: criterionScores.score,
+        maxScore: criterionScores.maxScore,
+      })
+      .from(criterionScores)
+      .where(inArray(criterionScores.submissionId, submissionIds))
+
+    const bySubmission = new Map<string, MasteryScoreInput>(
+      submissionIds.map((submissionId) => [submissionId, { submissionId, criterionScores: [] }])
+    )
+    for (const { submissionId, ...score } of scores) {
+      bySubmission.get(submissionId)?.criterionScores.push(score)
+    }
+    await ingestMastery([...bySubmission.values()])
+  }
+
+  await ingestOutstandingMastery()
+
+  async function markFailed(submissionId: string, err: unknown) {
+    console.error(`Failed to grade submission ${submissionId}:`, err)
+
+    // Revert submission status so it can be graded again
+    await db
+      .update(submissions)
+      .set({ status: 'submitted' })
+      .where(eq(submissions.id, submissionId))
+
+    await markItem(
+      submissionId,
+      'failed',
+      err instanceof Error ? err.message : String(err)
+    )
+  }
+
+  await batchGradeSubmissions(
+    pendingItems.map((item) => ({ id: item.submissionId, studentWork: item.content })),
+    rubricData,
+    assignmentData,
+    {
+      feedbackTone: options.feedbackTone,
+      onResult: async ({ submissionId, result }) => {
+        try {
+          await persistGradingResult(submissionId, job.teacherId, result, {
+            batchGraded: true,
+            gradingJobId: jobId,
+          })
+          await markItem(submissionId, 'graded')
+        } catch (err) {
+          await markFailed(submissionId, err)
+          return
+        }
+        pendingMastery.push({ submissionId, criterionScores: result.criterionScores })
+        if (pendingMastery.length >= MASTERY_INGEST_BATCH_SIZE) await flushMastery()
+      },
+      onError: markFailed,
+    }
+  )
+  await flushMastery()
+  await ingestOutstandingMastery()
+
+  await db
+    .update(gradingJobs)
+    .set({ status: 'completed', completedAt: new Date() })
+    .where(eq(gradingJobs.id, jobId))
+}
+
+/**
+ * Read a job's progress, scoped to the teacher who started it. Jobs left
+ * `queued`/`running` by a process that stopped writing heartbeats are resumed.
+ */
+export async function getGradingJobProgress(
+  jobId: string,
+  teacherId: string
+): Promise<GradingJobProgress | null> {
+  const [job] = await db
+    .select()
+    .from(gradingJobs)
+    .where(and(eq(gradingJobs.id, jobId), eq(gradingJobs.teacherId, teacherId)))
+    .limit(1)
+
+  if (!job) return null
+
+  const counts = await db
+    .select({
+      status: gradingJobItems.status,
+      count: sql<number>`count(*)::int`,
+    })
+    .from(gradingJobItems)
+    .where(eq(gradingJobItems.jobId, jobId))
+    .groupBy(gradingJobItems.status)
+
+  const byStatus = Object.fromEntries(counts.map((c) => [c.status, c.count]))
+
+  const lastBeat = (job.heartbeatAt ?? job.createdAt).getTime()
+  const isActive = job.status === 'queued' || job.status === 'running'
+  if (isActive && Date.now() - lastBeat > STALE_JOB_MS && (await claimStaleGradingJob(job))) {
+    startGradingJob(jobId)
+  }
+
+  return {
+    jobId: job.id,
+    assignmentId: job.assignmentId,
+    status: job.status,
+    total: job.total,
+    graded: byStatus.graded ?? 0,
+    failed: byStatus.failed ?? 0,
+    pending: byStatus.pending ?? 0,
+    error: job.error,
+    completedAt: job.completedAt,
+  }
+}
@@ -0,0 +1,265 @@
+import { db } from '@/lib/db'
+import {
+  masteryRecords,
+  masteryLatest,
+  submissions,
+  assignments,
+  rubricCriteria,
+} from '@/lib/db/schema'
+import { eq, inArray, desc, sql, type SQL } from 'drizzle-orm'
+import type { AnyPgColumn } from 'drizzle-orm/pg-core'
+import { cacheTags, invalidateCacheTags } from '@/lib/cache'
+import { markRiskScoresStale } from '@/lib/early-warning'
+import { RollupBatch, recordRollups } from '@/lib/analytics-rollups'
+
+/**
+ * Bulk mastery ingestion. Criterion scores for any number of submissions are
+ * resolved with one submissions lookup and one criterion-to-standard map,
+ * turned into per-standard mastery records in memory, and written with
+ * multi-row statements: the append-only history in `mastery_records`, and
+ * the current level per student and standard in `mastery_latest`. Cache,
+ * risk and rollup invalidation happens once per batch.
+ */
+
+// Rows per INSERT statement, well under Postgres' bind-parameter limit
+const WRITE_CHUNK_SIZE = 1000
+
+export interface CriterionScoreInput {
+  criterionId: string
+  score: number
+  maxScore: number
+}
+
+export interface MasteryScoreInput {
+  submissionId: string
+  criterionScores: CriterionScoreInput[]
+}
+
+/** Criterion id -> its standard and display name. */
+export type CriterionStandardMap = Map<string, { standardId: string | null; name: string }>
+
+export interface IngestedMastery {
+  standardId: string
+  level: string
+  score: number
+}
+
+export interface MasteryIngestResult {
+  created: number
+  /** Records written per submission id; submissions with no mapped criteria map to `[]`. */
+  bySubmission: Map<string, IngestedMastery[]>
+  notFound: string[]
+  /** Submissions skipped because their assignment belongs to another teacher. */
+  forbidden: string[]
+}
+
+export function scoreToLevel(score: number, maxScore: number): string {
+  if (maxScore === 0) return 'beginning'
+  const pct = (score / maxScore) * 100
+  if (pct >= 90) return 'advanced'
+  if (pct >= 70) return 'proficient'
+  if (pct >= 50) return 'developing'
+  return 'beginning'
+}
+
+/** Build the criteria map from rubric criterion rows the caller already loaded. */
+export function criterionStandardMap(
+  rows: { id: string; standardId: string | null; name: string }[]
+): CriterionStandardMap {
+  return new Map(rows.map((c) => [c.id, { standardId: c.standardId, name: c.name }]))
+}
+
+function excluded(column: AnyPgColumn): SQL {
+  return sql`excluded.${sql.identifier(column.name)}`
+}
+
+async function loadCriteria(criterionIds: string[]): Promise<CriterionStandardMap> {
+  if (criterionIds.length === 0) return new Map()
+  const rows = await db
+    .select({
+      id: rubricCriteria.id,
+      standardId: rubricCriteria.standardId,
+      name: rubricCriteria.name,
+    })
+    .from(rubricCriteria)
+    .where(inArray(rubricCriteria.id, criterionIds))
+  return criterionStandardMap(rows)
+}
+
+/**
+ * Write mastery records for a batch of graded submissions. Pass `criteria`
+ * when the caller already has the rubric loaded (e.g. a grading job) to skip
+ * the criteria lookup. Pass `teacherId` to only ingest submissions to that
+ * teacher's assignments; the rest are reported in `forbidden`.
+ */
+export async function ingestMasteryScores(
+  items: MasteryScoreInput[],
+  options: { criteria?: CriterionStandardMap; teacherId?: string } = {}
+): Promise<MasteryIngestResult> {
+  const result: MasteryIngestResult = {
+    created: 0,
+    bySubmission: new Map(),
+    notFound: [],
+    forbidden: [],
+  }
+  if (items.length === 0) return result
+
+  const submissionIds = [...new Set(items.map((i) => i.submissionId))]
+  const submissionRows = await db
+    .select({
+      id: submissions.id,
+      studentId: submissions.studentId,
+      assignmentId: submissions.assignmentId,
+      teacherId: assignments.teacherId,
+    })
+    .from(submissions)
+    .innerJoin(assignments, eq(submissions.assignmentId, assignments.id))
+    .where(inArray(submissions.id, submissionIds))
+  const submissionMap = new Map(submissionRows.map((s) => [s.id, s]))
+  result.notFound = submissionIds.filter((id) => !submissionMap.has(id))
+  if (options.teacherId) {
+    for (const s of submissionRows) {
+      if (s.teacherId === options.teacherId) continue
+      result.forbidden.push(s.id)
+      submissionMap.delete(s.id)
+    }
+  }
+
+  const criteria =
+    options.criteria ??
+    (await loadCriteria([...new Set(items.flatMap((i) => i.criterionScores.map((s) => s.criterionId)))]))
+
+  const now = new Date()
+  const records: {
+    studentId: string
+    standardId: string
+    level: string
+    score: number
+    source: string
+    assessedAt: Date
+    notes: string
+  }[] = []
+
+  for (const item of items) {
+    const submission = submissionMap.get(item.submissionId)
+    if (!submission) continue
+
+    // Group scores by standard (multiple criteria can map to the same standard)
+    const scoresByStandard = new Map<
+      string,
+      { totalScore: number; totalMaxScore: number; criterionNames: string[] }
+    >()
+    for (const s of item.criterionScores) {
+      const criterion = criteria.get(s.criterionId)
+      if (!criterion?.standardId) continue
+
+      const existing = scoresByStandard.get(criterion.standardId)
+      if (existing) {
+        existing.totalScore += s.score
+        existing.totalMaxScore += s.maxScore
+        existing.criterionNames.push(criterion.name)
+      } else {
+        scoresByStandard.set(criterion.standardId, {
+          totalScore: s.score,
+          totalMaxScore: s.maxScore,
+          criterionNames: [criterion.name],
+        })
+      }
+    }
+
+    const written = result.bySubmission.get(item.submissionId) ?? []
+    for (const [standardId, data] of scoresByStandard) {
+      const record = {
+        studentId: submission.studentId,
+        standardId,
+        level: scoreToLevel(data.totalScore, data.totalMaxScore),
+        score:
+          data.totalMaxScore > 0
+            ? Math.round((data.totalScore / data.totalMaxScore) * 100)
+            : 0,
+        source: submission.assignmentId,
+        assessedAt: now,
+        notes: `Based on criteria: ${data.criterionNames.join(', ')}`,
+      }
+      records.push(record)
+      written.push({ standardId, level: record.level, score: record.score })
+    }
+    result.bySubmission.set(item.submissionId, written)
+  }
+
+  result.created = records.length
+  if (records.length === 0) return result
+
+  // Later entries for the same student and standard win
+  const latest = new Map<string, (typeof records)[number]>()
+  for (const record of records) {
+    latest.set(`${record.studentId}:${record.standardId}`, record)
+  }
+  const latestRows = [...latest.values()].map((r) => ({
+    studentId: r.studentId,
+    standardId: r.standardId,
+    level: r.level,
+    score: r.score,
+    assessedAt: r.assessedAt,
+    source: r.source,
+  }))
+
+  await db.transaction(async (tx) => {
+    for (let i = 0; i < records.length; i += WRITE_CHUNK_SIZE) {
+      await tx.insert(masteryRecords).values(records.slice(i, i + WRITE_CHUNK_SIZE))
+    }
+    for (let i = 0; i < latestRows.length; i += WRITE_CHUNK_SIZE) {
+      await tx
+        .insert(masteryLatest)
+        .values(latestRows.slice(i, i + WRITE_CHUNK_SIZE))
+        .onConflictDoUpdate({
+          target: [masteryLatest.studentId, masteryLatest.standardId],
+          set: {
+            level: excluded(masteryLatest.level),
+            score: excluded(masteryLatest.score),
+            assessedAt: excluded(masteryLatest.assessedAt),
+            source: excluded(masteryLatest.source),
+          },
+          // Never let an older assessment replace a newer one
+          setWhere: sql`${excluded(masteryLatest.assessedAt)} >= ${masteryLatest}.${sql.identifier(masteryLatest.assessedAt.name)}`,
+        })
+    }
+  })
+
+  const studentIds = [...new Set(records.map((r) => r.studentId))]
+  await invalidateCacheTags(studentIds.map((id) => cacheTags.student(id)))
+  await markRiskScoresStale(studentIds)
+
+  const rollups = new RollupBatch()
+  for (const record of records) rollups.mastery(record.level)
+  await recordRollups(rollups)
+
+  return result
+}
+
+/**
+ * Recompute `mastery_latest` from the full history. Run after seeding, bulk
+ * imports, or any write that bypassed `ingestMasteryScores`.
+ */
+export async function rebuildMasteryLatest(): Promise<void> {
+  await db.transaction(async (tx) => {
+    await tx.delete(masteryLatest)
+    await tx.insert(masteryLatest).select(
+      tx
+        .selectDistinctOn([masteryRecords.studentId, masteryRecords.standardId], {
+          studentId: masteryRecords.studentId,
+          standardId: masteryRecords.standardId,
+          level: masteryRecords.level,
+          score: masteryRecords.score,
+          assessedAt: masteryRecords.assessedAt,
+          source: masteryRecords.source,
+        })
+        .from(masteryRecords)
+        .orderBy(
+          masteryRecords.studentId,
+          masteryRecords.standardId,
+          desc(masteryRecords.assessedAt)
+        )
+    )
+  })
+}
@@ -0,0 +1,146 @@
+import { db } from '@/lib/db'
+import {
+  submissions,
+  assignments,
+  masteryRecords,
+  feedbackDrafts,
+  standards,
+} from '@/lib/db/schema'
+import { eq, and, inArray, desc } from 'drizzle-orm'
+import type { ReportCardInput } from '@/lib/ai/report-card'
+
+/**
+ * Report card inputs for many students of one class, gathered with three
+ * grouped queries (submissions, mastery, feedback highlights) and bucketed by
+ * student in memory, instead of a round of queries per student.
+ */
+
+const MAX_FEEDBACK_HIGHLIGHTS = 8
+
+interface ClassInfo {
+  id: string
+  name: string
+  subject: string
+  gradeLevel: string
+}
+
+function groupBy<T extends { studentId: string }>(rows: T[]): Map<string, T[]> {
+  const groups = new Map<string, T[]>()
+  for (const row of rows) {
+    const group = groups.get(row.studentId)
+    if (group) group.push(row)
+    else groups.set(row.studentId, [row])
+  }
+  return groups
+}
+
+function feedbackHighlights(
+  feedbacks: { aiFeedback: string | null; strengths: string | null }[]
+): string[] {
+  return feedbacks
+    .flatMap((f) => {
+      const highlights: string[] = []
+      if (f.aiFeedback) {
+        highlights.push(f.aiFeedback.slice(0, 200))
+      }
+      if (f.strengths) {
+        try {
+          const parsed = JSON.parse(f.strengths) as string[]
+          highlights.push(...parsed.slice(0, 2))
+        } catch {
+          // skip malformed JSON
+        }
+      }
+      return highlights
+    })
+    .slice(0, MAX_FEEDBACK_HIGHLIGHTS)
+}
+
+export async function loadReportCardInputs(
+  classInfo: ClassInfo,
+  students: { id: string; name: string }[],
+  gradingPeriod: string
+): Promise<Map<string, ReportCardInput>> {
+  const inputs = new Map<string, ReportCardInput>()
+  if (students.length === 0) return inputs
+
+  const studentIds = students.map((s) => s.id)
+
+  const submissionRows = await db
+    .select({
+      studentId: submissions.studentId,
+      assignmentTitle: assignments.title,
+      score: submissions.totalScore,
+      maxScore: submissions.maxScore,
+      letterGrade: submissions.letterGrade,
+      submittedAt: submissions.submittedAt,
+    })
+    .from(submissions)
+    .innerJoin(assignments, eq(submissions.assignmentId, assignments.id))
+    .where(
+      and(
+        eq(assignments.classId, classInfo.id),
+        inArray(submissions.studentId, studentIds)
+      )
+    )
+    .orderBy(desc(submissions.submittedAt))
+
+  const masteryRows = await db
+    .select({
+      studentId: masteryRecords.studentId,
+      standardCode: standards.code,
+      standardDescription: standards.description,
+      level: masteryRecords.level,
+      score: masteryRecords.score,
+    })
+    .from(masteryRecords)
+    .innerJoin(standards, eq(masteryRecords.standardId, standards.id))
+    .where(inArray(masteryRecords.studentId, studentIds))
+    .orderBy(desc(masteryRecords.assessedAt))
+
+  const feedbackRows = await db
+    .select({
+      studentId: submissions.studentId,
+      aiFeedback: feedbackDrafts.aiFeedback,
+      strengths: feedbackDrafts.strengths,
+    })
+    .from(feedbackDrafts)
+    .innerJoin(submissions, eq(feedbackDrafts.submissionId, submissions.id))
+    .innerJoin(assignments, eq(submissions.assignmentId, assignments.id))
+    .where(
+      and(
+        eq(assignments.classId, classInfo.id),
+        inArray(submissions.studentId, studentIds)
+      )
+    )
+
+  const submissionsByStudent = groupBy(submissionRows)
+  const masteryByStudent = groupBy(masteryRows)
+  const feedbackByStudent = groupBy(feedbackRows)
+
+  for (const student of students) {
+    inputs.set(student.id, {
+      studentName: student.name,
+      className: classInfo.name,
+      subject: classInfo.subject,
+      gradeLevel: classInfo.gradeLevel,
+      gradingPeriod,
+      submissions: (submissionsByStudent.get(student.id) ?? []).map((s) => ({
+        assignmentTitle: s.assignmentTitle,
+        score: s.score,
+        maxScore: s.maxScore,
+        letterGrade: s.letterGrade,
+        submittedAt: s.submittedAt.toISOString().split('T')[0],
+      })),
+      masteryData: (masteryByStudent.get(student.id) ?? []).map((m) => ({
+        standardCode: m.standardCode,
+        standardDescription: m.standardDescription,
+        level: m.level,
+        score: m.score,
+      })),
+      feedbackHighlights: feedbackHighlights(feedbackByStudent.get(student.id) ?? []),
+    })
+  }
+
+  return inputs
+}
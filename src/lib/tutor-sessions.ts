@@ -0,0 +1,145 @@
+import { db } from '@/lib/db'
+import { tutorSessions, tutorMessages } from '@/lib/db/schema'
+import { and, eq, gte, lt, asc, desc, sql } from 'drizzle-orm'
+import { createId } from '@paralleldrive/cuid2'
+import { summarizeTutorConversation, type TutorTurn } from '@/lib/ai/tutor'
+
+/**
+ * Tutor transcripts are stored one row per message in `tutor_messages`, so a
+ * turn appends two rows instead of rewriting the whole session. The model is
+ * given a bounded window: the session's rolling summary plus at most
+ * `MAX_CONTEXT_MESSAGES` recent messages. Once more than `SUMMARIZE_AFTER`
+ * messages sit outside the summary, all but the last `KEEP_RECENT` are folded
+ * into it, so per-turn cost stays flat however long a session runs.
+ */
+
+const MAX_CONTEXT_MESSAGES = 24
+const SUMMARIZE_AFTER = 20
+const KEEP_RECENT = 8
+
+type TutorSession = typeof tutorSessions.$inferSelect
+
+const summarizing = new Set<string>()
+
+/**
+ * Append a message at the session's next position. The position is reserved
+ * and the row inserted in one statement, so concurrent appends cannot collide
+ * and a failed insert leaves no gap. Returns the message's `seq`.
+ */
+export async function appendTutorMessage(
+  sessionId: string,
+  role: TutorTurn['role'],
+  content: string
+): Promise<number> {
+  const rows = await db.execute<{ seq: number }>(sql`
+    with reserved as (
+      update tutor_sessions
+      set message_count = message_count + 1
+      where id = ${sessionId}
+      returning message_count - 1 as seq
+    )
+    insert into tutor_messages (id, session_id, seq, role, content)
+    select ${createId()}, ${sessionId}, seq, ${role}, ${content} from reserved
+    returning seq
+  `)
+
+  const [row] = rows
+  if (!row) {
+    throw new Error(`Tutor session ${sessionId} not found`)
+  }
+  return Number(row.seq)
+}
+
+/**
+ * The context sent to the model for the next turn: the rolling summary and
+ * the most recent messages it does not cover.
+ */
+export async function loadTutorContext(
+  session: Pick<TutorSession, 'id' | 'summary' | 'summarizedCount'>
+): Promise<{ summary: string | null; turns: TutorTurn[] }> {
+  const recent = await db
+    .select({ role: tutorMessages.role, content: tutorMessages.content })
+    .from(tutorMessages)
+    .where(
+      and(
+        eq(tutorMessages.sessionId, session.id),
+        gte(tutorMessages.seq, session.summarizedCount)
+      )
+    )
+    .orderBy(desc(tutorMessages.seq))
+    .limit(MAX_CONTEXT_MESSAGES)
+
+  return {
+    summary: session.summary,
+    turns: recent.reverse().map((m) => ({
+      role: m.role as TutorTurn['role'],
+      content: m.content,
+    })),
+  }
+}
+
+async function rollSummaryForward(sessionId: string): Promise<void> {
+  const [session] = await db
+    .select({
+      subject: tutorSessions.subject,
+      summary: tutorSessions.summary,
+      summarizedCount: tutorSessions.summarizedCount,
+      messageCount: tutorSessions.messageCount,
+    })
+    .from(tutorSessions)
+    .where(eq(tutorSessions.id, sessionId))
+    .limit(1)
+
+  if (!session || session.messageCount - session.summarizedCount <= SUMMARIZE_AFTER) {
+    return
+  }
+
+  const through = session.messageCount - KEEP_RECENT
+  const older = await db
+    .select({ role: tutorMessages.role, content: tutorMessages.content })
+    .from(tutorMessages)
+    .where(
+      and(
+        eq(tutorMessages.sessionId, sessionId),
+        gte(tutorMessages.seq, session.summarizedCount),
+        lt(tutorMessages.seq, through)
+      )
+    )
+    .orderBy(asc(tutorMessages.seq))
+
+  const summary = await summarizeTutorConversation({
+    subject: session.subject,
+    previousSummary: session.summary,
+    turns: older.map((m) => ({ role: m.role as TutorTurn['role'], content: m.content })),
+  })
+
+  // Only advance from the state the summary was built on; another process may
+  // have rolled it forward in the meantime
+  await db
+    .update(tutorSessions)
+    .set({ summary, summarizedCount: through })
+    .where(
+      and(
+        eq(tutorSessions.id, sessionId),
+        eq(tutorSessions.summarizedCount, session.summarizedCount)
+      )
+    )
+}
+
+/**
+ * Fold older messages into the rolling summary in the background of this
+ * process once enough have accumulated. No-op if one is already running for
+ * the session.
+ */
+export function scheduleTutorSummary(sessionId: string): void {
+  if (summarizing.has(sessionId)) return
+  summarizing.add(sessionId)
+
+  rollSummaryForward(sessionId)
+    .catch((error) => {
+      console.error(`Failed to summarize tutor session ${sessionId}:`, error)
+    })
+    .finally(() => {
+      summarizing.delete(sessionId)
+    })
+}
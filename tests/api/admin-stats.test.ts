@@ -0,0 +1,71 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest'
+import {
+  mockAuthSession,
+  mockNoAuth,
+  TEST_ADMIN,
+  TEST_TEACHER,
+} from '../helpers'
+
+vi.mock('@/lib/auth', () => ({
+  auth: vi.fn(),
+}))
+
+vi.mock('@/lib/db', () => ({
+  db: {
+    execute: vi.fn(),
+  },
+}))
+
+import { GET } from '@/app/api/admin/stats/route'
+import { auth } from '@/lib/auth'
+import { instrumentClient, withQueryStats } from '@/lib/db/query-stats'
+
+describe('Admin Stats API - GET /api/admin/stats', () => {
+  beforeEach(() => {
+    vi.clearAllMocks()
+  })
+
+  it('returns 401 when not authenticated', async () => {
+    mockNoAuth(vi.mocked(auth))
+    const response = await GET()
+    expect(response.status).toBe(401)
+  })
+
+  it('returns 403 for non-admin roles', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    const response = await GET()
+    expect(response.status).toBe(403)
+  })
+
+  it('reports cache, memoization and per-route query statistics to admins', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_ADMIN)
+
+    // A stand-in for the postgres client: `unsafe` returns a thenable query
+    const client = instrumentClient({
+      unsafe: vi.fn(() => Promise.resolve([])),
+      begin: vi.fn(),
+    } as any)
+
+    const handler = withQueryStats('GET /api/test-route', async () => {
+      await client.unsafe('select 1')
+      await client.unsafe('select 2')
+      return 'ok'
+    })
+    await handler()
+    await handler()
+
+    const response = await GET()
+    const data = await response.json()
+
+    expect(response.status).toBe(200)
+    expect(data.cache).toBeDefined()
+    expect(data.aiMemoization).toBeDefined()
+    expect(data.queries.routes['GET /api/test-route']).toMatchObject({
+      requests: 2,
+      queries: 4,
+      avgQueries: 2,
+      maxQueries: 2,
+      errors: 0,
+    })
+  })
+})
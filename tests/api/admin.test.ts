@@ -78,21 +78,23 @@ describe('Admin API', () => {
     it('returns 200 with overview data for admin', async () => {
       mockAuthSession(vi.mocked(auth), TEST_ADMIN)
 
-      // The overview route makes 8 sequential db.select() calls:
-      // 1. schoolCount, 2. teacherCount, 3. spedTeacherCount, 4. studentCount,
-      // 5. classCount, 6. assignmentCount, 7. submissionCount,
-      // 8. recentAssignments, 9. recentGraded, 10. ungradedCount
+      // The overview route reads the analytics rollups:
+      // 1. counters, 2. daily rollups for the last 7 days
       selectResults = [
-        [{ count: 2 }],   // schools
-        [{ count: 3 }],   // teachers
-        [{ count: 1 }],   // sped_teachers
-        [{ count: 22 }],  // students
-        [{ count: 5 }],   // classes
-        [{ count: 10 }],  // assignments
-        [{ count: 30 }],  // submissions
-        [{ count: 3 }],   // recent assignments
-        [{ count: 8 }],   // recent graded
-        [{ count: 5 }],   // ungraded
+        [
+          { metric: 'schools', value: 2 },
+          { metric: 'users:teacher', value: 3 },
+          { metric: 'users:sped_teacher', value: 1 },
+          { metric: 'users:student', value: 22 },
+          { metric: 'classes', value: 5 },
+          { metric: 'assignments', value: 10 },
+          { metric: 'submissions', value: 30 },
+          { metric: 'submissions_ungraded', value: 5 },
+        ],
+        [
+          { assignmentsCreated: 2, submissionsGraded: 5, lessonPlansCreated: 0 },
+          { assignmentsCreated: 1, submissionsGraded: 3, lessonPlansCreated: 1 },
+        ],
       ]
 
       const response = await overviewGET()
@@ -134,23 +136,26 @@ describe('Admin API', () => {
     it('returns 200 with analytics data for admin', async () => {
       mockAuthSession(vi.mocked(auth), TEST_ADMIN)
 
-      // Analytics route makes multiple db.select() calls:
-      // 1. masteryDistribution, 2. subjectScores,
-      // 3. totalSubmissions, 4. gradedSubmissions,
-      // 5. teacherEngagement, 6. teachersWithAssignments,
-      // 7. teachersWithLessonPlans, 8. teachersWithRubrics,
-      // 9. teachersWithFeedback, 10. totalTeachers
+      // The analytics route reads the analytics rollups:
+      // 1. counters, 2. subject rollups, 3. top teachers
       selectResults = [
-        [{ level: 'proficient', count: 10 }, { level: 'developing', count: 5 }],
-        [{ subject: 'ELA', avgScore: 82.5, submissionCount: 15 }],
-        [{ count: 30 }],
-        [{ count: 20 }],
+        [
+          { metric: 'mastery:proficient', value: 10 },
+          { metric: 'mastery:developing', value: 5 },
+          { metric: 'submissions', value: 30 },
+          { metric: 'submissions_graded', value: 20 },
+          { metric: 'users:teacher', value: 4 },
+          { metric: 'users:sped_teacher', value: 1 },
+          { metric: 'teachers_with:assignments', value: 3 },
+          { metric: 'teachers_with:lessonPlans', value: 2 },
+          { metric: 'teachers_with:rubrics', value: 2 },
+          { metric: 'teachers_with:feedbackDrafts', value: 1 },
+        ],
+        [
+          { subject: 'ELA', submissions: 15, scoredSubmissions: 12, scorePercentSum: 990 },
+          { subject: 'Art', submissions: 0, scoredSubmissions: 0, scorePercentSum: 0 },
+        ],
         [{ teacherId: 't1', teacherName: 'Ms. Rivera', teacherEmail: 'rivera@school.edu', assignmentCount: 5, submissionCount: 10, gradedCount: 8, feedbackCount: 6 }],
-        [{ count: 3 }],
-        [{ count: 2 }],
-        [{ count: 2 }],
-        [{ count: 1 }],
-        [{ count: 5 }],
       ]
 
       const response = await analyticsGET()
@@ -168,7 +173,12 @@ describe('Admin API', () => {
       expect(data.gradingCompletion.total).toBe(30)
       expect(data.gradingCompletion.graded).toBe(20)
       expect(data.teacherEngagement).toBeDefined()
+      expect(data.subjectScores[0].avgScore).toBe(82.5)
+      expect(data.gradingCompletion.completionRate).toBe(66.67)
       expect(data.teacherEngagement.totalTeachers).toBe(5)
+      expect(data.teacherEngagement.withAssignments).toBe(3)
+      expect(data.teacherEngagement.withFeedbackDrafts).toBe(1)
+      expect(data.teacherEngagement.topTeachers).toHaveLength(1)
     })
   })
 
@@ -193,21 +203,19 @@ describe('Admin API', () => {
       mockAuthSession(vi.mocked(auth), TEST_ADMIN)
 
       // schools route:
-      // 1. allSchools query
-      // Then for each school: classes, teachers, students, assignment count, avg score
+      // 1. allSchools query, 2. school rollups
+      // Then for each school: classes, teachers, students
       selectResults = [
         // 1. allSchools
         [{ id: 's1', name: 'Lincoln Middle School', districtId: 'd1', address: '123 Main St', districtName: 'Springfield USD' }],
-        // 2. schoolClasses for s1
+        // 2. school rollups
+        [{ schoolId: 's1', assignments: 6, submissions: 20, gradedSubmissions: 12, scoredSubmissions: 10, scorePercentSum: 785 }],
+        // 3. schoolClasses for s1
         [{ id: 'c1' }, { id: 'c2' }],
-        // 3. teacher count for s1
+        // 4. teacher count for s1
         [{ count: 2 }],
-        // 4. student count for s1
+        // 5. student count for s1
         [{ count: 15 }],
-        // 5. assignment count for s1
-        [{ count: 6 }],
-        // 6. avg score for s1
-        [{ avgScore: 78.5 }],
       ]
 
       const response = await schoolsGET()
@@ -221,6 +229,8 @@ describe('Admin API', () => {
       expect(data.schools[0].classCount).toBe(2)
       expect(data.schools[0].teacherCount).toBe(2)
       expect(data.schools[0].studentCount).toBe(15)
+      expect(data.schools[0].assignmentCount).toBe(6)
+      expect(data.schools[0].avgScore).toBe(78.5)
     })
   })
 
@@ -174,13 +174,15 @@ describe('AI Features API', () => {
     it('returns AI-generated insights for admin', async () => {
       mockAuthSession(vi.mocked(auth), TEST_ADMIN)
 
-      // The insights route makes many sequential db.select() calls:
+      // The insights route checks the cache, then on a miss makes many
+      // sequential db.select() calls:
       // 1. schoolCount, 2. teacherCount, 3. studentCount, 4. classCount,
       // 5. assignmentCount, 6. submissionCount, 7. gradedCount, 8. ungradedCount,
       // 9. feedbackCount, 10. masteryDist, 11. subjectScores,
       // 12. teachersWithAssignments, 13. teachersWithLessonPlans,
       // 14. teachersWithRubrics, 15. teachersWithFeedback
       selectResults = [
+        [],               // cache lookup (miss)
         [{ count: 2 }],   // schools
         [{ count: 5 }],   // teachers
         [{ count: 22 }],  // students
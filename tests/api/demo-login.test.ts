@@ -0,0 +1,61 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest'
+import { NextRequest } from 'next/server'
+
+vi.mock('@/lib/demo-clone', () => ({
+  cloneDemoData: vi.fn(),
+  scheduleDemoMaintenance: vi.fn(),
+}))
+
+import { POST } from '@/app/api/auth/demo-login/route'
+import { cloneDemoData, scheduleDemoMaintenance } from '@/lib/demo-clone'
+
+function demoLoginRequest(body: unknown) {
+  return new NextRequest('http://localhost:3000/api/auth/demo-login', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+  })
+}
+
+describe('Demo login - POST /api/auth/demo-login', () => {
+  beforeEach(() => {
+    vi.clearAllMocks()
+  })
+
+  it('returns 400 for an email that is not a demo entry account', async () => {
+    const req = demoLoginRequest({ email: 'someone@else.edu' })
+    const response = await POST(req)
+    const data = await response.json()
+    expect(response.status).toBe(400)
+    expect(data.error).toBe('Invalid demo email')
+    expect(cloneDemoData).not.toHaveBeenCalled()
+  })
+
+  it('returns the sandbox email and schedules pool maintenance', async () => {
+    vi.mocked(cloneDemoData).mockResolvedValue({
+      email: 'rivera.demo.abcd1234@school.edu',
+      sessionId: 'abcd1234efgh',
+    })
+
+    const req = demoLoginRequest({ email: 'rivera@school.edu' })
+    const response = await POST(req)
+    const data = await response.json()
+
+    expect(response.status).toBe(200)
+    expect(data).toEqual({ email: 'rivera.demo.abcd1234@school.edu' })
+    expect(cloneDemoData).toHaveBeenCalledWith('rivera@school.edu')
+    expect(scheduleDemoMaintenance).toHaveBeenCalledTimes(1)
+  })
+
+  it('returns 500 when no sandbox can be provisioned', async () => {
+    vi.mocked(cloneDemoData).mockRejectedValue(new Error('No seed users found to clone'))
+
+    const req = demoLoginRequest({ email: 'rivera@school.edu' })
+    const response = await POST(req)
+    const data = await response.json()
+
+    expect(response.status).toBe(500)
+    expect(data.error).toBe('Failed to create demo session')
+    expect(scheduleDemoMaintenance).not.toHaveBeenCalled()
+  })
+})
@@ -31,8 +31,8 @@ function createChainMock(result: unknown = []) {
   const chain: Record<string, any> = {}
   const methods = [
     'select', 'from', 'leftJoin', 'innerJoin', 'where',
-    'orderBy', 'limit', 'insert', 'values', 'returning',
-    'update', 'set', 'delete', 'groupBy',
+    'orderBy', 'limit', 'offset', 'insert', 'values', 'returning',
+    'update', 'set', 'delete', 'groupBy', 'onConflictDoUpdate',
   ]
   for (const method of methods) {
     chain[method] = vi.fn().mockReturnValue(chain)
@@ -62,6 +62,7 @@ vi.mock('@/lib/db', () => {
 
 import { GET } from '@/app/api/early-warning/route'
 import { auth } from '@/lib/auth'
+import { db } from '@/lib/db'
 
 describe('Early Warning API', () => {
   beforeEach(() => {
@@ -101,39 +102,32 @@ describe('Early Warning API', () => {
     it('returns student risk data for teacher', async () => {
       mockAuthSession(vi.mocked(auth), TEST_TEACHER)
 
-      const now = new Date()
-
       // Teacher flow DB calls:
-      // 1. teacherClasses: get classes this teacher belongs to
-      // 2. student members in those classes
-      // 3. student info from users table
-      // 4. recent mastery records
-      // 5. recent assignments
-      // 6. all student submissions
+      // 1. teacher class ids (scope subquery)
+      // 2. student members of those classes (scope subquery)
+      // 3. students whose stored risk is missing or stale
+      // 4. recent graded scores per student
+      // 5. below-proficient counts per student
+      // 6. missing submission counts per student
+      // 7. risk level summary
+      // 8. page of students
       selectResults = [
-        // 1. teacherClasses
-        [{ classId: 'c1' }],
-        // 2. student members
-        [{ userId: 'stu-1' }],
-        // 3. student info
-        [{ id: 'stu-1', name: 'Aisha Torres', email: 'aisha@student.edu' }],
-        // 4. mastery records (below proficient)
-        [
-          { studentId: 'stu-1', standardId: 'std-1', score: 55, level: 'beginning', assessedAt: now },
-          { studentId: 'stu-1', standardId: 'std-2', score: 60, level: 'developing', assessedAt: now },
-        ],
-        // 5. recent assignments
-        [{ id: 'a1' }, { id: 'a2' }],
-        // 6. all student submissions (one graded low, one missing)
+        [],
+        [],
+        [{ id: 'stu-1' }],
+        [{ studentId: 'stu-1', scores: [50] }],
+        [{ studentId: 'stu-1', count: 2 }],
+        [{ studentId: 'stu-1', count: 1 }],
+        [{ riskLevel: 'high_risk', count: 1 }],
         [
           {
-            id: 'sub-1',
-            studentId: 'stu-1',
-            assignmentId: 'a1',
-            totalScore: 50,
-            maxScore: 100,
-            status: 'graded',
-            submittedAt: now,
+            id: 'stu-1',
+            name: 'Aisha Torres',
+            email: 'aisha@student.edu',
+            riskLevel: 'high_risk',
+            indicators: ['2 standards below proficient', '1 missing submission', 'Average score below 70%'],
+            recentScores: [50],
+            trendDirection: 'stable',
           },
         ],
       ]
@@ -143,62 +137,41 @@ describe('Early Warning API', () => {
       const data = await response.json()
 
       expect(response.status).toBe(200)
-      expect(data.students).toBeDefined()
       expect(data.students).toHaveLength(1)
       expect(data.students[0].name).toBe('Aisha Torres')
-      expect(data.students[0].riskLevel).toBeDefined()
-      expect(['high_risk', 'moderate_risk', 'on_track']).toContain(data.students[0].riskLevel)
-      expect(data.students[0].indicators).toBeDefined()
-      expect(Array.isArray(data.students[0].indicators)).toBe(true)
-      expect(data.students[0].recentScores).toBeDefined()
-      expect(data.students[0].trendDirection).toBeDefined()
+      expect(data.summary).toEqual({ total: 1, high_risk: 1, moderate_risk: 0, on_track: 0 })
+      expect(data.page).toBe(1)
+      expect(data.totalPages).toBe(1)
+
+      // Recomputed scores are upserted with the same indicators the route reports
+      const insertChain = (db.insert as any).mock.results[0].value
+      expect(insertChain.values).toHaveBeenCalledWith([
+        expect.objectContaining({
+          studentId: 'stu-1',
+          riskLevel: 'high_risk',
+          riskRank: 0,
+          indicators: ['2 standards below proficient', '1 missing submission', 'Average score below 70%'],
+          recentScores: [50],
+          trendDirection: 'stable',
+        }),
+      ])
     })
 
-    it('returns student risk data for admin', async () => {
+    it('returns stored risk data for admin without recomputing fresh rows', async () => {
       mockAuthSession(vi.mocked(auth), TEST_ADMIN)
 
-      const now = new Date()
-
       // Admin flow (no schoolId filter):
-      // 1. all students with role='student'
-      // 2. student info from users table
-      // 3. mastery records
-      // 4. recent assignments
-      // 5. all student submissions
+      // 1. all students (scope subquery)
+      // 2. stale students: none
+      // 3. risk level summary
+      // 4. page of students
       selectResults = [
-        // 1. allStudents
-        [{ id: 'stu-1' }, { id: 'stu-2' }],
-        // 2. student info
-        [
-          { id: 'stu-1', name: 'Aisha Torres', email: 'aisha@student.edu' },
-          { id: 'stu-2', name: 'DeShawn Williams', email: 'deshawn@student.edu' },
-        ],
-        // 3. mastery records
-        [
-          { studentId: 'stu-1', standardId: 'std-1', score: 90, level: 'proficient', assessedAt: now },
-        ],
-        // 4. recent assignments
-        [{ id: 'a1' }],
-        // 5. all student submissions
+        [],
+        [],
+        [{ riskLevel: 'on_track', count: 2 }],
         [
-          {
-            id: 'sub-1',
-            studentId: 'stu-1',
-            assignmentId: 'a1',
-            totalScore: 90,
-            maxScore: 100,
-            status: 'graded',
-            submittedAt: now,
-          },
-          {
-            id: 'sub-2',
-            studentId: 'stu-2',
-            assignmentId: 'a1',
-            totalScore: 85,
-            maxScore: 100,
-            status: 'graded',
-            submittedAt: now,
-          },
+          { id: 'stu-1', name: 'Aisha Torres', email: 'aisha@student.edu', riskLevel: 'on_track', indicators: [], recentScores: [90], trendDirection: 'stable' },
+          { id: 'stu-2', name: 'DeShawn Williams', email: 'deshawn@student.edu', riskLevel: 'on_track', indicators: [], recentScores: [85], trendDirection: 'stable' },
         ],
       ]
 
@@ -207,43 +180,32 @@ describe('Early Warning API', () => {
       const data = await response.json()
 
       expect(response.status).toBe(200)
-      expect(data.students).toBeDefined()
       expect(data.students).toHaveLength(2)
+      expect(data.summary.on_track).toBe(2)
+      expect(db.insert).not.toHaveBeenCalled()
     })
 
     it('returns correct structure with riskLevel, indicators, recentScores, and trendDirection', async () => {
       mockAuthSession(vi.mocked(auth), TEST_TEACHER)
 
-      const now = new Date()
-
-      // Set up a student with enough data to trigger risk indicators
+      // Newest first: a drop from the 80s to the 40s triggers the trend indicator
       selectResults = [
-        // 1. teacherClasses
-        [{ classId: 'c1' }],
-        // 2. student members
-        [{ userId: 'stu-1' }],
-        // 3. student info
-        [{ id: 'stu-1', name: 'Aisha Torres', email: 'aisha@student.edu' }],
-        // 4. mastery records (below proficient triggers indicator)
-        [
-          { studentId: 'stu-1', standardId: 'std-1', score: 40, level: 'beginning', assessedAt: now },
-          { studentId: 'stu-1', standardId: 'std-2', score: 50, level: 'developing', assessedAt: now },
-          { studentId: 'stu-1', standardId: 'std-3', score: 45, level: 'beginning', assessedAt: now },
-        ],
-        // 5. recent assignments with classId (3 assignments in class c1)
-        [{ id: 'a1', classId: 'c1' }, { id: 'a2', classId: 'c1' }, { id: 'a3', classId: 'c1' }],
-        // 6. student class memberships (student enrolled in c1)
-        [{ userId: 'stu-1', classId: 'c1' }],
-        // 7. submissions (only 1 graded, low score -- missing 2 submissions + low average)
+        [],
+        [],
+        [{ id: 'stu-1' }],
+        [{ studentId: 'stu-1', scores: [45, 40, 85, 88] }],
+        [{ studentId: 'stu-1', count: 3 }],
+        [],
+        [{ riskLevel: 'high_risk', count: 1 }],
         [
           {
-            id: 'sub-1',
-            studentId: 'stu-1',
-            assignmentId: 'a1',
-            totalScore: 45,
-            maxScore: 100,
-            status: 'graded',
-            submittedAt: now,
+            id: 'stu-1',
+            name: 'Aisha Torres',
+            email: 'aisha@student.edu',
+            riskLevel: 'high_risk',
+            indicators: ['Declining score trend', '3 standards below proficient', 'Average score below 70%'],
+            recentScores: [45, 40, 85, 88],
+            trendDirection: 'declining',
           },
         ],
       ]
@@ -255,34 +217,65 @@ describe('Early Warning API', () => {
       expect(response.status).toBe(200)
       expect(data.students).toHaveLength(1)
 
+      const insertChain = (db.insert as any).mock.results[0].value
+      expect(insertChain.values).toHaveBeenCalledWith([
+        expect.objectContaining({
+          riskLevel: 'high_risk',
+          indicators: ['Declining score trend', '3 standards below proficient', 'Average score below 70%'],
+          trendDirection: 'declining',
+        }),
+      ])
+
       const student = data.students[0]
       expect(student.id).toBe('stu-1')
       expect(student.name).toBe('Aisha Torres')
       expect(student.email).toBe('aisha@student.edu')
       expect(student.riskLevel).toBe('high_risk')
       expect(student.indicators.length).toBeGreaterThanOrEqual(3)
-      expect(student.recentScores).toEqual([45])
-      expect(student.trendDirection).toBeDefined()
+      expect(student.recentScores).toEqual([45, 40, 85, 88])
       expect(['declining', 'stable', 'improving']).toContain(student.trendDirection)
       // AI recommendations should be attached for flagged students
       expect(student.recommendations).toBeDefined()
       expect(Array.isArray(student.recommendations)).toBe(true)
     })
 
-    it('returns empty students array when teacher has no classes', async () => {
-      mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    it('pages through students with page and pageSize', async () => {
+      mockAuthSession(vi.mocked(auth), TEST_ADMIN)
 
-      // Teacher has no classes
       selectResults = [
-        [], // teacherClasses: empty
+        [],
+        [],
+        [{ riskLevel: 'on_track', count: 3 }],
+        [{ id: 'stu-2', name: 'DeShawn Williams', email: 'deshawn@student.edu', riskLevel: 'on_track', indicators: [], recentScores: [], trendDirection: 'stable' }],
       ]
 
+      const req = new NextRequest('http://localhost:3000/api/early-warning?page=2&pageSize=1')
+      const response = await GET(req)
+      const data = await response.json()
+
+      expect(response.status).toBe(200)
+      expect(data.page).toBe(2)
+      expect(data.pageSize).toBe(1)
+      expect(data.totalPages).toBe(3)
+
+      const pageChain = (db.select as any).mock.results[3].value
+      expect(pageChain.limit).toHaveBeenCalledWith(1)
+      expect(pageChain.offset).toHaveBeenCalledWith(1)
+    })
+
+    it('returns empty students array when teacher has no classes', async () => {
+      mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+
+      // Nothing in scope: no stale students and an empty summary
+      selectResults = []
+
       const req = new NextRequest('http://localhost:3000/api/early-warning')
       const response = await GET(req)
       const data = await response.json()
 
       expect(response.status).toBe(200)
       expect(data.students).toEqual([])
+      expect(data.summary.total).toBe(0)
     })
   })
 })
@@ -31,6 +31,7 @@ vi.mock('@/lib/ai/generate-exit-ticket', () => ({
 
 import { POST } from '@/app/api/exit-tickets/generate/route'
 import { auth } from '@/lib/auth'
+import { generateExitTicket } from '@/lib/ai/generate-exit-ticket'
 
 describe('Exit Tickets API', () => {
   beforeEach(() => {
@@ -129,5 +130,25 @@ describe('Exit Tickets API', () => {
       expect(data.questions).toBeDefined()
       expect(data.questions).toHaveLength(1)
     })
+
+    it('bypasses the stored generation when regenerate is set', async () => {
+      mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+
+      await POST(createPostRequest('/api/exit-tickets/generate', {
+        topic: 'Fractions',
+        gradeLevel: '4',
+        subject: 'Math',
+      }))
+      await POST(createPostRequest('/api/exit-tickets/generate', {
+        topic: 'Fractions',
+        gradeLevel: '4',
+        subject: 'Math',
+        regenerate: true,
+      }))
+
+      const calls = vi.mocked(generateExitTicket).mock.calls
+      expect(calls[0][1]).toEqual({ fresh: false })
+      expect(calls[1][1]).toEqual({ fresh: true })
+    })
   })
 })
@@ -13,8 +13,10 @@ vi.mock('@/lib/auth', () => ({
   auth: vi.fn(),
 }))
 
-vi.mock('@/lib/ai/grade-submission', () => ({
-  batchGradeSubmissions: vi.fn(),
+vi.mock('@/lib/grading-jobs', () => ({
+  createGradingJob: vi.fn(),
+  startGradingJob: vi.fn(),
+  getGradingJobProgress: vi.fn(),
 }))
 
 function createChainMock(result: unknown = []) {
@@ -53,9 +55,14 @@ vi.mock('@/lib/db', () => {
 })
 
 import { POST as batchPOST } from '@/app/api/grading/batch/route'
+import { GET as jobProgressGET } from '@/app/api/grading/batch/[jobId]/route'
 import { GET as analyticsGET } from '@/app/api/grading/analytics/route'
 import { auth } from '@/lib/auth'
-import { batchGradeSubmissions } from '@/lib/ai/grade-submission'
+import {
+  createGradingJob,
+  startGradingJob,
+  getGradingJobProgress,
+} from '@/lib/grading-jobs'
 
 describe('Batch Grading API - POST /api/grading/batch', () => {
   beforeEach(() => {
@@ -112,7 +119,7 @@ describe('Batch Grading API - POST /api/grading/batch', () => {
     expect(data.error).toContain('assignmentId')
   })
 
-  it('batch grades submissions and returns results', async () => {
+  it('starts a grading job for ungraded submissions and returns its id', async () => {
     mockAuthSession(vi.mocked(auth), TEST_TEACHER)
 
     const mockAssignment = {
@@ -120,75 +127,71 @@ describe('Batch Grading API - POST /api/grading/batch', () => {
       teacherId: TEST_TEACHER.id,
       rubricId: 'r1',
       title: 'Essay Assignment',
-      description: 'Write an essay',
-      instructions: null,
-      subject: 'ELA',
-      gradeLevel: '8',
     }
 
-    const mockRubric = {
-      id: 'r1',
-      title: 'Essay Rubric',
-      levels: JSON.stringify(['Beginning', 'Developing', 'Proficient', 'Advanced']),
-    }
+    const mockUngraded = [{ id: 'sub-1' }, { id: 'sub-2' }]
 
-    const mockCriteria = [
-      {
-        id: 'c1',
-        name: 'Thesis',
-        description: 'Clear thesis statement',
-        weight: 0.5,
-        descriptors: JSON.stringify({ Beginning: 'No thesis', Advanced: 'Excellent thesis' }),
-      },
+    // select call order: assignment, rubric, ungraded submissions
+    selectResults = [
+      [mockAssignment],
+      [{ id: 'r1' }],
+      mockUngraded,
     ]
 
-    const mockUngraded = [
-      { id: 'sub-1', assignmentId: 'a1', studentId: 's1', content: 'Essay 1...', status: 'submitted' },
-      { id: 'sub-2', assignmentId: 'a1', studentId: 's2', content: 'Essay 2...', status: 'submitted' },
+    vi.mocked(createGradingJob).mockResolvedValue({ id: 'job-1', total: 2 })
+
+    const req = createPostRequest('/api/grading/batch', {
+      assignmentId: 'a1',
+      feedbackTone: 'growth_mindset',
+    })
+    const response = await batchPOST(req)
+    const data = await response.json()
+
+    expect(response.status).toBe(202)
+    expect(data.jobId).toBe('job-1')
+    expect(data.status).toBe('queued')
+    expect(data.total).toBe(2)
+    expect(createGradingJob).toHaveBeenCalledWith({
+      assignmentId: 'a1',
+      teacherId: TEST_TEACHER.id,
+      submissionIds: ['sub-1', 'sub-2'],
+      options: { feedbackTone: 'growth_mindset' },
+    })
+    expect(startGradingJob).toHaveBeenCalledWith('job-1')
+  })
+
+  it('returns zero totals without starting a job when nothing is ungraded', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+
+    selectResults = [
+      [{ id: 'a1', teacherId: TEST_TEACHER.id, rubricId: 'r1' }],
+      [{ id: 'r1' }],
+      [],
     ]
 
-    // select call order: assignment, rubric, criteria, ungraded submissions
+    const req = createPostRequest('/api/grading/batch', {
+      assignmentId: 'a1',
+    })
+    const response = await batchPOST(req)
+    const data = await response.json()
+
+    expect(response.status).toBe(200)
+    expect(data.total).toBe(0)
+    expect(data.message).toContain('No ungraded submissions')
+    expect(createGradingJob).not.toHaveBeenCalled()
+    expect(startGradingJob).not.toHaveBeenCalled()
+  })
+
+  it('returns zero totals when a concurrent job already claimed every submission', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+
     selectResults = [
-      [mockAssignment],
-      [mockRubric],
-      mockCriteria,
-      mockUngraded,
+      [{ id: 'a1', teacherId: TEST_TEACHER.id, rubricId: 'r1' }],
+      [{ id: 'r1' }],
+      [{ id: 'sub-1' }],
     ]
 
-    vi.mocked(batchGradeSubmissions).mockResolvedValue([
-      {
-        submissionId: 'sub-1',
-        result: {
-          totalScore: 85,
-          maxScore: 100,
-          letterGrade: 'B',
-          overallFeedback: 'Good essay.',
-          strengths: ['Clear argument'],
-          improvements: ['More evidence'],
-          nextSteps: ['Practice analysis'],
-          misconceptions: [],
-          criterionScores: [
-            { criterionId: 'c1', criterionName: 'Thesis', level: 'Proficient', score: 85, maxScore: 100, justification: 'Solid.' },
-          ],
-        },
-      },
-      {
-        submissionId: 'sub-2',
-        result: {
-          totalScore: 72,
-          maxScore: 100,
-          letterGrade: 'C',
-          overallFeedback: 'Needs improvement.',
-          strengths: ['Organized'],
-          improvements: ['Thesis clarity'],
-          nextSteps: ['Review rubric'],
-          misconceptions: [],
-          criterionScores: [
-            { criterionId: 'c1', criterionName: 'Thesis', level: 'Developing', score: 72, maxScore: 100, justification: 'Weak thesis.' },
-          ],
-        },
-      },
-    ])
+    vi.mocked(createGradingJob).mockResolvedValue(null)
 
     const req = createPostRequest('/api/grading/batch', {
       assignmentId: 'a1',
@@ -197,9 +200,60 @@ describe('Batch Grading API - POST /api/grading/batch', () => {
     const data = await response.json()
 
     expect(response.status).toBe(200)
-    expect(data.total).toBe(2)
-    expect(data.graded).toBe(2)
-    expect(data.failed).toBe(0)
+    expect(data.total).toBe(0)
+    expect(data.message).toContain('No ungraded submissions')
+    expect(startGradingJob).not.toHaveBeenCalled()
+  })
+})
+
+describe('Batch Grading API - GET /api/grading/batch/[jobId]', () => {
+  beforeEach(() => {
+    vi.clearAllMocks()
+  })
+
+  const params = Promise.resolve({ jobId: 'job-1' })
+
+  it('returns 401 when not authenticated', async () => {
+    mockNoAuth(vi.mocked(auth))
+    const req = createGetRequest('/api/grading/batch/job-1')
+    const response = await jobProgressGET(req, { params })
+    expect(response.status).toBe(401)
+  })
+
+  it('returns 404 when the job does not belong to the teacher', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    vi.mocked(getGradingJobProgress).mockResolvedValue(null)
+
+    const req = createGetRequest('/api/grading/batch/job-1')
+    const response = await jobProgressGET(req, { params })
+    const data = await response.json()
+    expect(response.status).toBe(404)
+    expect(data.error).toContain('not found')
+    expect(getGradingJobProgress).toHaveBeenCalledWith('job-1', TEST_TEACHER.id)
+  })
+
+  it('returns job progress counts', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    vi.mocked(getGradingJobProgress).mockResolvedValue({
+      jobId: 'job-1',
+      assignmentId: 'a1',
+      status: 'running',
+      total: 3,
+      graded: 1,
+      failed: 1,
+      pending: 1,
+      error: null,
+      completedAt: null,
+    })
+
+    const req = createGetRequest('/api/grading/batch/job-1')
+    const response = await jobProgressGET(req, { params })
+    const data = await response.json()
+    expect(response.status).toBe(200)
+    expect(data.status).toBe('running')
+    expect(data.graded).toBe(1)
+    expect(data.failed).toBe(1)
+    expect(data.pending).toBe(1)
   })
 })
 
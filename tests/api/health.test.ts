@@ -27,6 +27,15 @@ describe('Health API', () => {
     expect(data.timestamp).toBeDefined()
   })
 
+  it('does not expose internal statistics', async () => {
+    vi.mocked(db.execute).mockResolvedValue([] as any)
+
+    const response = await GET()
+    const data = await response.json()
+
+    expect(Object.keys(data).sort()).toEqual(['database', 'status', 'timestamp', 'version'])
+  })
+
   it('returns 500 with unhealthy status when database fails', async () => {
     vi.mocked(db.execute).mockRejectedValue(new Error('Connection refused'))
 
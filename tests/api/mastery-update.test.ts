@@ -0,0 +1,317 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest'
+import {
+  mockAuthSession,
+  mockNoAuth,
+  TEST_TEACHER,
+  TEST_STUDENT,
+  createPostRequest,
+} from '../helpers'
+
+vi.mock('@/lib/auth', () => ({
+  auth: vi.fn(),
+}))
+
+vi.mock('@/lib/cache', () => ({
+  cacheTags: { student: (id: string) => `student:${id}` },
+  invalidateCacheTags: vi.fn(),
+}))
+
+vi.mock('@/lib/early-warning', () => ({
+  markRiskScoresStale: vi.fn(),
+}))
+
+vi.mock('@/lib/analytics-rollups', () => ({
+  RollupBatch: class {
+    levels: string[] = []
+    mastery(level: string) {
+      this.levels.push(level)
+      return this
+    }
+  },
+  recordRollups: vi.fn(),
+}))
+
+function createChainMock(result: unknown = []) {
+  const chain: Record<string, any> = {}
+  const methods = [
+    'select', 'from', 'leftJoin', 'innerJoin', 'where',
+    'orderBy', 'limit', 'insert', 'values', 'returning',
+    'update', 'set', 'delete', 'groupBy', 'onConflictDoUpdate',
+  ]
+  for (const method of methods) {
+    chain[method] = vi.fn().mockReturnValue(chain)
+  }
+  chain.then = (resolve: (v: unknown) => void, reject?: (e: unknown) => void) => {
+    return Promise.resolve(result).then(resolve, reject)
+  }
+  return chain
+}
+
+let selectCallIndex = 0
+let selectResults: unknown[][] = [[]]
+const txInsert = vi.fn(() => createChainMock([]))
+
+vi.mock('@/lib/db', () => {
+  return {
+    db: {
+      select: vi.fn(() => {
+        const result = selectResults[selectCallIndex] ?? []
+        selectCallIndex++
+        return createChainMock(result)
+      }),
+      transaction: vi.fn(async (fn: (tx: unknown) => Promise<unknown>) => fn({ insert: txInsert })),
+      query: {},
+    },
+  }
+})
+
+import { POST } from '@/app/api/mastery/update/route'
+import { POST as POST_BATCH } from '@/app/api/mastery/update/batch/route'
+import { scoreToLevel } from '@/lib/mastery-ingest'
+import { auth } from '@/lib/auth'
+import { db } from '@/lib/db'
+import { invalidateCacheTags } from '@/lib/cache'
+import { markRiskScoresStale } from '@/lib/early-warning'
+import { recordRollups } from '@/lib/analytics-rollups'
+
+const mockCriteria = [
+  { id: 'c-thesis', standardId: 'std-w1', name: 'Thesis' },
+  { id: 'c-org', standardId: 'std-w1', name: 'Organization' },
+  { id: 'c-evidence', standardId: 'std-ri2', name: 'Evidence' },
+  { id: 'c-format', standardId: null, name: 'Formatting' },
+]
+
+function writtenRows(call: number) {
+  const values = (txInsert.mock.results[call].value as any).values
+  return values.mock.calls[0][0]
+}
+
+describe('Mastery API - POST /api/mastery/update', () => {
+  beforeEach(() => {
+    vi.clearAllMocks()
+    selectCallIndex = 0
+    selectResults = [[]]
+  })
+
+  it('returns 401 when not authenticated', async () => {
+    mockNoAuth(vi.mocked(auth))
+    const req = createPostRequest('/api/mastery/update', {})
+    const response = await POST(req)
+    expect(response.status).toBe(401)
+  })
+
+  it('returns 400 when required fields are missing', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    const req = createPostRequest('/api/mastery/update', {})
+    const response = await POST(req)
+    const data = await response.json()
+    expect(response.status).toBe(400)
+    expect(data.error).toBe('Missing required fields: submissionId, criterionScores')
+  })
+
+  it('returns 404 when the submission does not exist', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    selectResults = [[], mockCriteria]
+    const req = createPostRequest('/api/mastery/update', {
+      submissionId: 'nonexistent-id',
+      criterionScores: [{ criterionId: 'c-thesis', score: 8, maxScore: 10 }],
+    })
+    const response = await POST(req)
+    const data = await response.json()
+    expect(response.status).toBe(404)
+    expect(data.error).toBe('Submission not found')
+    expect(db.transaction).not.toHaveBeenCalled()
+  })
+
+  it('aggregates criteria per standard and writes history and latest rows', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    selectResults = [
+      [{ id: 'sub-001', studentId: 'student-001', assignmentId: 'a-001' }],
+      mockCriteria,
+    ]
+    const req = createPostRequest('/api/mastery/update', {
+      submissionId: 'sub-001',
+      criterionScores: [
+        { criterionId: 'c-thesis', score: 7, maxScore: 10 },
+        { criterionId: 'c-org', score: 9, maxScore: 10 },
+        { criterionId: 'c-evidence', score: 4, maxScore: 10 },
+        { criterionId: 'c-format', score: 5, maxScore: 5 },
+      ],
+    })
+    const response = await POST(req)
+    const data = await response.json()
+
+    expect(response.status).toBe(201)
+    expect(data.created).toBe(2)
+    expect(data.records).toEqual([
+      { standardId: 'std-w1', level: 'proficient', score: 80 },
+      { standardId: 'std-ri2', level: 'beginning', score: 40 },
+    ])
+
+    // One multi-row insert into the history, one upsert into the latest table
+    expect(txInsert).toHaveBeenCalledTimes(2)
+    const history = writtenRows(0)
+    expect(history).toHaveLength(2)
+    expect(history[0].notes).toBe('Based on criteria: Thesis, Organization')
+    expect(history[0].source).toBe('a-001')
+    const latest = writtenRows(1)
+    expect(latest).toHaveLength(2)
+    expect(latest[0]).not.toHaveProperty('notes')
+
+    expect(invalidateCacheTags).toHaveBeenCalledWith(['student:student-001'])
+    expect(markRiskScoresStale).toHaveBeenCalledWith(['student-001'])
+    expect(recordRollups).toHaveBeenCalledTimes(1)
+  })
+})
+
+describe('Mastery API - POST /api/mastery/update/batch', () => {
+  beforeEach(() => {
+    vi.clearAllMocks()
+    selectCallIndex = 0
+    selectResults = [[]]
+  })
+
+  it('returns 403 for a student', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_STUDENT)
+    const req = createPostRequest('/api/mastery/update/batch', { submissions: [] })
+    const response = await POST_BATCH(req)
+    expect(response.status).toBe(403)
+  })
+
+  it('returns 400 for an empty batch', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    const req = createPostRequest('/api/mastery/update/batch', { submissions: [] })
+    const response = await POST_BATCH(req)
+    expect(response.status).toBe(400)
+  })
+
+  it('returns 400 when the batch exceeds the size limit', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    const req = createPostRequest('/api/mastery/update/batch', {
+      submissions: Array.from({ length: 501 }, (_, i) => ({
+        submissionId: `sub-${i}`,
+        criterionScores: [],
+      })),
+    })
+    const response = await POST_BATCH(req)
+    const data = await response.json()
+    expect(response.status).toBe(400)
+    expect(data.error).toContain('Maximum 500 submissions per batch')
+  })
+
+  it('ingests many submissions with two lookups and one statement per table', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    const items = Array.from({ length: 150 }, (_, i) => ({
+      submissionId: `sub-${i}`,
+      criterionScores: [
+        { criterionId: 'c-thesis', score: 9, maxScore: 10 },
+        { criterionId: 'c-evidence', score: 6, maxScore: 10 },
+      ],
+    }))
+    selectResults = [
+      items.map((item, i) => ({
+        id: item.submissionId,
+        studentId: `student-${i}`,
+        assignmentId: 'a-001',
+        teacherId: TEST_TEACHER.id,
+      })),
+      mockCriteria,
+    ]
+
+    const req = createPostRequest('/api/mastery/update/batch', { submissions: items })
+    const response = await POST_BATCH(req)
+    const data = await response.json()
+
+    expect(response.status).toBe(201)
+    expect(data.created).toBe(300)
+    expect(data.submissions).toHaveLength(150)
+    expect(data.notFound).toEqual([])
+
+    expect(db.select).toHaveBeenCalledTimes(2)
+    expect(db.transaction).toHaveBeenCalledTimes(1)
+    expect(txInsert).toHaveBeenCalledTimes(2)
+    expect(writtenRows(0)).toHaveLength(300)
+    expect(writtenRows(1)).toHaveLength(300)
+    expect(vi.mocked(invalidateCacheTags).mock.calls[0][0]).toHaveLength(150)
+  })
+
+  it('keeps one latest row when a student repeats a standard in the batch', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    selectResults = [
+      [
+        { id: 'sub-1', studentId: 'student-001', assignmentId: 'a-001', teacherId: TEST_TEACHER.id },
+        { id: 'sub-2', studentId: 'student-001', assignmentId: 'a-002', teacherId: TEST_TEACHER.id },
+      ],
+      mockCriteria,
+    ]
+    const req = createPostRequest('/api/mastery/update/batch', {
+      submissions: [
+        { submissionId: 'sub-1', criterionScores: [{ criterionId: 'c-thesis', score: 5, maxScore: 10 }] },
+        { submissionId: 'sub-2', criterionScores: [{ criterionId: 'c-thesis', score: 10, maxScore: 10 }] },
+      ],
+    })
+    await POST_BATCH(req)
+
+    expect(writtenRows(0)).toHaveLength(2)
+    const latest = writtenRows(1)
+    expect(latest).toHaveLength(1)
+    expect(latest[0]).toMatchObject({ level: 'advanced', source: 'a-002' })
+  })
+
+  it('reports unknown submissions without failing the batch', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    selectResults = [
+      [{ id: 'sub-001', studentId: 'student-001', assignmentId: 'a-001', teacherId: TEST_TEACHER.id }],
+      mockCriteria,
+    ]
+    const req = createPostRequest('/api/mastery/update/batch', {
+      submissions: [
+        { submissionId: 'sub-001', criterionScores: [{ criterionId: 'c-evidence', score: 7, maxScore: 10 }] },
+        { submissionId: 'nonexistent-id', criterionScores: [{ criterionId: 'c-evidence', score: 7, maxScore: 10 }] },
+      ],
+    })
+    const response = await POST_BATCH(req)
+    const data = await response.json()
+
+    expect(response.status).toBe(201)
+    expect(data.created).toBe(1)
+    expect(data.notFound).toEqual(['nonexistent-id'])
+  })
+
+  it('does not ingest submissions to another teacher\'s assignments', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    selectResults = [
+      [
+        { id: 'sub-own', studentId: 'student-001', assignmentId: 'a-001', teacherId: TEST_TEACHER.id },
+        { id: 'sub-other', studentId: 'student-009', assignmentId: 'a-009', teacherId: 'teacher-other' },
+      ],
+      mockCriteria,
+    ]
+    const req = createPostRequest('/api/mastery/update/batch', {
+      submissions: [
+        { submissionId: 'sub-own', criterionScores: [{ criterionId: 'c-evidence', score: 7, maxScore: 10 }] },
+        { submissionId: 'sub-other', criterionScores: [{ criterionId: 'c-evidence', score: 7, maxScore: 10 }] },
+      ],
+    })
+    const response = await POST_BATCH(req)
+    const data = await response.json()
+
+    expect(response.status).toBe(201)
+    expect(data.created).toBe(1)
+    expect(data.forbidden).toEqual(['sub-other'])
+    expect(data.submissions.map((s: { submissionId: string }) => s.submissionId)).toEqual(['sub-own'])
+    expect(writtenRows(0)).toHaveLength(1)
+    expect(writtenRows(0)[0].studentId).toBe('student-001')
+    expect(markRiskScoresStale).toHaveBeenCalledWith(['student-001'])
+  })
+})
+
+describe('scoreToLevel', () => {
+  it('applies the mastery thresholds', () => {
+    expect(scoreToLevel(9, 10)).toBe('advanced')
+    expect(scoreToLevel(7, 10)).toBe('proficient')
+    expect(scoreToLevel(5, 10)).toBe('developing')
+    expect(scoreToLevel(4, 10)).toBe('beginning')
+    expect(scoreToLevel(5, 0)).toBe('beginning')
+  })
+})
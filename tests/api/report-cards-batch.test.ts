@@ -0,0 +1,297 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest'
+import {
+  mockAuthSession,
+  mockNoAuth,
+  TEST_TEACHER,
+  TEST_STUDENT,
+  createPostRequest,
+} from '../helpers'
+
+vi.mock('@/lib/auth', () => ({
+  auth: vi.fn(),
+}))
+
+vi.mock('@/lib/ai/report-card', () => ({
+  batchGenerateReportCards: vi.fn(),
+}))
+
+function createChainMock(result: unknown = []) {
+  const chain: Record<string, any> = {}
+  const methods = [
+    'select', 'from', 'leftJoin', 'innerJoin', 'where',
+    'orderBy', 'limit', 'insert', 'values', 'returning',
+    'update', 'set', 'delete', 'groupBy',
+  ]
+  for (const method of methods) {
+    chain[method] = vi.fn().mockReturnValue(chain)
+  }
+  chain.then = (resolve: (v: unknown) => void, reject?: (e: unknown) => void) => {
+    return Promise.resolve(result).then(resolve, reject)
+  }
+  return chain
+}
+
+let selectCallIndex = 0
+let selectResults: unknown[][] = [[]]
+
+vi.mock('@/lib/db', () => {
+  return {
+    db: {
+      select: vi.fn(() => {
+        const result = selectResults[selectCallIndex] ?? []
+        selectCallIndex++
+        return createChainMock(result)
+      }),
+      insert: vi.fn(() => createChainMock([])),
+      query: {},
+    },
+  }
+})
+
+import { POST } from '@/app/api/report-cards/batch/route'
+import { auth } from '@/lib/auth'
+import { db } from '@/lib/db'
+import { batchGenerateReportCards } from '@/lib/ai/report-card'
+
+const mockClass = {
+  id: 'class-001',
+  name: 'Algebra I',
+  subject: 'Math',
+  gradeLevel: '9',
+}
+
+const mockCard = {
+  overallNarrative: 'A strong quarter.',
+  strengths: ['Problem solving'],
+  areasForGrowth: ['Showing work'],
+  recommendations: ['Practice at home'],
+  gradeRecommendation: 'B+',
+}
+
+function makeStudents(count: number) {
+  return Array.from({ length: count }, (_, i) => ({
+    id: `student-${i + 1}`,
+    name: `Student ${i + 1}`,
+  }))
+}
+
+// select call order: membership, class, students, existing cards,
+// then the three grouped prefetch queries (submissions, mastery, feedback)
+function classResults(students: unknown[], existing: unknown[] = [], prefetch: unknown[][] = [[], [], []]) {
+  return [[{ classId: 'class-001' }], [mockClass], students, existing, ...prefetch]
+}
+
+async function readEvents(response: Response) {
+  const text = await response.text()
+  return text.trim().split('\n').map((line) => JSON.parse(line))
+}
+
+function generateAll() {
+  vi.mocked(batchGenerateReportCards).mockImplementation(async (items, options) => {
+    for (const item of items) {
+      await options?.onResult?.(item.key, mockCard)
+    }
+  })
+}
+
+describe('Report Cards API - POST /api/report-cards/batch', () => {
+  beforeEach(() => {
+    vi.clearAllMocks()
+    selectCallIndex = 0
+    selectResults = [[]]
+  })
+
+  it('returns 401 when not authenticated', async () => {
+    mockNoAuth(vi.mocked(auth))
+    const req = createPostRequest('/api/report-cards/batch', {
+      classId: 'class-001',
+      gradingPeriod: 'Q1 2025',
+    })
+    const response = await POST(req)
+    expect(response.status).toBe(401)
+  })
+
+  it('returns 403 for a student', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_STUDENT)
+    const req = createPostRequest('/api/report-cards/batch', {
+      classId: 'class-001',
+      gradingPeriod: 'Q1 2025',
+    })
+    const response = await POST(req)
+    expect(response.status).toBe(403)
+  })
+
+  it('returns 400 when gradingPeriod is missing', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    const req = createPostRequest('/api/report-cards/batch', { classId: 'class-001' })
+    const response = await POST(req)
+    const data = await response.json()
+    expect(response.status).toBe(400)
+    expect(data.error).toBe('classId and gradingPeriod are required')
+  })
+
+  it('returns 403 when the teacher is not a member of the class', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    selectResults = [[]]
+    const req = createPostRequest('/api/report-cards/batch', {
+      classId: 'class-999',
+      gradingPeriod: 'Q1 2025',
+    })
+    const response = await POST(req)
+    expect(response.status).toBe(403)
+  })
+
+  it('returns 400 when the class exceeds the batch size limit', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    selectResults = classResults(makeStudents(201))
+    const req = createPostRequest('/api/report-cards/batch', {
+      classId: 'class-001',
+      gradingPeriod: 'Q1 2025',
+    })
+    const response = await POST(req)
+    const data = await response.json()
+    expect(response.status).toBe(400)
+    expect(data.error).toContain('Maximum 200 students per batch')
+  })
+
+  it('streams progress and saves every card as a draft in one insert', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    selectResults = classResults(makeStudents(3))
+    generateAll()
+
+    const req = createPostRequest('/api/report-cards/batch', {
+      classId: 'class-001',
+      gradingPeriod: 'Q1 2025',
+    })
+    const response = await POST(req)
+    expect(response.status).toBe(200)
+    expect(response.headers.get('Content-Type')).toContain('application/x-ndjson')
+
+    const events = await readEvents(response)
+    const progress = events.filter((e) => e.type === 'progress')
+    expect(progress.map((e) => e.completed)).toEqual([1, 2, 3])
+    expect(progress.every((e) => e.total === 3)).toBe(true)
+
+    const done = events[events.length - 1]
+    expect(done).toMatchObject({ type: 'done', generated: 3, skipped: 0, total: 3 })
+    expect(done.reportCards).toHaveLength(3)
+
+    expect(db.insert).toHaveBeenCalledTimes(1)
+    const values = (db.insert as any).mock.results[0].value.values
+    const rows = values.mock.calls[0][0]
+    expect(rows).toHaveLength(3)
+    expect(rows.every((r: { status: string }) => r.status === 'draft')).toBe(true)
+  })
+
+  it('skips students who already have a card for the grading period', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    selectResults = classResults(makeStudents(3), [{ studentId: 'student-1' }])
+    generateAll()
+
+    const req = createPostRequest('/api/report-cards/batch', {
+      classId: 'class-001',
+      gradingPeriod: 'Q1 2025',
+    })
+    const events = await readEvents(await POST(req))
+    const done = events[events.length - 1]
+
+    expect(done).toMatchObject({ generated: 2, skipped: 1, total: 3 })
+    expect(done.reportCards).toContainEqual({
+      studentId: 'student-1',
+      studentName: 'Student 1',
+      status: 'skipped',
+    })
+
+    const items = vi.mocked(batchGenerateReportCards).mock.calls[0][0]
+    expect(items.map((i) => i.key.id)).toEqual(['student-2', 'student-3'])
+  })
+
+  it('builds each student input from the grouped prefetch queries', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    selectResults = classResults(makeStudents(2), [], [
+      [
+        {
+          studentId: 'student-2',
+          assignmentTitle: 'Quiz 1',
+          score: 8,
+          maxScore: 10,
+          letterGrade: 'B',
+          submittedAt: new Date('2025-10-01T12:00:00Z'),
+        },
+      ],
+      [
+        {
+          studentId: 'student-1',
+          standardCode: 'A.1',
+          standardDescription: 'Linear equations',
+          level: 'proficient',
+          score: 85,
+        },
+      ],
+      [{ studentId: 'student-2', aiFeedback: 'Clear reasoning.', strengths: '["Neat work"]' }],
+    ])
+    generateAll()
+
+    const req = createPostRequest('/api/report-cards/batch', {
+      classId: 'class-001',
+      gradingPeriod: 'Q1 2025',
+    })
+    await readEvents(await POST(req))
+
+    // Seven queries regardless of class size
+    expect(db.select).toHaveBeenCalledTimes(7)
+
+    const items = vi.mocked(batchGenerateReportCards).mock.calls[0][0]
+    const [first, second] = items.map((i) => i.input)
+    expect(first.submissions).toEqual([])
+    expect(first.masteryData).toHaveLength(1)
+    expect(second.submissions).toEqual([
+      { assignmentTitle: 'Quiz 1', score: 8, maxScore: 10, letterGrade: 'B', submittedAt: '2025-10-01' },
+    ])
+    expect(second.feedbackHighlights).toEqual(['Clear reasoning.', 'Neat work'])
+    expect(second.className).toBe('Algebra I')
+  })
+
+  it('reports a failed narrative without stopping the rest', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    selectResults = classResults(makeStudents(3))
+    vi.mocked(batchGenerateReportCards).mockImplementation(async (items, options) => {
+      for (const item of items) {
+        if (item.key.id === 'student-2') {
+          await options?.onError?.(item.key, new Error('timed out'))
+        } else {
+          await options?.onResult?.(item.key, mockCard)
+        }
+      }
+    })
+
+    const req = createPostRequest('/api/report-cards/batch', {
+      classId: 'class-001',
+      gradingPeriod: 'Q1 2025',
+    })
+    const events = await readEvents(await POST(req))
+    const done = events[events.length - 1]
+
+    expect(done).toMatchObject({ generated: 2, skipped: 0, total: 3 })
+    expect(done.reportCards).toContainEqual({
+      studentId: 'student-2',
+      studentName: 'Student 2',
+      status: 'error',
+    })
+  })
+
+  it('writes cards in chunks as they arrive', async () => {
+    mockAuthSession(vi.mocked(auth), TEST_TEACHER)
+    selectResults = classResults(makeStudents(25))
+    generateAll()
+
+    const req = createPostRequest('/api/report-cards/batch', {
+      classId: 'class-001',
+      gradingPeriod: 'Q1 2025',
+    })
+    const events = await readEvents(await POST(req))
+
+    expect(events[events.length - 1]).toMatchObject({ generated: 25 })
+    expect(db.insert).toHaveBeenCalledTimes(3)
+  })
+})
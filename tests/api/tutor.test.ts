@@ -84,10 +84,8 @@ describe('Tutor Sessions API', () => {
           topic: 'Linear Equations',
           startedAt: now,
           endedAt: null,
-          messages: JSON.stringify([
-            { role: 'user', content: 'Help me solve 2x + 5 = 13', timestamp: now.toISOString() },
-            { role: 'assistant', content: 'Let us start by thinking about what operation to undo first.', timestamp: now.toISOString() },
-          ]),
+          messageCount: 2,
+          lastMessage: 'Let us start by thinking about what operation to undo first.',
         },
       ]
 
@@ -116,7 +114,31 @@ describe('Tutor Sessions API', () => {
       expect(data).toEqual([])
     })
 
-    it('handles session with empty messages array', async () => {
+    it('truncates the last message preview to 120 characters', async () => {
+      mockAuthSession(vi.mocked(auth), TEST_STUDENT)
+
+      const now = new Date()
+      selectResult = [
+        {
+          id: 'session-3',
+          subject: 'ELA',
+          topic: null,
+          startedAt: now,
+          endedAt: now,
+          messageCount: 41,
+          lastMessage: 'a'.repeat(300),
+        },
+      ]
+
+      const response = await GET()
+      const data = await response.json()
+
+      expect(response.status).toBe(200)
+      expect(data[0].messageCount).toBe(41)
+      expect(data[0].lastMessage).toHaveLength(120)
+    })
+
+    it('handles session with no messages', async () => {
       mockAuthSession(vi.mocked(auth), TEST_STUDENT)
 
       const now = new Date()
@@ -128,7 +150,8 @@ describe('Tutor Sessions API', () => {
           topic: 'Photosynthesis',
           startedAt: now,
           endedAt: null,
-          messages: JSON.stringify([]),
+          messageCount: 0,
+          lastMessage: null,
         },
       ]
 
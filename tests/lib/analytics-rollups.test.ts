@@ -0,0 +1,337 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest'
+
+function createChainMock(result: unknown = []) {
+  const chain: Record<string, any> = {}
+  const methods = [
+    'select', 'from', 'leftJoin', 'innerJoin', 'where',
+    'orderBy', 'limit', 'insert', 'values', 'returning',
+    'update', 'set', 'delete', 'groupBy', 'onConflictDoUpdate',
+  ]
+  for (const method of methods) {
+    chain[method] = vi.fn().mockReturnValue(chain)
+  }
+  chain.then = (resolve: (v: unknown) => void, reject?: (e: unknown) => void) => {
+    return Promise.resolve(result).then(resolve, reject)
+  }
+  return chain
+}
+
+let selectCallIndex = 0
+let selectResults: unknown[][] = [[]]
+
+vi.mock('@/lib/db', () => ({
+  db: {
+    select: vi.fn(() => {
+      const result = selectResults[selectCallIndex] ?? []
+      selectCallIndex++
+      return createChainMock(result)
+    }),
+    insert: vi.fn(() => createChainMock([])),
+  },
+}))
+
+import {
+  RollupBatch,
+  collectRollups,
+  recordRollups,
+  recordSubmissionChanges,
+  recordAssignmentChange,
+  rollupMetrics,
+  type SubmissionDims,
+  type SubmissionSnapshot,
+} from '@/lib/analytics-rollups'
+import { db } from '@/lib/db'
+
+const DIMS: SubmissionDims = { teacherId: 'teacher-001', schoolId: 'school-1', subject: 'Math' }
+const GRADED_AT = new Date('2026-03-10T15:00:00Z')
+
+function snapshot(status: string, score?: { total: number; max: number }): SubmissionSnapshot {
+  const graded = status === 'graded' || status === 'returned'
+  return {
+    status,
+    totalScore: score?.total ?? null,
+    maxScore: score?.max ?? null,
+    gradedAt: graded ? GRADED_AT : null,
+  }
+}
+
+// Rows passed to each rollup upsert, in write order
+function insertedRows() {
+  return vi.mocked(db.insert).mock.results.map(
+    (r) => (r.value as Record<string, any>).values.mock.calls[0][0] as Record<string, unknown>[]
+  )
+}
+
+describe('analytics rollups', () => {
+  beforeEach(() => {
+    vi.clearAllMocks()
+    selectCallIndex = 0
+    selectResults = [[]]
+    vi.spyOn(console, 'error').mockImplementation(() => {})
+  })
+
+  afterEach(() => {
+    vi.restoreAllMocks()
+  })
+
+  describe('RollupBatch.submission', () => {
+    it('counts a new submission as awaiting a grade', () => {
+      const batch = new RollupBatch().submission(DIMS, null, snapshot('submitted'))
+
+      expect(batch.counters.get(rollupMetrics.submissions)).toBe(1)
+      expect(batch.counters.get(rollupMetrics.ungradedSubmissions)).toBe(1)
+      expect(batch.counters.get(rollupMetrics.gradedSubmissions)).toBeUndefined()
+      expect(batch.teachers.get('teacher-001')).toEqual({ submissions: 1 })
+      expect(batch.schools.get('school-1')).toEqual({ submissions: 1 })
+      expect(batch.subjects.get('Math')).toEqual({ submissions: 1 })
+    })
+
+    it('moves nothing when a submission goes from submitted to grading', () => {
+      const batch = new RollupBatch().submission(DIMS, snapshot('submitted'), snapshot('grading'))
+
+      expect(batch.isEmpty).toBe(true)
+    })
+
+    it('moves a submission from ungraded to graded and adds its score', () => {
+      const batch = new RollupBatch().submission(
+        DIMS,
+        snapshot('grading'),
+        snapshot('graded', { total: 8, max: 10 })
+      )
+
+      expect(batch.counters.get(rollupMetrics.submissions) ?? 0).toBe(0)
+      expect(batch.counters.get(rollupMetrics.ungradedSubmissions)).toBe(-1)
+      expect(batch.counters.get(rollupMetrics.gradedSubmissions)).toBe(1)
+      expect(batch.teachers.get('teacher-001')).toMatchObject({ gradedSubmissions: 1 })
+      expect(batch.schools.get('school-1')).toMatchObject({
+        gradedSubmissions: 1,
+        scoredSubmissions: 1,
+        scorePercentSum: 80,
+      })
+      expect(batch.subjects.get('Math')).toMatchObject({ scoredSubmissions: 1, scorePercentSum: 80 })
+      expect(batch.daily.get('2026-03-10')).toEqual({ submissionsGraded: 1 })
+    })
+
+    it('applies only the score difference when a graded submission is re-graded', () => {
+      const batch = new RollupBatch().submission(
+        DIMS,
+        snapshot('graded', { total: 6, max: 10 }),
+        snapshot('graded', { total: 9, max: 10 })
+      )
+
+      expect(batch.subjects.get('Math')?.scorePercentSum).toBeCloseTo(30)
+      expect(batch.counters.get(rollupMetrics.gradedSubmissions) ?? 0).toBe(0)
+      expect(batch.daily.get('2026-03-10')?.submissionsGraded ?? 0).toBe(0)
+    })
+
+    it('moves nothing when graded feedback is returned', () => {
+      const score = { total: 7, max: 10 }
+      const batch = new RollupBatch().submission(DIMS, snapshot('graded', score), snapshot('returned', score))
+
+      expect(batch.isEmpty).toBe(true)
+    })
+
+    it('does not count a score against a zero maximum', () => {
+      const batch = new RollupBatch().submission(DIMS, null, snapshot('graded', { total: 0, max: 0 }))
+
+      expect(batch.subjects.get('Math')).toEqual({ submissions: 1 })
+    })
+
+    it('skips school rows for submissions in classes without a school', () => {
+      const batch = new RollupBatch().submission({ ...DIMS, schoolId: null }, null, snapshot('submitted'))
+
+      expect(batch.schools.size).toBe(0)
+      expect(batch.teachers.get('teacher-001')).toEqual({ submissions: 1 })
+    })
+  })
+
+  describe('recordSubmissionChanges', () => {
+    it('looks up attribution once and writes the deltas', async () => {
+      selectResults = [[
+        { id: 'sub-1', ...DIMS },
+        { id: 'sub-2', ...DIMS },
+      ]]
+
+      await recordSubmissionChanges([
+        { submissionId: 'sub-1', before: snapshot('grading'), after: snapshot('graded', { total: 8, max: 10 }) },
+        { submissionId: 'sub-2', before: null, after: snapshot('submitted') },
+      ])
+
+      expect(db.select).toHaveBeenCalledTimes(1)
+      const counterRows = insertedRows().at(-1)
+      expect(counterRows).toEqual(
+        expect.arrayContaining([
+          expect.objectContaining({ metric: rollupMetrics.submissions, value: 1 }),
+          expect.objectContaining({ metric: rollupMetrics.gradedSubmissions, value: 1 }),
+        ])
+      )
+      expect(counterRows).not.toContainEqual(
+        expect.objectContaining({ metric: rollupMetrics.ungradedSubmissions })
+      )
+    })
+
+    it('skips the lookup and the write when no change moves a rollup', async () => {
+      await recordSubmissionChanges([
+        { submissionId: 'sub-1', before: snapshot('submitted'), after: snapshot('grading') },
+      ])
+
+      expect(db.select).not.toHaveBeenCalled()
+      expect(db.insert).not.toHaveBeenCalled()
+    })
+
+    it('logs changes to submissions that could not be found', async () => {
+      selectResults = [[]]
+
+      await recordSubmissionChanges([
+        { submissionId: 'sub-missing', before: null, after: snapshot('submitted') },
+      ])
+
+      expect(console.error).toHaveBeenCalledWith(
+        expect.stringContaining('analytics rollups'),
+        expect.stringContaining('sub-missing')
+      )
+      expect(db.insert).not.toHaveBeenCalled()
+    })
+  })
+
+  describe('recordAssignmentChange', () => {
+    it('attributes a new assignment to its teacher, school and creation day', async () => {
+      selectResults = [[{ schoolId: 'school-1' }]]
+
+      await recordAssignmentChange(
+        { teacherId: 'teacher-001', classId: 'class-1', subject: 'Math', createdAt: GRADED_AT },
+        1
+      )
+
+      const [teacherRows, schoolRows, dailyRows, counterRows] = insertedRows()
+      expect(teacherRows).toEqual([expect.objectContaining({ teacherId: 'teacher-001', assignments: 1 })])
+      expect(schoolRows).toEqual([expect.objectContaining({ schoolId: 'school-1', assignments: 1 })])
+      expect(dailyRows).toEqual([expect.objectContaining({ day: '2026-03-10', assignmentsCreated: 1 })])
+      expect(counterRows).toContainEqual(expect.objectContaining({ metric: rollupMetrics.assignments, value: 1 }))
+    })
+
+    it('removes a deleted assignment', async () => {
+      selectResults = [[{ schoolId: 'school-1' }]]
+
+      await recordAssignmentChange(
+        { teacherId: 'teacher-001', classId: 'class-1', subject: 'Math', createdAt: GRADED_AT },
+        -1
+      )
+
+      const counterRows = insertedRows().at(-1)
+      expect(counterRows).toContainEqual(expect.objectContaining({ metric: rollupMetrics.assignments, value: -1 }))
+    })
+  })
+
+  describe('recordRollups', () => {
+    it('logs a failed write with the lost deltas instead of throwing', async () => {
+      const failure = new Error('connection reset')
+      vi.mocked(db.insert).mockImplementationOnce(() => {
+        throw failure
+      })
+
+      await expect(recordRollups(new RollupBatch().rubric('teacher-001'))).resolves.toBeUndefined()
+
+      expect(console.error).toHaveBeenCalledWith(
+        expect.stringContaining('analytics:rebuild'),
+        failure,
+        {
+          lostDeltas: expect.objectContaining({
+            counters: { [rollupMetrics.rubrics]: 1 },
+            teachers: { 'teacher-001': { rubrics: 1 } },
+          }),
+        }
+      )
+    })
+
+    it('does not write an empty batch', async () => {
+      await recordRollups(new RollupBatch())
+
+      expect(db.insert).not.toHaveBeenCalled()
+    })
+  })
+
+  describe('rebuild and incremental updates', () => {
+    // An executor that answers collectRollups' queries in order: sandbox users
+    // (unused when unscoped), users by role, schools, classes, assignments,
+    // submissions, feedback drafts, mastery, lesson plans, rubrics
+    function executorFor(results: Record<string, unknown[]>) {
+      const order = [
+        'sandboxUsers', 'users', 'schools', 'classes', 'assignments',
+        'submissions', 'feedback', 'mastery', 'lessonPlans', 'rubrics',
+      ]
+      let call = 0
+      return {
+        select: vi.fn(() => createChainMock(results[order[call++]] ?? [])),
+        insert: vi.fn(),
+        delete: vi.fn(),
+      } as any
+    }
+
+    it('builds the same rollups from the base tables as the incremental path', async () => {
+      const otherDims: SubmissionDims = { teacherId: 'teacher-002', schoolId: null, subject: 'Science' }
+
+      // Incremental: each submission walks submitted -> grading -> graded (or
+      // stays submitted), and one assignment per teacher is created
+      const incremental = new RollupBatch()
+      incremental.assignment(DIMS, GRADED_AT).assignment(otherDims, GRADED_AT)
+
+      const walk = (dims: SubmissionDims, steps: SubmissionSnapshot[]) => {
+        let before: SubmissionSnapshot | null = null
+        for (const after of steps) {
+          incremental.submission(dims, before, after)
+          before = after
+        }
+      }
+      walk(DIMS, [snapshot('submitted'), snapshot('grading'), snapshot('graded', { total: 8, max: 10 })])
+      walk(DIMS, [snapshot('submitted'), snapshot('grading'), snapshot('graded', { total: 6, max: 10 })])
+      walk(DIMS, [snapshot('submitted')])
+      walk(otherDims, [snapshot('submitted'), snapshot('grading'), snapshot('graded', { total: 5, max: 10 })])
+
+      // Rebuild: the aggregate rows the base-table queries return for the
+      // same final state
+      const rebuilt = await collectRollups({}, executorFor({
+        schools: [{ count: 0 }],
+        classes: [{ count: 0 }],
+        assignments: [
+          { ...DIMS, day: '2026-03-10', count: 1 },
+          { ...otherDims, day: '2026-03-10', count: 1 },
+        ],
+        submissions: [
+          { ...DIMS, status: 'graded', gradedDay: '2026-03-10', count: 2, scored: 2, scorePercentSum: 140 },
+          { ...DIMS, status: 'submitted', gradedDay: null, count: 1, scored: 0, scorePercentSum: 0 },
+          { ...otherDims, status: 'graded', gradedDay: '2026-03-10', count: 1, scored: 1, scorePercentSum: 50 },
+        ],
+      }))
+
+      expect(rebuilt.summary()).toEqual(incremental.summary())
+    })
+
+    it('removes exactly what it adds when collected with sign -1', async () => {
+      const results = {
+        users: [{ role: 'teacher', count: 2 }],
+        schools: [{ count: 1 }],
+        classes: [{ count: 3 }],
+        submissions: [
+          { ...DIMS, status: 'graded', gradedDay: '2026-03-10', count: 2, scored: 2, scorePercentSum: 140 },
+        ],
+        rubrics: [{ teacherId: 'teacher-001', count: 4 }],
+      }
+
+      const added = (await collectRollups({}, executorFor(results))).summary()
+      const removed = (await collectRollups({ sign: -1 }, executorFor(results))).summary()
+
+      const negate = (fields: Record<string, number>) =>
+        Object.fromEntries(Object.entries(fields).map(([field, n]) => [field, -n]))
+      const negateRows = (rows: Record<string, Record<string, number>>) =>
+        Object.fromEntries(Object.entries(rows).map(([id, fields]) => [id, negate(fields)]))
+
+      expect(added.counters[rollupMetrics.users('teacher')]).toBe(2)
+      expect(removed.counters).toEqual(negate(added.counters))
+      expect(removed.teachers).toEqual(negateRows(added.teachers))
+      expect(removed.schools).toEqual(negateRows(added.schools))
+      expect(removed.subjects).toEqual(negateRows(added.subjects))
+      expect(removed.daily).toEqual(negateRows(added.daily))
+    })
+  })
+})
@@ -0,0 +1,231 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest'
+
+function createChainMock(result: unknown = []) {
+  const chain: Record<string, any> = {}
+  const methods = [
+    'select', 'from', 'where', 'insert', 'values', 'returning',
+    'delete', 'onConflictDoUpdate',
+  ]
+  for (const method of methods) {
+    chain[method] = vi.fn().mockReturnValue(chain)
+  }
+  chain.then = (resolve: (v: unknown) => void, reject?: (e: unknown) => void) => {
+    return Promise.resolve(result).then(resolve, reject)
+  }
+  return chain
+}
+
+let remoteRows: unknown[] = []
+
+vi.mock('@/lib/db', () => ({
+  db: {
+    select: vi.fn(() => createChainMock(remoteRows)),
+    insert: vi.fn(() => createChainMock([])),
+    delete: vi.fn(() => createChainMock([])),
+  },
+}))
+
+import {
+  cached,
+  getCached,
+  setCache,
+  invalidateCacheTags,
+  invalidateCacheKeys,
+  getCacheStats,
+} from '@/lib/cache'
+import { db } from '@/lib/db'
+
+const MINUTE = 60 * 1000
+let keySeq = 0
+
+// Module state (the in-process tier) outlives each test, so every test uses
+// its own keys
+function uniqueKey(name: string) {
+  return `test:${name}:${++keySeq}`
+}
+
+// Let pending reads settle so in-flight loads have started
+function flush() {
+  return new Promise((resolve) => setTimeout(resolve, 0))
+}
+
+function deferred<T>() {
+  let resolve!: (value: T) => void
+  const promise = new Promise<T>((r) => {
+    resolve = r
+  })
+  return { promise, resolve }
+}
+
+describe('cache', () => {
+  beforeEach(() => {
+    vi.clearAllMocks()
+    remoteRows = []
+  })
+
+  describe('in-process LRU', () => {
+    it('serves entries from memory without a database read', async () => {
+      const key = uniqueKey('local')
+      await setCache(key, { n: 1 }, MINUTE)
+
+      expect(await getCached(key)).toEqual({ n: 1 })
+      expect(db.select).not.toHaveBeenCalled()
+    })
+
+    it('evicts the least recently used entry beyond 500 entries', async () => {
+      const keys = Array.from({ length: 500 }, (_, i) => uniqueKey(`lru-${i}`))
+      for (const key of keys) await setCache(key, key, MINUTE)
+
+      // Touch the oldest entry so the second oldest becomes the eviction candidate
+      await getCached(keys[0])
+      await setCache(uniqueKey('lru-overflow'), 'x', MINUTE)
+      vi.mocked(db.select).mockClear()
+
+      expect(await getCached(keys[0])).toBe(keys[0])
+      expect(db.select).not.toHaveBeenCalled()
+
+      // Evicted from memory; the database has no row in this test
+      expect(await getCached(keys[1])).toBeNull()
+      expect(db.select).toHaveBeenCalledTimes(1)
+    })
+
+    it('falls back to the database and keeps the row in memory', async () => {
+      const key = uniqueKey('remote')
+      remoteRows = [{
+        value: JSON.stringify({ n: 2 }),
+        expiresAt: new Date(Date.now() + MINUTE),
+        staleUntil: new Date(Date.now() + MINUTE),
+        tags: [],
+      }]
+
+      expect(await getCached(key)).toEqual({ n: 2 })
+      expect(await getCached(key)).toEqual({ n: 2 })
+      expect(db.select).toHaveBeenCalledTimes(1)
+    })
+  })
+
+  describe('request coalescing', () => {
+    it('shares one loader call between concurrent misses', async () => {
+      const key = uniqueKey('coalesce')
+      const gate = deferred<string>()
+      const loader = vi.fn(() => gate.promise)
+      const coalescedBefore = getCacheStats().coalesced
+
+      const first = cached(key, loader, { ttlMs: MINUTE })
+      const second = cached(key, loader, { ttlMs: MINUTE })
+      await flush()
+      gate.resolve('value')
+
+      expect(await first).toBe('value')
+      expect(await second).toBe('value')
+      expect(loader).toHaveBeenCalledTimes(1)
+      expect(getCacheStats().coalesced).toBe(coalescedBefore + 1)
+      expect(db.insert).toHaveBeenCalledTimes(1)
+    })
+
+    it('does not store values rejected by cacheable', async () => {
+      const key = uniqueKey('uncacheable')
+      const value = await cached(key, async () => 'partial', {
+        ttlMs: MINUTE,
+        cacheable: () => false,
+      })
+
+      expect(value).toBe('partial')
+      expect(db.insert).not.toHaveBeenCalled()
+    })
+  })
+
+  describe('stale-while-revalidate', () => {
+    it('returns the stale value and refreshes it once in the background', async () => {
+      const key = uniqueKey('stale')
+      await setCache(key, 'old', 0, { staleTtlMs: MINUTE })
+
+      const gate = deferred<string>()
+      const loader = vi.fn(() => gate.promise)
+
+      expect(await cached(key, loader, { ttlMs: MINUTE, staleTtlMs: MINUTE })).toBe('old')
+      expect(await cached(key, loader, { ttlMs: MINUTE, staleTtlMs: MINUTE })).toBe('old')
+      expect(loader).toHaveBeenCalledTimes(1)
+
+      gate.resolve('new')
+      await vi.waitFor(async () => {
+        expect(await getCached(key)).toBe('new')
+      })
+    })
+
+    it('calls the loader in the foreground once the stale window has passed', async () => {
+      const key = uniqueKey('expired')
+      await setCache(key, 'old', 0)
+
+      const loader = vi.fn(async () => 'new')
+      expect(await cached(key, loader, { ttlMs: MINUTE })).toBe('new')
+      expect(loader).toHaveBeenCalledTimes(1)
+    })
+  })
+
+  describe('invalidation', () => {
+    it('evicts tagged entries from memory and the database', async () => {
+      const tagged = uniqueKey('tagged')
+      const other = uniqueKey('untagged')
+      await setCache(tagged, 1, MINUTE, { tags: ['student:s1'] })
+      await setCache(other, 2, MINUTE, { tags: ['student:s2'] })
+
+      await invalidateCacheTags(['student:s1'])
+
+      expect(db.delete).toHaveBeenCalledTimes(1)
+      expect(await getCached(tagged)).toBeNull()
+      expect(await getCached(other)).toBe(2)
+    })
+
+    it('evicts keys from memory and the database', async () => {
+      const key = uniqueKey('key')
+      await setCache(key, 1, MINUTE)
+
+      await invalidateCacheKeys([key])
+
+      expect(db.delete).toHaveBeenCalledTimes(1)
+      expect(await getCached(key)).toBeNull()
+    })
+
+    it('skips storing a load whose own tag was invalidated while it ran', async () => {
+      const key = uniqueKey('own-tag')
+      const gate = deferred<string>()
+      const load = cached(key, () => gate.promise, { ttlMs: MINUTE, tags: ['student:s3'] })
+      await flush()
+
+      await invalidateCacheTags(['student:s3'])
+      gate.resolve('computed before the write')
+
+      expect(await load).toBe('computed before the write')
+      expect(db.insert).not.toHaveBeenCalled()
+    })
+
+    it('skips storing a load whose key was invalidated while it ran', async () => {
+      const key = uniqueKey('own-key')
+      const gate = deferred<string>()
+      const load = cached(key, () => gate.promise, { ttlMs: MINUTE })
+      await flush()
+
+      await invalidateCacheKeys([key])
+      gate.resolve('value')
+
+      await load
+      expect(db.insert).not.toHaveBeenCalled()
+    })
+
+    it('still stores a load when unrelated tags or keys are invalidated', async () => {
+      const key = uniqueKey('unrelated')
+      const gate = deferred<string>()
+      const load = cached(key, () => gate.promise, { ttlMs: MINUTE, tags: ['student:s4'] })
+      await flush()
+
+      await invalidateCacheTags(['student:s5'])
+      await invalidateCacheKeys([uniqueKey('other-key')])
+      gate.resolve('value')
+
+      await load
+      expect(db.insert).toHaveBeenCalledTimes(1)
+      expect(await getCached(key)).toBe('value')
+    })
+  })
+})
@@ -0,0 +1,246 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest'
+import { getTableName, type SQL } from 'drizzle-orm'
+import { PgDialect, type PgTable } from 'drizzle-orm/pg-core'
+
+// Select results are queued per table and taken when a query is awaited, so
+// subqueries that are only embedded in other statements consume nothing
+let tableResults = new Map<unknown, unknown[][]>()
+let executed: { sql: string; params: unknown[] }[] = []
+let clonedUserRows: unknown[] = []
+
+function createChainMock(result: () => unknown = () => []) {
+  const chain: Record<string, any> = {}
+  const methods = [
+    'select', 'where', 'leftJoin', 'innerJoin', 'orderBy', 'limit', 'for',
+    'groupBy', 'values', 'returning', 'set', 'onConflictDoUpdate',
+  ]
+  for (const method of methods) {
+    chain[method] = vi.fn().mockReturnValue(chain)
+  }
+  chain.from = vi.fn((table: unknown) => {
+    chain.table = table
+    return chain
+  })
+  chain.then = (resolve: (v: unknown) => void, reject?: (e: unknown) => void) => {
+    return Promise.resolve().then(result).then(resolve, reject)
+  }
+  return chain
+}
+
+vi.mock('@/lib/db', () => {
+  const dialect = new PgDialect()
+  const db: Record<string, any> = {
+    select: vi.fn(() => {
+      const chain = createChainMock(() => tableResults.get(chain.table)?.shift() ?? [])
+      return chain
+    }),
+    insert: vi.fn(() => createChainMock()),
+    update: vi.fn(() => createChainMock()),
+    delete: vi.fn(() => createChainMock()),
+    execute: vi.fn(async (query: SQL) => {
+      const rendered = dialect.sqlToQuery(query)
+      executed.push(rendered)
+      return rendered.sql.includes('returning id') ? clonedUserRows : []
+    }),
+  }
+  db.transaction = vi.fn((fn: (tx: unknown) => unknown) => fn(db))
+  return { db }
+})
+
+vi.mock('@/lib/analytics-rollups', () => ({
+  collectRollups: vi.fn(async () => ({ apply: vi.fn() })),
+}))
+
+import { cloneDemoData, replenishDemoPool, cleanupExpiredDemoSessions } from '@/lib/demo-clone'
+import { collectRollups } from '@/lib/analytics-rollups'
+import { db } from '@/lib/db'
+import * as schema from '@/lib/db/schema'
+
+const SEED_USERS = [
+  { id: 'seed-teacher', email: 'rivera@school.edu' },
+  { id: 'seed-student', email: 'aisha@student.edu' },
+]
+
+function remapped(column: string) {
+  return `coalesce((select m.new_id from demo_id_map m where m.old_id = t."${column}"), t."${column}")`
+}
+
+function statementFor(table: PgTable) {
+  return executed.find((q) => q.sql.trim().startsWith(`insert into "${getTableName(table)}"`))
+}
+
+// `values` passed to inserts into `table`
+function insertedInto(table: PgTable) {
+  return vi.mocked(db.insert).mock.calls.flatMap(([t], i) =>
+    t === table
+      ? (vi.mocked(db.insert).mock.results[i].value as Record<string, any>).values.mock.calls.map(
+          (call: unknown[]) => call[0]
+        )
+      : []
+  )
+}
+
+describe('demo sandboxes', () => {
+  beforeEach(() => {
+    vi.clearAllMocks()
+    executed = []
+    clonedUserRows = SEED_USERS.map(() => ({ id: 'cloned' }))
+    // The template is read once per process, on the first clone
+    tableResults = new Map([[schema.users, [SEED_USERS]]])
+  })
+
+  describe('cloneDemoData', () => {
+    it('clones a sandbox inline when the pool is empty', async () => {
+      const { email, sessionId } = await cloneDemoData('rivera@school.edu')
+
+      expect(email).toBe(`rivera.demo.${sessionId.slice(0, 8)}@school.edu`)
+      expect(insertedInto(schema.demoSessions)).toEqual([
+        expect.objectContaining({ id: sessionId, sourceEmail: 'rivera@school.edu' }),
+      ])
+      // Handing a sandbox out directly does not touch the pool lock
+      expect(executed.some((q) => q.sql.includes('pg_advisory_xact_lock'))).toBe(false)
+    })
+
+    it('builds the id map from the template and derives new ids from the session', async () => {
+      const { sessionId } = await cloneDemoData('rivera@school.edu')
+
+      expect(executed[0].sql).toContain('create temp table demo_id_map')
+      expect(executed[1].sql).toContain('insert into demo_id_map')
+      expect(executed[1].params).toEqual([sessionId, JSON.stringify(SEED_USERS.map((u) => u.id))])
+    })
+
+    it('copies users with rewritten ids, sandbox emails and the session id', async () => {
+      const { sessionId } = await cloneDemoData('rivera@school.edu')
+
+      const users = statementFor(schema.users)!
+      expect(users.sql).toContain(remapped('id'))
+      expect(users.sql).toContain(`split_part(t.email, '@', 1)`)
+      expect(users.params).toContain(sessionId)
+      expect(users.params).toContain(`.demo.${sessionId.slice(0, 8)}@`)
+    })
+
+    it('rewrites id and reference columns through the map and copies the rest', async () => {
+      await cloneDemoData('rivera@school.edu')
+
+      const submissions = statementFor(schema.submissions)!
+      expect(submissions.sql).toContain(remapped('id'))
+      expect(submissions.sql).toContain(remapped('assignment_id'))
+      expect(submissions.sql).toContain(remapped('student_id'))
+      expect(submissions.sql).toContain('t."content"')
+      expect(submissions.sql).not.toContain(remapped('content'))
+      expect(submissions.sql).toContain('where t."id" in (select old_id from demo_id_map)')
+
+      const masteryLatest = statementFor(schema.masteryLatest)!
+      expect(masteryLatest.sql).toContain('where t."student_id" in (select old_id from demo_id_map)')
+    })
+
+    it('copies tables in foreign key order', async () => {
+      await cloneDemoData('rivera@school.edu')
+
+      const position = (table: PgTable) => executed.indexOf(statementFor(table)!)
+      const order = [
+        schema.users,
+        schema.classes,
+        schema.classMembers,
+        schema.rubrics,
+        schema.rubricCriteria,
+        schema.assignments,
+        schema.submissions,
+        schema.feedbackDrafts,
+        schema.criterionScores,
+        schema.tutorSessions,
+        schema.tutorMessages,
+      ].map(position)
+
+      expect(order.every((p) => p >= 0)).toBe(true)
+      expect(order).toEqual([...order].sort((a, b) => a - b))
+    })
+  })
+
+  describe('replenishDemoPool', () => {
+    it('does nothing when the pool is full', async () => {
+      tableResults.set(schema.demoSessions, [[{ count: 3 }]])
+
+      expect(await replenishDemoPool()).toBe(0)
+      expect(db.transaction).not.toHaveBeenCalled()
+    })
+
+    it('provisions each missing sandbox under the pool lock', async () => {
+      // Unlocked count, then the recount under the lock before each sandbox
+      tableResults.set(schema.demoSessions, [[{ count: 1 }], [{ count: 1 }], [{ count: 2 }]])
+
+      expect(await replenishDemoPool()).toBe(2)
+
+      const locks = executed.filter((q) => q.sql.includes('pg_advisory_xact_lock'))
+      expect(locks).toHaveLength(2)
+      expect(insertedInto(schema.demoSessions)).toEqual([
+        expect.objectContaining({ sourceEmail: null }),
+        expect.objectContaining({ sourceEmail: null }),
+      ])
+    })
+
+    it('stops when another process filled the pool first', async () => {
+      tableResults.set(schema.demoSessions, [[{ count: 2 }], [{ count: 3 }]])
+
+      expect(await replenishDemoPool()).toBe(0)
+      expect(insertedInto(schema.demoSessions)).toEqual([])
+      expect(executed.some((q) => q.sql.includes('demo_id_map'))).toBe(false)
+    })
+
+    it('shares one refill between concurrent calls in a process', async () => {
+      tableResults.set(schema.demoSessions, [[{ count: 3 }]])
+
+      const [first, second] = await Promise.all([replenishDemoPool(), replenishDemoPool()])
+
+      expect(first).toBe(0)
+      expect(second).toBe(0)
+      expect(db.select).toHaveBeenCalledTimes(1)
+    })
+  })
+
+  describe('cleanupExpiredDemoSessions', () => {
+    it('deletes expired sandboxes in batches of 20', async () => {
+      const firstBatch = Array.from({ length: 20 }, (_, i) => ({ id: `demo-${i}` }))
+      tableResults.set(schema.demoSessions, [firstBatch, [{ id: 'demo-20' }], []])
+
+      expect(await cleanupExpiredDemoSessions()).toBe(21)
+
+      expect(db.transaction).toHaveBeenCalledTimes(2)
+      expect(collectRollups).toHaveBeenNthCalledWith(
+        1,
+        { demoSessionIds: firstBatch.map((s) => s.id), sign: -1 },
+        db
+      )
+      expect(collectRollups).toHaveBeenNthCalledWith(2, { demoSessionIds: ['demo-20'], sign: -1 }, db)
+    })
+
+    it('deletes each table once per batch, children before parents', async () => {
+      tableResults.set(schema.demoSessions, [[{ id: 'demo-1' }], []])
+      tableResults.set(schema.classMembers, [[{ classId: 'class-1' }]])
+
+      await cleanupExpiredDemoSessions()
+
+      const deleted = vi.mocked(db.delete).mock.calls.map(([table]) => getTableName(table as PgTable))
+      expect(new Set(deleted).size).toBe(deleted.length)
+
+      const before = (child: PgTable, parent: PgTable) =>
+        expect(deleted.indexOf(getTableName(child))).toBeLessThan(deleted.indexOf(getTableName(parent)))
+      before(schema.criterionScores, schema.submissions)
+      before(schema.feedbackDrafts, schema.submissions)
+      before(schema.submissions, schema.assignments)
+      before(schema.rubricCriteria, schema.rubrics)
+      before(schema.classStandards, schema.classes)
+      before(schema.classMembers, schema.classes)
+      before(schema.tutorSessions, schema.users)
+      before(schema.users, schema.demoSessions)
+      expect(deleted.at(-1)).toBe('demo_sessions')
+    })
+
+    it('returns zero when nothing has expired', async () => {
+      tableResults.set(schema.demoSessions, [[]])
+
+      expect(await cleanupExpiredDemoSessions()).toBe(0)
+      expect(db.transaction).not.toHaveBeenCalled()
+    })
+  })
+})
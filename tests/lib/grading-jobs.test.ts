@@ -0,0 +1,241 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest'
+
+function createChainMock(result: unknown = []) {
+  const chain: Record<string, any> = {}
+  const methods = [
+    'select', 'from', 'leftJoin', 'innerJoin', 'where',
+    'orderBy', 'limit', 'insert', 'values', 'returning',
+    'update', 'set', 'delete', 'groupBy',
+  ]
+  for (const method of methods) {
+    chain[method] = vi.fn().mockReturnValue(chain)
+  }
+  chain.then = (resolve: (v: unknown) => void, reject?: (e: unknown) => void) => {
+    return Promise.resolve(result).then(resolve, reject)
+  }
+  return chain
+}
+
+let selectCallIndex = 0
+let selectResults: unknown[][] = [[]]
+let updateResults: unknown[][] = []
+let insertResults: unknown[][] = []
+
+vi.mock('@/lib/db', () => {
+  const db: Record<string, any> = {
+    select: vi.fn(() => {
+      const result = selectResults[selectCallIndex] ?? []
+      selectCallIndex++
+      return createChainMock(result)
+    }),
+    insert: vi.fn(() => createChainMock(insertResults.shift() ?? [])),
+    update: vi.fn(() => createChainMock(updateResults.shift() ?? [])),
+    delete: vi.fn(() => createChainMock([])),
+  }
+  db.transaction = vi.fn((fn: (tx: unknown) => unknown) => fn(db))
+  return { db }
+})
+
+vi.mock('@/lib/ai/grade-submission', () => ({
+  batchGradeSubmissions: vi.fn(),
+}))
+
+vi.mock('@/lib/grading-helpers', () => ({
+  buildRubricInput: vi.fn(() => ({ rubric: {}, assignment: {} })),
+  persistGradingResult: vi.fn(),
+}))
+
+vi.mock('@/lib/mastery-ingest', () => ({
+  ingestMasteryScores: vi.fn(),
+  criterionStandardMap: vi.fn(() => new Map()),
+}))
+
+import { createGradingJob, startGradingJob, getGradingJobProgress } from '@/lib/grading-jobs'
+import { batchGradeSubmissions } from '@/lib/ai/grade-submission'
+import { db } from '@/lib/db'
+
+const MINUTE = 60 * 1000
+
+// Every `.set(...)` passed to db.update, in call order
+function updateSets() {
+  return vi.mocked(db.update).mock.results.flatMap((r) =>
+    (r.value as Record<string, any>).set.mock.calls.map((call: unknown[]) => call[0])
+  )
+}
+
+function flush() {
+  return new Promise((resolve) => setTimeout(resolve, 0))
+}
+
+describe('grading jobs', () => {
+  beforeEach(() => {
+    vi.clearAllMocks()
+    selectCallIndex = 0
+    selectResults = [[]]
+    updateResults = []
+    insertResults = []
+    vi.spyOn(console, 'error').mockImplementation(() => {})
+  })
+
+  afterEach(() => {
+    vi.useRealTimers()
+    vi.restoreAllMocks()
+  })
+
+  describe('createGradingJob', () => {
+    it('creates items only for the submissions it claimed', async () => {
+      // sub-2 was claimed by an overlapping request
+      updateResults = [[{ id: 'sub-1' }]]
+      insertResults = [[{ id: 'job-1', total: 1 }], []]
+
+      const job = await createGradingJob({
+        assignmentId: 'a1',
+        teacherId: 'teacher-001',
+        submissionIds: ['sub-1', 'sub-2'],
+      })
+
+      expect(job).toEqual({ id: 'job-1', total: 1 })
+      expect(updateSets()).toEqual([{ status: 'grading' }])
+
+      const [jobInsert, itemsInsert] = vi.mocked(db.insert).mock.results.map(
+        (r) => r.value as Record<string, any>
+      )
+      expect(jobInsert.values).toHaveBeenCalledWith(expect.objectContaining({ total: 1 }))
+      expect(itemsInsert.values).toHaveBeenCalledWith([{ jobId: 'job-1', submissionId: 'sub-1' }])
+    })
+
+    it('returns null without creating a job when nothing could be claimed', async () => {
+      updateResults = [[]]
+
+      const job = await createGradingJob({
+        assignmentId: 'a1',
+        teacherId: 'teacher-001',
+        submissionIds: ['sub-1'],
+      })
+
+      expect(job).toBeNull()
+      expect(db.insert).not.toHaveBeenCalled()
+    })
+  })
+
+  describe('startGradingJob', () => {
+    it('writes a heartbeat on a timer while the job runs and stops when it finishes', async () => {
+      vi.useFakeTimers()
+      let finishGrading!: () => void
+      vi.mocked(batchGradeSubmissions).mockReturnValue(
+        new Promise((resolve) => {
+          finishGrading = () => resolve([])
+        })
+      )
+
+      // select call order: job, assignment, rubric, criteria, pending items,
+      // graded items awaiting mastery
+      selectResults = [
+        [{ id: 'job-beat', assignmentId: 'a1', teacherId: 'teacher-001', status: 'queued', options: '{}' }],
+        [{ id: 'a1', rubricId: 'r1' }],
+        [{ id: 'r1' }],
+        [],
+        [{ submissionId: 'sub-1', content: 'essay' }],
+        [],
+      ]
+
+      startGradingJob('job-beat')
+      await vi.waitFor(() => {
+        expect(batchGradeSubmissions).toHaveBeenCalled()
+      })
+
+      const heartbeats = () => updateSets().filter((set) => Object.keys(set).join() === 'heartbeatAt')
+      expect(heartbeats()).toHaveLength(0)
+
+      await vi.advanceTimersByTimeAsync(30 * 1000)
+      expect(heartbeats()).toHaveLength(1)
+      await vi.advanceTimersByTimeAsync(30 * 1000)
+      expect(heartbeats()).toHaveLength(2)
+
+      finishGrading()
+      await vi.waitFor(() => {
+        expect(updateSets()).toContainEqual(expect.objectContaining({ status: 'completed' }))
+      })
+
+      await vi.advanceTimersByTimeAsync(2 * MINUTE)
+      expect(heartbeats()).toHaveLength(2)
+    })
+
+    it('fails the job and releases its pending submissions when the run throws', async () => {
+      selectResults = [
+        [{ id: 'job-fail', assignmentId: 'a1', teacherId: 'teacher-001', status: 'queued', options: '{}' }],
+        [{ id: 'a1', rubricId: null }],
+      ]
+
+      startGradingJob('job-fail')
+      await vi.waitFor(() => {
+        expect(updateSets()).toContainEqual({ status: 'failed', error: 'Assignment a1 has no rubric' })
+      })
+
+      expect(db.transaction).toHaveBeenCalledTimes(1)
+      expect(updateSets()).toContainEqual({ status: 'submitted' })
+      expect(updateSets()).toContainEqual(
+        expect.objectContaining({ status: 'failed', error: 'Assignment a1 has no rubric' })
+      )
+      expect(batchGradeSubmissions).not.toHaveBeenCalled()
+    })
+  })
+
+  describe('getGradingJobProgress', () => {
+    function staleJob(id: string) {
+      return {
+        id,
+        assignmentId: 'a1',
+        teacherId: 'teacher-001',
+        status: 'running',
+        total: 2,
+        error: null,
+        completedAt: null,
+        createdAt: new Date(Date.now() - 10 * MINUTE),
+        heartbeatAt: new Date(Date.now() - 5 * MINUTE),
+      }
+    }
+
+    it('reports item counts by status', async () => {
+      selectResults = [
+        [{ ...staleJob('job-counts'), heartbeatAt: new Date() }],
+        [{ status: 'graded', count: 1 }, { status: 'pending', count: 1 }],
+      ]
+
+      const progress = await getGradingJobProgress('job-counts', 'teacher-001')
+
+      expect(progress).toMatchObject({ total: 2, graded: 1, failed: 0, pending: 1 })
+      expect(db.update).not.toHaveBeenCalled()
+    })
+
+    it('resumes a stale job after claiming it', async () => {
+      selectResults = [[staleJob('job-stale')], []]
+      updateResults = [[{ id: 'job-stale' }]]
+
+      await getGradingJobProgress('job-stale', 'teacher-001')
+
+      expect(updateSets()[0]).toEqual({ heartbeatAt: expect.any(Date) })
+      // The resumed run starts by reading the job
+      await vi.waitFor(() => {
+        expect(db.select).toHaveBeenCalledTimes(3)
+      })
+    })
+
+    it('leaves a stale job alone when another process claimed it first', async () => {
+      selectResults = [[staleJob('job-taken')], []]
+      updateResults = [[]]
+
+      await getGradingJobProgress('job-taken', 'teacher-001')
+      await flush()
+
+      expect(db.update).toHaveBeenCalledTimes(1)
+      expect(db.select).toHaveBeenCalledTimes(2)
+    })
+
+    it('returns null for a job that belongs to another teacher', async () => {
+      selectResults = [[]]
+
+      expect(await getGradingJobProgress('job-other', 'teacher-002')).toBeNull()
+    })
+  })
+})
@@ -0,0 +1,206 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest'
+import type Anthropic from '@anthropic-ai/sdk'
+
+function createChainMock(result: unknown = []) {
+  const chain: Record<string, any> = {}
+  const methods = [
+    'select', 'from', 'where', 'insert', 'values', 'returning',
+    'delete', 'onConflictDoUpdate',
+  ]
+  for (const method of methods) {
+    chain[method] = vi.fn().mockReturnValue(chain)
+  }
+  chain.then = (resolve: (v: unknown) => void, reject?: (e: unknown) => void) => {
+    return Promise.resolve(result).then(resolve, reject)
+  }
+  return chain
+}
+
+vi.mock('@/lib/db', () => ({
+  db: {
+    select: vi.fn(() => createChainMock([])),
+    insert: vi.fn(() => createChainMock([])),
+    delete: vi.fn(() => createChainMock([])),
+    execute: vi.fn(() => Promise.resolve([])),
+  },
+}))
+
+vi.mock('@/lib/ai', () => ({
+  anthropic: {
+    messages: {
+      create: vi.fn(),
+    },
+  },
+}))
+
+import {
+  memoizationKey,
+  createMemoizedMessage,
+  getMemoizationStats,
+} from '@/lib/ai/memoize'
+import { anthropic } from '@/lib/ai'
+import { db } from '@/lib/db'
+
+let seq = 0
+
+// The in-process cache outlives each test, so every test sends its own request
+function uniqueParams(): Anthropic.MessageCreateParamsNonStreaming {
+  return {
+    model: 'claude-sonnet-4-5',
+    max_tokens: 1024,
+    messages: [{ role: 'user', content: `request ${++seq}` }],
+  }
+}
+
+function message(text: string, overrides: Partial<Anthropic.Message> = {}): Anthropic.Message {
+  return {
+    id: `msg-${text.length}`,
+    type: 'message',
+    role: 'assistant',
+    model: 'claude-sonnet-4-5',
+    content: [{ type: 'text', text, citations: null }],
+    stop_reason: 'end_turn',
+    stop_sequence: null,
+    usage: { input_tokens: 10, output_tokens: 10 },
+    ...overrides,
+  } as Anthropic.Message
+}
+
+// Values passed to the cache_entries upsert
+function storedRows() {
+  return vi.mocked(db.insert).mock.results.map(
+    (r) => (r.value as Record<string, any>).values.mock.calls[0][0]
+  )
+}
+
+describe('AI memoization', () => {
+  beforeEach(() => {
+    vi.clearAllMocks()
+    delete process.env.AI_MEMOIZATION
+  })
+
+  afterEach(() => {
+    delete process.env.AI_MEMOIZATION
+  })
+
+  describe('memoizationKey', () => {
+    it('is a stable hash of the module and the full request', () => {
+      const params = uniqueParams()
+      const key = memoizationKey('rubric', params)
+
+      expect(key).toMatch(/^ai:rubric:[0-9a-f]{64}$/)
+      expect(memoizationKey('rubric', structuredClone(params))).toBe(key)
+    })
+
+    it('differs when any part of the request changes', () => {
+      const params = uniqueParams()
+      const key = memoizationKey('rubric', params)
+
+      expect(memoizationKey('quiz', params)).not.toBe(key)
+      expect(memoizationKey('rubric', { ...params, system: 'Be brief.' })).not.toBe(key)
+      expect(memoizationKey('rubric', { ...params, max_tokens: 2048 })).not.toBe(key)
+    })
+  })
+
+  describe('createMemoizedMessage', () => {
+    it('calls the API once for identical requests and stores the result under the ai tags', async () => {
+      const params = uniqueParams()
+      vi.mocked(anthropic.messages.create).mockResolvedValue(message('rubric') as any)
+
+      const first = await createMemoizedMessage('rubric-repeat', params)
+      const second = await createMemoizedMessage('rubric-repeat', structuredClone(params))
+
+      expect(second).toEqual(first)
+      expect(anthropic.messages.create).toHaveBeenCalledTimes(1)
+      expect(storedRows()).toEqual([
+        expect.objectContaining({
+          key: memoizationKey('rubric-repeat', params),
+          tags: ['ai', 'ai:rubric-repeat'],
+        }),
+      ])
+    })
+
+    it('calls the API for a fresh request and stores the new result in place of the old one', async () => {
+      const params = uniqueParams()
+      vi.mocked(anthropic.messages.create)
+        .mockResolvedValueOnce(message('first version') as any)
+        .mockResolvedValueOnce(message('second version') as any)
+
+      await createMemoizedMessage('lesson-fresh', params)
+      const regenerated = await createMemoizedMessage('lesson-fresh', params, { fresh: true })
+      const replayed = await createMemoizedMessage('lesson-fresh', params)
+
+      expect(anthropic.messages.create).toHaveBeenCalledTimes(2)
+      expect(regenerated.content).toEqual(message('second version').content)
+      expect(replayed.content).toEqual(message('second version').content)
+      expect(getMemoizationStats()['lesson-fresh']).toMatchObject({ hits: 1, misses: 1, bypassed: 1 })
+    })
+
+    it('does not store responses over 256 KB', async () => {
+      const params = uniqueParams()
+      vi.mocked(anthropic.messages.create).mockResolvedValue(
+        message('x'.repeat(300 * 1024)) as any
+      )
+
+      await createMemoizedMessage('digest-large', params)
+      await createMemoizedMessage('digest-large', params)
+      await createMemoizedMessage('digest-large', params, { fresh: true })
+
+      expect(anthropic.messages.create).toHaveBeenCalledTimes(3)
+      expect(db.insert).not.toHaveBeenCalled()
+    })
+
+    it('does not store truncated responses', async () => {
+      const params = uniqueParams()
+      vi.mocked(anthropic.messages.create).mockResolvedValue(
+        message('cut off', { stop_reason: 'max_tokens' }) as any
+      )
+
+      await createMemoizedMessage('quiz-truncated', params)
+
+      expect(db.insert).not.toHaveBeenCalled()
+    })
+
+    it('bypasses the cache entirely when AI_MEMOIZATION is off', async () => {
+      process.env.AI_MEMOIZATION = 'off'
+      const params = uniqueParams()
+      vi.mocked(anthropic.messages.create).mockResolvedValue(message('uncached') as any)
+
+      await createMemoizedMessage('translate-off', params)
+      await createMemoizedMessage('translate-off', params)
+
+      expect(anthropic.messages.create).toHaveBeenCalledTimes(2)
+      expect(db.insert).not.toHaveBeenCalled()
+      expect(getMemoizationStats()['translate-off']).toBeUndefined()
+    })
+
+    it('trims the memo store once every 50 writes', async () => {
+      vi.mocked(anthropic.messages.create).mockResolvedValue(message('entry') as any)
+
+      // Earlier tests have counted fewer than 50 writes, so exactly one trim
+      // falls inside these 50
+      for (let i = 0; i < 50; i++) {
+        await createMemoizedMessage('trim', uniqueParams())
+      }
+
+      expect(db.execute).toHaveBeenCalledTimes(1)
+    })
+  })
+
+  describe('getMemoizationStats', () => {
+    it('reports hits, misses and hit rate per module', async () => {
+      const rubricParams = uniqueParams()
+      const quizParams = uniqueParams()
+      vi.mocked(anthropic.messages.create).mockResolvedValue(message('stats') as any)
+
+      await createMemoizedMessage('stats-rubric', rubricParams)
+      await createMemoizedMessage('stats-rubric', rubricParams)
+      await createMemoizedMessage('stats-rubric', rubricParams)
+      await createMemoizedMessage('stats-quiz', quizParams)
+
+      const stats = getMemoizationStats()
+      expect(stats['stats-rubric']).toEqual({ hits: 2, misses: 1, bypassed: 0, hitRate: 2 / 3 })
+      expect(stats['stats-quiz']).toEqual({ hits: 0, misses: 1, bypassed: 0, hitRate: 0 })
+    })
+  })
+})
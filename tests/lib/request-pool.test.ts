@@ -0,0 +1,212 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest'
+import Anthropic from '@anthropic-ai/sdk'
+import { AIRateLimiter, withRetry, runWithConcurrency } from '@/lib/ai/request-pool'
+
+function apiError(status: number, headers?: Record<string, string>) {
+  return new Anthropic.APIError(status, undefined, `status ${status}`, new Headers(headers))
+}
+
+function deferred<T>() {
+  let resolve!: (value: T) => void
+  const promise = new Promise<T>((r) => {
+    resolve = r
+  })
+  return { promise, resolve }
+}
+
+// Resolves to whether `promise` has settled, without waiting for it
+async function isSettled(promise: Promise<unknown>) {
+  let settled = false
+  promise.then(() => (settled = true), () => (settled = true))
+  await vi.advanceTimersByTimeAsync(0)
+  return settled
+}
+
+describe('AIRateLimiter', () => {
+  beforeEach(() => {
+    vi.useFakeTimers()
+  })
+
+  afterEach(() => {
+    vi.useRealTimers()
+  })
+
+  it('grants requests within the per-minute budget immediately', async () => {
+    const limiter = new AIRateLimiter({ requestsPerMinute: 2, inputTokensPerMinute: 1000 })
+
+    expect(await isSettled(limiter.acquire(100))).toBe(true)
+    expect(await isSettled(limiter.acquire(100))).toBe(true)
+  })
+
+  it('waits for the request budget to refill', async () => {
+    const limiter = new AIRateLimiter({ requestsPerMinute: 2, inputTokensPerMinute: 1000 })
+    await limiter.acquire(1)
+    await limiter.acquire(1)
+
+    const third = limiter.acquire(1)
+    await vi.advanceTimersByTimeAsync(29_000)
+    expect(await isSettled(third)).toBe(false)
+
+    // One request refills every 30 seconds at 2 per minute
+    await vi.advanceTimersByTimeAsync(1_000)
+    expect(await isSettled(third)).toBe(true)
+  })
+
+  it('holds every acquirer until a pause has passed', async () => {
+    const limiter = new AIRateLimiter({ requestsPerMinute: 100, inputTokensPerMinute: 10_000 })
+    limiter.pause(5_000)
+
+    const acquired = limiter.acquire(1)
+    await vi.advanceTimersByTimeAsync(4_999)
+    expect(await isSettled(acquired)).toBe(false)
+
+    await vi.advanceTimersByTimeAsync(1)
+    expect(await isSettled(acquired)).toBe(true)
+  })
+
+  it('refunds unused tokens when a reservation is settled', async () => {
+    const limiter = new AIRateLimiter({ requestsPerMinute: 100, inputTokensPerMinute: 1000 })
+    await limiter.acquire(1000)
+
+    // Most of the prompt was a cache read, which does not count
+    limiter.settle(1000, 100)
+
+    expect(await isSettled(limiter.acquire(800))).toBe(true)
+  })
+
+  it('caps a reservation at the per-minute token limit', async () => {
+    const limiter = new AIRateLimiter({ requestsPerMinute: 100, inputTokensPerMinute: 1000 })
+
+    expect(await isSettled(limiter.acquire(50_000))).toBe(true)
+  })
+})
+
+describe('withRetry', () => {
+  beforeEach(() => {
+    vi.useFakeTimers()
+    // No jitter: each delay is half the exponential backoff
+    vi.spyOn(Math, 'random').mockReturnValue(0)
+  })
+
+  afterEach(() => {
+    vi.useRealTimers()
+    vi.restoreAllMocks()
+  })
+
+  it('retries server errors with exponential backoff', async () => {
+    const fn = vi.fn()
+      .mockRejectedValueOnce(apiError(500))
+      .mockRejectedValueOnce(apiError(529))
+      .mockResolvedValue('ok')
+
+    const result = withRetry(fn, { baseDelayMs: 100 })
+    await vi.advanceTimersByTimeAsync(49)
+    expect(fn).toHaveBeenCalledTimes(1)
+
+    await vi.advanceTimersByTimeAsync(1)
+    expect(fn).toHaveBeenCalledTimes(2)
+
+    await vi.advanceTimersByTimeAsync(99)
+    expect(fn).toHaveBeenCalledTimes(2)
+
+    await vi.advanceTimersByTimeAsync(1)
+    expect(await result).toBe('ok')
+    expect(fn).toHaveBeenCalledTimes(3)
+  })
+
+  it('waits for Retry-After and pauses the shared limiter on 429', async () => {
+    const limiter = new AIRateLimiter({ requestsPerMinute: 100, inputTokensPerMinute: 10_000 })
+    const pause = vi.spyOn(limiter, 'pause')
+    const fn = vi.fn()
+      .mockRejectedValueOnce(apiError(429, { 'retry-after': '2' }))
+      .mockResolvedValue('ok')
+
+    const result = withRetry(fn, { baseDelayMs: 100, limiter })
+    await vi.advanceTimersByTimeAsync(1_999)
+    expect(fn).toHaveBeenCalledTimes(1)
+    expect(pause).toHaveBeenCalledWith(2_000)
+
+    await vi.advanceTimersByTimeAsync(1)
+    expect(await result).toBe('ok')
+  })
+
+  it('does not retry client errors', async () => {
+    const error = apiError(400)
+    const fn = vi.fn().mockRejectedValue(error)
+
+    await expect(withRetry(fn)).rejects.toBe(error)
+    expect(fn).toHaveBeenCalledTimes(1)
+  })
+
+  it('gives up after maxAttempts', async () => {
+    const fn = vi.fn().mockRejectedValue(apiError(503))
+
+    const result = expect(withRetry(fn, { maxAttempts: 3, baseDelayMs: 100 })).rejects.toThrow()
+    await vi.advanceTimersByTimeAsync(1_000)
+    await result
+    expect(fn).toHaveBeenCalledTimes(3)
+  })
+
+  it('limits retries after timeouts to maxTimeoutRetries', async () => {
+    const fn = vi.fn().mockRejectedValue(new Anthropic.APIConnectionTimeoutError())
+
+    const result = expect(
+      withRetry(fn, { maxAttempts: 5, maxTimeoutRetries: 1, baseDelayMs: 100 })
+    ).rejects.toBeInstanceOf(Anthropic.APIConnectionTimeoutError)
+    await vi.advanceTimersByTimeAsync(1_000)
+    await result
+    expect(fn).toHaveBeenCalledTimes(2)
+  })
+})
+
+describe('runWithConcurrency', () => {
+  it('returns results in input order', async () => {
+    const delays = [30, 10, 20, 0]
+    const results = await runWithConcurrency(delays, 2, async (ms, index) => {
+      await new Promise((resolve) => setTimeout(resolve, ms))
+      return index
+    })
+
+    expect(results).toEqual([0, 1, 2, 3])
+  })
+
+  it('keeps at most `concurrency` workers in flight', async () => {
+    let active = 0
+    let maxActive = 0
+
+    await runWithConcurrency(Array.from({ length: 10 }, (_, i) => i), 3, async () => {
+      active++
+      maxActive = Math.max(maxActive, active)
+      await new Promise((resolve) => setTimeout(resolve, 1))
+      active--
+    })
+
+    expect(maxActive).toBe(3)
+  })
+
+  it('stops starting items after a failure and rethrows once in-flight work drains', async () => {
+    const slow = deferred<string>()
+    const started: number[] = []
+    let slowFinished = false
+
+    const run = runWithConcurrency([0, 1, 2, 3], 2, async (item) => {
+      started.push(item)
+      if (item === 0) {
+        const value = await slow.promise
+        slowFinished = true
+        return value
+      }
+      throw new Error(`item ${item} failed`)
+    })
+    const outcome = run.catch((error: Error) => error)
+
+    await new Promise((resolve) => setTimeout(resolve, 0))
+    slow.resolve('done')
+
+    const error = await outcome
+    expect(error).toBeInstanceOf(Error)
+    expect((error as Error).message).toBe('item 1 failed')
+    expect(started).toEqual([0, 1])
+    expect(slowFinished).toBe(true)
+  })
+})